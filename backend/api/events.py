@@ -22,8 +22,8 @@ from fastapi.responses import Response
 router = APIRouter(prefix="/api/events", tags=["events"])
 
 
-# Import WebSocket manager from websocket module
-from backend.api.websocket import manager
+# Event notices are coalesced and delivered to WebSocket clients off the request path
+from backend.notifications.event_stream import get_event_stream
 
 
 @router.post("/upload")
@@ -116,7 +116,7 @@ async def create_event(
     )
     
     # Trigger pattern analysis (simplified)
-    await manager.broadcast(f"Event created: {event.event_type}")
+    get_event_stream().publish(str(current_user.id), event.event_type)
     
     return db_event
 
@@ -150,7 +150,7 @@ async def create_events_batch(
     
     created_events = process_event_batch(db, str(current_user.id), event_dicts)
     
-    await manager.broadcast(f"Batch: {len(created_events)} events created")
+    get_event_stream().publish(str(current_user.id), count=len(created_events))
     
     return created_events
 
@@ -1,7 +1,7 @@
 """
 Telemetry ingestion API endpoint.
 
-Handles telemetry event ingestion with validation, rate limiting, and pattern detection triggering.
+Handles telemetry event ingestion with validation and rate limiting.
 """
 
 from datetime import datetime
@@ -17,12 +17,6 @@ from backend.logging_config import get_logger
 from backend.services.event_service import EventService
 from backend.monitoring.performance import measure_query
 from database.models import User, Event
-try:
-    from backend.jobs.pattern_detection import trigger_pattern_detection
-    PATTERN_DETECTION_AVAILABLE = True
-except ImportError:
-    PATTERN_DETECTION_AVAILABLE = False
-    logger.warning("Pattern detection job not available")
 
 logger = get_logger(__name__)
 
@@ -80,8 +74,8 @@ async def ingest_telemetry(
     """
     Ingest telemetry event.
     
-    Accepts telemetry events from clients, validates them, stores in database,
-    and triggers pattern detection if needed.
+    Accepts telemetry events from clients, validates them, and stores them in
+    the database for the periodic pattern detection job.
     
     Rate limited to prevent abuse.
     """
@@ -114,15 +108,9 @@ async def ingest_telemetry(
             f"path={event.path}, event_id={db_event.id}"
         )
         
-        # Trigger pattern detection asynchronously (don't wait)
-        # This ensures patterns are detected within 1 hour as per sprint requirements
-        if PATTERN_DETECTION_AVAILABLE:
-            try:
-                # Trigger pattern detection job (runs in background)
-                trigger_pattern_detection.delay(user_id=user_id, hours_back=1)
-            except Exception as e:
-                # Don't fail the request if pattern detection trigger fails
-                logger.warning(f"Failed to trigger pattern detection: {e}")
+        # Pattern detection picks new events up from the periodic
+        # process_events task (celery beat "detect-patterns"), so ingestion
+        # never publishes a job per event.
         
         return TelemetryEventResponse(
             ok=True,
@@ -1,39 +1,48 @@
 """WebSocket endpoints for real-time updates."""
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+from typing import List, Optional
+
+from backend.notifications.fanout import NotificationFanout, get_notification_fanout
 
 router = APIRouter(tags=["websocket"])
 
 
 class ConnectionManager:
-    """WebSocket connection manager for real-time updates."""
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """WebSocket connection manager for real-time updates.
+
+    Delivery goes through a NotificationFanout, so broadcasts only enqueue
+    messages, slow clients are dropped, and clients connected to other API
+    workers receive them too.
+    """
+    def __init__(self, fanout: Optional[NotificationFanout] = None):
+        self.fanout = fanout or get_notification_fanout("updates")
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        """WebSockets connected to this worker."""
+        return self.fanout.websockets
+
+    async def connect(self, websocket: WebSocket, user_id: Optional[str] = None):
         """Accept a WebSocket connection."""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        await self.fanout.register(websocket, user_id)
 
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.fanout.unregister(websocket)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send a message to a specific WebSocket connection."""
         await websocket.send_text(message)
 
+    async def send_to_user(self, user_id: str, message: str):
+        """Send a message to every connection of a user, on any worker."""
+        await self.fanout.publish(str(user_id), message)
+
     async def broadcast(self, message: str):
         """Broadcast a message to all connected clients."""
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                # Remove disconnected connections
-                if connection in self.active_connections:
-                    self.active_connections.remove(connection)
+        await self.fanout.broadcast(message)
 
 
 # Global WebSocket manager instance
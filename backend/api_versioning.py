@@ -6,6 +6,8 @@ Provides version management, deprecation warnings, and version-specific routing.
 
 from typing import Optional, Dict, Any
 from fastapi import Request, Header
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from datetime import datetime, timedelta
 import logging
 
@@ -40,7 +42,7 @@ def get_api_version(request: Request) -> str:
     
     Args:
         request: FastAPI request object
-        
+    
     Returns:
         str: API version (e.g., "v1")
     """
@@ -74,7 +76,7 @@ def check_version_deprecation(version: str) -> Optional[Dict[str, Any]]:
     
     Args:
         version: API version to check
-        
+    
     Returns:
         Optional[Dict[str, Any]]: Deprecation warning if version is deprecated, None otherwise
     """
@@ -111,35 +113,53 @@ def check_version_deprecation(version: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def add_version_headers(response, version: str):
+def get_version_headers(version: str) -> Dict[str, str]:
     """
-    Add version-related headers to response.
+    Get version-related response headers.
     
     Args:
-        response: FastAPI response object
         version: API version
+    
+    Returns:
+        Dict[str, str]: Header names and values
     """
     version_info = API_VERSIONS.get(version, {})
     
-    response.headers["X-API-Version"] = version
-    response.headers["X-API-Current-Version"] = CURRENT_API_VERSION
+    headers = {
+        "X-API-Version": version,
+        "X-API-Current-Version": CURRENT_API_VERSION,
+    }
     
     if version_info.get("status") == "deprecated":
         deprecation_date = version_info.get("deprecation_date")
         sunset_date = version_info.get("sunset_date")
         
         if deprecation_date:
-            response.headers["X-API-Deprecated"] = "true"
-            response.headers["X-API-Deprecation-Date"] = deprecation_date
+            headers["X-API-Deprecated"] = "true"
+            headers["X-API-Deprecation-Date"] = deprecation_date
         
         if sunset_date:
-            response.headers["X-API-Sunset-Date"] = sunset_date
+            headers["X-API-Sunset-Date"] = sunset_date
     
     # Add deprecation warning in header
     deprecation_warning = check_version_deprecation(version)
     if deprecation_warning:
         warning_msg = f"API version {version} is deprecated. Use {CURRENT_API_VERSION} instead."
-        response.headers["Warning"] = f'299 - "{warning_msg}"'
+        headers["Warning"] = f'299 - "{warning_msg}"'
+    
+    return headers
+
+
+def add_version_headers(response, version: str):
+    """
+    Add version-related headers to response.
+    
+    Args:
+        response: FastAPI response object
+        version: API version
+    """
+    for key, value in get_version_headers(version).items():
+        response.headers[key] = value
 
 
 def get_version_info(version: Optional[str] = None) -> Dict[str, Any]:
@@ -148,7 +168,7 @@ def get_version_info(version: Optional[str] = None) -> Dict[str, Any]:
     
     Args:
         version: Specific version to get info for, or None for all versions
-        
+    
     Returns:
         Dict[str, Any]: Version information
     """
@@ -167,29 +187,38 @@ class VersionDeprecationMiddleware:
     Middleware to add deprecation warnings for deprecated API versions.
     """
     
-    async def __call__(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request and add deprecation warnings if needed.
         
         Args:
-            request: FastAPI request object
-            call_next: Next middleware/handler
-            
-        Returns:
-            Response: HTTP response with deprecation headers if applicable
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
         # Only check API endpoints
-        if not request.url.path.startswith("/api"):
-            return await call_next(request)
+        if scope["type"] != "http" or not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
         
+        request = Request(scope)
         version = get_api_version(request)
         deprecation_warning = check_version_deprecation(version)
+        version_headers = get_version_headers(version)
         
-        # Process request
-        response = await call_next(request)
+        async def send_with_version(message: Message):
+            if message["type"] == "http.response.start":
+                # Add version headers
+                headers = MutableHeaders(scope=message)
+                for key, value in version_headers.items():
+                    headers[key] = value
+            await send(message)
         
-        # Add version headers
-        add_version_headers(response, version)
+        # Process request
+        await self.app(scope, receive, send_with_version)
         
         # Log deprecation usage
         if deprecation_warning:
@@ -202,5 +231,3 @@ class VersionDeprecationMiddleware:
                     "client_ip": request.client.host if request.client else None,
                 }
             )
-        
-        return response
@@ -83,6 +83,81 @@ def set(key: str, value: Any, ttl_seconds: int = 300) -> None:
         _cleanup_expired()
 
 
+def incr(key: str, amount: int = 1, ttl_seconds: int = 300) -> int:
+    """Increment an integer in cache, starting from 0, and reset its TTL.
+    
+    Returns:
+        The new value
+    """
+    if redis_client:
+        try:
+            pipe = redis_client.pipeline()
+            pipe.incrby(key, amount)
+            pipe.expire(key, ttl_seconds)
+            value, _ = pipe.execute()
+            return int(value)
+        except Exception as e:
+            logger.warning(f"Redis incr failed: {e}, falling back to memory")
+    
+    value = 0
+    if key in _memory_cache:
+        cached_value, expiry = _memory_cache[key]
+        if datetime.utcnow() <= expiry:
+            value = cached_value
+    
+    value += amount
+    _memory_cache[key] = (value, datetime.utcnow() + timedelta(seconds=ttl_seconds))
+    return value
+
+
+# Set a key only while a guard key still holds the expected raw value
+_SET_IF_UNCHANGED_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[3] then
+    redis.call('SETEX', KEYS[1], ARGV[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+def set_if_unchanged(key: str, value: Any, ttl_seconds: int, guard_key: str, expected: Any) -> bool:
+    """Set value in cache only if ``guard_key`` still holds ``expected``.
+    
+    A reader that computes a value from the database passes the guard value
+    it read before the query; writers change the guard (e.g. with incr), so a
+    value computed concurrently with a write is not cached.
+    
+    Args:
+        key: Key to set
+        value: Value to cache
+        ttl_seconds: TTL of the cached value
+        guard_key: Key whose value must be unchanged
+        expected: Value of guard_key read before computing ``value`` (None if missing)
+    
+    Returns:
+        True if the value was cached
+    """
+    if redis_client:
+        try:
+            raw_expected = "" if expected is None else json.dumps(expected)
+            return bool(redis_client.eval(
+                _SET_IF_UNCHANGED_SCRIPT, 2, key, guard_key, json.dumps(value), ttl_seconds, raw_expected
+            ))
+        except Exception as e:
+            logger.warning(f"Redis set_if_unchanged failed: {e}, falling back to memory")
+    
+    current = None
+    if guard_key in _memory_cache:
+        guard_value, expiry = _memory_cache[guard_key]
+        if datetime.utcnow() <= expiry:
+            current = guard_value
+    if current != expected:
+        return False
+    
+    set(key, value, ttl_seconds)
+    return True
+
+
 def delete(key: str) -> None:
     """Delete key from cache."""
     if redis_client:
@@ -42,6 +42,11 @@ celery_app.conf.beat_schedule = {
         'task': 'backend.ml.training_job.schedule_retraining_task',
         'schedule': crontab(hour=2, minute=0, day_of_week=0),  # Sunday 2 AM
     },
+    # Incremental ML model updates with new data only (hourly)
+    'update-ml-models': {
+        'task': 'backend.ml.training_job.incremental_training_task',
+        'schedule': crontab(minute=30),  # Every hour at :30
+    },
     # Retention campaigns (daily)
     'send-retention-campaigns': {
         'task': 'retention_campaigns.process',
@@ -54,6 +54,30 @@ class Settings(BaseSettings):
     stripe_api_key: Optional[str] = Field(default=None, description="Stripe API key")
     stripe_webhook_secret: Optional[str] = Field(default=None, description="Stripe webhook secret")
     
+    # ML model registry
+    ml_preload_models: str = Field(default="", description="Comma-separated model types to load at startup")
+    ml_registry_check_interval: float = Field(default=30.0, description="Seconds between checks for a newer active model version")
+    ml_registry_max_memory_mb: int = Field(default=1024, description="Memory budget for loaded ML models (MB)")
+    ml_training_max_workers: int = Field(default=0, description="Worker processes for parallel model training (0 = one per CPU)")
+    ml_training_memory_limit_mb: int = Field(default=0, description="Address space limit per training worker (MB, 0 = unlimited)")
+    ml_training_cpu_limit_seconds: int = Field(default=0, description="CPU time limit per training worker (0 = unlimited)")
+    ml_training_timeout_seconds: float = Field(default=3600.0, description="Wall-clock limit per model training run")
+    ml_training_cache_dir: str = Field(default="", description="Directory for Parquet snapshots of training data (empty = disabled)")
+    ml_artifact_verify_checksums: bool = Field(default=True, description="Verify model artifact checksums on load")
+    ml_allow_pickle_artifacts: bool = Field(default=False, description="Load models saved as pickle before the artifact format (trusted files only)")
+    
+    # API responses
+    api_response_envelope: bool = Field(default=False, description="Wrap /api JSON route results in the standard response envelope")
+    
+    # WebSocket notifications
+    websocket_send_queue_size: int = Field(default=100, description="Messages buffered per WebSocket connection before a slow client is disconnected")
+    event_stream_window_ms: int = Field(default=250, description="Window in which event-created notices are coalesced per user before delivery")
+    
+    # Privacy Guardian middleware
+    guardian_async_events: bool = Field(default=True, description="Record guardian request/response events from a background consumer instead of inline")
+    guardian_sample_rate: float = Field(default=1.0, description="Fraction of requests whose guardian events are recorded (blocked requests are always recorded)")
+    guardian_route_sample_rates: str = Field(default="", description="Comma-separated path_prefix=rate overrides of the guardian sample rate")
+    
     # Celery (optional)
     celery_broker_url: Optional[str] = Field(default=None, description="Celery broker URL (Redis)")
     celery_result_backend: Optional[str] = Field(default=None, description="Celery result backend URL")
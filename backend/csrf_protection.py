@@ -10,8 +10,9 @@ Implements Double Submit Cookie pattern for CSRF protection:
 import secrets
 from typing import Optional
 from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,7 +33,7 @@ EXEMPT_PATHS = {
 }
 
 
-class CSRFProtectionMiddleware(BaseHTTPMiddleware):
+class CSRFProtectionMiddleware:
     """
     CSRF protection middleware using Double Submit Cookie pattern.
     
@@ -43,24 +44,33 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
     4. Exempts safe methods (GET, HEAD, OPTIONS) and configured paths
     """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request with CSRF protection.
         
         Args:
-            request: FastAPI request object
-            call_next: Next middleware/handler
-            
-        Returns:
-            Response: HTTP response with CSRF protection applied
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Check if path is exempted
-        if any(request.url.path.startswith(path) for path in EXEMPT_PATHS):
-            return await call_next(request)
+        if any(scope["path"].startswith(path) for path in EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
         
         # Check if method is exempted
-        if request.method in EXEMPT_METHODS:
-            return await call_next(request)
+        if scope["method"] in EXEMPT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
         
         # Get CSRF token from cookie
         csrf_token_cookie = request.cookies.get(CSRF_TOKEN_COOKIE_NAME)
@@ -101,23 +111,24 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
                     detail="CSRF token validation failed. Tokens do not match."
                 )
         
-        # Process request
-        response = await call_next(request)
-        
-        # Generate and set CSRF token if not present
-        if not csrf_token_cookie:
-            csrf_token = secrets.token_urlsafe(32)
-            response.set_cookie(
-                key=CSRF_TOKEN_COOKIE_NAME,
-                value=csrf_token,
-                httponly=True,  # HttpOnly prevents JavaScript access
-                secure=True,  # Only send over HTTPS in production
-                samesite="strict",  # Strict SameSite prevents cross-site requests
-                max_age=86400,  # 24 hours
-                path="/",
-            )
+        async def send_with_cookie(message: Message):
+            # Generate and set CSRF token if not present
+            if message["type"] == "http.response.start" and not csrf_token_cookie:
+                cookie = Response()
+                cookie.set_cookie(
+                    key=CSRF_TOKEN_COOKIE_NAME,
+                    value=secrets.token_urlsafe(32),
+                    httponly=True,  # HttpOnly prevents JavaScript access
+                    secure=True,  # Only send over HTTPS in production
+                    samesite="strict",  # Strict SameSite prevents cross-site requests
+                    max_age=86400,  # 24 hours
+                    path="/",
+                )
+                MutableHeaders(scope=message).append("set-cookie", cookie.headers["set-cookie"])
+            await send(message)
         
-        return response
+        # Process request
+        await self.app(scope, receive, send_with_cookie)
 
 
 def get_csrf_token(request: Request) -> Optional[str]:
@@ -126,7 +137,7 @@ def get_csrf_token(request: Request) -> Optional[str]:
     
     Args:
         request: FastAPI request object
-        
+    
     Returns:
         Optional[str]: CSRF token if present, None otherwise
     """
@@ -139,7 +150,7 @@ def validate_csrf_token(request: Request) -> bool:
     
     Args:
         request: FastAPI request object
-        
+    
     Returns:
         bool: True if token is valid, False otherwise
     """
@@ -81,6 +81,27 @@ def setup_signal_handlers() -> None:
     signal.signal(signal.SIGINT, signal_handler)
 
 
+def preload_ml_models() -> None:
+    """Load configured ML models into the model registry before serving."""
+    from backend.config import settings
+    
+    model_types = [m.strip() for m in settings.ml_preload_models.split(",") if m.strip()]
+    if not model_types:
+        return
+    
+    from backend.database import SessionLocal
+    from backend.ml.model_manager import ModelManager
+    
+    db = SessionLocal()
+    try:
+        ModelManager(db).preload_models(model_types)
+    except Exception as e:
+        # Models still load lazily on first use
+        logger.error(f"Error preloading ML models: {e}")
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app):
     """
@@ -114,12 +135,28 @@ async def lifespan(app):
         except Exception as e:
             logger.error(f"Error closing cache: {e}")
     
+    async def close_websockets():
+        """Flush pending event notices, then stop WebSocket writers and pub/sub listeners."""
+        from backend.notifications.event_stream import get_event_stream
+        from backend.notifications.fanout import close_notification_fanouts
+        await get_event_stream().close()
+        await close_notification_fanouts()
+    
+    async def close_ml_inference():
+        """Finish in-flight prediction batches and stop the inference threads."""
+        from backend.ml.batching import close_prediction_batcher
+        await close_prediction_batcher()
+    
+    register_async_shutdown_handler(close_websockets)
+    register_async_shutdown_handler(close_ml_inference)
     register_async_shutdown_handler(close_database)
     register_async_shutdown_handler(close_cache)
     
     # Setup signal handlers
     setup_signal_handlers()
     
+    preload_ml_models()
+    
     logger.info("Application startup complete")
     
     yield
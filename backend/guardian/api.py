@@ -217,12 +217,13 @@ async def update_trust_level(
 
 @router.get("/verify")
 async def verify_ledger(
+    full: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Verify trust ledger integrity."""
+    """Verify trust ledger integrity from the last checkpoint (or all of it if full)."""
     ledger = TrustLedger()
-    verification = ledger.verify(str(current_user.id))
+    verification = ledger.verify_incremental(str(current_user.id), db, full=full)
     
     return verification
 
@@ -1,22 +1,110 @@
-"""Trust ledger - append-only immutable log with hash chains."""
+"""Trust ledger - append-only immutable log with hash chains.
+
+Each user's chain is split into daily segment files
+(``user_<id>/<YYYY-MM-DD>.jsonl``). Every segment has a sidecar ``.idx`` file
+holding the end offset of each line, so the newest entries are read by
+seeking straight to their offsets instead of parsing the whole history. The
+Merkle root of a segment's entry hashes is its daily hash root; once a day's
+segment is sealed (a later one exists) its root, size and last hash are
+checkpointed in ``TrustLedgerRoot`` and later verifications start after it.
+
+Appends are hashed synchronously against an in-memory chain head per user
+and handed to a background writer thread, which writes whatever has queued
+up since its last pass and fsyncs each touched file once (group commit).
+Each batch is written under an exclusive ``flock`` on the ledger directory,
+and segment sizes are taken from the files themselves, so an index is never
+extended from offsets another process has already moved past.
+Readers flush pending writes first, so they always see every appended entry.
+If a write fails, the waiters on those entries are told, and the user's chain
+head is reloaded from disk so later entries chain to what was written.
+
+Because chain heads live in memory, only one ledger may write a directory at
+a time: the first append claims it with a non-blocking ``flock`` on
+``.writer.lock``, held until ``close()``, and appends from any other process
+raise ``LedgerWriteError`` instead of forking users' chains.
+
+Files from the old single-file layout (``user_<id>.jsonl``) are read as the
+oldest segment, so existing chains continue.
+"""
 
 import os
 import json
+import fcntl
+import queue
 import hashlib
+import threading
+import atexit
+from array import array
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
+from uuid import UUID
+from sqlalchemy.orm import Session
 from .events import GuardianEvent
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_BATCH = 1000
+LEGACY_SEGMENT = "legacy"
+DATE_FORMAT = "%Y-%m-%d"
+LOCK_FILE = ".ledger.lock"
+WRITER_LOCK_FILE = ".writer.lock"
+
+
+class LedgerWriteError(IOError):
+    """Raised when ledger entries could not be written to disk."""
+
+
+def merkle_root(hashes: List[str]) -> Optional[str]:
+    """Compute the Merkle root of a list of entry hashes.
+    
+    Pairs are hashed as ``sha256(left + right)`` over their hex digests; an
+    odd node at the end of a level is carried up unchanged.
+    
+    Args:
+        hashes: Entry hashes in ledger order
+    
+    Returns:
+        Hex digest of the root, or None for an empty list
+    """
+    if not hashes:
+        return None
+    
+    level = list(hashes)
+    while len(level) > 1:
+        parents = [
+            hashlib.sha256((level[i] + level[i + 1]).encode()).hexdigest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+    
+    return level[0]
+
+
+def _line_ends(data: bytes, base: int = 0) -> List[int]:
+    """Offsets just past each complete (newline-terminated) line in data."""
+    ends = []
+    pos = data.find(b'\n')
+    while pos != -1:
+        ends.append(base + pos + 1)
+        pos = data.find(b'\n', pos + 1)
+    return ends
+
 
 class TrustLedger:
     """Append-only trust ledger with cryptographic verification."""
     
-    def __init__(self, ledger_dir: Optional[Path] = None):
-        """Initialize trust ledger."""
+    def __init__(self, ledger_dir: Optional[Path] = None, fsync: bool = True, max_batch: int = DEFAULT_MAX_BATCH):
+        """Initialize trust ledger.
+        
+        Args:
+            ledger_dir: Directory holding per-user ledger segments
+            fsync: Fsync each file once per written batch
+            max_batch: Most entries the writer takes per pass
+        """
         if ledger_dir is None:
             # Use user-specific directory or fallback to default
             base_dir = Path(os.getenv("GUARDIAN_LEDGER_DIR", "/tmp/guardian/ledger"))
@@ -24,123 +112,502 @@ class TrustLedger:
         
         self.ledger_dir = Path(ledger_dir)
         self.ledger_dir.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.max_batch = max_batch
         
-        # Per-user ledger files
+        # Per-user legacy ledger files
         self.user_ledgers: Dict[str, Path] = {}
+        
+        # (segment day, hash of the newest entry) per user, including queued ones
+        self._chain_heads: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        
+        # Background writer state; entries are numbered in queue order
+        self._queue: "queue.Queue[Tuple[int, str, Path, str]]" = queue.Queue()
+        self._progress = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._writer: Optional[threading.Thread] = None
+        # Open .writer.lock while this ledger owns the directory
+        self._writer_lock = None
+        # Failed entry number -> error, until reported to a waiter
+        self._failed: Dict[int, str] = {}
+        # User -> newest entry number chained to a failed write
+        self._broken_chains: Dict[str, int] = {}
+        # Size of each segment as last written by this process, touched only
+        # by the writer; checked against the file under the directory lock
+        self._segment_sizes: Dict[Path, int] = {}
+        self.stats = {"entries_written": 0, "batches": 0, "fsyncs": 0, "write_errors": 0}
     
     def _get_ledger_file(self, user_id: str) -> Path:
-        """Get ledger file path for user."""
+        """Get legacy single-file ledger path for user."""
         if user_id not in self.user_ledgers:
             ledger_file = self.ledger_dir / f"user_{user_id}.jsonl"
             self.user_ledgers[user_id] = ledger_file
         
         return self.user_ledgers[user_id]
     
-    def append(self, event: GuardianEvent) -> str:
-        """Append event to ledger and return hash."""
-        ledger_file = self._get_ledger_file(event.user_id or "anonymous")
+    def _segment_file(self, user_id: str, day: str) -> Path:
+        """Get segment file path for a user and day."""
+        return self.ledger_dir / f"user_{user_id}" / f"{day}.jsonl"
+    
+    def _segments(self, user_id: str) -> List[Tuple[str, Path]]:
+        """List a user's segments as (day, path), oldest first."""
+        segments = []
         
-        # Read existing entries to get previous hash
-        previous_hash = self._get_last_hash(ledger_file)
+        legacy_file = self._get_ledger_file(user_id)
+        if legacy_file.exists():
+            segments.append((LEGACY_SEGMENT, legacy_file))
         
-        # Create entry with hash chain
-        entry_data = event.to_dict()
-        entry_data["previous_hash"] = previous_hash
+        user_dir = self.ledger_dir / f"user_{user_id}"
+        if user_dir.is_dir():
+            segments.extend((path.stem, path) for path in sorted(user_dir.glob("*.jsonl")))
+        
+        return segments
+    
+    @staticmethod
+    def _index_file(segment: Path) -> Path:
+        return segment.with_suffix(".idx")
+    
+    def _read_index(self, segment: Path) -> array:
+        """Get the end offset of every complete line in a segment.
+        
+        The sidecar index is trusted up to the current file size; lines past
+        the indexed range (an interrupted index write, or a legacy file with
+        no index) are found by scanning only that tail.
+        """
+        ends = array('Q')
+        if not segment.exists():
+            return ends
+        
+        size = segment.stat().st_size
+        index_file = self._index_file(segment)
+        if index_file.exists():
+            data = index_file.read_bytes()
+            ends.frombytes(data[:len(data) - len(data) % ends.itemsize])
+            # Never trust offsets past the end of the data
+            while ends and ends[-1] > size:
+                ends.pop()
+        
+        indexed = ends[-1] if ends else 0
+        if indexed < size:
+            with open(segment, 'rb') as f:
+                f.seek(indexed)
+                ends.extend(_line_ends(f.read(size - indexed), indexed))
         
-        # Calculate hash
-        entry_json = json.dumps(entry_data, sort_keys=True, default=str)
-        entry_hash = hashlib.sha256(entry_json.encode()).hexdigest()
-        entry_data["hash"] = entry_hash
+        return ends
+    
+    @staticmethod
+    def _read_lines(segment: Path, ends: array, first: int, last: int) -> List[bytes]:
+        """Read lines ``first`` to ``last - 1`` of a segment in one read."""
+        if first >= last:
+            return []
         
-        # Append to ledger (append-only)
-        final_entry = {**entry_data, "hash": entry_hash}
-        with open(ledger_file, 'a') as f:
-            f.write(json.dumps(final_entry, default=str) + '\n')
+        start = ends[first - 1] if first else 0
+        with open(segment, 'rb') as f:
+            f.seek(start)
+            data = f.read(ends[last - 1] - start)
+        
+        return data.split(b'\n')[:-1]
+    
+    def _load_chain_head(self, user_id: str) -> Tuple[str, Optional[str]]:
+        """Read the newest segment day and entry hash for a user from disk."""
+        for day, segment in reversed(self._segments(user_id)):
+            ends = self._read_index(segment)
+            if not ends:
+                continue
+            
+            last_line = self._read_lines(segment, ends, len(ends) - 1, len(ends))[0]
+            # The legacy segment sorts before every day
+            return ("" if day == LEGACY_SEGMENT else day), json.loads(last_line).get("hash")
+        
+        return "", None
+    
+    def append(self, event: GuardianEvent, wait: bool = False) -> str:
+        """Append event to ledger and return hash.
+        
+        The entry is chained and hashed immediately; writing it to disk
+        happens on the background writer. Entries go to the segment of their
+        timestamp's day, or to the current segment if that is later, so
+        segment order always matches chain order.
+        
+        Args:
+            event: Event to record
+            wait: Block until the entry is written (and fsynced)
+        
+        Returns:
+            Hash of the new entry
+        
+        Raises:
+            LedgerWriteError: If another process is writing the ledger
+                directory, or with ``wait``, if the entry could not be written
+        """
+        user_id = event.user_id or "anonymous"
+        entry_data = event.to_dict()
+        
+        with self._lock:
+            self._start_writer()
+            head_day, previous_hash = self._chain_heads.get(user_id) or self._load_chain_head(user_id)
+            day = max(event.timestamp.strftime(DATE_FORMAT), head_day)
+            
+            # Create entry with hash chain
+            entry_data["previous_hash"] = previous_hash
+            
+            # Calculate hash
+            entry_json = json.dumps(entry_data, sort_keys=True, default=str)
+            entry_hash = hashlib.sha256(entry_json.encode()).hexdigest()
+            
+            # Append to ledger (append-only), in chain order
+            final_entry = {**entry_data, "hash": entry_hash}
+            self._chain_heads[user_id] = (day, entry_hash)
+            seq = self._enqueue(user_id, self._segment_file(user_id, day), json.dumps(final_entry, default=str) + '\n')
         
         logger.debug(f"Appended event {event.event_id} to ledger, hash: {entry_hash[:16]}...")
         
+        if wait:
+            with self._progress:
+                self._progress.wait_for(lambda: self._written >= seq)
+                error = self._failed.pop(seq, None)
+            if error is not None:
+                raise LedgerWriteError(f"Ledger entry {entry_hash[:16]} was not written: {error}")
+        
         return entry_hash
     
+    def _start_writer(self):
+        """Claim the ledger directory and start the writer thread if needed.
+        
+        Raises:
+            LedgerWriteError: If another process holds the directory
+        """
+        if self._writer_lock is None:
+            lock_file = open(self.ledger_dir / WRITER_LOCK_FILE, 'a')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                lock_file.close()
+                logger.error(f"Ledger directory {self.ledger_dir} is already being written by another process")
+                raise LedgerWriteError(
+                    f"Ledger directory {self.ledger_dir} is already being written by another process"
+                ) from e
+            self._writer_lock = lock_file
+        
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="trust-ledger-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+    
+    def _enqueue(self, user_id: str, segment: Path, line: str) -> int:
+        """Queue a serialized entry for the writer thread and return its number."""
+        with self._progress:
+            self._enqueued += 1
+            seq = self._enqueued
+        self._queue.put((seq, user_id, segment, line))
+        return seq
+    
+    def _writer_loop(self):
+        """Write queued entries in batches, one write and fsync per segment."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._write_batch(batch)
+            
+            with self._progress:
+                self._written += len(batch)
+                self._progress.notify_all()
+    
+    def _lock_directory(self):
+        """Take an exclusive lock on the ledger directory across processes.
+        
+        Returns:
+            The open lock file; closing it releases the lock
+        """
+        lock_file = open(self.ledger_dir / LOCK_FILE, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError:
+            lock_file.close()
+            raise
+        return lock_file
+    
+    def _prepare_segment(self, segment: Path) -> int:
+        """Make a segment and its index consistent before writing to it.
+        
+        Called under the directory lock whenever the segment's size is not the
+        one this process last wrote. Every writer extends data and index under
+        that lock, so bytes past the last complete line can only be a torn
+        line left by an interrupted write; it is dropped, and the index is
+        rewritten if it is behind the data.
+        
+        Returns:
+            Size of the segment
+        """
+        segment.parent.mkdir(parents=True, exist_ok=True)
+        ends = self._read_index(segment)
+        complete = ends[-1] if ends else 0
+        
+        if segment.exists() and segment.stat().st_size > complete:
+            logger.warning(f"Truncating incomplete entry at the end of {segment}")
+            os.truncate(segment, complete)
+        
+        index_file = self._index_file(segment)
+        if not index_file.exists() or index_file.stat().st_size != len(ends) * ends.itemsize:
+            index_file.write_bytes(ends.tobytes())
+        
+        return complete
+    
+    def _write_batch(self, batch: List[Tuple[int, str, Path, str]]):
+        """Write one batch of entries and extend the segment indexes."""
+        by_segment: Dict[Path, List[Tuple[int, str, str]]] = {}
+        for seq, user_id, segment, line in batch:
+            by_segment.setdefault(segment, []).append((seq, user_id, line))
+        
+        try:
+            lock_file = self._lock_directory()
+        except OSError as e:
+            logger.error(f"Failed to lock ledger directory {self.ledger_dir}: {e}")
+            self._fail([entry for entries in by_segment.values() for entry in entries], str(e))
+        else:
+            with lock_file:
+                self._write_segments(by_segment)
+        
+        # Every entry chained to a failed one has been dropped by now
+        for user_id, broken_through in list(self._broken_chains.items()):
+            if broken_through <= batch[-1][0]:
+                del self._broken_chains[user_id]
+        
+        self.stats["batches"] += 1
+    
+    def _write_segments(self, by_segment: Dict[Path, List[Tuple[int, str, str]]]):
+        """Append each segment's entries; the caller holds the directory lock."""
+        for segment, entries in by_segment.items():
+            # Entries chained to one that was never written are dropped too
+            orphaned = [
+                entry for entry in entries
+                if entry[0] <= self._broken_chains.get(entry[1], 0)
+            ]
+            if orphaned:
+                self._fail(orphaned, "an earlier entry of the chain failed to write", reset_chain=False)
+                entries = [entry for entry in entries if entry not in orphaned]
+                if not entries:
+                    continue
+            
+            lines = [line for _, _, line in entries]
+            try:
+                segment.parent.mkdir(parents=True, exist_ok=True)
+                with open(segment, 'ab') as f:
+                    # Another process may have written the segment since
+                    size = os.fstat(f.fileno()).st_size
+                    if self._segment_sizes.get(segment) != size:
+                        size = self._prepare_segment(segment)
+                    
+                    data = [line.encode() for line in lines]
+                    ends = array('Q')
+                    for line in data:
+                        size += len(line)
+                        ends.append(size)
+                    
+                    f.write(b''.join(data))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self.stats["fsyncs"] += 1
+                
+                # The index can be rebuilt from the data, so it is not fsynced
+                with open(self._index_file(segment), 'ab') as f:
+                    f.write(ends.tobytes())
+                
+                self._segment_sizes[segment] = size
+                self.stats["entries_written"] += len(lines)
+            except Exception as e:
+                self._segment_sizes.pop(segment, None)
+                logger.error(f"Failed to write {len(lines)} entries to {segment}: {e}")
+                self._fail(entries, str(e))
+    
+    def _fail(self, entries: List[Tuple[int, str, str]], error: str, reset_chain: bool = True):
+        """Record entries that were not written and reset their users' chain heads."""
+        self.stats["write_errors"] += 1
+        with self._progress:
+            for seq, _, _ in entries:
+                self._failed[seq] = error
+        
+        if not reset_chain:
+            return
+        with self._lock:
+            for user_id in {user_id for _, user_id, _ in entries}:
+                # The next append reloads the head from disk; entries already
+                # queued behind the failed one are dropped with it
+                self._chain_heads.pop(user_id, None)
+                self._broken_chains[user_id] = self._enqueued
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every entry appended so far is on disk.
+        
+        Write failures of those entries not yet reported to another waiter
+        are reported (and logged) once.
+        
+        Args:
+            timeout: Seconds to wait (None = no limit)
+        
+        Returns:
+            True if all entries were written before the timeout, False on
+            timeout or if any of them failed to write
+        """
+        with self._progress:
+            target = self._enqueued
+            if not self._progress.wait_for(lambda: self._written >= target, timeout):
+                return False
+            failed = [seq for seq in self._failed if seq <= target]
+            for seq in failed:
+                del self._failed[seq]
+        
+        if failed:
+            logger.error(f"{len(failed)} ledger entries failed to write")
+            return False
+        return True
+    
+    def close(self) -> bool:
+        """Flush pending entries and give up ownership of the ledger directory.
+        
+        A later append claims the directory again.
+        
+        Returns:
+            True if every entry was written, as returned by ``flush``
+        """
+        flushed = True
+        while True:
+            flushed = self.flush() and flushed
+            with self._lock, self._progress:
+                # Appends made while flushing must be written before releasing
+                if self._written < self._enqueued:
+                    continue
+                
+                if self._writer_lock is not None:
+                    self._writer_lock.close()
+                    self._writer_lock = None
+                self._chain_heads.clear()
+                return flushed
+    
     def _get_last_hash(self, ledger_file: Path) -> Optional[str]:
-        """Get hash of last entry in ledger."""
-        if not ledger_file.exists():
+        """Get hash of last entry in a ledger file."""
+        ends = self._read_index(ledger_file)
+        if not ends:
             return None
         
         try:
-            # Read last line
-            with open(ledger_file, 'rb') as f:
-                try:
-                    f.seek(-2, os.SEEK_END)
-                    while f.read(1) != b'\n':
-                        f.seek(-2, os.SEEK_CUR)
-                except OSError:
-                    f.seek(0)
-                
-                last_line = f.readline().decode()
-                if last_line.strip():
-                    entry = json.loads(last_line)
-                    return entry.get("hash")
+            last_line = self._read_lines(ledger_file, ends, len(ends) - 1, len(ends))[0]
+            if last_line.strip():
+                return json.loads(last_line).get("hash")
         except Exception as e:
             logger.warning(f"Failed to read last hash from {ledger_file}: {e}")
         
         return None
     
+    def file_state(self, user_id: str) -> Dict[str, Any]:
+        """Describe a user's ledger files as they are on disk.
+        
+        Pending writes are not flushed; the state is for telling whether the
+        files changed since an earlier look.
+        
+        Returns:
+            Total size and newest modification time of the user's segments,
+            and the hash of the newest entry
+        """
+        size = 0
+        mtime_ns = 0
+        for _, segment in self._segments(user_id):
+            stat = segment.stat()
+            size += stat.st_size
+            mtime_ns = max(mtime_ns, stat.st_mtime_ns)
+        
+        return {"size": size, "mtime_ns": mtime_ns, "last_hash": self._load_chain_head(user_id)[1]}
+    
     def get_user_ledger(self, user_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get all entries for a user."""
-        ledger_file = self._get_ledger_file(user_id)
+        """Get entries for a user, most recent first.
         
-        if not ledger_file.exists():
-            return []
+        With a limit, only the newest segments are touched and only the
+        wanted lines are read.
+        """
+        self.flush()
         
         entries = []
         try:
-            with open(ledger_file, 'r') as f:
-                for line in f:
-                    if line.strip():
-                        entry = json.loads(line)
-                        entries.append(entry)
-            
-            # Reverse to get most recent first
-            entries.reverse()
-            
-            if limit:
-                entries = entries[:limit]
+            for _, segment in reversed(self._segments(user_id)):
+                ends = self._read_index(segment)
+                first = max(0, len(ends) - (limit - len(entries))) if limit else 0
+                
+                lines = self._read_lines(segment, ends, first, len(ends))
+                entries.extend(json.loads(line) for line in reversed(lines) if line.strip())
+                
+                if limit and len(entries) >= limit:
+                    break
         except Exception as e:
             logger.error(f"Failed to read ledger for user {user_id}: {e}")
         
         return entries
     
-    def verify(self, user_id: str) -> Dict[str, Any]:
-        """Verify integrity of ledger hash chain."""
-        ledger_file = self._get_ledger_file(user_id)
+    def verify(self, user_id: str, checkpoint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Verify integrity of ledger hash chain.
         
-        if not ledger_file.exists():
-            return {
-                "valid": True,
-                "entries": 0,
-                "errors": [],
-            }
+        Args:
+            user_id: User whose ledger to verify
+            checkpoint: Optional sealed segment already verified, as
+                ``{"date", "entry_count", "last_hash"}``. Its size and last
+                hash are checked and verification continues after it.
         
-        entries = []
+        Returns:
+            Verification result, with the Merkle root of every segment
+            verified in this pass under ``segments``
+        """
+        self.flush()
+        
+        segments = self._segments(user_id)
         errors = []
+        entry_count = 0
         previous_hash = None
+        verified_from = None
+        segment_roots = []
         
-        try:
-            with open(ledger_file, 'r') as f:
-                for line_num, line in enumerate(f, 1):
+        if checkpoint:
+            position = next((i for i, (day, _) in enumerate(segments) if day == checkpoint["date"]), None)
+            if position is None:
+                errors.append(f"Checkpointed segment {checkpoint['date']} is missing")
+            else:
+                segment = segments[position][1]
+                ends = self._read_index(segment)
+                last_hash = self._get_last_hash(segment)
+                if len(ends) != checkpoint["entry_count"] or last_hash != checkpoint["last_hash"]:
+                    errors.append(
+                        f"Segment {checkpoint['date']} changed since it was checkpointed: "
+                        f"{len(ends)} entries (expected {checkpoint['entry_count']})"
+                    )
+                else:
+                    previous_hash = last_hash
+                    verified_from = checkpoint["date"]
+                    segments = segments[position + 1:]
+        
+        for day, segment in segments:
+            hashes = []
+            try:
+                ends = self._read_index(segment)
+                for line_num, line in enumerate(self._read_lines(segment, ends, 0, len(ends)), 1):
                     if not line.strip():
                         continue
                     
                     try:
                         entry = json.loads(line)
-                        entries.append(entry)
+                        entry_count += 1
                         
                         # Verify hash chain
                         stored_hash = entry.get("hash")
                         stored_prev_hash = entry.get("previous_hash")
                         
                         if previous_hash and stored_prev_hash != previous_hash:
-                            errors.append(f"Hash chain broken at line {line_num}: expected {previous_hash[:16]}..., got {stored_prev_hash[:16] if stored_prev_hash else 'None'}...")
+                            errors.append(f"Hash chain broken at {day} line {line_num}: expected {previous_hash[:16]}..., got {stored_prev_hash[:16] if stored_prev_hash else 'None'}...")
                         
                         # Verify entry hash
                         entry_copy = {k: v for k, v in entry.items() if k != "hash"}
@@ -148,41 +615,127 @@ class TrustLedger:
                         calculated_hash = hashlib.sha256(entry_json.encode()).hexdigest()
                         
                         if stored_hash != calculated_hash:
-                            errors.append(f"Hash mismatch at line {line_num}: stored {stored_hash[:16]}..., calculated {calculated_hash[:16]}...")
+                            errors.append(f"Hash mismatch at {day} line {line_num}: stored {str(stored_hash)[:16]}..., calculated {calculated_hash[:16]}...")
                         
                         previous_hash = stored_hash
+                        hashes.append(str(stored_hash))
                     except json.JSONDecodeError as e:
-                        errors.append(f"Invalid JSON at line {line_num}: {e}")
-        
-        except Exception as e:
-            errors.append(f"Failed to read ledger: {e}")
+                        errors.append(f"Invalid JSON at {day} line {line_num}: {e}")
+            except Exception as e:
+                errors.append(f"Failed to read ledger segment {day}: {e}")
+            
+            segment_roots.append({
+                "date": day,
+                "hash_root": merkle_root(hashes),
+                "entry_count": len(hashes),
+                "last_hash": hashes[-1] if hashes else None,
+            })
         
         return {
             "valid": len(errors) == 0,
-            "entries": len(entries),
+            "entries": entry_count,
             "errors": errors,
             "last_hash": previous_hash,
+            "verified_from": verified_from,
+            "segments": segment_roots,
         }
     
+    def verify_incremental(self, user_id: str, db: Session, full: bool = False) -> Dict[str, Any]:
+        """Verify from the last checkpoint in ``TrustLedgerRoot`` and checkpoint new sealed segments.
+        
+        Args:
+            user_id: User whose ledger to verify
+            db: Database session
+            full: Re-verify every segment and compare sealed segments with
+                their stored roots instead of starting at the checkpoint
+        
+        Returns:
+            Verification result as returned by ``verify``
+        """
+        from database.models import TrustLedgerRoot
+        
+        try:
+            user_uuid = UUID(str(user_id))
+        except ValueError:
+            # Only real users have checkpoint rows
+            return self.verify(user_id)
+        
+        rows = {
+            row.date.strftime(DATE_FORMAT): row
+            for row in db.query(TrustLedgerRoot).filter(TrustLedgerRoot.user_id == user_uuid).all()
+        }
+        # Rows written before segments existed have no last hash and are replaced
+        checkpoints = {day: row for day, row in rows.items() if row.last_hash}
+        
+        checkpoint = None
+        if checkpoints and not full:
+            latest = checkpoints[max(checkpoints)]
+            checkpoint = {
+                "date": max(checkpoints),
+                "entry_count": latest.entry_count,
+                "last_hash": latest.last_hash,
+            }
+        
+        result = self.verify(user_id, checkpoint=checkpoint)
+        
+        for root in result["segments"]:
+            row = checkpoints.get(root["date"])
+            if row is not None and row.hash_root != root["hash_root"]:
+                result["errors"].append(f"Merkle root of segment {root['date']} does not match its checkpoint")
+        result["valid"] = len(result["errors"]) == 0
+        
+        if result["valid"]:
+            # The newest segment can still grow, so it is not checkpointed
+            self._save_segment_roots(db, user_uuid, result["segments"][:-1], rows)
+        
+        return result
+    
+    def _save_segment_roots(self, db: Session, user_id: UUID, roots: List[Dict[str, Any]], rows: Dict[str, Any]):
+        """Persist Merkle roots of sealed segments to ``TrustLedgerRoot``."""
+        from database.models import TrustLedgerRoot
+        
+        changed = False
+        try:
+            for root in roots:
+                if root["date"] == LEGACY_SEGMENT:
+                    continue
+                
+                row = rows.get(root["date"])
+                if row is None:
+                    row = TrustLedgerRoot(
+                        user_id=user_id,
+                        date=datetime.strptime(root["date"], DATE_FORMAT).replace(tzinfo=timezone.utc),
+                    )
+                    db.add(row)
+                elif row.last_hash:
+                    continue
+                
+                row.hash_root = root["hash_root"]
+                row.entry_count = root["entry_count"]
+                row.last_hash = root["last_hash"]
+                changed = True
+            
+            if changed:
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to store ledger checkpoints for user {user_id}: {e}")
+            db.rollback()
+    
     def get_daily_hash_root(self, user_id: str, date: Optional[datetime] = None) -> Optional[str]:
-        """Get hash root for a specific day."""
+        """Get the Merkle root of a day's segment."""
         if date is None:
             date = datetime.utcnow()
         
-        date_str = date.strftime("%Y-%m-%d")
-        entries = self.get_user_ledger(user_id)
-        
-        # Filter entries for the date
-        day_entries = [
-            e for e in entries
-            if datetime.fromisoformat(e["timestamp"]).strftime("%Y-%m-%d") == date_str
-        ]
-        
-        if not day_entries:
+        self.flush()
+        segment = self._segment_file(user_id, date.strftime(DATE_FORMAT))
+        ends = self._read_index(segment)
+        if not ends:
             return None
         
-        # Calculate root hash of all entries for the day
-        entries_json = json.dumps(day_entries, sort_keys=True, default=str)
-        root_hash = hashlib.sha256(entries_json.encode()).hexdigest()
+        hashes = [
+            str(json.loads(line).get("hash"))
+            for line in self._read_lines(segment, ends, 0, len(ends))
+            if line.strip()
+        ]
         
-        return root_hash
+        return merkle_root(hashes)
@@ -1,33 +1,115 @@
 """Guardian middleware for FastAPI."""
 
+import random
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from .service import get_guardian_service
-from .events import GuardianEvent, DataScope, DataClass
+from .events import DataScope, DataClass, ResponseAction
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Skip guardian for certain paths
+SKIP_PATHS = (
+    "/health",
+    "/metrics",
+    "/api/guardian",  # Avoid recursion
+)
 
-class GuardianMiddleware(BaseHTTPMiddleware):
-    """Middleware to monitor API requests and responses."""
+
+def parse_route_sample_rates(value: str) -> List[Tuple[str, float]]:
+    """Parse ``prefix=rate`` pairs, longest prefix first.
+    
+    Args:
+        value: Comma-separated pairs such as ``/api/events=0.1,/api/ml=0.5``
+    
+    Returns:
+        List of (path prefix, sample rate)
+    """
+    rates = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        prefix, _, rate = item.partition("=")
+        try:
+            rates.append((prefix.strip(), min(max(float(rate), 0.0), 1.0)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid guardian sample rate: {item!r}")
+    return sorted(rates, key=lambda pair: len(pair[0]), reverse=True)
+
+
+class GuardianMiddleware:
+    """Middleware to monitor API requests and responses.
+    
+    The block/allow decision for each request is made inline from the
+    memoized policy decision. The request and response events themselves are
+    sampled per route and, in async mode, handed to the guardian service's
+    background consumer, so risk assessment, redaction and the ledger append
+    stay off the request path. It is a pure ASGI middleware; the response
+    event is emitted when the response starts.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        async_events: Optional[bool] = None,
+        sample_rate: Optional[float] = None,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+    ):
+        """Initialize middleware.
+        
+        Args:
+            app: ASGI application
+            async_events: Emit events from the background consumer (default from settings)
+            sample_rate: Fraction of requests recorded (default from settings)
+            route_sample_rates: Sample rate overrides by path prefix (default from settings)
+        """
+        self.app = app
+        
+        if async_events is None or sample_rate is None or route_sample_rates is None:
+            from backend.config import settings
+            if async_events is None:
+                async_events = settings.guardian_async_events
+            if sample_rate is None:
+                sample_rate = settings.guardian_sample_rate
+            if route_sample_rates is None:
+                route_sample_rates = dict(parse_route_sample_rates(settings.guardian_route_sample_rates))
+        
+        self.async_events = async_events
+        self.sample_rate = sample_rate
+        self.route_sample_rates = sorted(route_sample_rates.items(), key=lambda pair: len(pair[0]), reverse=True)
+    
+    def _is_sampled(self, path: str) -> bool:
+        """Decide whether this request's events are recorded."""
+        rate = next(
+            (rate for prefix, rate in self.route_sample_rates if path.startswith(prefix)),
+            self.sample_rate,
+        )
+        return rate >= 1.0 or random.random() < rate
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def _emit(self, guardian, event_kwargs: Dict):
+        """Record an event inline or through the background consumer."""
+        if self.async_events:
+            guardian.emit_event_async(**event_kwargs)
+        else:
+            guardian.emit_event(**event_kwargs)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request through Guardian monitoring."""
-        guardian = get_guardian_service()
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Skip guardian for certain paths
-        skip_paths = [
-            "/health",
-            "/metrics",
-            "/api/guardian",  # Avoid recursion
-        ]
+        path = scope["path"]
+        if path.startswith(SKIP_PATHS):
+            await self.app(scope, receive, send)
+            return
         
-        if any(request.url.path.startswith(path) for path in skip_paths):
-            return await call_next(request)
+        request = Request(scope)
+        guardian = get_guardian_service()
         
         # Extract user ID from request
         user_id = None
@@ -35,69 +117,87 @@ class GuardianMiddleware(BaseHTTPMiddleware):
             user_id = str(request.state.user.id) if hasattr(request.state.user, "id") else None
         
         # Determine data scope
-        scope = DataScope.API
-        if request.url.path.startswith("/api/external"):
-            scope = DataScope.EXTERNAL
-        elif request.url.path.startswith("/api/"):
-            scope = DataScope.API
+        if path.startswith("/api/external"):
+            data_scope = DataScope.EXTERNAL
+        elif path.startswith("/api/"):
+            data_scope = DataScope.API
         else:
-            scope = DataScope.APP
+            data_scope = DataScope.APP
         
         # Monitor request
         start_time = time.time()
         
         try:
-            # Emit event for API call
-            event = guardian.emit_event(
-                event_type="api_call",
-                scope=scope,
-                data_class=DataClass.TELEMETRY,
-                description=f"{request.method} {request.url.path}",
-                data_touched={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "headers": dict(request.headers),
-                },
-                purpose="API request monitoring",
-                user_id=user_id,
-                source="guardian_middleware",
-            )
-            
-            # Check if blocked
-            if event.guardian_action.value == "block":
-                logger.warning(f"Guardian blocked request: {request.url.path}")
-                return JSONResponse(
-                    status_code=403,
-                    content={
-                        "error": "Request blocked by Privacy Guardian",
-                        "reason": event.action_reason,
-                    }
-                )
-            
-            # Process request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Monitor response (if not blocked)
-            guardian.emit_event(
-                event_type="api_response",
-                scope=scope,
-                data_class=DataClass.TELEMETRY,
-                description=f"Response for {request.method} {request.url.path}",
-                data_touched={
-                    "status_code": response.status_code,
-                    "duration_ms": duration * 1000,
-                },
-                purpose="API response monitoring",
-                user_id=user_id,
-                source="guardian_middleware",
-            )
-            
-            return response
-            
+            # Same decision emit_event makes for a request event, without recording it
+            decision = guardian.decide(data_scope, DataClass.TELEMETRY)
+            blocked = decision.action == ResponseAction.BLOCK
+            # Blocked requests are always recorded
+            sampled = blocked or self._is_sampled(path)
+            if sampled:
+                request_event = {
+                    "event_type": "api_call",
+                    "scope": data_scope,
+                    "data_class": DataClass.TELEMETRY,
+                    "description": f"{request.method} {path}",
+                    "data_touched": {
+                        "method": request.method,
+                        "path": path,
+                        # Header names only; values carry credentials and cookies
+                        "headers": sorted(request.headers.keys()),
+                    },
+                    "purpose": "API request monitoring",
+                    "user_id": user_id,
+                    "source": "guardian_middleware",
+                }
+                self._emit(guardian, request_event)
         except Exception as e:
             logger.error(f"Guardian middleware error: {e}")
             # Still allow request to proceed
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+        
+        # Check if blocked
+        if blocked:
+            logger.warning(f"Guardian blocked request: {path}")
+            response = JSONResponse(
+                status_code=403,
+                content={
+                    "error": "Request blocked by Privacy Guardian",
+                    "reason": decision.reason,
+                }
+            )
+            await response(scope, receive, send)
+            return
+        
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_monitoring(message: Message):
+            if message["type"] == "http.response.start":
+                # Calculate duration
+                duration = time.time() - start_time
+                
+                # Monitor response (if not blocked)
+                response_event = {
+                    "event_type": "api_response",
+                    "scope": data_scope,
+                    "data_class": DataClass.TELEMETRY,
+                    "description": f"Response for {request.method} {path}",
+                    "data_touched": {
+                        "status_code": message["status"],
+                        "duration_ms": duration * 1000,
+                    },
+                    "purpose": "API response monitoring",
+                    "user_id": user_id,
+                    "source": "guardian_middleware",
+                }
+                
+                try:
+                    self._emit(guardian, response_event)
+                except Exception as e:
+                    logger.error(f"Guardian middleware error: {e}")
+            await send(message)
+        
+        # Process request
+        await self.app(scope, receive, send_with_monitoring)
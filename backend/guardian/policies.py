@@ -1,8 +1,16 @@
-"""Policy engine for Guardian risk assessment."""
+"""Policy engine for Guardian risk assessment.
+
+A risk assessment depends only on an event's scope, data class, MFA flag and
+user decision, so when policies are loaded every combination is assessed
+once and stored in a decision table. ``assess_risk`` is then a dictionary
+lookup. Policy files are watched and the table is rebuilt when they change.
+"""
 
 import os
+import time
+import threading
 import yaml
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, NamedTuple, Tuple
 from pathlib import Path
 from .events import GuardianEvent, DataScope, DataClass, RiskLevel, ResponseAction
 import logging
@@ -10,102 +18,207 @@ import logging
 logger = logging.getLogger(__name__)
 
 # Default policy directory (relative to project root)
-POLICY_DIR = Path(__file__).parent.parent.parent.parent / "guardian" / "policies"
+POLICY_DIR = Path(__file__).parent.parent.parent / "guardian" / "policies"
+
+# Seconds between checks of the policy files for changes
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+SCOPE_WEIGHTS = {
+    DataScope.USER: 0.1,
+    DataScope.APP: 0.2,
+    DataScope.API: 0.5,
+    DataScope.EXTERNAL: 0.8,
+}
+
+DATA_CLASS_WEIGHTS = {
+    DataClass.CREDENTIALS: 1.0,
+    DataClass.PAYMENT: 0.9,
+    DataClass.BIOMETRICS: 0.9,
+    DataClass.HEALTH: 0.8,
+    DataClass.CONTACTS: 0.7,
+    DataClass.MESSAGES: 0.7,
+    DataClass.LOCATION: 0.6,
+    DataClass.AUDIO: 0.7,
+    DataClass.VIDEO: 0.7,
+    DataClass.FILES: 0.5,
+    DataClass.BROWSING: 0.4,
+    DataClass.CALENDAR: 0.3,
+    DataClass.TELEMETRY: 0.2,
+    DataClass.OTHER: 0.3,
+}
+
+# Assessment only distinguishes no decision, "deny" and any other decision
+USER_DECISIONS = (None, "deny", "allow")
+
+
+def _user_decision_key(user_decision: Optional[str]) -> Optional[str]:
+    if not user_decision:
+        return None
+    return "deny" if user_decision == "deny" else "allow"
+
+
+class PolicyDecision(NamedTuple):
+    """Outcome of assessing an event against the loaded policies."""
+    risk_score: float
+    risk_level: RiskLevel
+    action: ResponseAction
+    reason: str
+    risk_factors: Tuple[str, ...]
 
 
 class PolicyEngine:
     """Policy engine for risk assessment and response actions."""
     
-    def __init__(self, policy_dir: Optional[Path] = None):
-        """Initialize policy engine."""
+    def __init__(self, policy_dir: Optional[Path] = None, reload_interval: float = DEFAULT_RELOAD_INTERVAL):
+        """Initialize policy engine.
+        
+        Args:
+            policy_dir: Directory of YAML policy files
+            reload_interval: Seconds between checks for changed policy files
+                (0 = check on every assessment, None = never reload)
+        """
         self.policy_dir = policy_dir or POLICY_DIR
+        self.reload_interval = reload_interval
         self.policies: Dict[str, Any] = {}
+        self._decisions: Dict[Tuple, PolicyDecision] = {}
+        self._file_versions: Dict[Path, int] = {}
+        self._next_reload_check = 0.0
+        self._reload_lock = threading.Lock()
         self.load_policies()
     
+    def _policy_files(self) -> Dict[Path, int]:
+        """Current policy files and their modification times."""
+        if not self.policy_dir.exists():
+            return {}
+        return {path: path.stat().st_mtime_ns for path in self.policy_dir.glob("*.yaml")}
+    
     def load_policies(self):
-        """Load policies from YAML files."""
+        """Load policies from YAML files and compile the decision table."""
+        self._file_versions = self._policy_files()
+        
         if not self.policy_dir.exists():
             logger.warning(f"Policy directory {self.policy_dir} does not exist, using defaults")
-            self.policies = self._get_default_policies()
-            return
+            policies = self._get_default_policies()
+        else:
+            policies = {}
+            for policy_file in sorted(self._file_versions):
+                try:
+                    with open(policy_file, 'r') as f:
+                        policy_data = yaml.safe_load(f)
+                        policy_name = policy_file.stem
+                        policies[policy_name] = policy_data
+                        logger.info(f"Loaded policy: {policy_name}")
+                except Exception as e:
+                    logger.error(f"Failed to load policy {policy_file}: {e}")
+            
+            if not policies:
+                logger.warning("No policies loaded, using defaults")
+                policies = self._get_default_policies()
         
-        for policy_file in self.policy_dir.glob("*.yaml"):
-            try:
-                with open(policy_file, 'r') as f:
-                    policy_data = yaml.safe_load(f)
-                    policy_name = policy_file.stem
-                    self.policies[policy_name] = policy_data
-                    logger.info(f"Loaded policy: {policy_name}")
-            except Exception as e:
-                logger.error(f"Failed to load policy {policy_file}: {e}")
+        # Swap both at once so concurrent lookups never mix policy versions
+        self.policies, self._decisions = policies, self._compile(policies)
+    
+    def reload_if_changed(self) -> bool:
+        """Reload policies if any policy file was added, removed or modified.
         
-        if not self.policies:
-            logger.warning("No policies loaded, using defaults")
-            self.policies = self._get_default_policies()
+        Returns:
+            True if policies were reloaded
+        """
+        with self._reload_lock:
+            if self._policy_files() == self._file_versions:
+                return False
+            logger.info(f"Policy files in {self.policy_dir} changed, reloading")
+            self.load_policies()
+            return True
+    
+    def _maybe_reload(self):
+        if self.reload_interval is None:
+            return
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.reload_interval
+        try:
+            self.reload_if_changed()
+        except Exception as e:
+            logger.error(f"Failed to reload policies: {e}")
+    
+    def _compile(self, policies: Dict[str, Any]) -> Dict[Tuple, PolicyDecision]:
+        """Assess every (scope, data class, mfa, user decision) combination."""
+        risk_weights = self._get_risk_weights(policies)
+        
+        table = {}
+        for scope in DataScope:
+            for data_class in DataClass:
+                for mfa_required in (False, True):
+                    for user_decision in USER_DECISIONS:
+                        event = GuardianEvent(
+                            scope=scope,
+                            data_class=data_class,
+                            mfa_required=mfa_required,
+                            user_decision=user_decision,
+                        )
+                        risk_score = self._calculate_risk_score(event, risk_weights)
+                        risk_level = self._risk_level(risk_score)
+                        event.risk_level = risk_level
+                        action = self._determine_action(event)
+                        table[(scope, data_class, mfa_required, user_decision)] = PolicyDecision(
+                            risk_score=risk_score,
+                            risk_level=risk_level,
+                            action=action,
+                            reason=self._get_action_reason(event, action),
+                            risk_factors=tuple(event.risk_factors),
+                        )
+        return table
+    
+    def decide(
+        self,
+        scope: DataScope,
+        data_class: DataClass,
+        mfa_required: bool = False,
+        user_decision: Optional[str] = None,
+    ) -> PolicyDecision:
+        """Look up the policy decision for events with these attributes."""
+        self._maybe_reload()
+        return self._decisions[(scope, data_class, bool(mfa_required), _user_decision_key(user_decision))]
     
     def assess_risk(self, event: GuardianEvent) -> GuardianEvent:
         """Assess risk for an event and determine guardian action."""
-        # Calculate risk score
-        risk_score = self._calculate_risk_score(event)
+        decision = self.decide(event.scope, event.data_class, event.mfa_required, event.user_decision)
+        
+        event.risk_score = decision.risk_score
+        event.risk_level = decision.risk_level
+        event.risk_factors = list(decision.risk_factors)
+        event.guardian_action = decision.action
+        event.action_reason = decision.reason
         
-        # Determine risk level
+        return event
+    
+    @staticmethod
+    def _risk_level(risk_score: float) -> RiskLevel:
+        """Map a risk score to its level."""
         if risk_score >= 0.8:
-            risk_level = RiskLevel.CRITICAL
+            return RiskLevel.CRITICAL
         elif risk_score >= 0.6:
-            risk_level = RiskLevel.HIGH
+            return RiskLevel.HIGH
         elif risk_score >= 0.4:
-            risk_level = RiskLevel.MEDIUM
+            return RiskLevel.MEDIUM
         else:
-            risk_level = RiskLevel.LOW
-        
-        event.risk_score = risk_score
-        event.risk_level = risk_level
-        
-        # Determine response action based on policy
-        action = self._determine_action(event)
-        event.guardian_action = action
-        event.action_reason = self._get_action_reason(event, action)
-        
-        return event
+            return RiskLevel.LOW
     
-    def _calculate_risk_score(self, event: GuardianEvent) -> float:
+    def _calculate_risk_score(self, event: GuardianEvent, risk_weights: Dict[str, float]) -> float:
         """Calculate risk score based on policies."""
         score = 0.0
         risk_factors = []
         
-        # Get risk weights from policy
-        risk_weights = self._get_risk_weights()
-        
         # Scope factor
-        scope_weights = {
-            DataScope.USER: 0.1,
-            DataScope.APP: 0.2,
-            DataScope.API: 0.5,
-            DataScope.EXTERNAL: 0.8,
-        }
-        scope_score = scope_weights.get(event.scope, 0.5)
+        scope_score = SCOPE_WEIGHTS.get(event.scope, 0.5)
         score += scope_score * risk_weights.get("scope", 0.3)
         if scope_score > 0.5:
             risk_factors.append(f"Data scope: {event.scope.value}")
         
         # Data class factor
-        data_class_weights = {
-            DataClass.CREDENTIALS: 1.0,
-            DataClass.PAYMENT: 0.9,
-            DataClass.BIOMETRICS: 0.9,
-            DataClass.HEALTH: 0.8,
-            DataClass.CONTACTS: 0.7,
-            DataClass.MESSAGES: 0.7,
-            DataClass.LOCATION: 0.6,
-            DataClass.AUDIO: 0.7,
-            DataClass.VIDEO: 0.7,
-            DataClass.FILES: 0.5,
-            DataClass.BROWSING: 0.4,
-            DataClass.CALENDAR: 0.3,
-            DataClass.TELEMETRY: 0.2,
-            DataClass.OTHER: 0.3,
-        }
-        class_score = data_class_weights.get(event.data_class, 0.5)
+        class_score = DATA_CLASS_WEIGHTS.get(event.data_class, 0.5)
         score += class_score * risk_weights.get("data_class", 0.4)
         if class_score > 0.5:
             risk_factors.append(f"Sensitive data class: {event.data_class.value}")
@@ -130,9 +243,6 @@ class PolicyEngine:
     
     def _determine_action(self, event: GuardianEvent) -> ResponseAction:
         """Determine guardian action based on risk level and policies."""
-        # Get action thresholds from policy
-        thresholds = self._get_action_thresholds()
-        
         if event.risk_level == RiskLevel.CRITICAL:
             return ResponseAction.BLOCK
         elif event.risk_level == RiskLevel.HIGH:
@@ -153,7 +263,7 @@ class PolicyEngine:
         }
         return reasons.get(action, "Action taken based on policy")
     
-    def _get_risk_weights(self) -> Dict[str, float]:
+    def _get_risk_weights(self, policies: Dict[str, Any]) -> Dict[str, float]:
         """Get risk weights from policy."""
         default_weights = {
             "scope": 0.3,
@@ -161,8 +271,8 @@ class PolicyEngine:
             "external": 0.3,
         }
         
-        if "risk_weights" in self.policies:
-            return {**default_weights, **self.policies.get("risk_weights", {})}
+        if "risk_weights" in policies:
+            return {**default_weights, **policies.get("risk_weights", {})}
         return default_weights
     
     def _get_action_thresholds(self) -> Dict[str, float]:
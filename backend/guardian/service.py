@@ -1,28 +1,106 @@
 """Guardian service - core privacy monitoring and enforcement."""
 
 import os
+import queue
+import threading
 from typing import Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.orm import Session
 from .events import GuardianEvent, DataScope, DataClass, RiskLevel, ResponseAction
-from .policies import PolicyEngine
+from .policies import PolicyEngine, PolicyDecision
 from .ledger import TrustLedger
 from database.models import User
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_EVENT_QUEUE_SIZE = 10000
+
 
 class GuardianService:
     """Core Guardian service for privacy monitoring."""
     
-    def __init__(self, policy_engine: Optional[PolicyEngine] = None, ledger: Optional[TrustLedger] = None):
+    def __init__(
+        self,
+        policy_engine: Optional[PolicyEngine] = None,
+        ledger: Optional[TrustLedger] = None,
+        event_queue_size: int = DEFAULT_EVENT_QUEUE_SIZE,
+    ):
         """Initialize Guardian service."""
         self.policy_engine = policy_engine or PolicyEngine()
         self.ledger = ledger or TrustLedger()
         self._private_mode_active = False
         self._lockdown_active = False
+        
+        # Events emitted off the request path by a background consumer
+        self._event_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=event_queue_size)
+        self._consumer: Optional[threading.Thread] = None
+        self._consumer_lock = threading.Lock()
+        self.async_stats = {"queued": 0, "dropped": 0, "emitted": 0, "failed": 0}
+    
+    def decide(
+        self,
+        scope: DataScope,
+        data_class: DataClass,
+        mfa_required: bool = False,
+        user_decision: Optional[str] = None,
+    ) -> PolicyDecision:
+        """Get the action ``emit_event`` would take, without recording anything.
+        
+        Cheap enough for the request path: policy decisions are memoized and
+        nothing is hashed, masked or written.
+        """
+        if self._lockdown_active:
+            return PolicyDecision(1.0, RiskLevel.CRITICAL, ResponseAction.BLOCK, "Guardian lockdown active", ())
+        
+        if self._private_mode_active and data_class == DataClass.TELEMETRY:
+            return PolicyDecision(0.0, RiskLevel.LOW, ResponseAction.MASK, "Private mode active - telemetry masked", ())
+        
+        return self.policy_engine.decide(scope, data_class, mfa_required, user_decision)
+    
+    def emit_event_async(self, **kwargs) -> bool:
+        """Queue an event for ``emit_event`` on the background consumer.
+        
+        Args:
+            **kwargs: Arguments for ``emit_event`` (without ``db``)
+        
+        Returns:
+            False if the queue was full and the event was dropped
+        """
+        if self._consumer is None or not self._consumer.is_alive():
+            with self._consumer_lock:
+                if self._consumer is None or not self._consumer.is_alive():
+                    self._consumer = threading.Thread(
+                        target=self._consume_events, name="guardian-events", daemon=True
+                    )
+                    self._consumer.start()
+        
+        try:
+            self._event_queue.put_nowait(kwargs)
+        except queue.Full:
+            self.async_stats["dropped"] += 1
+            return False
+        
+        self.async_stats["queued"] += 1
+        return True
+    
+    def _consume_events(self):
+        """Emit queued events one by one."""
+        while True:
+            kwargs = self._event_queue.get()
+            try:
+                self.emit_event(**kwargs)
+                self.async_stats["emitted"] += 1
+            except Exception as e:
+                self.async_stats["failed"] += 1
+                logger.error(f"Failed to emit queued guardian event: {e}")
+            finally:
+                self._event_queue.task_done()
+    
+    def wait_for_events(self):
+        """Block until every queued event has been emitted."""
+        self._event_queue.join()
     
     def emit_event(
         self,
@@ -3,151 +3,464 @@ Pattern Detection Background Job
 
 Processes telemetry events and detects patterns within 1 hour of ingestion.
 Runs periodically or can be triggered manually.
+
+Events are streamed per user in chunks ordered by (timestamp, id). Each user
+has a PatternDetectionState row holding a watermark (the last processed
+event) and rolling state (the tail of the last sequence and candidate
+sequence counts), so every event is processed exactly once, and sequences
+that span chunk or run boundaries are still detected. The state row is
+locked while a chunk is processed and updated in the same transaction as
+the patterns it produced. The periodic task only finds users with new
+events and fans them out across Celery workers.
 """
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from celery import shared_task
+from celery import group, shared_task
 
 from backend.database import SessionLocal
 from backend.logging_config import get_logger
-from backend.ml.pattern_detector import AdvancedPatternDetector
-from database.models import Event, Pattern, User
+from backend.ml.event_tokens import SEQUENCE_SEPARATOR, event_key
+from database.models import Event, Pattern, PatternDetectionState, TemporalPattern
 
 logger = get_logger(__name__)
 
+# Events read per query/transaction
+CHUNK_SIZE = 5000
+
+# Events newer than this are left for the next run, so transactions that
+# commit slightly out of timestamp order are not skipped by the watermark
+WATERMARK_LAG = timedelta(seconds=60)
+
+# Consecutive events forming a sequence, and the largest gap within one
+SEQUENCE_LENGTH = 3
+SEQUENCE_MAX_GAP = timedelta(minutes=5)
+
+# Occurrences before a sequence is stored as a TemporalPattern
+MIN_SEQUENCE_FREQUENCY = 3
+
+# Candidate sequences kept in the rolling state per user
+MAX_PENDING_SEQUENCES = 1000
+
+# Longest value that fits Pattern.file_extension
+MAX_EXTENSION_LENGTH = 20
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Make a timestamp timezone-aware, treating naive values as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _file_extension(file_path: Optional[str]) -> str:
+    """Get the lowercase extension of a file path ('' if none)."""
+    if not file_path:
+        return ''
+    extension = os.path.splitext(file_path)[1].lower()
+    return extension if len(extension) > 1 and len(extension) <= MAX_EXTENSION_LENGTH else ''
+
+
+def aggregate_events(
+    rows: List[Tuple[Any, datetime, str, Optional[str], Optional[str]]],
+    tail: List[List[Any]]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]], List[List[Any]]]:
+    """
+    Aggregate a chunk of one user's events.
+    
+    Args:
+        rows: (id, timestamp, event_type, file_path, tool) in timestamp order
+        tail: Last events of the previous chunk as [key, ISO timestamp, extension]
+    
+    Returns:
+        Tuple of (extension stats, sequence stats, new tail). Extension stats
+        map each file extension to its count, tools and last use; sequence
+        stats map each sequence key to its count, summed step gap (seconds)
+        and file extensions.
+    """
+    extensions: Dict[str, Dict[str, Any]] = {}
+    sequences: Dict[str, Dict[str, Any]] = {}
+    window = [(key, _as_utc(datetime.fromisoformat(ts)), ext) for key, ts, ext in tail]
+    
+    for _, timestamp, event_type, file_path, tool in rows:
+        timestamp = _as_utc(timestamp)
+        extension = _file_extension(file_path)
+        
+        if extension:
+            stats = extensions.setdefault(extension, {'count': 0, 'tools': set(), 'last_used': timestamp})
+            stats['count'] += 1
+            stats['last_used'] = max(stats['last_used'], timestamp)
+            if tool:
+                stats['tools'].add(tool)
+        
+        # Consecutive events close together form a sequence
+        if window and timestamp - window[-1][1] > SEQUENCE_MAX_GAP:
+            window = []
+        window.append((event_key({'eventType': event_type, 'appId': tool or 'unknown'}), timestamp, extension))
+        
+        if len(window) >= SEQUENCE_LENGTH:
+            steps = window[-SEQUENCE_LENGTH:]
+            key = SEQUENCE_SEPARATOR.join(step[0] for step in steps)
+            stats = sequences.setdefault(key, {'count': 0, 'gap_total': 0.0, 'files': []})
+            stats['count'] += 1
+            stats['gap_total'] += (steps[-1][1] - steps[0][1]).total_seconds() / (SEQUENCE_LENGTH - 1)
+            for step in steps:
+                if step[2] and step[2] not in stats['files']:
+                    stats['files'].append(step[2])
+        
+        window = window[-(SEQUENCE_LENGTH - 1):]
+    
+    new_tail = [[key, ts.isoformat(), ext] for key, ts, ext in window]
+    return extensions, sequences, new_tail
+
+
+def _lock_state(db: Session, user_id: UUID, initial_watermark: datetime) -> Optional[PatternDetectionState]:
+    """Lock the user's state row, creating it on the first run.
+    
+    Returns None if another worker is processing the user.
+    """
+    state = db.query(PatternDetectionState).filter(
+        PatternDetectionState.user_id == user_id
+    ).with_for_update(skip_locked=True).one_or_none()
+    if state is not None:
+        return state
+    
+    state = PatternDetectionState(
+        user_id=user_id,
+        watermark_timestamp=initial_watermark,
+        events_processed=0,
+        rolling_state={},
+    )
+    db.add(state)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Exists but locked by another worker
+        db.rollback()
+        return None
+    return state
+
+
+def _next_chunk(db: Session, state: PatternDetectionState, upper_bound: datetime, chunk_size: int) -> list:
+    """Read the next events after the state's watermark."""
+    query = select(
+        Event.id, Event.timestamp, Event.event_type, Event.file_path, Event.tool
+    ).where(
+        Event.user_id == state.user_id,
+        Event.timestamp <= upper_bound,
+    )
+    
+    if state.watermark_event_id is None:
+        query = query.where(Event.timestamp > state.watermark_timestamp)
+    else:
+        query = query.where(or_(
+            Event.timestamp > state.watermark_timestamp,
+            and_(Event.timestamp == state.watermark_timestamp, Event.id > state.watermark_event_id),
+        ))
+    
+    return db.execute(query.order_by(Event.timestamp, Event.id).limit(chunk_size)).all()
+
+
+def _apply_extension_stats(db: Session, user_id: UUID, extensions: Dict[str, Dict[str, Any]]) -> Tuple[int, int]:
+    """Add extension stats to the user's Pattern records."""
+    if not extensions:
+        return 0, 0
+    
+    # Batch load existing patterns to avoid N+1 queries
+    existing_patterns = {
+        p.file_extension: p
+        for p in db.query(Pattern).filter(
+            Pattern.user_id == user_id,
+            Pattern.file_extension.in_(list(extensions))
+        ).all()
+    }
+    
+    created = updated = 0
+    for file_extension, stats in extensions.items():
+        pattern = existing_patterns.get(file_extension)
+        if pattern:
+            pattern.count = (pattern.count or 0) + stats['count']
+            if pattern.last_used is None or _as_utc(pattern.last_used) < stats['last_used']:
+                pattern.last_used = stats['last_used']
+            pattern.tools = sorted(set(pattern.tools or []) | stats['tools'])
+            updated += 1
+        else:
+            db.add(Pattern(
+                user_id=user_id,
+                file_extension=file_extension,
+                count=stats['count'],
+                last_used=stats['last_used'],
+                tools=sorted(stats['tools']),
+            ))
+            created += 1
+    
+    return created, updated
+
+
+def _apply_sequence_stats(
+    db: Session,
+    user_id: UUID,
+    sequences: Dict[str, Dict[str, Any]],
+    pending: Dict[str, List[Any]]
+) -> int:
+    """Add sequence stats to TemporalPattern records or the pending candidates.
+    
+    Returns:
+        Number of TemporalPattern records created
+    """
+    if not sequences:
+        return 0
+    
+    existing = {
+        p.sequence: p
+        for p in db.query(TemporalPattern).filter(
+            TemporalPattern.user_id == user_id,
+            TemporalPattern.sequence.in_(list(sequences))
+        ).all()
+    }
+    
+    created = 0
+    for key, stats in sequences.items():
+        pattern = existing.get(key)
+        if pattern is None:
+            count, gap_total, files = pending.pop(key, [0, 0.0, []])
+            count += stats['count']
+            gap_total += stats['gap_total']
+            files = files + [f for f in stats['files'] if f not in files]
+            if count < MIN_SEQUENCE_FREQUENCY:
+                pending[key] = [count, gap_total, files]
+                continue
+            db.add(TemporalPattern(
+                user_id=user_id,
+                sequence=key,
+                count=count,
+                avg_time_gap=gap_total / count,
+                files=files,
+            ))
+            created += 1
+        else:
+            previous = pattern.count or 0
+            total = previous + stats['count']
+            pattern.avg_time_gap = ((pattern.avg_time_gap or 0.0) * previous + stats['gap_total']) / total
+            pattern.count = total
+            files = list(pattern.files or [])
+            pattern.files = files + [f for f in stats['files'] if f not in files]
+    
+    # Keep only the most frequent candidates
+    if len(pending) > MAX_PENDING_SEQUENCES:
+        keep = sorted(pending, key=lambda k: pending[k][0], reverse=True)[:MAX_PENDING_SEQUENCES]
+        for key in set(pending) - set(keep):
+            del pending[key]
+    
+    return created
+
+
+def process_user_events(
+    db: Session,
+    user_id: Union[str, UUID],
+    hours_back: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    now: Optional[datetime] = None,
+    lag_seconds: float = WATERMARK_LAG.total_seconds()
+) -> Dict[str, Any]:
+    """
+    Process a user's new events since their watermark.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        hours_back: How far back the first run for a user starts
+        chunk_size: Events read and committed per transaction
+        now: Current time (defaults to utcnow)
+        lag_seconds: Leave events newer than this for the next run
+    
+    Returns:
+        Dict with processing results
+    """
+    user_id = user_id if isinstance(user_id, UUID) else UUID(user_id)
+    now = now or datetime.utcnow()
+    upper_bound = now - timedelta(seconds=lag_seconds)
+    result = {
+        'processed': 0,
+        'patterns_created': 0,
+        'patterns_updated': 0,
+        'sequences_created': 0,
+        'chunks': 0,
+        'skipped': False,
+    }
+    
+    while True:
+        state = _lock_state(db, user_id, now - timedelta(hours=hours_back))
+        if state is None:
+            logger.info(f"Pattern detection for user {user_id} is already running, skipping")
+            result['skipped'] = True
+            break
+        
+        rows = _next_chunk(db, state, upper_bound, chunk_size)
+        if not rows:
+            db.commit()
+            break
+        
+        rolling = dict(state.rolling_state or {})
+        pending = dict(rolling.get('pending', {}))
+        extensions, sequences, tail = aggregate_events(rows, rolling.get('tail', []))
+        
+        created, updated = _apply_extension_stats(db, user_id, extensions)
+        result['patterns_created'] += created
+        result['patterns_updated'] += updated
+        result['sequences_created'] += _apply_sequence_stats(db, user_id, sequences, pending)
+        
+        # Advance the watermark in the same transaction as the patterns
+        last_id, last_timestamp = rows[-1][0], rows[-1][1]
+        state.watermark_timestamp = last_timestamp
+        state.watermark_event_id = last_id
+        state.events_processed = (state.events_processed or 0) + len(rows)
+        state.rolling_state = {'tail': tail, 'pending': pending}
+        db.commit()
+        
+        result['processed'] += len(rows)
+        result['chunks'] += 1
+        if len(rows) < chunk_size:
+            break
+    
+    return result
+
+
+def find_users_with_new_events(
+    db: Session,
+    hours_back: int = 1,
+    now: Optional[datetime] = None,
+    lag_seconds: float = WATERMARK_LAG.total_seconds()
+) -> List[str]:
+    """
+    Find users with events after their watermark.
+    
+    Users without a watermark only count events from the last hours_back hours.
+    
+    Args:
+        db: Database session
+        hours_back: Look-back window for users seen for the first time
+        now: Current time (defaults to utcnow)
+        lag_seconds: Ignore events newer than this
+    
+    Returns:
+        List of user IDs
+    """
+    now = now or datetime.utcnow()
+    cutoff_time = now - timedelta(hours=hours_back)
+    query = select(Event.user_id).outerjoin(
+        PatternDetectionState, PatternDetectionState.user_id == Event.user_id
+    ).where(
+        Event.timestamp > func.coalesce(PatternDetectionState.watermark_timestamp, cutoff_time),
+        Event.timestamp <= now - timedelta(seconds=lag_seconds),
+    ).distinct()
+    return [str(user_id) for user_id in db.execute(query).scalars()]
+
+
+@shared_task(name='pattern_detection.process_user_events', bind=True)
+def process_user_events_task(
+    self,
+    user_id: str,
+    hours_back: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    lag_seconds: float = WATERMARK_LAG.total_seconds()
+):
+    """
+    Process new events for one user.
+    
+    Args:
+        user_id: User ID to process events for
+        hours_back: How far back the first run for this user starts
+        chunk_size: Events per chunk
+        lag_seconds: Leave events newer than this for the next run
+    
+    Returns:
+        Dict with processing results
+    """
+    db = SessionLocal()
+    try:
+        result = process_user_events(
+            db, user_id, hours_back=hours_back, chunk_size=chunk_size, lag_seconds=lag_seconds
+        )
+        logger.info(
+            f"Pattern detection for user {user_id}: {result['processed']} events processed, "
+            f"{result['patterns_created']} patterns created, {result['patterns_updated']} patterns updated"
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Pattern detection failed for user {user_id}: {e}", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 
 @shared_task(name='pattern_detection.process_events', bind=True)
-def process_events_task(self, user_id: str = None, hours_back: int = 1):
+def process_events_task(
+    self,
+    user_id: str = None,
+    hours_back: int = 1,
+    fan_out: bool = True,
+    lag_seconds: float = WATERMARK_LAG.total_seconds()
+):
     """
     Process events and detect patterns.
     
     Args:
         user_id: Optional user ID to process events for. If None, processes all users.
-        hours_back: Number of hours to look back for events (default: 1 hour)
+        hours_back: Number of hours to look back for users without a watermark (default: 1 hour)
+        fan_out: Dispatch one Celery task per user instead of processing them here
+        lag_seconds: Leave events newer than this for the next run
     
     Returns:
         Dict with processing results
     """
+    if user_id:
+        return process_user_events_task(user_id=user_id, hours_back=hours_back, lag_seconds=lag_seconds)
+    
     db = SessionLocal()
     try:
-        detector = AdvancedPatternDetector()
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours_back)
+        user_ids = find_users_with_new_events(db, hours_back=hours_back, lag_seconds=lag_seconds)
         
-        # Get events to process
-        query = db.query(Event).filter(Event.timestamp >= cutoff_time)
-        if user_id:
-            query = query.filter(Event.user_id == user_id)
-        
-        events = query.order_by(Event.timestamp).all()
-        
-        if not events:
-            logger.info(f"No events found in the last {hours_back} hour(s)")
+        if not user_ids:
+            logger.info("No users with new events")
             return {
                 'processed': 0,
                 'patterns_created': 0,
                 'patterns_updated': 0,
+                'users_processed': 0,
             }
         
-        # Group events by user
-        events_by_user: Dict[str, List[Event]] = {}
-        for event in events:
-            if event.user_id not in events_by_user:
-                events_by_user[event.user_id] = []
-            events_by_user[event.user_id].append(event)
+        if fan_out:
+            group(
+                process_user_events_task.s(uid, hours_back, lag_seconds=lag_seconds) for uid in user_ids
+            ).apply_async()
+            logger.info(f"Pattern detection dispatched for {len(user_ids)} users")
+            return {'users_dispatched': len(user_ids)}
         
-        total_processed = 0
-        patterns_created = 0
-        patterns_updated = 0
-        
-        # Process each user's events
-        for user_id, user_events in events_by_user.items():
+        totals = {'processed': 0, 'patterns_created': 0, 'patterns_updated': 0, 'users_processed': 0}
+        for uid in user_ids:
             try:
-                # Convert events to dict format for pattern detector
-                event_dicts = [
-                    {
-                        'filePath': event.file_path,
-                        'eventType': event.event_type,
-                        'tool': event.tool or 'unknown',
-                        'timestamp': event.timestamp.isoformat(),
-                        'metadata': event.metadata or {},
-                    }
-                    for event in user_events
-                ]
-                
-                # Detect patterns
-                patterns = detector.detect_repetitive_patterns(
-                    sequences=[event_dicts],
-                    min_frequency=3
-                )
-                
-                # Batch load existing patterns to avoid N+1 queries
-                file_extensions = [
-                    _extract_file_extension(p) for p in patterns
-                    if _extract_file_extension(p)
-                ]
-                
-                existing_patterns = {
-                    p.file_extension: p
-                    for p in db.query(Pattern).filter(
-                        Pattern.user_id == user_id,
-                        Pattern.file_extension.in_(file_extensions)
-                    ).all()
-                }
-                
-                # Update or create Pattern records
-                for pattern_data in patterns:
-                    file_extension = _extract_file_extension(pattern_data)
-                    if not file_extension:
-                        continue
-                    
-                    # Get existing pattern from batch-loaded dict
-                    pattern = existing_patterns.get(file_extension)
-                    
-                    if pattern:
-                        # Update existing pattern
-                        pattern.count += pattern_data.get('frequency', 0)
-                        pattern.last_used = datetime.utcnow()
-                        if 'tools' in pattern_data:
-                            existing_tools = set(pattern.tools or [])
-                            new_tools = set(pattern_data.get('tools', []))
-                            pattern.tools = list(existing_tools | new_tools)
-                        patterns_updated += 1
-                    else:
-                        # Create new pattern
-                        pattern = Pattern(
-                            user_id=user_id,
-                            file_extension=file_extension,
-                            count=pattern_data.get('frequency', 0),
-                            last_used=datetime.utcnow(),
-                            tools=pattern_data.get('tools', []),
-                        )
-                        db.add(pattern)
-                        patterns_created += 1
-                        # Add to dict to avoid duplicates
-                        existing_patterns[file_extension] = pattern
-                
-                total_processed += len(user_events)
-                
+                result = process_user_events(db, uid, hours_back=hours_back, lag_seconds=lag_seconds)
             except Exception as e:
-                logger.error(f"Error processing events for user {user_id}: {e}", exc_info=True)
+                logger.error(f"Error processing events for user {uid}: {e}", exc_info=True)
+                db.rollback()
                 continue
-        
-        db.commit()
+            for key in ('processed', 'patterns_created', 'patterns_updated'):
+                totals[key] += result[key]
+            totals['users_processed'] += 1
         
         logger.info(
-            f"Pattern detection completed: {total_processed} events processed, "
-            f"{patterns_created} patterns created, {patterns_updated} patterns updated"
+            f"Pattern detection completed: {totals['processed']} events processed, "
+            f"{totals['patterns_created']} patterns created, {totals['patterns_updated']} patterns updated"
         )
-        
-        return {
-            'processed': total_processed,
-            'patterns_created': patterns_created,
-            'patterns_updated': patterns_updated,
-            'users_processed': len(events_by_user),
-        }
-        
+        return totals
+    
     except Exception as e:
         logger.error(f"Pattern detection task failed: {e}", exc_info=True)
         db.rollback()
@@ -156,25 +469,6 @@ def process_events_task(self, user_id: str = None, hours_back: int = 1):
         db.close()
 
 
-def _extract_file_extension(pattern_data: Dict[str, Any]) -> str:
-    """Extract file extension from pattern data."""
-    # Try to get file extension from sequences
-    sequences = pattern_data.get('sequences', [])
-    if sequences and len(sequences) > 0:
-        first_sequence = sequences[0]
-        if first_sequence and len(first_sequence) > 0:
-            file_path = first_sequence[0].get('filePath', '')
-            if '.' in file_path:
-                return '.' + file_path.split('.')[-1]
-    
-    # Fallback: try to get from sequence_key
-    sequence_key = pattern_data.get('sequence_key', '')
-    if '.' in sequence_key:
-        return '.' + sequence_key.split('.')[-1]
-    
-    return ''
-
-
 @shared_task(name='pattern_detection.process_user_patterns', bind=True)
 def process_user_patterns_task(self, user_id: str):
     """
@@ -186,7 +480,7 @@ def process_user_patterns_task(self, user_id: str):
     Returns:
         Dict with processing results
     """
-    return process_events_task(user_id=user_id, hours_back=24)
+    return process_user_events_task(user_id=user_id, hours_back=24)
 
 
 # Manual trigger function for testing (synchronous)
@@ -194,6 +488,8 @@ def trigger_pattern_detection_sync(user_id: str = None, hours_back: int = 1):
     """
     Manually trigger pattern detection synchronously (for testing).
     
+    Processes all events up to now, without waiting for them to settle.
+    
     Args:
         user_id: Optional user ID to process
         hours_back: Hours to look back
@@ -201,7 +497,7 @@ def trigger_pattern_detection_sync(user_id: str = None, hours_back: int = 1):
     Returns:
         Processing results
     """
-    return process_events_task(user_id=user_id, hours_back=hours_back)
+    return process_events_task(user_id=user_id, hours_back=hours_back, fan_out=False, lag_seconds=0)
 
 
 # Async trigger function (for Celery)
@@ -216,4 +512,6 @@ def trigger_pattern_detection(user_id: str = None, hours_back: int = 1):
     Returns:
         Celery task result
     """
-    return process_events_task.delay(user_id=user_id, hours_back=hours_back)
+    if user_id:
+        return process_user_events_task.delay(user_id=user_id, hours_back=hours_back)
+    return process_events_task.delay(hours_back=hours_back)
@@ -3,7 +3,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from slowapi.errors import RateLimitExceeded
 
 from backend.config import settings
@@ -13,7 +14,7 @@ from backend.request_id import RequestIDMiddleware
 from backend.middleware_security import ComprehensiveSecurityMiddleware
 from backend.csrf_protection import CSRFProtectionMiddleware
 from backend.api_versioning import VersionDeprecationMiddleware
-from backend.response_middleware import APIResponseMiddleware
+from backend.response_middleware import APIResponseMiddleware, StandardJSONResponse
 from backend.guardian.middleware import GuardianMiddleware
 from backend.security import SecurityHeadersMiddleware
 try:
@@ -30,20 +31,32 @@ from backend.error_handling import (
 logger = get_logger(__name__)
 
 
-class SecurityHeadersMiddlewareClass(BaseHTTPMiddleware):
-    """Security headers middleware wrapper."""
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        headers = SecurityHeadersMiddleware.get_security_headers()
-        for key, value in headers.items():
-            response.headers[key] = value
-        return response
+class SecurityHeadersMiddlewareClass:
+    """Security headers middleware wrapper (pure ASGI)."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for key, value in SecurityHeadersMiddleware.get_security_headers().items():
+                    headers[key] = value
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
 
 
 def setup_middleware(app: FastAPI) -> None:
     """
     Configure all middleware for the FastAPI application.
     
+    Every layer is a pure ASGI middleware (no BaseHTTPMiddleware), so a
+    request passes through the stack without per-layer tasks or streams.
     Middleware order is important:
     1. Request ID (first - for tracing)
     2. Comprehensive Security (early - before CORS)
@@ -78,7 +91,7 @@ def setup_middleware(app: FastAPI) -> None:
     )
     
     # API versioning middleware (adds deprecation warnings)
-    app.middleware("http")(VersionDeprecationMiddleware())
+    app.add_middleware(VersionDeprecationMiddleware)
     
     # CSRF protection middleware (early in stack, after CORS)
     if settings.environment == "production":
@@ -86,6 +99,9 @@ def setup_middleware(app: FastAPI) -> None:
     
     # API response standardization middleware (before routes)
     app.add_middleware(APIResponseMiddleware)
+    if settings.api_response_envelope:
+        # Routes registered after this write the envelope while serializing
+        app.router.default_response_class = StandardJSONResponse
     
     # Compression middleware
     app.add_middleware(GZipMiddleware, minimum_size=1000)
@@ -4,10 +4,8 @@ Error handling middleware for FastAPI.
 Provides centralized error handling and standardized error responses.
 """
 
-from typing import Callable
-from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.error_handling import format_error_response, APIError
 from backend.logging_config import get_logger
@@ -15,41 +13,60 @@ from backend.logging_config import get_logger
 logger = get_logger(__name__)
 
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+class ErrorHandlingMiddleware:
     """
     Middleware for handling errors and standardizing error responses.
     
     Catches exceptions, formats them consistently, and logs them appropriately.
+    Exceptions raised after the response has started cannot be replaced by an
+    error response and are re-raised.
     """
     
-    async def dispatch(self, request: Request, call_next: Callable):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request and handle any errors.
         
         Args:
-            request: FastAPI request object
-            call_next: Next middleware/route handler
-            
-        Returns:
-            JSONResponse: Standardized error response or normal response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_tracking_start(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_tracking_start)
+            return
         except APIError as e:
+            if response_started:
+                raise
             # Handle API errors (already formatted)
             logger.warning(
                 f"API error: {e.error_code} - {e.message}",
                 extra={"error_code": e.error_code, "status_code": e.status_code}
             )
             response, status_code = format_error_response(e, include_traceback=False)
-            return JSONResponse(status_code=status_code, content=response)
         except Exception as e:
+            if response_started:
+                raise
             # Handle unexpected errors
             logger.error(
-                f"Unexpected error in {request.url.path}: {e}",
+                f"Unexpected error in {scope['path']}: {e}",
                 exc_info=True,
-                extra={"path": request.url.path, "method": request.method}
+                extra={"path": scope["path"], "method": scope["method"]}
             )
             response, status_code = format_error_response(e, include_traceback=False)
-            return JSONResponse(status_code=status_code, content=response)
+        
+        await JSONResponse(status_code=status_code, content=response)(scope, receive, send)
@@ -5,9 +5,8 @@ FastAPI middleware to track request latency and performance metrics.
 """
 
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.monitoring.performance import get_performance_monitor
 
@@ -23,39 +22,48 @@ def get_logger():
     return logger
 
 
-class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
-    """Middleware to track API performance."""
+class PerformanceMonitoringMiddleware:
+    """Middleware to track API performance (pure ASGI)."""
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Track request latency and performance."""
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate latency
-        latency_ms = (time.time() - start_time) * 1000
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Record metrics
-        monitor = get_performance_monitor()
-        endpoint = request.url.path
-        method = request.method
-        
-        monitor.record_latency(
-            endpoint=endpoint,
-            method=method,
-            latency_ms=latency_ms,
-            status_code=response.status_code,
-        )
-        
-        # Add performance headers
-        response.headers["X-Response-Time-Ms"] = str(round(latency_ms, 2))
+        start_time = time.time()
         
-        # Log slow requests
-        if latency_ms > 500:
-            get_logger().warning(
-                f"Slow request: {method} {endpoint} took {latency_ms:.2f}ms "
-                f"(status: {response.status_code})"
-            )
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                # Latency up to the response headers, as seen by the client
+                latency_ms = (time.time() - start_time) * 1000
+                status_code = message["status"]
+                
+                # Record metrics
+                monitor = get_performance_monitor()
+                endpoint = scope["path"]
+                method = scope["method"]
+                
+                monitor.record_latency(
+                    endpoint=endpoint,
+                    method=method,
+                    latency_ms=latency_ms,
+                    status_code=status_code,
+                )
+                
+                # Add performance headers
+                MutableHeaders(scope=message)["X-Response-Time-Ms"] = str(round(latency_ms, 2))
+                
+                # Log slow requests
+                if latency_ms > 500:
+                    get_logger().warning(
+                        f"Slow request: {method} {endpoint} took {latency_ms:.2f}ms "
+                        f"(status: {status_code})"
+                    )
+            await send(message)
         
-        return response
+        # Process request
+        await self.app(scope, receive, send_with_timing)
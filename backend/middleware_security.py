@@ -4,8 +4,10 @@ Integrates security hardening into FastAPI middleware stack
 """
 
 from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 from backend.security_hardening import (
     SecurityMiddleware,
@@ -23,7 +25,7 @@ from backend.config import settings
 logger = logging.getLogger(__name__)
 
 
-class ComprehensiveSecurityMiddleware(BaseHTTPMiddleware):
+class ComprehensiveSecurityMiddleware:
     """
     Comprehensive security middleware that combines:
     - IP blocking
@@ -31,26 +33,54 @@ class ComprehensiveSecurityMiddleware(BaseHTTPMiddleware):
     - Request validation
     - Security logging
     - Performance optimization
+    
+    Implemented as a pure ASGI middleware; checks run on the request line
+    and headers before the app is called, and headers are added to the
+    response start message.
     """
     
-    async def dispatch(self, request: Request, call_next):
+    # Response headers added to every checked request
+    SECURITY_HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": (
+            "geolocation=(), microphone=(), camera=(), "
+            "payment=(), usb=(), magnetometer=(), "
+            "gyroscope=(), accelerometer=()"
+        ),
+    }
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request through security checks."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope, receive)
+        
         # Get client IP
         client_ip = IPBlockingMiddleware.get_client_ip(request)
         request.state.client_ip = client_ip
         
         # Skip security checks for health check endpoints
         if request.url.path in ["/health", "/api/health", "/metrics"]:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send)
+            return
         
         # Check IP blocking
         if IPBlockingMiddleware.is_ip_blocked(client_ip):
             logger.warning(f"Blocked request from IP: {client_ip}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=403,
                 content={"error": "Access denied"}
             )
+            await response(scope, receive, send)
+            return
         
         # Scan for threats
         threats = ThreatDetection.scan_request(request)
@@ -80,50 +110,36 @@ class ComprehensiveSecurityMiddleware(BaseHTTPMiddleware):
                 extra={"ip": client_ip, "threats": threats}
             )
             
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=400,
                 content={"error": "Invalid request detected"}
             )
+            await response(scope, receive, send)
+            return
+        
+        # Add security headers
+        security_headers = dict(self.SECURITY_HEADERS)
+        
+        # Add HSTS header for HTTPS requests
+        if request.url.scheme == "https":
+            security_headers["Strict-Transport-Security"] = (
+                "max-age=31536000; includeSubDomains; preload"
+            )
+        
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Record success (gradually reduces failure count)
+                IPBlockingMiddleware.record_success(client_ip)
+                
+                headers = MutableHeaders(scope=message)
+                for header, value in security_headers.items():
+                    headers[header] = value
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            
-            # Record success (gradually reduces failure count)
-            IPBlockingMiddleware.record_success(client_ip)
-            
-            # Add security headers
-            security_headers = {
-                "X-Content-Type-Options": "nosniff",
-                "X-Frame-Options": "DENY",
-                "X-XSS-Protection": "1; mode=block",
-                "Referrer-Policy": "strict-origin-when-cross-origin",
-                "Permissions-Policy": (
-                    "geolocation=(), microphone=(), camera=(), "
-                    "payment=(), usb=(), magnetometer=(), "
-                    "gyroscope=(), accelerometer=()"
-                ),
-            }
-            
-            # Add HSTS header for HTTPS requests
-            if request.url.scheme == "https":
-                security_headers["Strict-Transport-Security"] = (
-                    "max-age=31536000; includeSubDomains; preload"
-                )
-            
-            for header, value in security_headers.items():
-                response.headers[header] = value
-            
-            # Optimize response if it's JSON
-            if isinstance(response, JSONResponse) or response.headers.get("content-type", "").startswith("application/json"):
-                # Add compression if client accepts it
-                accept_encoding = request.headers.get("Accept-Encoding", "")
-                if "gzip" in accept_encoding:
-                    # Response compression will be handled by FastAPI's GZipMiddleware
-                    pass
-            
-            return response
-            
+            await self.app(scope, receive, send_with_headers)
+        
         except Exception as e:
             # Record failure on exception
             IPBlockingMiddleware.record_failure(client_ip)
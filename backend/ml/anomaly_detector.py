@@ -9,16 +9,25 @@ from sklearn.metrics import precision_score, recall_score
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
-from backend.ml.base import BaseMLModel, FloyoDataProcessor
+from backend.ml.base import BaseMLModel, FloyoDataProcessor, training_watermark
 from database.models import Pattern, Event
 from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Incremental training adds this many trees per update, fit on the patterns
+# updated since the last one; past MAX_ESTIMATORS a full retrain is required
+INCREMENTAL_ESTIMATORS = 20
+MAX_ESTIMATORS = 300
+MIN_INCREMENTAL_SAMPLES = 20
+
 
 class PatternAnomalyDetector(BaseMLModel):
     """Isolation Forest model for detecting unusual patterns."""
     
+    supports_incremental = True
+    STATE_ATTRIBUTES = ["scaler"]
+    
     def __init__(self, model_version: int = 1, contamination: float = 0.1):
         super().__init__("pattern_anomaly_detector", model_version)
         self.contamination = contamination
@@ -81,6 +90,7 @@ class PatternAnomalyDetector(BaseMLModel):
             
             self.is_trained = True
             self.last_trained_at = datetime.utcnow()
+            self.training_watermark = training_watermark(patterns_df.get("updated_at"))
             
             logger.info(f"PatternAnomalyDetector trained. Detected {anomaly_count} anomalies")
             
@@ -90,6 +100,69 @@ class PatternAnomalyDetector(BaseMLModel):
             logger.error(f"Error training PatternAnomalyDetector: {e}", exc_info=True)
             return {"error": str(e)}
     
+    def partial_train(self, db: Session, since: datetime, user_id: Optional[str] = None,
+                      **kwargs) -> Dict[str, Any]:
+        """Add trees fit on patterns updated since ``since``.
+        
+        The scaler is kept as fitted by the last full training so existing
+        trees and new ones see features on the same scale.
+        
+        Args:
+            db: Database session
+            since: Training watermark of the current model
+            user_id: Optional user ID to filter training data
+            
+        Returns:
+            Dictionary of training metrics
+        """
+        if not self.is_trained:
+            return {"error": "Model not trained", "requires_full_retrain": True}
+        
+        n_trees = len(self.model.estimators_)
+        if n_trees + INCREMENTAL_ESTIMATORS > MAX_ESTIMATORS:
+            return {"error": f"Forest has {n_trees} trees", "requires_full_retrain": True}
+        
+        try:
+            patterns_df = FloyoDataProcessor.patterns_to_dataframe(db, user_id, since=since)
+            if patterns_df is None:
+                return {"error": "Could not load patterns"}
+            
+            features_list = []
+            for _, pattern in patterns_df.iterrows():
+                features = self._extract_features(pattern, db)
+                if features is not None:
+                    features_list.append(features)
+            
+            # Too few updated patterns: leave the watermark so they are used next time
+            if len(features_list) < MIN_INCREMENTAL_SAMPLES:
+                return {"skipped": True, "new_samples": len(features_list)}
+            
+            X_scaled = self.scaler.transform(pd.DataFrame(features_list))
+            
+            self.model.set_params(warm_start=True, n_estimators=n_trees + INCREMENTAL_ESTIMATORS)
+            try:
+                self.model.fit(X_scaled)
+            finally:
+                self.model.set_params(warm_start=False)
+            
+            anomaly_count = int(np.sum(self.model.predict(X_scaled) == -1))
+            
+            self.training_watermark = training_watermark(patterns_df.get("updated_at"), since)
+            self.last_trained_at = datetime.utcnow()
+            self.training_metrics = {
+                **self.training_metrics,
+                "new_samples": len(features_list),
+                "anomalies_detected": anomaly_count,
+                "n_estimators": len(self.model.estimators_),
+            }
+            
+            logger.info(f"PatternAnomalyDetector updated with {len(features_list)} patterns")
+            return self.training_metrics
+            
+        except Exception as e:
+            logger.error(f"Error updating PatternAnomalyDetector: {e}", exc_info=True)
+            return {"error": str(e)}
+    
     def _extract_features(self, pattern: pd.Series, db: Session) -> Optional[Dict[str, float]]:
         """Extract features from a pattern."""
         try:
@@ -145,40 +218,7 @@ class PatternAnomalyDetector(BaseMLModel):
         Returns:
             Dictionary with anomaly detection results
         """
-        if not self.is_trained:
-            logger.warning("PatternAnomalyDetector not trained")
-            return {
-                "is_anomaly": False,
-                "anomaly_score": 0.0,
-                "error": "Model not trained"
-            }
-        
-        try:
-            # Extract features
-            features = self._extract_detection_features(pattern_data, db)
-            if features is None:
-                return {"is_anomaly": False, "anomaly_score": 0.0}
-            
-            # Scale features
-            features_array = np.array([list(features.values())])
-            features_scaled = self.scaler.transform(features_array)
-            
-            # Predict
-            prediction = self.model.predict(features_scaled)[0]
-            anomaly_score = self.model.score_samples(features_scaled)[0]
-            
-            is_anomaly = prediction == -1
-            
-            return {
-                "is_anomaly": bool(is_anomaly),
-                "anomaly_score": float(anomaly_score),
-                "confidence": "high" if abs(anomaly_score) > 0.5 else "medium" if abs(anomaly_score) > 0.2 else "low",
-                "recommendation": "create_workflow" if is_anomaly else "normal_pattern"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error detecting anomaly: {e}")
-            return {"is_anomaly": False, "anomaly_score": 0.0, "error": str(e)}
+        return self.predict_batch([pattern_data])[0]
     
     def _extract_detection_features(self, pattern_data: Dict[str, Any], db: Session) -> Optional[Dict[str, float]]:
         """Extract features for anomaly detection."""
@@ -198,3 +238,54 @@ class PatternAnomalyDetector(BaseMLModel):
         """Predict if pattern is anomalous."""
         # This is a wrapper for detect_anomaly
         return self.detect_anomaly(pattern_data, None)
+    
+    def predict_batch(self, patterns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score many patterns with a single scaler and forest pass.
+        
+        Args:
+            patterns: List of pattern dictionaries
+            
+        Returns:
+            List of anomaly detection results, one per pattern
+        """
+        if not self.is_trained:
+            logger.warning("PatternAnomalyDetector not trained")
+            return [{
+                "is_anomaly": False,
+                "anomaly_score": 0.0,
+                "error": "Model not trained"
+            } for _ in patterns]
+        
+        if not patterns:
+            return []
+        
+        try:
+            rows = [self._extract_detection_features(p, None) for p in patterns]
+            valid = [i for i, row in enumerate(rows) if row is not None]
+            results: List[Dict[str, Any]] = [{"is_anomaly": False, "anomaly_score": 0.0} for _ in patterns]
+            if not valid:
+                return results
+            
+            # Scale features
+            features_array = np.array([list(rows[i].values()) for i in valid], dtype=float)
+            features_scaled = self.scaler.transform(features_array)
+            
+            # Predict
+            predictions = self.model.predict(features_scaled)
+            anomaly_scores = self.model.score_samples(features_scaled)
+            
+            for row, i in enumerate(valid):
+                is_anomaly = predictions[row] == -1
+                anomaly_score = float(anomaly_scores[row])
+                results[i] = {
+                    "is_anomaly": bool(is_anomaly),
+                    "anomaly_score": anomaly_score,
+                    "confidence": "high" if abs(anomaly_score) > 0.5 else "medium" if abs(anomaly_score) > 0.2 else "low",
+                    "recommendation": "create_workflow" if is_anomaly else "normal_pattern"
+                }
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error detecting anomaly: {e}")
+            return [{"is_anomaly": False, "anomaly_score": 0.0, "error": str(e)} for _ in patterns]
@@ -4,11 +4,13 @@ from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from backend.database import get_db
 from backend.auth.utils import get_current_user
 from backend.ml.model_manager import ModelManager
+from backend.ml.model_registry import get_model_registry
+from backend.ml.batching import get_prediction_batcher
 from backend.ml.training_pipeline import TrainingPipeline
 from backend.ml.workflow_recommender import WorkflowRecommender
 from backend.ml.anomaly_detector import PatternAnomalyDetector
@@ -129,15 +131,17 @@ async def train_all_models(
     """Train all ML models."""
     try:
         pipeline = TrainingPipeline(db, ModelManager(db))
+        run_id = str(uuid4())
         
-        # Train in background
+        # Train in background, one worker process per model
         def train():
-            pipeline.train_all_models()
+            pipeline.train_all_models(parallel=True, run_id=run_id)
         
         background_tasks.add_task(train)
         
         return {
             "status": "training_started",
+            "run_id": run_id,
             "message": "All models training started in background"
         }
     except Exception as e:
@@ -145,6 +149,26 @@ async def train_all_models(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/models/training/{run_id}")
+async def get_training_progress(
+    run_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Get progress of a training run."""
+    try:
+        models = ModelManager(db).get_training_progress(run_id)
+        if not models:
+            raise HTTPException(status_code=404, detail="Training run not found")
+        
+        return {"run_id": run_id, "models": models}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting training progress: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Prediction Endpoints
 
 @router.post("/predict")
@@ -164,8 +188,10 @@ async def make_prediction(
         if not model.is_trained:
             raise HTTPException(status_code=400, detail=f"Model {request.model_type} not trained")
         
-        # Make prediction
-        prediction = model.predict(request.input_features)
+        # Make prediction, batched with concurrent requests for this model
+        prediction = await get_prediction_batcher().predict(
+            request.model_type, model, request.input_features
+        )
         
         # Log prediction
         model_record = db.query(MLModel).filter(
@@ -202,7 +228,7 @@ async def optimized_prediction(
     """Make an optimized prediction with caching."""
     try:
         optimizer = ModelOptimizer(db)
-        result = optimizer.optimize_prediction(model_type, input_data)
+        result = await optimizer.optimize_prediction_async(model_type, input_data)
         return result
     except Exception as e:
         logger.error(f"Error in optimized prediction: {e}")
@@ -407,6 +433,30 @@ async def get_system_metrics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics")
+async def get_prediction_metrics(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get prediction server latency and batch-size histograms."""
+    try:
+        return get_prediction_batcher().get_stats()
+    except Exception as e:
+        logger.error(f"Error getting prediction metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/registry")
+async def get_registry_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get model registry cache, memory and load-time metrics."""
+    try:
+        return get_model_registry().get_stats()
+    except Exception as e:
+        logger.error(f"Error getting registry stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Evaluation Endpoints
 
 @router.get("/evaluate/{model_type}")
@@ -0,0 +1,385 @@
+"""Pickle-free model artifacts.
+
+A model is stored as two files sharing a prefix:
+
+- ``<prefix>.arrays``: every numeric array in the model, concatenated and
+  64-byte aligned. On load the file is memory-mapped once and each array is
+  a read-only view into it, so large factor matrices are paged in on demand
+  and shared between processes through the page cache.
+- ``<prefix>.manifest.json``: the object graph as JSON with references into
+  the array file, plus the array table and a SHA-256 of the array file.
+
+Only plain data, numpy arrays, and the classes listed in ``ALLOWED_CLASSES``
+(the scikit-learn estimators the models use, their Cython trees, scipy
+sparse matrices) can be stored. Loading resolves only those classes, creates
+them with ``__new__`` and restores their state with ``__setstate__``, so no
+constructor or other callable named by a manifest is ever run and a
+tampered artifact cannot execute code the way a pickle can.
+"""
+
+import hashlib
+import importlib
+import json
+import math
+import mmap
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_FORMAT = "floyo-artifact/1"
+ALIGNMENT = 64
+
+# Modules an allowed class must be defined in
+ALLOWED_MODULES = ("sklearn.", "scipy.sparse.")
+
+# Classes that may be reconstructed on load: the estimators used by the
+# models in this package, the helper objects they hold, and sparse matrices
+ALLOWED_CLASSES = frozenset({
+    "sklearn.decomposition._nmf:NMF",
+    "sklearn.dummy:DummyRegressor",
+    "sklearn.ensemble._forest:RandomForestClassifier",
+    "sklearn.ensemble._gb:GradientBoostingRegressor",
+    "sklearn.ensemble._iforest:IsolationForest",
+    "sklearn.preprocessing._data:StandardScaler",
+    "sklearn.preprocessing._label:LabelEncoder",
+    "sklearn.tree._classes:DecisionTreeClassifier",
+    "sklearn.tree._classes:DecisionTreeRegressor",
+    "sklearn.tree._classes:ExtraTreeRegressor",
+    "sklearn.tree._tree:Tree",
+    "sklearn._loss.loss:HalfSquaredError",
+    "sklearn._loss._loss:CyHalfSquaredError",
+    "sklearn._loss.link:IdentityLink",
+    "sklearn._loss.link:Interval",
+    "scipy.sparse._coo:coo_matrix",
+    "scipy.sparse._csc:csc_matrix",
+    "scipy.sparse._csr:csr_matrix",
+    "scipy.sparse._lil:lil_matrix",
+})
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact cannot be written, or is missing, corrupt or untrusted."""
+
+
+def manifest_path(prefix: Path) -> Path:
+    return prefix.with_name(prefix.name + ".manifest.json")
+
+
+def arrays_path(prefix: Path) -> Path:
+    return prefix.with_name(prefix.name + ".arrays")
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+@lru_cache(maxsize=None)
+def _resolve_class(name: str) -> type:
+    if name not in ALLOWED_CLASSES:
+        raise ArtifactError(f"Refusing to load class {name}")
+    # Only a class defined directly in its module, never an attribute path
+    module_name, _, class_name = name.partition(":")
+    obj = getattr(importlib.import_module(module_name), class_name, None)
+    if (
+        not isinstance(obj, type)
+        or not obj.__module__.startswith(ALLOWED_MODULES)
+        or _qualified_name(obj) != name
+    ):
+        raise ArtifactError(f"Refusing to load class {name}")
+    return obj
+
+
+class _Encoder:
+    """Turns an object graph into JSON plus a list of arrays."""
+
+    def __init__(self):
+        self.arrays: List[np.ndarray] = []
+        self._array_ids: Dict[int, int] = {}
+        self._random_state_ids: Dict[int, int] = {}
+
+    def encode(self, obj: Any) -> Any:
+        if obj is None or isinstance(obj, (bool, str)):
+            return obj
+        if isinstance(obj, (int, float)) and not isinstance(obj, np.generic):
+            return obj if not isinstance(obj, float) or np.isfinite(obj) else {"__float__": repr(obj)}
+        if isinstance(obj, np.generic):
+            return self.encode(obj.item())
+        if isinstance(obj, np.ndarray):
+            return self._encode_array(obj)
+        if isinstance(obj, np.dtype):
+            return {"__dtype__": np.lib.format.dtype_to_descr(obj)}
+        if isinstance(obj, list):
+            return [self.encode(item) for item in obj]
+        if isinstance(obj, tuple):
+            return {"__tuple__": [self.encode(item) for item in obj]}
+        if isinstance(obj, dict):
+            return {"__dict__": [[self.encode(k), self.encode(v)] for k, v in obj.items()]}
+        if isinstance(obj, uuid.UUID):
+            return {"__uuid__": str(obj)}
+        if isinstance(obj, datetime):
+            return {"__datetime__": obj.isoformat()}
+        if isinstance(obj, np.random.RandomState):
+            # Estimators share one generator across sub-estimators (e.g.
+            # gradient boosting trees); keep it shared, as pickle would
+            key = self._random_state_ids.get(id(obj))
+            if key is not None:
+                return {"__shared_random_state__": key}
+            key = self._random_state_ids[id(obj)] = len(self._random_state_ids)
+            return {"__random_state__": self.encode(obj.get_state()), "id": key}
+        if isinstance(obj, type):
+            if _qualified_name(obj) not in ALLOWED_CLASSES:
+                raise ArtifactError(f"Cannot store class {_qualified_name(obj)}")
+            return {"__class__": _qualified_name(obj)}
+
+        cls = type(obj)
+        if _qualified_name(cls) not in ALLOWED_CLASSES:
+            # Saving fails rather than writing an artifact that cannot be loaded
+            raise ArtifactError(f"Cannot store object of type {_qualified_name(cls)}")
+
+        if hasattr(obj, "__dict__") and not hasattr(cls, "__reduce_cython__"):
+            state = obj.__getstate__() if hasattr(obj, "__getstate__") else obj.__dict__
+            return {"__object__": _qualified_name(cls), "state": self.encode(state)}
+
+        # Extension types (e.g. sklearn's Tree) describe themselves via __reduce__
+        reduced = obj.__reduce__()
+        constructor, args = reduced[0], reduced[1]
+        if constructor is not cls:
+            raise ArtifactError(f"Cannot store object of type {_qualified_name(cls)}")
+        return {
+            "__reduce__": _qualified_name(cls),
+            "args": self.encode(tuple(args)),
+            "state": self.encode(reduced[2] if len(reduced) > 2 else None),
+        }
+
+    def _encode_array(self, array: np.ndarray) -> Any:
+        if array.dtype.hasobject:
+            return {
+                "__object_array__": [self.encode(item) for item in array.ravel().tolist()],
+                "shape": list(array.shape),
+            }
+        # The same array referenced twice (e.g. NMF components_ and the
+        # recommender's workflow_features) is stored once
+        key = self._array_ids.get(id(array))
+        if key is None:
+            key = len(self.arrays)
+            self._array_ids[id(array)] = key
+            self.arrays.append(np.ascontiguousarray(array))
+        return {"__array__": key}
+
+
+class _Decoder:
+    """Rebuilds an object graph from JSON and the loaded arrays."""
+
+    def __init__(self, arrays: List[np.ndarray]):
+        self.arrays = arrays
+        self._random_states: Dict[int, np.random.RandomState] = {}
+
+    def decode(self, obj: Any) -> Any:
+        if type(obj) is list:
+            return [self.decode(item) for item in obj]
+        if type(obj) is not dict:
+            return obj
+
+        # Every node's first key is its tag
+        handler = self._HANDLERS.get(next(iter(obj), None))
+        if handler is None:
+            raise ArtifactError(f"Unknown artifact node: {sorted(obj)}")
+        return handler(self, obj)
+
+    def _array(self, obj):
+        return self.arrays[obj["__array__"]]
+
+    def _object_array(self, obj):
+        items = [self.decode(item) for item in obj["__object_array__"]]
+        array = np.empty(len(items), dtype=object)
+        array[:] = items
+        return array.reshape(obj["shape"])
+
+    def _tuple(self, obj):
+        return tuple(self.decode(item) for item in obj["__tuple__"])
+
+    def _dict(self, obj):
+        return {self.decode(k): self.decode(v) for k, v in obj["__dict__"]}
+
+    def _random_state(self, obj):
+        random_state = np.random.RandomState(0)  # seeding from OS entropy is slow; state is replaced
+        random_state.set_state(self.decode(obj["__random_state__"]))
+        self._random_states[obj["id"]] = random_state
+        return random_state
+
+    def _object(self, obj):
+        cls = _resolve_class(obj["__object__"])
+        instance = cls.__new__(cls)
+        state = self.decode(obj["state"])
+        if hasattr(instance, "__setstate__"):
+            instance.__setstate__(state)
+        elif isinstance(state, tuple):
+            # Default state of objects with __slots__: (dict, slots)
+            instance.__dict__.update(state[0] or {})
+            for name, value in (state[1] or {}).items():
+                setattr(instance, name, value)
+        elif state:
+            instance.__dict__.update(state)
+        return instance
+
+    def _reduce(self, obj):
+        cls = _resolve_class(obj["__reduce__"])
+        # __new__ of an extension type only allocates it (Cython __cinit__);
+        # unlike calling the class, no __init__ or other Python code runs
+        instance = cls.__new__(cls, *self.decode(obj["args"]))
+        state = self.decode(obj["state"])
+        if state is not None:
+            instance.__setstate__(state)
+        return instance
+
+    _HANDLERS = {
+        "__array__": _array,
+        "__object_array__": _object_array,
+        "__tuple__": _tuple,
+        "__dict__": _dict,
+        "__float__": lambda self, obj: float(obj["__float__"]),
+        "__dtype__": lambda self, obj: _dtype(obj["__dtype__"]),
+        "__uuid__": lambda self, obj: uuid.UUID(obj["__uuid__"]),
+        "__datetime__": lambda self, obj: datetime.fromisoformat(obj["__datetime__"]),
+        "__random_state__": _random_state,
+        "__shared_random_state__": lambda self, obj: self._random_states[obj["__shared_random_state__"]],
+        "__class__": lambda self, obj: _resolve_class(obj["__class__"]),
+        "__object__": _object,
+        "__reduce__": _reduce,
+    }
+
+
+def _descr(descr: Any) -> Any:
+    # JSON turns the (name, format) tuples of structured dtypes into lists
+    if isinstance(descr, list):
+        return [tuple(_descr(part) for part in field) for field in descr]
+    return descr
+
+
+@lru_cache(maxsize=None)
+def _dtype_from_json(descr_json: str) -> np.dtype:
+    return np.lib.format.descr_to_dtype(_descr(json.loads(descr_json)))
+
+
+def _dtype(descr: Any) -> np.dtype:
+    return _dtype_from_json(json.dumps(descr))
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_artifact(obj: Any, prefix: Path) -> str:
+    """Write ``obj`` as an artifact.
+
+    Args:
+        obj: Object graph to store
+        prefix: Path prefix; ``.manifest.json`` and ``.arrays`` are appended
+
+    Returns:
+        SHA-256 of the manifest, which in turn covers the array file
+
+    Raises:
+        ArtifactError: If the graph contains an object that cannot be stored
+    """
+    encoder = _Encoder()
+    root = encoder.encode(obj)
+
+    table = []
+    offset = 0
+    tmp_arrays = arrays_path(prefix).with_suffix(".arrays.tmp")
+    with open(tmp_arrays, "wb") as f:
+        for array in encoder.arrays:
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            data = array.tobytes()
+            f.write(data)
+            table.append({
+                "dtype": np.lib.format.dtype_to_descr(array.dtype),
+                "shape": list(array.shape),
+                "offset": offset,
+            })
+            offset += len(data)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "arrays": table,
+        "arrays_sha256": _sha256(tmp_arrays),
+        "root": root,
+    }
+    manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode()
+    tmp_manifest = manifest_path(prefix).with_suffix(".json.tmp")
+    tmp_manifest.write_bytes(manifest_bytes)
+
+    # Arrays first, so a reader never sees a manifest without its arrays
+    tmp_arrays.replace(arrays_path(prefix))
+    tmp_manifest.replace(manifest_path(prefix))
+    return hashlib.sha256(manifest_bytes).hexdigest()
+
+
+def load_artifact(prefix: Path, expected_sha256: Optional[str] = None, verify: bool = True,
+                  mmap_arrays: bool = True) -> Any:
+    """Read an artifact written by save_artifact.
+
+    Args:
+        prefix: Path prefix the artifact was saved under
+        expected_sha256: Manifest checksum recorded when saving
+        verify: Check the manifest and array file checksums
+        mmap_arrays: Memory-map the array file instead of reading it
+
+    Returns:
+        The stored object graph
+
+    Raises:
+        ArtifactError: If the artifact is missing, corrupt or references an
+            untrusted class
+    """
+    manifest_file, arrays_file = manifest_path(prefix), arrays_path(prefix)
+    if not manifest_file.exists() or not arrays_file.exists():
+        raise ArtifactError(f"Artifact not found: {prefix}")
+
+    manifest_bytes = manifest_file.read_bytes()
+    if verify and expected_sha256 and hashlib.sha256(manifest_bytes).hexdigest() != expected_sha256:
+        raise ArtifactError(f"Manifest checksum mismatch: {manifest_file}")
+
+    manifest = json.loads(manifest_bytes)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"Unsupported artifact format: {manifest.get('format')}")
+    if verify and _sha256(arrays_file) != manifest["arrays_sha256"]:
+        raise ArtifactError(f"Array checksum mismatch: {arrays_file}")
+
+    buffer = _read_arrays(arrays_file, mmap_arrays)
+    arrays = [
+        np.frombuffer(
+            buffer,
+            dtype=_dtype(entry["dtype"]),
+            count=math.prod(entry["shape"]),
+            offset=entry["offset"],
+        ).reshape(entry["shape"])
+        for entry in manifest["arrays"]
+    ]
+    return _Decoder(arrays).decode(manifest["root"])
+
+
+def _read_arrays(path: Path, use_mmap: bool) -> Any:
+    if path.stat().st_size == 0:
+        return b""
+    if not use_mmap:
+        return path.read_bytes()
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file is closed
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
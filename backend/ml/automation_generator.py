@@ -9,6 +9,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
+from backend.ml.event_tokens import parse_sequence_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -120,28 +122,7 @@ class AutomationGenerator:
     
     def _parse_sequence_key(self, sequence_key: str) -> List[Dict[str, str]]:
         """Parse sequence key into steps."""
-        steps = []
-        parts = sequence_key.split(' -> ')
-        
-        for part in parts:
-            if part.startswith('i:'):
-                # Interaction step
-                _, interaction_type, overlay_type = part.split(':', 2)
-                steps.append({
-                    'type': 'interaction',
-                    'interaction_type': interaction_type,
-                    'overlay_type': overlay_type,
-                })
-            elif part.startswith('t:'):
-                # Telemetry step
-                _, event_type, app_id = part.split(':', 2)
-                steps.append({
-                    'type': 'telemetry',
-                    'event_type': event_type,
-                    'app_id': app_id,
-                })
-        
-        return steps
+        return parse_sequence_key(sequence_key)
     
     def _determine_integration(
         self,
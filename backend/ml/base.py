@@ -2,20 +2,75 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import hashlib
 import pickle
 import json
 from pathlib import Path
 from sqlalchemy.orm import Session
 
+from backend.ml.artifacts import ARTIFACT_FORMAT, load_artifact, save_artifact
 from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Columns returned by FloyoDataProcessor.events_to_dataframe by default
+EVENT_COLUMNS = [
+    "event_id", "user_id", "event_type", "file_path", "tool", "operation",
+    "timestamp", "hour_of_day", "day_of_week", "file_extension",
+]
+
+# Incremental updates re-read rows stored this long before the newest row the
+# last training read, so rows from transactions that commit out of order are
+# not skipped by the watermark
+WATERMARK_LAG = timedelta(seconds=60)
+
+
+def training_watermark(stored_at: Any, since: Optional[datetime] = None) -> Optional[datetime]:
+    """Watermark to record after training on a set of rows.
+    
+    It is derived from the database-assigned timestamps of the rows actually
+    read rather than the application clock, and moved back by WATERMARK_LAG.
+    
+    Args:
+        stored_at: created_at/updated_at values of the rows read (or None)
+        since: Watermark the rows were read from
+        
+    Returns:
+        The new watermark, never earlier than ``since``; ``since`` when no
+        timestamps were read
+    """
+    import pandas as pd
+    
+    if stored_at is None:
+        return since
+    newest = pd.to_datetime(pd.Series(stored_at), utc=True).max()
+    if pd.isna(newest):
+        return since
+    
+    watermark = newest.to_pydatetime() - WATERMARK_LAG
+    if since is not None:
+        since_utc = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        if watermark <= since_utc:
+            return since
+    return watermark
+
 
 class BaseMLModel(ABC):
     """Base class for all ML models in Floyo."""
     
+    # Whether partial_train can update a trained model with new data only
+    supports_incremental = False
+    
+    # Attributes persisted next to the estimator (encoders, scalers, ...)
+    STATE_ATTRIBUTES: List[str] = []
+    
     def __init__(self, model_name: str, model_version: int = 1):
         self.model_name = model_name
         self.model_version = model_version
@@ -24,6 +79,9 @@ class BaseMLModel(ABC):
         self.training_metrics: Dict[str, float] = {}
         self.created_at = datetime.utcnow()
         self.last_trained_at: Optional[datetime] = None
+        self.loaded_from: Optional[Path] = None
+        # Data created after this time has not been trained on yet
+        self.training_watermark: Optional[datetime] = None
         
     @abstractmethod
     def train(self, training_data: Any, **kwargs) -> Dict[str, float]:
@@ -39,9 +97,61 @@ class BaseMLModel(ABC):
         """Make a prediction on input data."""
         pass
     
+    def partial_train(self, db: Session, since: datetime, user_id: Optional[str] = None,
+                      **kwargs) -> Dict[str, Any]:
+        """Update a trained model with data created since ``since``.
+        
+        Models that support incremental training override this and set
+        ``supports_incremental``. The result contains ``requires_full_retrain``
+        when the update cannot be applied and the model must be rebuilt.
+        
+        Args:
+            db: Database session
+            since: Training watermark of the current model
+            user_id: Optional user ID to filter training data
+            
+        Returns:
+            Dictionary of training metrics
+        """
+        return {"error": f"{self.model_name} does not support incremental training",
+                "requires_full_retrain": True}
+    
+    def predict_batch(self, inputs: List[Any]) -> List[Any]:
+        """Make predictions for many inputs at once.
+        
+        Subclasses override this to build a single feature matrix and call
+        the underlying estimator once; the default falls back to ``predict``
+        per input.
+        
+        Args:
+            inputs: List of inputs, each in the format accepted by ``predict``
+            
+        Returns:
+            List of predictions in the same order as ``inputs``
+        """
+        return [self.predict(input_data) for input_data in inputs]
+    
+    def _get_artifact_state(self, file_path: Path) -> Dict[str, Any]:
+        """Objects stored in the model artifact.
+        
+        Models whose estimator is not a scikit-learn object override this and
+        _set_artifact_state to store it in its own format under ``file_path``.
+        """
+        return {"model": self.model, **{name: getattr(self, name) for name in self.STATE_ATTRIBUTES}}
+    
+    def _set_artifact_state(self, state: Dict[str, Any], file_path: Path) -> None:
+        """Restore the objects returned by _get_artifact_state."""
+        self.model = state.get("model")
+        for name in self.STATE_ATTRIBUTES:
+            if name in state:
+                setattr(self, name, state[name])
+    
     def save(self, file_path: Path) -> bool:
         """Save the model to disk."""
         try:
+            prefix = file_path / f"{self.model_name}_v{self.model_version}"
+            checksum = save_artifact(self._get_artifact_state(file_path), prefix)
+            
             model_data = {
                 "model_name": self.model_name,
                 "model_version": self.model_version,
@@ -49,18 +159,19 @@ class BaseMLModel(ABC):
                 "training_metrics": self.training_metrics,
                 "created_at": self.created_at.isoformat(),
                 "last_trained_at": self.last_trained_at.isoformat() if self.last_trained_at else None,
+                "training_watermark": self.training_watermark.isoformat() if self.training_watermark else None,
+                "artifact": {"format": ARTIFACT_FORMAT, "sha256": checksum},
             }
             
-            # Save model (pickle or model-specific format)
-            model_file = file_path / f"{self.model_name}_v{self.model_version}.pkl"
-            with open(model_file, 'wb') as f:
-                pickle.dump(self.model, f)
-            
             # Save metadata
             metadata_file = file_path / f"{self.model_name}_v{self.model_version}_metadata.json"
             with open(metadata_file, 'w') as f:
                 json.dump(model_data, f, indent=2)
             
+            # Drop pickles from before the artifact format for this version
+            for legacy_file in (prefix.with_suffix(".pkl"), file_path / f"{prefix.name}_state.pkl"):
+                legacy_file.unlink(missing_ok=True)
+            
             logger.info(f"Saved model {self.model_name} to {file_path}")
             return True
         except Exception as e:
@@ -69,11 +180,13 @@ class BaseMLModel(ABC):
     
     def load(self, file_path: Path) -> bool:
         """Load the model from disk."""
+        from backend.config import settings
+        
         try:
-            model_file = file_path / f"{self.model_name}_v{self.model_version}.pkl"
+            prefix = file_path / f"{self.model_name}_v{self.model_version}"
             metadata_file = file_path / f"{self.model_name}_v{self.model_version}_metadata.json"
             
-            if not model_file.exists() or not metadata_file.exists():
+            if not metadata_file.exists():
                 logger.warning(f"Model files not found for {self.model_name}")
                 return False
             
@@ -81,22 +194,48 @@ class BaseMLModel(ABC):
             with open(metadata_file, 'r') as f:
                 metadata = json.load(f)
             
-            # Load model
-            with open(model_file, 'rb') as f:
-                self.model = pickle.load(f)
+            artifact = metadata.get("artifact")
+            if artifact:
+                state = load_artifact(
+                    prefix,
+                    expected_sha256=artifact.get("sha256"),
+                    verify=settings.ml_artifact_verify_checksums,
+                )
+                self._set_artifact_state(state, file_path)
+            elif prefix.with_suffix(".pkl").exists() and settings.ml_allow_pickle_artifacts:
+                logger.warning(f"Loading legacy pickle for {self.model_name}; retrain or re-save to convert it")
+                self._load_pickle(prefix)
+            else:
+                logger.warning(f"Model files not found for {self.model_name}")
+                return False
             
             self.is_trained = metadata.get("is_trained", False)
             self.training_metrics = metadata.get("training_metrics", {})
             
             if metadata.get("last_trained_at"):
                 self.last_trained_at = datetime.fromisoformat(metadata["last_trained_at"])
+            if metadata.get("training_watermark"):
+                self.training_watermark = datetime.fromisoformat(metadata["training_watermark"])
             
+            self.loaded_from = file_path
             logger.info(f"Loaded model {self.model_name} from {file_path}")
             return True
         except Exception as e:
             logger.error(f"Error loading model {self.model_name}: {e}")
             return False
     
+    def _load_pickle(self, prefix: Path) -> None:
+        """Load a model saved as pickle before the artifact format existed."""
+        with open(prefix.with_suffix(".pkl"), 'rb') as f:
+            self.model = pickle.load(f)
+        
+        state_file = prefix.parent / f"{prefix.name}_state.pkl"
+        if self.STATE_ATTRIBUTES and state_file.exists():
+            with open(state_file, 'rb') as f:
+                for name, value in pickle.load(f).items():
+                    if name in self.STATE_ATTRIBUTES:
+                        setattr(self, name, value)
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get model performance metrics."""
         return {
@@ -113,34 +252,141 @@ class FloyoDataProcessor:
     """Utility class for processing Floyo data for ML training."""
     
     @staticmethod
-    def events_to_dataframe(db: Session, user_id: Optional[str] = None, limit: int = 10000):
-        """Convert Event records to pandas DataFrame."""
+    def _event_select(user_id: Optional[str] = None, limit: Optional[int] = None,
+                      columns: Optional[List[str]] = None, since: Optional[datetime] = None):
+        """Build a Core select of the requested event columns, newest first."""
+        from sqlalchemy import select, cast, String
+        from database.models import Event
+        
+        available = {
+            "event_id": cast(Event.id, String).label("event_id"),
+            "user_id": cast(Event.user_id, String).label("user_id"),
+            "event_type": Event.event_type,
+            "file_path": Event.file_path,
+            "tool": Event.tool,
+            "operation": Event.operation,
+            "timestamp": Event.timestamp,
+            "created_at": Event.created_at,
+        }
+        
+        # Derived columns need their source column
+        wanted = set(columns or EVENT_COLUMNS)
+        if wanted & {"hour_of_day", "day_of_week"}:
+            wanted.add("timestamp")
+        if "file_extension" in wanted:
+            wanted.add("file_path")
+        
+        stmt = select(*(available[name] for name in available if name in wanted))
+        if user_id:
+            stmt = stmt.where(Event.user_id == user_id)
+        if since is not None:
+            stmt = stmt.where(Event.created_at >= since)
+        stmt = stmt.order_by(Event.timestamp.desc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+    
+    @staticmethod
+    def _derive_event_columns(frame, columns: Optional[List[str]] = None):
+        """Add hour_of_day, day_of_week and file_extension in place, vectorized."""
+        import numpy as np
+        import pandas as pd
+        
+        wanted = columns or EVENT_COLUMNS
+        
+        if "timestamp" in frame.columns and ({"hour_of_day", "day_of_week"} & set(wanted)):
+            timestamps = frame["timestamp"]
+            if not pd.api.types.is_datetime64_any_dtype(timestamps):
+                timestamps = pd.to_datetime(timestamps, utc=True)
+            frame["hour_of_day"] = timestamps.dt.hour
+            frame["day_of_week"] = timestamps.dt.dayofweek
+        
+        if "file_path" in frame.columns and "file_extension" in wanted:
+            # Paths repeat heavily, so only compute the suffix once per
+            # distinct path; factorize codes missing values as -1
+            codes, paths = pd.factorize(frame["file_path"])
+            suffixes = np.array(
+                [Path(path).suffix.lower() if path else None for path in paths] + [None], dtype=object
+            )
+            frame["file_extension"] = suffixes[codes]
+        
+        return frame[[c for c in wanted if c in frame.columns]]
+    
+    @staticmethod
+    def iter_event_frames(db: Session, user_id: Optional[str] = None, limit: Optional[int] = None,
+                          columns: Optional[List[str]] = None, chunk_size: int = 50000,
+                          since: Optional[datetime] = None):
+        """Stream events as DataFrame chunks, newest first.
+        
+        Only the requested columns are selected and rows are fetched with
+        ``yield_per`` (a server-side cursor on PostgreSQL), so datasets larger
+        than memory can be processed chunk by chunk.
+        
+        Args:
+            db: Database session
+            user_id: Optional user ID filter
+            limit: Maximum number of events (None = all)
+            columns: Columns to return (default: EVENT_COLUMNS)
+            chunk_size: Rows per chunk
+            since: Only events stored at or after this time
+            
+        Yields:
+            DataFrames of at most chunk_size rows
+        """
+        import pandas as pd
+        
+        stmt = FloyoDataProcessor._event_select(user_id, limit, columns, since)
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        keys = list(result.keys())
+        
+        for rows in result.partitions(chunk_size):
+            frame = pd.DataFrame.from_records(rows, columns=keys)
+            yield FloyoDataProcessor._derive_event_columns(frame, columns)
+    
+    @staticmethod
+    def events_to_dataframe(db: Session, user_id: Optional[str] = None, limit: Optional[int] = 10000,
+                            columns: Optional[List[str]] = None, chunk_size: int = 50000,
+                            cache_dir: Optional[Path] = None, since: Optional[datetime] = None):
+        """Convert Event records to pandas DataFrame.
+        
+        Args:
+            db: Database session
+            user_id: Optional user ID filter
+            limit: Maximum number of events, newest first (None = all)
+            columns: Columns to return (default: EVENT_COLUMNS)
+            chunk_size: Rows fetched per round trip
+            since: Only events stored at or after this time
+            cache_dir: Directory for Parquet snapshots reused while the
+                underlying events are unchanged (default: settings.ml_training_cache_dir)
+        """
         try:
             import pandas as pd
-            from database.models import Event
             
-            query = db.query(Event)
-            if user_id:
-                query = query.filter(Event.user_id == user_id)
+            # Incremental reads are small and never repeat, so skip the cache
+            cache_path = None if since is not None else FloyoDataProcessor._event_cache_path(
+                db, user_id, limit, columns, cache_dir
+            )
+            if cache_path is not None and cache_path.exists():
+                try:
+                    return pd.read_parquet(cache_path)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable event snapshot {cache_path}: {e}")
             
-            events = query.order_by(Event.timestamp.desc()).limit(limit).all()
+            chunks = list(FloyoDataProcessor.iter_event_frames(db, user_id, limit, columns, chunk_size, since))
+            if not chunks:
+                return pd.DataFrame(columns=columns or EVENT_COLUMNS)
+            frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
             
-            data = []
-            for event in events:
-                data.append({
-                    "event_id": str(event.id),
-                    "user_id": str(event.user_id),
-                    "event_type": event.event_type,
-                    "file_path": event.file_path,
-                    "tool": event.tool,
-                    "operation": event.operation,
-                    "timestamp": event.timestamp,
-                    "hour_of_day": event.timestamp.hour if event.timestamp else None,
-                    "day_of_week": event.timestamp.weekday() if event.timestamp else None,
-                    "file_extension": Path(event.file_path).suffix.lower() if event.file_path else None,
-                })
+            if cache_path is not None:
+                try:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = cache_path.with_suffix(".tmp")
+                    frame.to_parquet(tmp_path, index=False)
+                    tmp_path.replace(cache_path)
+                except Exception as e:
+                    logger.warning(f"Could not write event snapshot {cache_path}: {e}")
             
-            return pd.DataFrame(data)
+            return frame
         except ImportError:
             logger.error("pandas not installed. Install with: pip install pandas")
             return None
@@ -149,8 +395,39 @@ class FloyoDataProcessor:
             return None
     
     @staticmethod
-    def patterns_to_dataframe(db: Session, user_id: Optional[str] = None):
-        """Convert Pattern records to pandas DataFrame."""
+    def _event_cache_path(db: Session, user_id: Optional[str], limit: Optional[int],
+                          columns: Optional[List[str]], cache_dir: Optional[Path]) -> Optional[Path]:
+        """Snapshot path for a query, keyed on its parameters and the data's current state."""
+        if cache_dir is None:
+            from backend.config import settings
+            cache_dir = settings.ml_training_cache_dir or None
+        if not cache_dir or not PYARROW_AVAILABLE:
+            return None
+        
+        from sqlalchemy import select, func
+        from database.models import Event
+        
+        # Any insert or delete changes the count or the newest timestamps
+        stmt = select(func.count(), func.max(Event.timestamp), func.max(Event.created_at))
+        if user_id:
+            stmt = stmt.where(Event.user_id == user_id)
+        fingerprint = db.execute(stmt).one()
+        
+        key = json.dumps(
+            [str(user_id) if user_id else None, limit, columns or EVENT_COLUMNS, [str(v) for v in fingerprint]]
+        )
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return Path(cache_dir) / f"events-{digest}.parquet"
+    
+    @staticmethod
+    def patterns_to_dataframe(db: Session, user_id: Optional[str] = None, since: Optional[datetime] = None):
+        """Convert Pattern records to pandas DataFrame.
+        
+        Args:
+            db: Database session
+            user_id: Optional user ID filter
+            since: Only patterns updated at or after this time
+        """
         try:
             import pandas as pd
             from database.models import Pattern
@@ -158,6 +435,8 @@ class FloyoDataProcessor:
             query = db.query(Pattern)
             if user_id:
                 query = query.filter(Pattern.user_id == user_id)
+            if since is not None:
+                query = query.filter(Pattern.updated_at >= since)
             
             patterns = query.all()
             
@@ -170,6 +449,7 @@ class FloyoDataProcessor:
                     "count": pattern.count,
                     "last_used": pattern.last_used,
                     "tools": pattern.tools,
+                    "updated_at": pattern.updated_at,
                 })
             
             return pd.DataFrame(data)
@@ -244,3 +524,53 @@ class FloyoDataProcessor:
         except Exception as e:
             logger.error(f"Error converting executions to DataFrame: {e}")
             return None
+    
+    @staticmethod
+    def user_activity_aggregates(db: Session, user_ids: List[Any], since: datetime,
+                                 chunk_size: int = 1000):
+        """Compute per-user activity aggregates with grouped queries.
+        
+        Args:
+            db: Database session
+            user_ids: Users to aggregate
+            since: Start of the recent-events window
+            chunk_size: Maximum users per IN clause
+            
+        Returns:
+            DataFrame indexed by user_id with recent_event_count,
+            execution_count and completed_count columns
+        """
+        import pandas as pd
+        from sqlalchemy import func, case
+        from database.models import Event, Workflow, WorkflowExecution
+        
+        unique_ids = list(dict.fromkeys(user_ids))
+        frame = pd.DataFrame(
+            0,
+            index=pd.Index(unique_ids, name="user_id", dtype=object),
+            columns=["recent_event_count", "execution_count", "completed_count"],
+        )
+        
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            
+            event_counts = db.query(Event.user_id, func.count(Event.id)).filter(
+                Event.user_id.in_(chunk),
+                Event.timestamp >= since
+            ).group_by(Event.user_id).all()
+            for user_id, count in event_counts:
+                frame.at[user_id, "recent_event_count"] = count
+            
+            completed = func.sum(case((WorkflowExecution.status == "completed", 1), else_=0))
+            execution_counts = db.query(
+                Workflow.user_id, func.count(WorkflowExecution.id), completed
+            ).join(
+                WorkflowExecution, WorkflowExecution.workflow_id == Workflow.id
+            ).filter(
+                Workflow.user_id.in_(chunk)
+            ).group_by(Workflow.user_id).all()
+            for user_id, count, completed_count in execution_counts:
+                frame.at[user_id, "execution_count"] = count
+                frame.at[user_id, "completed_count"] = completed_count or 0
+        
+        return frame
@@ -0,0 +1,255 @@
+"""Micro-batching of ML predictions for API handlers.
+
+Concurrent ``/api/ml`` prediction requests for the same model are collected
+for a few milliseconds and executed with a single ``predict_batch`` call on a
+dedicated thread pool, so the estimator runs one vectorized pass instead of
+one pass per request and never blocks the event loop or the default executor
+shared with other handlers. Request latency and batch size are recorded in
+fixed-bucket histograms, exposed on ``/api/ml/metrics``.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_WORKERS = 2
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count and sum, like a Prometheus histogram."""
+
+    def __init__(self, buckets: Sequence[float]):
+        """Initialize histogram.
+
+        Args:
+            buckets: Sorted upper bounds; larger values go to an overflow bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize as cumulative bucket counts keyed by upper bound."""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class BatchingStats:
+    """Per-model latency and batch-size histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, Histogram]] = {}
+
+    def _histograms(self, model_type: str) -> Dict[str, Histogram]:
+        histograms = self._models.get(model_type)
+        if histograms is None:
+            histograms = self._models[model_type] = {
+                "latency_ms": Histogram(LATENCY_BUCKETS_MS),
+                "inference_ms": Histogram(LATENCY_BUCKETS_MS),
+                "batch_size": Histogram(BATCH_SIZE_BUCKETS),
+            }
+        return histograms
+
+    def record_batch(self, model_type: str, latencies_ms: List[float], inference_ms: float):
+        """Record one executed batch.
+
+        Args:
+            model_type: Type of model
+            latencies_ms: Queue-to-result latency of each request in the batch
+            inference_ms: Time spent in ``predict_batch``
+        """
+        with self._lock:
+            histograms = self._histograms(model_type)
+            histograms["batch_size"].observe(len(latencies_ms))
+            histograms["inference_ms"].observe(inference_ms)
+            for latency in latencies_ms:
+                histograms["latency_ms"].observe(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize all histograms, keyed by model type."""
+        with self._lock:
+            return {
+                model_type: {name: histogram.to_dict() for name, histogram in histograms.items()}
+                for model_type, histograms in self._models.items()
+            }
+
+
+class PredictionBatcher:
+    """Groups concurrent predictions per model into micro-batches."""
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_workers: int = DEFAULT_WORKERS,
+    ):
+        """Initialize batcher.
+
+        Args:
+            max_batch_size: Flush a batch as soon as it reaches this size
+            max_wait_ms: Longest time the first request in a batch waits
+            max_workers: Threads in the dedicated inference pool
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_workers = max_workers
+        self.stats = BatchingStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Tuple[str, int], List[Tuple[Any, asyncio.Future, float]]] = {}
+        self._models: Dict[Tuple[str, int], Any] = {}
+        self._timers: Dict[Tuple[str, int], asyncio.TimerHandle] = {}
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool that runs ``predict_batch``, created on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="ml-predict"
+            )
+        return self._executor
+
+    async def predict(self, model_type: str, model: Any, input_data: Any) -> Any:
+        """Queue one input and wait for its prediction.
+
+        Args:
+            model_type: Type of model
+            model: Loaded model instance implementing ``predict_batch``
+            input_data: Input in the format accepted by ``model.predict``
+
+        Returns:
+            Prediction result for ``input_data``
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Keyed by model object too, so a hot-reloaded model never shares a
+        # batch with the version it replaced
+        key = (model_type, id(model))
+
+        batch = self._pending.setdefault(key, [])
+        self._models[key] = model
+        batch.append((input_data, future, time.perf_counter()))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_ms / 1000.0, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Tuple[str, int]):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        model = self._models.pop(key, None)
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(key[0], model, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _timed_predict(self, model: Any, inputs: List[Any]) -> Tuple[List[Any], float]:
+        start = time.perf_counter()
+        results = model.predict_batch(inputs)
+        return results, (time.perf_counter() - start) * 1000
+
+    async def _run_batch(self, model_type: str, model: Any, batch: List[Tuple[Any, asyncio.Future, float]]):
+        inputs = [input_data for input_data, _, _ in batch]
+        loop = asyncio.get_running_loop()
+
+        try:
+            results, inference_ms = await loop.run_in_executor(
+                self.executor, self._timed_predict, model, inputs
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            logger.error(f"Error in batched prediction for {model_type}: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        self.stats.record_batch(
+            model_type, [(done - queued) * 1000 for _, _, queued in batch], inference_ms
+        )
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching configuration and per-model histograms."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "workers": self.max_workers,
+            "models": self.stats.to_dict(),
+        }
+
+    def shutdown(self):
+        """Stop the inference thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def close(self):
+        """Run queued batches, wait for running ones, then stop the thread pool."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.shutdown()
+
+
+_batcher: Optional[PredictionBatcher] = None
+
+
+def get_prediction_batcher() -> PredictionBatcher:
+    """Get the process-wide prediction batcher."""
+    global _batcher
+    if _batcher is None:
+        _batcher = PredictionBatcher()
+    return _batcher
+
+
+async def close_prediction_batcher():
+    """Close the process-wide prediction batcher, if one was created."""
+    global _batcher
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
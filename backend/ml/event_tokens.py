@@ -0,0 +1,137 @@
+"""Compact integer representation of interaction and telemetry events.
+
+Each event is reduced to a key such as ``i:click:modal`` or
+``t:file_modified:vscode``, and every distinct key is interned to a small
+integer. Event streams become NumPy token arrays and sequences become tuples
+of ints, which hash and compare far more cheaply than the joined strings
+(``key -> key -> ...``) that are only built for output. This module owns the
+key format shared by the pattern detector, the workflow model builder and the
+automation generator.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SEQUENCE_SEPARATOR = ' -> '
+EMPTY_SEQUENCE_KEY = 'empty'
+
+
+def event_key(event: Dict[str, Any]) -> str:
+    """Convert a single event to its key.
+
+    Accepts both wrapped events (``{'type': 'interaction', 'data': {...}}``)
+    and raw interaction or telemetry dicts.
+    """
+    if event.get('type') == 'interaction':
+        interaction = event.get('data', {})
+        if isinstance(interaction, dict):
+            return f"i:{interaction.get('type', 'unknown')}:{interaction.get('overlay', {}).get('type', 'none')}"
+        return "i:unknown:none"
+    if event.get('type') == 'telemetry':
+        telemetry = event.get('data', {})
+        if isinstance(telemetry, dict):
+            return f"t:{telemetry.get('eventType', 'unknown')}:{telemetry.get('appId', 'unknown')}"
+        return "t:unknown:unknown"
+    if 'overlay' in event:
+        return f"i:{event.get('type', 'unknown')}:{event.get('overlay', {}).get('type', 'none')}"
+    if 'eventType' in event:
+        return f"t:{event.get('eventType', 'unknown')}:{event.get('appId', 'unknown')}"
+    return "unknown"
+
+
+def sequence_to_key(sequence: Iterable[Any]) -> str:
+    """Convert a sequence of events to its string key."""
+    keys = [event_key(event) for event in sequence if isinstance(event, dict)]
+    return SEQUENCE_SEPARATOR.join(keys) if keys else EMPTY_SEQUENCE_KEY
+
+
+@lru_cache(maxsize=4096)
+def _parse_event_key(key: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    if key.startswith('i:'):
+        _, interaction_type, overlay_type = key.split(':', 2)
+        return (('type', 'interaction'), ('interaction_type', interaction_type), ('overlay_type', overlay_type))
+    if key.startswith('t:'):
+        _, event_type, app_id = key.split(':', 2)
+        return (('type', 'telemetry'), ('event_type', event_type), ('app_id', app_id))
+    return None
+
+
+def parse_sequence_key(sequence_key: str) -> List[Dict[str, str]]:
+    """Parse a sequence key back into step dictionaries.
+
+    Unrecognised parts (such as ``unknown``) are skipped.
+    """
+    steps = []
+    for part in sequence_key.split(SEQUENCE_SEPARATOR):
+        step = _parse_event_key(part)
+        if step is not None:
+            steps.append(dict(step))
+    return steps
+
+
+class EventVocabulary:
+    """Interns event keys to small integers.
+
+    A vocabulary is cheap to create and is meant to be scoped to one
+    analysis; tokens from different vocabularies are not comparable.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, int] = {}
+        self.keys: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def token(self, key: str) -> int:
+        """Get the token for a key, interning it if new."""
+        token = self._tokens.get(key)
+        if token is None:
+            token = self._tokens[key] = len(self.keys)
+            self.keys.append(key)
+        return token
+
+    def encode(self, events: List[Dict[str, Any]]) -> np.ndarray:
+        """Encode an event stream as an array with one token per event."""
+        return np.fromiter(
+            (self.token(event_key(event)) for event in events),
+            dtype=np.int32,
+            count=len(events),
+        )
+
+    def encode_sequence(self, sequence: Iterable[Any]) -> Tuple[int, ...]:
+        """Encode a sequence as a tuple of tokens, skipping non-dict items."""
+        return tuple(self.token(event_key(event)) for event in sequence if isinstance(event, dict))
+
+    def group_sequences(self, sequences: List[List[Dict[str, Any]]]) -> Dict[Tuple[int, ...], List[List[Dict[str, Any]]]]:
+        """Group equal sequences in a single pass.
+
+        Sequences usually share event dicts (they are windows over one event
+        stream), so each event is keyed only once.
+
+        Returns:
+            Dictionary mapping token tuples to their sequences, in order of
+            first occurrence
+        """
+        event_tokens: Dict[int, int] = {}
+        groups: Dict[Tuple[int, ...], List[List[Dict[str, Any]]]] = {}
+
+        for sequence in sequences:
+            tokens = []
+            for event in sequence:
+                if not isinstance(event, dict):
+                    continue
+                token = event_tokens.get(id(event))
+                if token is None:
+                    token = event_tokens[id(event)] = self.token(event_key(event))
+                tokens.append(token)
+            groups.setdefault(tuple(tokens), []).append(sequence)
+
+        return groups
+
+    def sequence_key(self, tokens: Iterable[int]) -> str:
+        """Convert a token tuple back to its string key."""
+        keys = [self.keys[token] for token in tokens]
+        return SEQUENCE_SEPARATOR.join(keys) if keys else EMPTY_SEQUENCE_KEY
@@ -1,6 +1,6 @@
 """Model Manager for ML model lifecycle management."""
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -16,6 +16,7 @@ from backend.ml.sequence_predictor import SequencePredictor
 from backend.ml.workflow_trigger_predictor import WorkflowTriggerPredictor
 from backend.ml.workflow_recommender import WorkflowRecommender
 from backend.ml.anomaly_detector import PatternAnomalyDetector
+from backend.ml.model_registry import get_model_registry, ModelRecordInfo
 from database.models import MLModel, Prediction as PredictionModel
 from backend.logging_config import get_logger
 
@@ -23,6 +24,21 @@ logger = get_logger(__name__)
 
 Base = declarative_base()
 
+# Progress of a training run, stored in MLModel.training_config["status"]
+TRAINING_STATUS_QUEUED = "queued"
+TRAINING_STATUS_RUNNING = "training"
+TRAINING_STATUS_COMPLETED = "completed"
+TRAINING_STATUS_FAILED = "failed"
+
+MODEL_CLASSES = {
+    "pattern_classifier": PatternClassifier,
+    "suggestion_scorer": SuggestionScorer,
+    "sequence_predictor": SequencePredictor,
+    "workflow_trigger_predictor": WorkflowTriggerPredictor,
+    "workflow_recommender": WorkflowRecommender,
+    "anomaly_detector": PatternAnomalyDetector,
+}
+
 
 class MLModel(Base):
     """Database model for ML model metadata."""
@@ -38,6 +54,7 @@ class MLModel(Base):
     updated_at = Column(TIMESTAMP(timezone=True), server_default=__import__('sqlalchemy').sql.func.now(), onupdate=__import__('sqlalchemy').sql.func.now())
     model_path = Column(String(500), nullable=True)
     training_config = Column(JSONB, nullable=True)
+    training_watermark = Column(TIMESTAMP(timezone=True), nullable=True)  # Data trained on up to here
 
 
 class _PredictionBase(Base):
@@ -71,9 +88,6 @@ class ModelManager:
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
-        # Model instances
-        self._models: Dict[str, Any] = {}
-        
     def get_model(self, model_type: str, version: Optional[int] = None) -> Optional[Any]:
         """Get a model instance.
         
@@ -85,70 +99,72 @@ class ModelManager:
             Model instance or None
         """
         try:
-            # Check cache
-            cache_key = f"{model_type}_v{version}"
-            if cache_key in self._models:
-                return self._models[cache_key]
-            
-            # Load from database (using imported MLModel from models)
-            from database.models import MLModel
-            query = self.db.query(MLModel).filter(
-                MLModel.model_type == model_type,
-                MLModel.is_active == True
+            return get_model_registry().get_model(
+                self.db, model_type, self._load_model, version=version
             )
-            
-            if version:
-                query = query.filter(MLModel.version == version)
-            else:
-                query = query.order_by(MLModel.version.desc())
-            
-            model_record = query.first()
-            
-            if not model_record:
-                logger.warning(f"Model {model_type} not found in database")
-                return None
-            
-            # Instantiate model
-            model = self._create_model_instance(model_type, model_record.version)
-            
-            # Load model weights
-            if model_record.model_path:
-                model_path = Path(model_record.model_path)
-                if model.load(model_path):
-                    self._models[cache_key] = model
-                    return model
-            
-            # Try to load from default location
-            default_path = self.models_dir / model_type
-            if model.load(default_path):
-                self._models[cache_key] = model
-                return model
-            
-            logger.warning(f"Could not load model {model_type} from disk")
-            return None
-            
         except Exception as e:
             logger.error(f"Error getting model {model_type}: {e}")
             return None
     
+    def load_model(self, model_type: str) -> Tuple[Optional[MLModel], Optional[Any]]:
+        """Load a private copy of the active model, bypassing the registry.
+        
+        Use this to update a model without mutating the instance that is
+        serving predictions.
+        
+        Args:
+            model_type: Type of model
+            
+        Returns:
+            Tuple of (active MLModel record, model instance), either may be None
+        """
+        record = self.db.query(MLModel).filter(
+            MLModel.model_type == model_type,
+            MLModel.is_active == True
+        ).order_by(MLModel.version.desc()).first()
+        if not record:
+            return None, None
+        
+        info = ModelRecordInfo(model_type=model_type, version=record.version, model_path=record.model_path)
+        return record, self._load_model(model_type, info)
+    
+    def preload_models(self, model_types: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Load active models into the process-wide registry.
+        
+        Args:
+            model_types: Model types to preload (all known types if None)
+            
+        Returns:
+            Mapping of model type to whether it was loaded
+        """
+        return get_model_registry().preload(
+            self.db, model_types or list(MODEL_CLASSES), self._load_model
+        )
+    
+    def _load_model(self, model_type: str, record: ModelRecordInfo) -> Optional[Any]:
+        """Instantiate a model and load its weights from disk."""
+        model = self._create_model_instance(model_type, record.version)
+        
+        if record.model_path and model.load(Path(record.model_path)):
+            return model
+        
+        # Try to load from default location
+        if model.load(self.models_dir / model_type):
+            return model
+        
+        logger.warning(f"Could not load model {model_type} from disk")
+        return None
+    
     def _create_model_instance(self, model_type: str, version: int) -> Any:
         """Create a model instance."""
-        model_classes = {
-            "pattern_classifier": PatternClassifier,
-            "suggestion_scorer": SuggestionScorer,
-            "sequence_predictor": SequencePredictor,
-            "workflow_trigger_predictor": WorkflowTriggerPredictor,
-            "workflow_recommender": WorkflowRecommender,
-            "anomaly_detector": PatternAnomalyDetector,
-        }
-        
-        if model_type not in model_classes:
+        if model_type not in MODEL_CLASSES:
             raise ValueError(f"Unknown model type: {model_type}")
         
-        return model_classes[model_type](model_version=version)
+        return MODEL_CLASSES[model_type](model_version=version)
     
     def save_model(self, model: Any, model_type: str, training_metrics: Dict[str, Any],
-                   training_config: Optional[Dict[str, Any]] = None) -> MLModel:
+                   training_config: Optional[Dict[str, Any]] = None,
+                   model_record_id: Optional[str] = None) -> MLModel:
         """Save a trained model to database and disk.
         
         Args:
@@ -156,17 +172,26 @@ class ModelManager:
             model_type: Type of model
             training_metrics: Training metrics
             training_config: Training configuration
+            model_record_id: Pending record created by create_training_record
+                to complete instead of inserting a new version
             
         Returns:
             MLModel database record
         """
         try:
-            # Get next version
-            latest = self.db.query(MLModel).filter(
-                MLModel.model_type == model_type
-            ).order_by(MLModel.version.desc()).first()
+            pending = None
+            if model_record_id:
+                pending = self.db.query(MLModel).filter(MLModel.id == model_record_id).first()
             
-            next_version = (latest.version + 1) if latest else 1
+            if pending:
+                next_version = pending.version
+            else:
+                # Get next version
+                latest = self.db.query(MLModel).filter(
+                    MLModel.model_type == model_type
+                ).order_by(MLModel.version.desc()).first()
+                
+                next_version = (latest.version + 1) if latest else 1
             
             # Deactivate old models
             self.db.query(MLModel).filter(
@@ -174,7 +199,9 @@ class ModelManager:
                 MLModel.is_active == True
             ).update({"is_active": False})
             
-            # Save to disk
+            # Save to disk under the record's version so that loading by
+            # version finds it and the served version is not overwritten
+            model.model_version = next_version
             model_dir = self.models_dir / model_type
             model_dir.mkdir(parents=True, exist_ok=True)
             
@@ -183,20 +210,37 @@ class ModelManager:
             else:
                 model_path = None
             
-            # Create database record
-            model_record = MLModel(
-                model_type=model_type,
-                version=next_version,
-                accuracy_metrics=training_metrics,
-                is_active=True,
-                model_path=model_path,
-                training_config=training_config
-            )
+            if pending:
+                model_record = pending
+                model_record.accuracy_metrics = training_metrics
+                model_record.is_active = True
+                model_record.model_path = model_path
+                model_record.training_watermark = getattr(model, "training_watermark", None)
+                model_record.training_config = {
+                    **(pending.training_config or {}),
+                    **(training_config or {}),
+                    "status": TRAINING_STATUS_COMPLETED,
+                }
+            else:
+                # Create database record
+                model_record = MLModel(
+                    model_type=model_type,
+                    version=next_version,
+                    accuracy_metrics=training_metrics,
+                    is_active=True,
+                    model_path=model_path,
+                    training_config=training_config,
+                    training_watermark=getattr(model, "training_watermark", None)
+                )
+                self.db.add(model_record)
             
-            self.db.add(model_record)
             self.db.commit()
             self.db.refresh(model_record)
             
+            # Serve the new version from this process immediately; other
+            # processes pick it up on their next version check
+            get_model_registry().invalidate(model_type)
+            
             logger.info(f"Saved model {model_type} v{next_version}")
             
             return model_record
@@ -206,6 +250,90 @@ class ModelManager:
             self.db.rollback()
             raise
     
+    def create_training_record(self, model_type: str,
+                               training_config: Optional[Dict[str, Any]] = None) -> MLModel:
+        """Reserve the next version of a model for a training run.
+        
+        The record stays inactive until save_model completes it, and its
+        training_config carries the run's progress.
+        
+        Args:
+            model_type: Type of model
+            training_config: Initial training configuration
+            
+        Returns:
+            Pending MLModel database record
+        """
+        try:
+            latest = self.db.query(MLModel).filter(
+                MLModel.model_type == model_type
+            ).order_by(MLModel.version.desc()).first()
+            
+            model_record = MLModel(
+                model_type=model_type,
+                version=(latest.version + 1) if latest else 1,
+                is_active=False,
+                training_config={"status": TRAINING_STATUS_QUEUED, **(training_config or {})}
+            )
+            self.db.add(model_record)
+            self.db.commit()
+            self.db.refresh(model_record)
+            return model_record
+        except Exception as e:
+            logger.error(f"Error creating training record: {e}")
+            self.db.rollback()
+            raise
+    
+    def update_training_status(self, model_record_id: str, status: str, **details) -> None:
+        """Record the progress of a pending training record.
+        
+        Args:
+            model_record_id: Record created by create_training_record
+            status: New training status
+            **details: Extra fields to merge into training_config
+        """
+        try:
+            model_record = self.db.query(MLModel).filter(MLModel.id == model_record_id).first()
+            if not model_record:
+                return
+            
+            # Reassign so the JSONB column is flagged as modified
+            model_record.training_config = {
+                **(model_record.training_config or {}),
+                **details,
+                "status": status,
+            }
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Error updating training status: {e}")
+            self.db.rollback()
+    
+    def get_training_progress(self, run_id: str) -> List[Dict[str, Any]]:
+        """Get the status of every model in a training run.
+        
+        Args:
+            run_id: Training run identifier
+            
+        Returns:
+            List of dictionaries, one per model
+        """
+        records = self.db.query(MLModel).filter(
+            MLModel.training_config["run_id"].astext == run_id
+        ).order_by(MLModel.model_type).all()
+        
+        return [
+            {
+                "model_id": str(record.id),
+                "model_type": record.model_type,
+                "version": record.version,
+                "status": (record.training_config or {}).get("status"),
+                "timings": (record.training_config or {}).get("timings"),
+                "error": (record.training_config or {}).get("error"),
+                "is_active": record.is_active,
+            }
+            for record in records
+        ]
+    
     def log_prediction(self, model_id: str, user_id: Optional[str], prediction_type: str,
                       input_features: Dict[str, Any], prediction_result: Dict[str, Any],
                       confidence: Optional[float] = None) -> PredictionModel:
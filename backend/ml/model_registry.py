@@ -0,0 +1,303 @@
+"""Process-wide registry of loaded ML models.
+
+ModelManager instances are created per request or per job, so caching models
+on the manager means they are unpickled from disk over and over. The registry
+keeps one loaded instance per model type for the whole process, reloads it
+when a newer active version appears in ``ml_models`` and tracks how much
+memory the loaded models hold.
+"""
+
+from typing import Dict, Any, Optional, Callable, List
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHECK_INTERVAL_SECONDS = 30.0
+DEFAULT_MAX_MEMORY_BYTES = 1024 * 1024 * 1024
+
+
+@dataclass
+class RegistryEntry:
+    """A loaded model and its bookkeeping."""
+    model_type: str
+    version: int
+    model: Any
+    size_bytes: int
+    load_time_ms: float
+    pinned: bool = False
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    checked_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass
+class ModelRecordInfo:
+    """The subset of an ``ml_models`` row needed to load a model."""
+    model_type: str
+    version: int
+    model_path: Optional[str]
+
+
+# Loader signature: (model_type, record) -> model instance or None
+ModelLoader = Callable[[str, ModelRecordInfo], Optional[Any]]
+
+
+def estimate_model_size(model: Any) -> int:
+    """Estimate the memory held by a model from its on-disk artifacts.
+
+    Serialized artifact size is a cheap, stable proxy for the in-memory
+    footprint of sklearn estimators and factor matrices.
+    """
+    model_dir = getattr(model, "loaded_from", None)
+    if not model_dir:
+        return 0
+    prefix = f"{model.model_name}_v{model.model_version}"
+    try:
+        return sum(
+            p.stat().st_size for p in Path(model_dir).iterdir()
+            if p.is_file() and p.name.startswith(prefix)
+        )
+    except OSError:
+        return 0
+
+
+class ModelRegistry:
+    """Thread-safe, process-level cache of loaded ML models."""
+
+    def __init__(
+        self,
+        check_interval: float = DEFAULT_CHECK_INTERVAL_SECONDS,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    ):
+        """Initialize the registry.
+
+        Args:
+            check_interval: Seconds between checks for a newer active version
+            max_memory_bytes: Budget for loaded models; least recently used
+                pinned-version entries are evicted beyond it
+        """
+        self.check_interval = check_interval
+        self.max_memory_bytes = max_memory_bytes
+        self._entries: "OrderedDict[str, RegistryEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "reloads": 0,
+            "evictions": 0,
+            "load_failures": 0,
+        }
+        self._load_times_ms: Dict[str, List[float]] = {}
+
+    def get_model(
+        self,
+        db: Session,
+        model_type: str,
+        loader: ModelLoader,
+        version: Optional[int] = None,
+    ) -> Optional[Any]:
+        """Get a loaded model, loading or hot-reloading it when needed.
+
+        Args:
+            db: Database session used to look up the active version
+            model_type: Type of model
+            loader: Callable that instantiates and loads a model from a record
+            version: Specific version to load (latest active if None)
+
+        Returns:
+            Model instance or None
+        """
+        key = self._key(model_type, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (version is not None or not self._needs_check(entry)):
+                return self._hit(key, entry)
+
+            record = self._find_record(db, model_type, version)
+            if record is None:
+                if entry and version is None:
+                    # Model was deactivated; stop serving it
+                    self._drop(key)
+                logger.warning(f"Model {model_type} not found in database")
+                return None
+
+            if entry and entry.version == record.version:
+                entry.checked_at = time.monotonic()
+                return self._hit(key, entry)
+
+            if entry:
+                self._stats["reloads"] += 1
+                logger.info(f"Reloading {model_type}: v{entry.version} -> v{record.version}")
+            else:
+                self._stats["misses"] += 1
+
+            return self._load(key, record, loader, pinned=version is not None)
+
+    def preload(self, db: Session, model_types: List[str], loader: ModelLoader) -> Dict[str, bool]:
+        """Load the active version of each model type ahead of first use.
+
+        Returns:
+            Mapping of model type to whether it was loaded
+        """
+        results = {}
+        for model_type in model_types:
+            try:
+                results[model_type] = self.get_model(db, model_type, loader) is not None
+            except Exception as e:
+                logger.error(f"Error preloading model {model_type}: {e}")
+                results[model_type] = False
+        logger.info(f"Preloaded models: {results}")
+        return results
+
+    def invalidate(self, model_type: Optional[str] = None):
+        """Drop cached models so the next access reloads them.
+
+        Args:
+            model_type: Model type to drop (None = all)
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if model_type is None or self._entries[key].model_type == model_type:
+                    self._drop(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache, memory and load-time metrics."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["reloads"]
+            load_times = {
+                model_type: {
+                    "count": len(times),
+                    "avg_ms": sum(times) / len(times),
+                    "max_ms": max(times),
+                    "last_ms": times[-1],
+                }
+                for model_type, times in self._load_times_ms.items() if times
+            }
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "memory_bytes": self.memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "load_times": load_times,
+                "models": {
+                    key: {
+                        "model_type": entry.model_type,
+                        "version": entry.version,
+                        "size_bytes": entry.size_bytes,
+                        "load_time_ms": entry.load_time_ms,
+                        "hits": entry.hits,
+                        "loaded_at": entry.loaded_at.isoformat(),
+                    }
+                    for key, entry in self._entries.items()
+                },
+            }
+
+    @property
+    def memory_bytes(self) -> int:
+        """Total estimated memory held by loaded models."""
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    @staticmethod
+    def _key(model_type: str, version: Optional[int]) -> str:
+        return model_type if version is None else f"{model_type}_v{version}"
+
+    def _needs_check(self, entry: RegistryEntry) -> bool:
+        return time.monotonic() - entry.checked_at >= self.check_interval
+
+    def _hit(self, key: str, entry: RegistryEntry) -> Any:
+        self._stats["hits"] += 1
+        entry.hits += 1
+        self._entries.move_to_end(key)
+        return entry.model
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+
+    def _find_record(self, db: Session, model_type: str, version: Optional[int]) -> Optional[ModelRecordInfo]:
+        from database.models import MLModel
+
+        query = db.query(MLModel.version, MLModel.model_path).filter(
+            MLModel.model_type == model_type,
+            MLModel.is_active == True
+        )
+        if version:
+            query = query.filter(MLModel.version == version)
+        else:
+            query = query.order_by(MLModel.version.desc())
+
+        row = query.first()
+        if not row:
+            return None
+        return ModelRecordInfo(model_type=model_type, version=row[0], model_path=row[1])
+
+    def _load(self, key: str, record: ModelRecordInfo, loader: ModelLoader, pinned: bool) -> Optional[Any]:
+        start = time.perf_counter()
+        model = loader(record.model_type, record)
+        load_time_ms = (time.perf_counter() - start) * 1000
+
+        if model is None:
+            self._stats["load_failures"] += 1
+            self._drop(key)
+            return None
+
+        self._load_times_ms.setdefault(record.model_type, []).append(load_time_ms)
+        self._load_times_ms[record.model_type] = self._load_times_ms[record.model_type][-100:]
+
+        self._entries[key] = RegistryEntry(
+            model_type=record.model_type,
+            version=record.version,
+            model=model,
+            size_bytes=estimate_model_size(model),
+            load_time_ms=load_time_ms,
+            pinned=pinned,
+        )
+        self._entries.move_to_end(key)
+        self._evict(keep=key)
+
+        logger.info(f"Loaded model {record.model_type} v{record.version} in {load_time_ms:.1f}ms")
+        return model
+
+    def _evict(self, keep: str):
+        """Evict least recently used entries until within the memory budget.
+
+        Pinned-version entries go first; active models are only evicted when
+        nothing else is left, since they serve the bulk of traffic.
+        """
+        for pinned_only in (True, False):
+            for key in list(self._entries):
+                if self.memory_bytes <= self.max_memory_bytes:
+                    return
+                entry = self._entries[key]
+                if key == keep or (pinned_only and not entry.pinned):
+                    continue
+                self._drop(key)
+                self._stats["evictions"] += 1
+                logger.info(f"Evicted model {key} ({entry.size_bytes} bytes)")
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from backend.config import settings
+                _registry = ModelRegistry(
+                    check_interval=settings.ml_registry_check_interval,
+                    max_memory_bytes=settings.ml_registry_max_memory_mb * 1024 * 1024,
+                )
+    return _registry
@@ -2,10 +2,12 @@
 
 from typing import Dict, Any, Optional
 import time
-from functools import lru_cache, wraps
+from functools import wraps
 from sqlalchemy.orm import Session
 
 from backend.ml.model_manager import ModelManager
+from backend.ml.model_registry import get_model_registry
+from backend.ml.batching import get_prediction_batcher
 from backend.cache import get, set, delete
 from backend.logging_config import get_logger
 
@@ -51,11 +53,9 @@ class ModelOptimizer:
         """
         self.db = db
         self.model_manager = ModelManager(db)
-        self._model_cache = {}
     
-    @lru_cache(maxsize=10)
     def get_cached_model(self, model_type: str):
-        """Get model with caching."""
+        """Get model from the process-wide model registry."""
         return self.model_manager.get_model(model_type)
     
     def optimize_prediction(self, model_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -97,6 +97,44 @@ class ModelOptimizer:
             logger.error(f"Error in optimized prediction: {e}")
             return {"error": str(e)}
     
+    async def optimize_prediction_async(self, model_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached prediction served through the micro-batching prediction server.
+        
+        Same caching and result format as ``optimize_prediction``, but cache
+        misses are batched with concurrent requests for the same model.
+        
+        Args:
+            model_type: Type of model
+            input_data: Input features
+            
+        Returns:
+            Prediction result
+        """
+        try:
+            cache_key = f"prediction:{model_type}:{hash(str(sorted(input_data.items())))}"
+            cached = get(cache_key)
+            if cached:
+                return cached
+            
+            model = self.get_cached_model(model_type)
+            if not model:
+                return {"error": "Model not found"}
+            
+            # Timing includes the wait for the batch window
+            start_time = time.time()
+            result = await get_prediction_batcher().predict(model_type, model, input_data)
+            prediction_time = time.time() - start_time
+            
+            result["_prediction_time_ms"] = prediction_time * 1000
+            
+            set(cache_key, result, ttl=300)
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error in optimized prediction: {e}")
+            return {"error": str(e)}
+    
     def batch_predict(self, model_type: str, input_batch: list) -> list:
         """Batch predictions for efficiency.
         
@@ -112,13 +150,8 @@ class ModelOptimizer:
             if not model:
                 return [{"error": "Model not found"} for _ in input_batch]
             
-            # Make batch predictions
-            results = []
-            for input_data in input_batch:
-                result = model.predict(input_data)
-                results.append(result)
-            
-            return results
+            # Single vectorized call over the whole batch
+            return model.predict_batch(input_batch)
             
         except Exception as e:
             logger.error(f"Error in batch prediction: {e}")
@@ -141,11 +174,7 @@ class ModelOptimizer:
             clear_pattern(pattern)
             
             # Clear model cache
-            if model_type:
-                self.get_cached_model.cache_clear()
-            else:
-                self._model_cache.clear()
-                self.get_cached_model.cache_clear()
+            get_model_registry().invalidate(model_type)
             
             logger.info(f"Cleared cache for {model_type or 'all models'}")
             
@@ -1,6 +1,7 @@
 """Pattern Classification Model using Random Forest."""
 
 from typing import Dict, Any, Optional, List
+from datetime import datetime
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
@@ -9,15 +10,31 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
 from sqlalchemy.orm import Session
 
-from backend.ml.base import BaseMLModel, FloyoDataProcessor
+from backend.ml.base import BaseMLModel, FloyoDataProcessor, training_watermark
 from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+EVENT_FEATURE_COLUMNS = ["event_type", "tool", "operation", "hour_of_day", "day_of_week", "file_extension"]
+
+# Feature columns plus the stored time the training watermark is taken from
+EVENT_TRAINING_COLUMNS = EVENT_FEATURE_COLUMNS + ["created_at"]
+
+# Incremental training grows the forest by this many trees per update, fit on
+# the new events plus a replay sample of earlier ones so every category stays
+# represented; past MAX_ESTIMATORS a full retrain is required
+INCREMENTAL_ESTIMATORS = 20
+MAX_ESTIMATORS = 300
+REPLAY_BUFFER_SIZE = 2000
+MIN_INCREMENTAL_SAMPLES = 10
+
 
 class PatternClassifier(BaseMLModel):
     """ML model for classifying usage patterns into workflow categories."""
     
+    supports_incremental = True
+    STATE_ATTRIBUTES = ["label_encoders", "feature_names", "replay_X", "replay_y", "samples_seen"]
+    
     def __init__(self, model_version: int = 1):
         super().__init__("pattern_classifier", model_version)
         self.model = RandomForestClassifier(
@@ -30,6 +47,9 @@ class PatternClassifier(BaseMLModel):
         )
         self.label_encoders: Dict[str, LabelEncoder] = {}
         self.feature_names: List[str] = []
+        self.replay_X: Optional[np.ndarray] = None
+        self.replay_y: Optional[np.ndarray] = None
+        self.samples_seen = 0
         
     def train(self, db: Session, user_id: Optional[str] = None, **kwargs) -> Dict[str, float]:
         """Train the pattern classifier on event data.
@@ -46,7 +66,9 @@ class PatternClassifier(BaseMLModel):
             logger.info(f"Training PatternClassifier for user_id={user_id}")
             
             # Load training data
-            events_df = FloyoDataProcessor.events_to_dataframe(db, user_id, limit=10000)
+            events_df = FloyoDataProcessor.events_to_dataframe(
+                db, user_id, limit=10000, columns=EVENT_TRAINING_COLUMNS
+            )
             if events_df is None or events_df.empty:
                 logger.warning("No events data available for training")
                 return {"error": "No training data available"}
@@ -101,7 +123,11 @@ class PatternClassifier(BaseMLModel):
             
             self.is_trained = True
             self.last_trained_at = pd.Timestamp.now()
+            self.training_watermark = training_watermark(events_df.get("created_at"))
             self.feature_names = list(features_df.columns)
+            self.replay_X = self.replay_y = None
+            self.samples_seen = 0
+            self._update_replay_buffer(X_train.to_numpy(dtype=float), np.asarray(y_train))
             
             logger.info(f"PatternClassifier trained successfully. Accuracy: {accuracy:.3f}")
             
@@ -111,29 +137,138 @@ class PatternClassifier(BaseMLModel):
             logger.error(f"Error training PatternClassifier: {e}", exc_info=True)
             return {"error": str(e)}
     
-    def _prepare_features(self, events_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    def partial_train(self, db: Session, since: datetime, user_id: Optional[str] = None,
+                      **kwargs) -> Dict[str, Any]:
+        """Grow the forest with trees fit on events stored since ``since``.
+        
+        New trees see the new events plus the replay buffer; existing trees
+        are kept. Categorical values first seen in the new events get new
+        codes without renumbering the existing ones.
+        
+        Args:
+            db: Database session
+            since: Training watermark of the current model
+            user_id: Optional user ID to filter training data
+            
+        Returns:
+            Dictionary of training metrics
+        """
+        if not self.is_trained or self.replay_X is None:
+            return {"error": "Model has no incremental state", "requires_full_retrain": True}
+        
+        n_trees = len(self.model.estimators_)
+        if n_trees + INCREMENTAL_ESTIMATORS > MAX_ESTIMATORS:
+            return {"error": f"Forest has {n_trees} trees", "requires_full_retrain": True}
+        
+        try:
+            events_df = FloyoDataProcessor.events_to_dataframe(
+                db, user_id, limit=None, columns=EVENT_TRAINING_COLUMNS, since=since
+            )
+            if events_df is None:
+                return {"error": "Could not load events"}
+            
+            # Too few new events: leave the watermark so they are used next time
+            if len(events_df) < MIN_INCREMENTAL_SAMPLES:
+                return {"skipped": True, "new_samples": len(events_df)}
+            
+            features_df = self._prepare_features(events_df, refit_encoders=False)
+            labels = self._create_labels(events_df)
+            X_new = features_df[self.feature_names].to_numpy(dtype=float)
+            y_new = labels.to_numpy()
+            
+            # Prequential accuracy: the current model scored on data it has not seen
+            accuracy = accuracy_score(y_new, self.model.predict(X_new))
+            
+            X = np.vstack([X_new, self.replay_X])
+            y = np.concatenate([y_new, self.replay_y])
+            if set(np.unique(y)) != set(self.model.classes_):
+                return {"error": "New events introduce a category", "requires_full_retrain": True}
+            
+            self.model.set_params(warm_start=True, n_estimators=n_trees + INCREMENTAL_ESTIMATORS)
+            try:
+                self.model.fit(X, y)
+            finally:
+                self.model.set_params(warm_start=False)
+            
+            self._update_replay_buffer(X_new, y_new)
+            self.training_watermark = training_watermark(events_df.get("created_at"), since)
+            self.last_trained_at = pd.Timestamp.now()
+            self.training_metrics = {
+                **self.training_metrics,
+                "incremental_accuracy": float(accuracy),
+                "new_samples": len(X_new),
+                "n_estimators": len(self.model.estimators_),
+            }
+            
+            logger.info(
+                f"PatternClassifier updated with {len(X_new)} events. "
+                f"Accuracy on new data: {accuracy:.3f}"
+            )
+            return self.training_metrics
+            
+        except Exception as e:
+            logger.error(f"Error updating PatternClassifier: {e}", exc_info=True)
+            return {"error": str(e)}
+    
+    def _update_replay_buffer(self, X: np.ndarray, y: np.ndarray) -> None:
+        """Reservoir-sample labelled rows so the buffer stays uniform over all data seen."""
+        rng = np.random.default_rng(self.samples_seen)
+        
+        if self.replay_X is None:
+            self.replay_X = np.empty((0, X.shape[1]), dtype=float)
+            self.replay_y = np.empty(0, dtype=object)
+        
+        # Fill any free slots first
+        free = min(REPLAY_BUFFER_SIZE - len(self.replay_X), len(X))
+        if free > 0:
+            self.replay_X = np.vstack([self.replay_X, X[:free]])
+            self.replay_y = np.concatenate([self.replay_y, y[:free]])
+        
+        # Row t of the stream replaces a random slot with probability size / t
+        rest = np.arange(free, len(X))
+        if len(rest):
+            if not self.replay_X.flags.writeable:
+                # Loaded artifacts are memory-mapped read-only
+                self.replay_X, self.replay_y = self.replay_X.copy(), self.replay_y.copy()
+            seen = self.samples_seen + rest + 1
+            slots = (rng.random(len(rest)) * seen).astype(np.int64)
+            keep = slots < REPLAY_BUFFER_SIZE
+            self.replay_X[slots[keep]] = X[rest[keep]]
+            self.replay_y[slots[keep]] = y[rest[keep]]
+        
+        self.samples_seen += len(X)
+    
+    def _encode(self, field: str, values: pd.Series, refit: bool) -> np.ndarray:
+        """Label-encode a categorical column.
+        
+        With ``refit=False`` existing codes are kept and unseen values are
+        appended, matching the lookup used by _extract_features_matrix.
+        """
+        values = values.fillna('unknown')
+        encoder = self.label_encoders.get(field)
+        if refit or encoder is None:
+            encoder = LabelEncoder()
+            codes = encoder.fit_transform(values)
+            self.label_encoders[field] = encoder
+            return codes
+        
+        index = {value: i for i, value in enumerate(encoder.classes_)}
+        new_values = [value for value in pd.unique(values) if value not in index]
+        if new_values:
+            encoder.classes_ = np.concatenate([encoder.classes_, np.array(new_values, dtype=object)])
+            index.update({value: len(index) + i for i, value in enumerate(new_values)})
+        return values.map(index).to_numpy()
+    
+    def _prepare_features(self, events_df: pd.DataFrame, refit_encoders: bool = True) -> Optional[pd.DataFrame]:
         """Prepare features from events DataFrame."""
         try:
             features = []
             
             # Encode categorical features
-            if 'event_type' in events_df.columns:
-                le_event = LabelEncoder()
-                events_df['event_type_encoded'] = le_event.fit_transform(events_df['event_type'].fillna('unknown'))
-                self.label_encoders['event_type'] = le_event
-                features.append('event_type_encoded')
-            
-            if 'tool' in events_df.columns:
-                le_tool = LabelEncoder()
-                events_df['tool_encoded'] = le_tool.fit_transform(events_df['tool'].fillna('unknown'))
-                self.label_encoders['tool'] = le_tool
-                features.append('tool_encoded')
-            
-            if 'operation' in events_df.columns:
-                le_op = LabelEncoder()
-                events_df['operation_encoded'] = le_op.fit_transform(events_df['operation'].fillna('unknown'))
-                self.label_encoders['operation'] = le_op
-                features.append('operation_encoded')
+            for field in ('event_type', 'tool', 'operation'):
+                if field in events_df.columns:
+                    events_df[f'{field}_encoded'] = self._encode(field, events_df[field], refit_encoders)
+                    features.append(f'{field}_encoded')
             
             # Numerical features
             if 'hour_of_day' in events_df.columns:
@@ -205,84 +340,85 @@ class PatternClassifier(BaseMLModel):
         Returns:
             Dictionary with predicted category and confidence
         """
+        return self.predict_batch([event_data])[0]
+    
+    def predict_batch(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict workflow categories for many events with one forest pass.
+        
+        Args:
+            events: List of event feature dictionaries
+            
+        Returns:
+            List of prediction dictionaries, one per event
+        """
         if not self.is_trained:
             logger.warning("PatternClassifier not trained. Returning default prediction.")
-            return {
+            return [{
                 "category": "general",
                 "confidence": 0.5,
                 "error": "Model not trained"
-            }
+            } for _ in events]
+        
+        if not events:
+            return []
         
         try:
-            # Prepare features
-            features = self._extract_features(event_data)
-            if features is None:
-                return {"category": "general", "confidence": 0.5}
-            
-            # Make prediction
-            prediction = self.model.predict([features])[0]
-            probabilities = self.model.predict_proba([features])[0]
-            confidence = float(np.max(probabilities))
-            
-            return {
-                "category": prediction,
-                "confidence": confidence,
-                "probabilities": {str(i): float(prob) for i, prob in enumerate(probabilities)}
-            }
+            X = self._extract_features_matrix(events)
+            
+            # predict() is argmax over predict_proba, so one call gives both
+            probabilities = self.model.predict_proba(X)
+            best = np.argmax(probabilities, axis=1)
+            categories = self.model.classes_[best]
+            confidences = probabilities[np.arange(len(events)), best]
+            
+            return [
+                {
+                    "category": categories[i],
+                    "confidence": float(confidences[i]),
+                    "probabilities": {str(j): float(prob) for j, prob in enumerate(probabilities[i])}
+                }
+                for i in range(len(events))
+            ]
             
         except Exception as e:
             logger.error(f"Error making prediction: {e}")
-            return {"category": "general", "confidence": 0.5, "error": str(e)}
+            return [{"category": "general", "confidence": 0.5, "error": str(e)} for _ in events]
     
     def _extract_features(self, event_data: Dict[str, Any]) -> Optional[List[float]]:
         """Extract features from event data."""
         try:
-            features = []
-            
-            # Encode categorical features using saved encoders
-            if 'event_type' in event_data and 'event_type' in self.label_encoders:
-                try:
-                    encoded = self.label_encoders['event_type'].transform([event_data['event_type']])[0]
-                    features.append(float(encoded))
-                except:
-                    features.append(0.0)
-            else:
-                features.append(0.0)
-            
-            if 'tool' in event_data and 'tool' in self.label_encoders:
-                try:
-                    encoded = self.label_encoders['tool'].transform([event_data['tool']])[0]
-                    features.append(float(encoded))
-                except:
-                    features.append(0.0)
-            else:
-                features.append(0.0)
-            
-            if 'operation' in event_data and 'operation' in self.label_encoders:
-                try:
-                    encoded = self.label_encoders['operation'].transform([event_data['operation']])[0]
-                    features.append(float(encoded))
-                except:
-                    features.append(0.0)
-            else:
-                features.append(0.0)
-            
-            # Time features
-            hour = event_data.get('hour_of_day', 12)
-            features.append(float(hour))
-            features.append(float(np.sin(2 * np.pi * hour / 24)))
-            features.append(float(np.cos(2 * np.pi * hour / 24)))
-            
-            day = event_data.get('day_of_week', 0)
-            features.append(float(day))
-            features.append(float(np.sin(2 * np.pi * day / 7)))
-            features.append(float(np.cos(2 * np.pi * day / 7)))
-            
-            # File extension frequency (would need to be passed in or calculated)
-            features.append(event_data.get('ext_frequency', 1.0))
-            
-            return features
-            
+            return self._extract_features_matrix([event_data])[0].tolist()
         except Exception as e:
             logger.error(f"Error extracting features: {e}")
             return None
+    
+    def _extract_features_matrix(self, events: List[Dict[str, Any]]) -> np.ndarray:
+        """Build the feature matrix for a batch of events.
+        
+        Categorical values unseen during training encode to 0, matching the
+        single-event behaviour of the label encoders.
+        """
+        n = len(events)
+        X = np.zeros((n, 10), dtype=float)
+        
+        for col, field in enumerate(("event_type", "tool", "operation")):
+            encoder = self.label_encoders.get(field)
+            if encoder is None:
+                continue
+            index = {value: i for i, value in enumerate(encoder.classes_)}
+            X[:, col] = [index.get(event.get(field), 0) for event in events]
+        
+        # Time features
+        hours = np.array([event.get('hour_of_day', 12) for event in events], dtype=float)
+        days = np.array([event.get('day_of_week', 0) for event in events], dtype=float)
+        X[:, 3] = hours
+        X[:, 4] = np.sin(2 * np.pi * hours / 24)
+        X[:, 5] = np.cos(2 * np.pi * hours / 24)
+        X[:, 6] = days
+        X[:, 7] = np.sin(2 * np.pi * days / 7)
+        X[:, 8] = np.cos(2 * np.pi * days / 7)
+        
+        # File extension frequency (would need to be passed in or calculated)
+        X[:, 9] = [event.get('ext_frequency', 1.0) for event in events]
+        
+        return X
@@ -9,10 +9,22 @@ from collections import defaultdict, Counter
 from datetime import datetime, timedelta
 import statistics
 
+from backend.ml.event_tokens import EventVocabulary, sequence_to_key
+from backend.ml.temporal_profile import TemporalProfile, TimeZone
+
 
 class AdvancedPatternDetector:
     """Advanced pattern detection for workflow automation."""
     
+    def __init__(self, tz: TimeZone = None):
+        """
+        Initialize the detector.
+        
+        Args:
+            tz: Time zone for hour/weekday patterns (None = system local time)
+        """
+        self.tz = tz
+    
     def detect_repetitive_patterns(
         self,
         sequences: List[List[Dict[str, Any]]],
@@ -20,32 +32,24 @@ class AdvancedPatternDetector:
     ) -> List[Dict[str, Any]]:
         """Detect repetitive patterns in sequences."""
         
-        # Count sequence frequencies
-        sequence_freq = Counter()
-        for sequence in sequences:
-            seq_key = self._sequence_to_key(sequence)
-            sequence_freq[seq_key] += 1
+        # Group equal sequences in one pass
+        vocabulary = EventVocabulary()
+        groups = vocabulary.group_sequences(sequences)
         
         # Find frequent patterns
         patterns = []
-        for seq_key, frequency in sequence_freq.items():
+        for tokens, matching_sequences in groups.items():
+            frequency = len(matching_sequences)
             if frequency >= min_frequency:
-                # Find matching sequences
-                matching_sequences = [
-                    seq for seq in sequences
-                    if self._sequence_to_key(seq) == seq_key
-                ]
-                
-                if matching_sequences:
-                    pattern = {
-                        'sequence_key': seq_key,
-                        'frequency': frequency,
-                        'sequences': matching_sequences,
-                        'steps': len(matching_sequences[0]),
-                        'consistency_score': self._calculate_consistency(matching_sequences),
-                        'temporal_pattern': self._detect_temporal_pattern(matching_sequences),
-                    }
-                    patterns.append(pattern)
+                pattern = {
+                    'sequence_key': vocabulary.sequence_key(tokens),
+                    'frequency': frequency,
+                    'sequences': matching_sequences,
+                    'steps': len(matching_sequences[0]),
+                    'consistency_score': self._calculate_consistency(matching_sequences),
+                    'temporal_pattern': self._detect_temporal_pattern(matching_sequences),
+                }
+                patterns.append(pattern)
         
         return sorted(patterns, key=lambda p: p['frequency'], reverse=True)
     
@@ -56,58 +60,29 @@ class AdvancedPatternDetector:
     ) -> Dict[str, Any]:
         """Detect temporal patterns in interactions and events."""
         
-        # Group by hour of day
-        hourly_interactions = defaultdict(list)
-        hourly_telemetry = defaultdict(list)
-        
-        for interaction in interactions:
-            timestamp = interaction.get('timestamp', 0)
-            if timestamp > 0:
-                hour = datetime.fromtimestamp(timestamp / 1000).hour
-                hourly_interactions[hour].append(interaction)
-        
-        for event in telemetry_events:
-            timestamp = self._parse_timestamp(event.get('timestamp'))
-            if timestamp > 0:
-                hour = datetime.fromtimestamp(timestamp / 1000).hour
-                hourly_telemetry[hour].append(event)
-        
-        # Find peak hours
-        peak_interaction_hour = max(hourly_interactions.items(), key=lambda x: len(x[1]))[0] if hourly_interactions else None
-        peak_telemetry_hour = max(hourly_telemetry.items(), key=lambda x: len(x[1]))[0] if hourly_telemetry else None
-        
-        # Detect day-of-week patterns
-        day_interactions = defaultdict(list)
-        day_telemetry = defaultdict(list)
-        
-        for interaction in interactions:
-            timestamp = interaction.get('timestamp', 0)
-            if timestamp > 0:
-                day = datetime.fromtimestamp(timestamp / 1000).strftime('%A')
-                day_interactions[day].append(interaction)
-        
-        for event in telemetry_events:
-            timestamp = self._parse_timestamp(event.get('timestamp'))
-            if timestamp > 0:
-                day = datetime.fromtimestamp(timestamp / 1000).strftime('%A')
-                day_telemetry[day].append(event)
+        interaction_times = [
+            timestamp for timestamp in (i.get('timestamp', 0) for i in interactions)
+            if timestamp > 0
+        ]
+        telemetry_times = [
+            timestamp for timestamp in (self._parse_timestamp(e.get('timestamp')) for e in telemetry_events)
+            if timestamp > 0
+        ]
         
-        peak_day = max(day_interactions.items(), key=lambda x: len(x[1]))[0] if day_interactions else None
+        # Hour of day and day of week histograms
+        interaction_profile = TemporalProfile(interaction_times, self.tz)
+        telemetry_profile = TemporalProfile(telemetry_times, self.tz)
         
         return {
             'peak_hours': {
-                'interactions': peak_interaction_hour,
-                'telemetry': peak_telemetry_hour,
+                'interactions': interaction_profile.peak_hour(),
+                'telemetry': telemetry_profile.peak_hour(),
             },
             'peak_days': {
-                'interactions': peak_day,
-            },
-            'hourly_distribution': {
-                hour: len(events) for hour, events in hourly_interactions.items()
-            },
-            'daily_distribution': {
-                day: len(events) for day, events in day_interactions.items()
+                'interactions': interaction_profile.peak_day(),
             },
+            'hourly_distribution': interaction_profile.hour_distribution(),
+            'daily_distribution': interaction_profile.day_distribution(),
         }
     
     def detect_contextual_patterns(
@@ -211,31 +186,7 @@ class AdvancedPatternDetector:
     
     def _sequence_to_key(self, sequence: List[Dict[str, Any]]) -> str:
         """Convert sequence to key for comparison."""
-        keys = []
-        for event in sequence:
-            if isinstance(event, dict):
-                if event.get('type') == 'interaction':
-                    interaction = event.get('data', {})
-                    if isinstance(interaction, dict):
-                        key = f"i:{interaction.get('type', 'unknown')}:{interaction.get('overlay', {}).get('type', 'none')}"
-                    else:
-                        key = "i:unknown:none"
-                elif event.get('type') == 'telemetry':
-                    telemetry = event.get('data', {})
-                    if isinstance(telemetry, dict):
-                        key = f"t:{telemetry.get('eventType', 'unknown')}:{telemetry.get('appId', 'unknown')}"
-                    else:
-                        key = "t:unknown:unknown"
-                else:
-                    # Handle direct interaction/telemetry dicts
-                    if 'overlay' in event:
-                        key = f"i:{event.get('type', 'unknown')}:{event.get('overlay', {}).get('type', 'none')}"
-                    elif 'eventType' in event:
-                        key = f"t:{event.get('eventType', 'unknown')}:{event.get('appId', 'unknown')}"
-                    else:
-                        key = "unknown"
-                keys.append(key)
-        return ' -> '.join(keys) if keys else 'empty'
+        return sequence_to_key(sequence)
     
     def _calculate_consistency(
         self,
@@ -286,20 +237,14 @@ class AdvancedPatternDetector:
             return {}
         
         # Group by hour
-        hours = [
-            datetime.fromtimestamp(ts / 1000).hour
-            for ts in timestamps if ts > 0
-        ]
+        profile = TemporalProfile([ts for ts in timestamps if ts > 0], self.tz)
         
-        if not hours:
+        if not len(profile):
             return {}
         
-        hour_counts = Counter(hours)
-        peak_hour = max(hour_counts.items(), key=lambda x: x[1])[0] if hour_counts else None
-        
         return {
-            'peak_hour': peak_hour,
-            'hour_distribution': dict(hour_counts),
+            'peak_hour': profile.peak_hour(),
+            'hour_distribution': profile.hour_distribution(),
             'total_occurrences': len(sequences),
         }
     
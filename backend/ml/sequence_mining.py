@@ -0,0 +1,72 @@
+"""Repeated-window mining over token sequences.
+
+Events are reduced to integer tokens (one per distinct event key) and every
+window of a given length gets a dense integer ID, so two windows are equal
+exactly when their IDs are. IDs for length ``L`` are built from the IDs for
+length ``L - 1`` and the next token, the same rank-refinement step used to
+build suffix arrays, and densified with a hash-based factorization. Each
+length costs O(n), instead of comparing every window against every later
+window.
+"""
+
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def iter_window_ids(tokens: np.ndarray, max_length: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield dense IDs for all windows of length 1 to ``max_length``.
+
+    Args:
+        tokens: Integer token per event
+        max_length: Longest window length
+
+    Yields:
+        ``(length, ids)`` where ``ids[i]`` identifies ``tokens[i:i + length]``
+    """
+    tokens = np.asarray(tokens, dtype=np.int64)
+    if max_length < 1 or len(tokens) == 0:
+        return
+
+    ids, uniques = pd.factorize(tokens)
+    n_tokens = len(uniques)
+    token_ids = ids.astype(np.int64)
+    ids = token_ids
+    yield 1, ids
+
+    for length in range(2, min(max_length, len(tokens)) + 1):
+        # Window i of this length is window i of the previous length
+        # followed by token i + length - 1
+        combined = ids[:-1] * n_tokens + token_ids[length - 1:]
+        ids = pd.factorize(combined)[0].astype(np.int64)
+        yield length, ids
+
+
+def find_repeated_windows(tokens: np.ndarray, lengths: Iterable[int]) -> Dict[int, np.ndarray]:
+    """Find windows that occur again later without overlapping.
+
+    A window starting at ``i`` with length ``L`` is reported when an equal
+    window starts at some ``j >= i + L``.
+
+    Args:
+        tokens: Integer token per event
+        lengths: Window lengths to search
+
+    Returns:
+        Dictionary mapping each length (in the order given) to the sorted
+        start positions of its repeated windows
+    """
+    lengths = list(lengths)
+    wanted = set(lengths)
+    found = {length: np.empty(0, dtype=np.int64) for length in lengths}
+
+    for length, ids in iter_window_ids(tokens, max(lengths, default=0)):
+        if length not in wanted:
+            continue
+        starts = np.arange(len(ids), dtype=np.int64)
+        last_start = np.full(int(ids.max()) + 1, -1, dtype=np.int64)
+        np.maximum.at(last_start, ids, starts)
+        found[length] = np.flatnonzero(last_start[ids] >= starts + length)
+
+    return found
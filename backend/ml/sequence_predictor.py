@@ -4,8 +4,13 @@ from typing import Dict, Any, Optional, List, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from pathlib import Path
 from sqlalchemy.orm import Session
 
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
 try:
     import tensorflow as tf
     from tensorflow.keras.models import Sequential
@@ -19,9 +24,6 @@ except ImportError:
 
 from backend.ml.base import BaseMLModel, FloyoDataProcessor
 from database.models import Event, TemporalPattern, WorkflowExecution
-from backend.logging_config import get_logger
-
-logger = get_logger(__name__)
 
 
 class SequencePredictor(BaseMLModel):
@@ -39,6 +41,22 @@ class SequencePredictor(BaseMLModel):
         else:
             self.use_fallback = False
     
+    def _get_artifact_state(self, file_path: Path) -> Dict[str, Any]:
+        """Keras models are stored in the native .keras format next to the artifact."""
+        if self.model is not None:
+            self.model.save(file_path / f"{self.model_name}_v{self.model_version}.keras")
+        return {"feature_count": self.feature_count, "sequence_length": self.sequence_length}
+    
+    def _set_artifact_state(self, state: Dict[str, Any], file_path: Path) -> None:
+        self.feature_count = state.get("feature_count", 0)
+        self.sequence_length = state.get("sequence_length", self.sequence_length)
+        keras_file = file_path / f"{self.model_name}_v{self.model_version}.keras"
+        self.model = None
+        if keras_file.exists():
+            if not TENSORFLOW_AVAILABLE:
+                raise RuntimeError("TensorFlow is required to load the LSTM sequence predictor")
+            self.model = tf.keras.models.load_model(keras_file)
+    
     def train(self, db: Session, user_id: Optional[str] = None, **kwargs) -> Dict[str, float]:
         """Train the LSTM sequence predictor.
         
@@ -229,49 +247,66 @@ class SequencePredictor(BaseMLModel):
         Returns:
             Dictionary with prediction probability and explanation
         """
+        return self.predict_batch([recent_events])[0]
+    
+    def predict_batch(self, event_sequences: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Predict workflow need for many event sequences in one forward pass.
+        
+        Args:
+            event_sequences: List of recent-event lists, one per prediction
+            
+        Returns:
+            List of prediction dictionaries
+        """
         if not self.is_trained:
-            return {"probability": 0.5, "will_trigger": False, "error": "Model not trained"}
+            return [
+                {"probability": 0.5, "will_trigger": False, "error": "Model not trained"}
+                for _ in event_sequences
+            ]
         
         if self.use_fallback:
-            return self._predict_fallback(recent_events)
+            return [self._predict_fallback(events) for events in event_sequences]
+        
+        if not event_sequences:
+            return []
         
         try:
-            # Prepare sequence
-            if len(recent_events) < self.sequence_length:
-                # Pad with zeros
-                padded = recent_events + [{}] * (self.sequence_length - len(recent_events))
-            else:
-                padded = recent_events[-self.sequence_length:]
+            X = np.stack([self._sequence_features(events) for events in event_sequences])
+            probabilities = self.model.predict(X, verbose=0)[:, 0]
             
-            # Extract features
-            sequence = []
-            for event in padded:
-                feat = [
-                    event.get('hour_of_day', 0),
-                    event.get('day_of_week', 0),
-                    1.0 if event.get('file_extension') else 0.0,
-                    len(str(event.get('file_path', ''))),
-                ]
-                sequence.append(feat)
-            
-            # Pad to sequence_length
-            while len(sequence) < self.sequence_length:
-                sequence.append([0.0] * 4)
-            
-            # Predict
-            X = np.array([sequence])
-            probability = float(self.model.predict(X, verbose=0)[0][0])
-            will_trigger = probability > 0.7
-            
-            return {
-                "probability": probability,
-                "will_trigger": will_trigger,
-                "confidence": "high" if probability > 0.8 else "medium" if probability > 0.5 else "low"
-            }
+            return [
+                {
+                    "probability": float(probability),
+                    "will_trigger": bool(probability > 0.7),
+                    "confidence": "high" if probability > 0.8 else "medium" if probability > 0.5 else "low"
+                }
+                for probability in probabilities
+            ]
             
         except Exception as e:
             logger.error(f"Error making prediction: {e}")
-            return {"probability": 0.5, "will_trigger": False, "error": str(e)}
+            return [
+                {"probability": 0.5, "will_trigger": False, "error": str(e)}
+                for _ in event_sequences
+            ]
+    
+    def _sequence_features(self, recent_events: List[Dict[str, Any]]) -> np.ndarray:
+        """Build the (sequence_length, 4) feature block for one sequence."""
+        if len(recent_events) < self.sequence_length:
+            # Pad with zeros
+            padded = recent_events + [{}] * (self.sequence_length - len(recent_events))
+        else:
+            padded = recent_events[-self.sequence_length:]
+        
+        return np.array([
+            [
+                event.get('hour_of_day', 0),
+                event.get('day_of_week', 0),
+                1.0 if event.get('file_extension') else 0.0,
+                len(str(event.get('file_path', ''))),
+            ]
+            for event in padded
+        ], dtype=float)
     
     def _predict_fallback(self, recent_events: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fallback prediction using heuristics."""
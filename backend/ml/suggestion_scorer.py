@@ -1,6 +1,8 @@
 """Suggestion Confidence Scorer using Gradient Boosting."""
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
@@ -14,6 +16,15 @@ from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+FEATURE_NAMES = [
+    "pattern_frequency",
+    "user_activity_level",
+    "temporal_recency",
+    "base_confidence",
+    "workflow_success_rate",
+    "tools_count",
+]
+
 
 class SuggestionScorer(BaseMLModel):
     """ML model for scoring suggestion confidence (adoption probability)."""
@@ -52,25 +63,14 @@ class SuggestionScorer(BaseMLModel):
                 logger.warning("Insufficient suggestions for training")
                 return {"error": "Insufficient training data (need at least 20 suggestions)"}
             
-            # Prepare features and labels
-            features_list = []
-            labels = []
-            
-            for suggestion in suggestions:
-                features = self._extract_features(suggestion, db)
-                if features is not None:
-                    features_list.append(features)
-                    # Label: 1 if applied, 0 if dismissed, 0.5 if neither
-                    label = 1.0 if suggestion.is_applied else (0.0 if suggestion.is_dismissed else 0.5)
-                    labels.append(label)
-            
-            if len(features_list) < 10:
-                logger.warning("Insufficient feature data")
-                return {"error": "Insufficient feature data"}
+            # Prepare features and labels with a handful of grouped queries
+            features_df = self._extract_features_frame(suggestions, db)
             
-            # Convert to DataFrame
-            features_df = pd.DataFrame(features_list)
-            labels = np.array(labels)
+            # Label: 1 if applied, 0 if dismissed, 0.5 if neither
+            labels = np.array([
+                1.0 if s.is_applied else (0.0 if s.is_dismissed else 0.5)
+                for s in suggestions
+            ])
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -113,66 +113,79 @@ class SuggestionScorer(BaseMLModel):
     def _extract_features(self, suggestion: Suggestion, db: Session) -> Optional[Dict[str, float]]:
         """Extract features from a suggestion."""
         try:
-            # Get pattern frequency for this user
-            from database.models import Pattern
-            
-            pattern_frequency = 0.0
-            if suggestion.tools_involved:
-                # Count patterns matching suggestion
-                patterns = db.query(Pattern).filter(
-                    Pattern.user_id == suggestion.user_id
-                ).all()
-                
-                for pattern in patterns:
-                    if pattern.tools and any(tool in pattern.tools for tool in suggestion.tools_involved):
-                        pattern_frequency += pattern.count
-            
-            # Get user activity level
-            from database.models import Event
-            from datetime import datetime, timedelta
-            
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            recent_events = db.query(Event).filter(
-                Event.user_id == suggestion.user_id,
-                Event.timestamp >= week_ago
-            ).count()
-            
-            # Temporal recency
-            days_since_creation = (datetime.utcnow() - suggestion.created_at).days if suggestion.created_at else 0
-            temporal_recency = 1.0 / (1.0 + days_since_creation) if days_since_creation > 0 else 1.0
-            
-            # Confidence from suggestion
-            base_confidence = suggestion.confidence or 0.5
-            
-            # Get workflow success rate (if user has workflows)
-            from database.models import WorkflowExecution, Workflow
-            
-            workflows = db.query(Workflow).filter(Workflow.user_id == suggestion.user_id).all()
-            workflow_ids = [w.id for w in workflows]
-            
-            success_rate = 0.5  # Default
-            if workflow_ids:
-                executions = db.query(WorkflowExecution).filter(
-                    WorkflowExecution.workflow_id.in_(workflow_ids)
-                ).all()
-                
-                if executions:
-                    successful = sum(1 for e in executions if e.status == "completed")
-                    success_rate = successful / len(executions) if executions else 0.5
-            
-            return {
-                "pattern_frequency": float(pattern_frequency),
-                "user_activity_level": float(recent_events),
-                "temporal_recency": float(temporal_recency),
-                "base_confidence": float(base_confidence),
-                "workflow_success_rate": float(success_rate),
-                "tools_count": float(len(suggestion.tools_involved) if suggestion.tools_involved else 0),
-            }
-            
+            return self._extract_features_frame([suggestion], db).iloc[0].to_dict()
         except Exception as e:
             logger.error(f"Error extracting features: {e}")
             return None
     
+    def _extract_features_frame(self, suggestions: List[Suggestion], db: Session,
+                                chunk_size: int = 1000) -> pd.DataFrame:
+        """Extract features for many suggestions at once.
+        
+        Per-user aggregates (recent events, execution success, patterns) are
+        computed once per user with grouped queries and joined to the
+        suggestions, instead of re-querying for every suggestion.
+        
+        Args:
+            suggestions: Suggestions to featurize
+            db: Database session
+            chunk_size: Maximum users per IN clause
+            
+        Returns:
+            DataFrame with one row per suggestion and FEATURE_NAMES columns
+        """
+        from database.models import Pattern
+        
+        now = datetime.utcnow()
+        user_ids = [s.user_id for s in suggestions]
+        aggregates = FloyoDataProcessor.user_activity_aggregates(
+            db, user_ids, now - timedelta(days=7), chunk_size=chunk_size
+        ).reindex(user_ids)
+        
+        # Patterns are only needed for users with tool-based suggestions
+        patterns_by_user: Dict[Any, List[Tuple[set, int]]] = defaultdict(list)
+        pattern_users = list({s.user_id for s in suggestions if s.tools_involved})
+        for start in range(0, len(pattern_users), chunk_size):
+            rows = db.query(Pattern.user_id, Pattern.tools, Pattern.count).filter(
+                Pattern.user_id.in_(pattern_users[start:start + chunk_size])
+            ).all()
+            for user_id, tools, count in rows:
+                if tools:
+                    patterns_by_user[user_id].append((set(tools), count or 0))
+        
+        pattern_frequency_cache: Dict[Tuple[Any, Tuple[str, ...]], float] = {}
+        
+        def pattern_frequency(suggestion: Suggestion) -> float:
+            if not suggestion.tools_involved:
+                return 0.0
+            key = (suggestion.user_id, tuple(suggestion.tools_involved))
+            if key not in pattern_frequency_cache:
+                pattern_frequency_cache[key] = float(sum(
+                    count for tools, count in patterns_by_user.get(suggestion.user_id, [])
+                    if any(tool in tools for tool in suggestion.tools_involved)
+                ))
+            return pattern_frequency_cache[key]
+        
+        def temporal_recency(suggestion: Suggestion) -> float:
+            days_since_creation = (now - suggestion.created_at).days if suggestion.created_at else 0
+            return 1.0 / (1.0 + days_since_creation) if days_since_creation > 0 else 1.0
+        
+        execution_count = aggregates["execution_count"].to_numpy(dtype=float)
+        completed_count = aggregates["completed_count"].to_numpy(dtype=float)
+        success_rate = np.divide(
+            completed_count, execution_count,
+            out=np.full(len(suggestions), 0.5), where=execution_count > 0
+        )
+        
+        return pd.DataFrame({
+            "pattern_frequency": [pattern_frequency(s) for s in suggestions],
+            "user_activity_level": aggregates["recent_event_count"].to_numpy(dtype=float),
+            "temporal_recency": [temporal_recency(s) for s in suggestions],
+            "base_confidence": [float(s.confidence or 0.5) for s in suggestions],
+            "workflow_success_rate": success_rate,
+            "tools_count": [float(len(s.tools_involved) if s.tools_involved else 0) for s in suggestions],
+        }, columns=FEATURE_NAMES)
+    
     def predict(self, suggestion_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict adoption probability for a suggestion.
         
@@ -182,31 +195,52 @@ class SuggestionScorer(BaseMLModel):
         Returns:
             Dictionary with confidence score
         """
+        return self.predict_batch([suggestion_data])[0]
+    
+    def predict_batch(self, suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict adoption probabilities for many suggestions at once.
+        
+        Args:
+            suggestions: List of suggestion feature dictionaries
+            
+        Returns:
+            List of dictionaries with confidence scores
+        """
         if not self.is_trained:
             logger.warning("SuggestionScorer not trained. Returning default confidence.")
-            return {
+            return [{
                 "confidence": 0.5,
                 "error": "Model not trained"
-            }
+            } for _ in suggestions]
+        
+        if not suggestions:
+            return []
         
         try:
-            # Prepare features
-            features = self._prepare_features(suggestion_data)
-            if features is None:
-                return {"confidence": 0.5}
-            
-            # Make prediction
-            confidence = self.model.predict([features])[0]
-            confidence = float(np.clip(confidence, 0.0, 1.0))  # Clamp to [0, 1]
-            
-            return {
-                "confidence": confidence,
-                "explanation": self._explain_prediction(features, confidence)
-            }
+            rows = [self._prepare_features(s) for s in suggestions]
+            valid = [i for i, row in enumerate(rows) if row is not None]
+            results: List[Dict[str, Any]] = [{"confidence": 0.5} for _ in suggestions]
+            if not valid:
+                return results
+            
+            X = np.array([rows[i] for i in valid], dtype=float)
+            
+            # Clamp to [0, 1]
+            confidences = np.clip(self.model.predict(X), 0.0, 1.0)
+            top_features = self._top_feature_indices()
+            
+            for row, i in enumerate(valid):
+                confidence = float(confidences[row])
+                results[i] = {
+                    "confidence": confidence,
+                    "explanation": self._format_explanation(X[row], confidence, top_features)
+                }
+            
+            return results
             
         except Exception as e:
             logger.error(f"Error making prediction: {e}")
-            return {"confidence": 0.5, "error": str(e)}
+            return [{"confidence": 0.5, "error": str(e)} for _ in suggestions]
     
     def _prepare_features(self, suggestion_data: Dict[str, Any]) -> Optional[List[float]]:
         """Prepare features from suggestion data."""
@@ -225,28 +259,17 @@ class SuggestionScorer(BaseMLModel):
     
     def _explain_prediction(self, features: List[float], confidence: float) -> str:
         """Generate explanation for prediction."""
-        feature_names = [
-            "pattern_frequency",
-            "user_activity_level",
-            "temporal_recency",
-            "base_confidence",
-            "workflow_success_rate",
-            "tools_count",
-        ]
-        
-        # Get feature importance
+        return self._format_explanation(features, confidence, self._top_feature_indices())
+    
+    def _top_feature_indices(self, n: int = 3) -> List[int]:
+        """Indices of the most important features, highest first."""
         importances = self.model.feature_importances_
-        
-        # Find top contributing features
-        top_features = sorted(
-            zip(feature_names, importances, features),
-            key=lambda x: x[1],
-            reverse=True
-        )[:3]
-        
+        return sorted(range(len(FEATURE_NAMES)), key=lambda i: importances[i], reverse=True)[:n]
+    
+    def _format_explanation(self, features: Any, confidence: float, top_features: List[int]) -> str:
         explanation = f"Confidence: {confidence:.2f}. Top factors: "
         explanation += ", ".join([
-            f"{name}({val:.2f})" for name, _, val in top_features
+            f"{FEATURE_NAMES[i]}({features[i]:.2f})" for i in top_features
         ])
         
         return explanation
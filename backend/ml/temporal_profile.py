@@ -0,0 +1,124 @@
+"""Vectorized hour-of-day and weekday profiles of event timestamps.
+
+Epoch-millisecond timestamps are converted to local hour and weekday with
+integer arithmetic on NumPy arrays and counted with ``np.bincount``, instead
+of building a ``datetime`` per event. The UTC offset is looked up once per
+distinct 15-minute UTC interval (every time zone changes offset on such a
+boundary), so results match ``datetime.fromtimestamp`` including around DST
+changes and in half-hour zones.
+"""
+
+import calendar
+import time
+from datetime import datetime, tzinfo
+from typing import Dict, Iterable, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+TimeZone = Union[str, tzinfo, None]
+
+_OFFSET_INTERVAL = 900
+_SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+def _resolve_tz(tz: TimeZone) -> Optional[tzinfo]:
+    if isinstance(tz, str):
+        return ZoneInfo(tz)
+    return tz
+
+
+def _utc_offsets(seconds: np.ndarray, tz: Optional[tzinfo]) -> np.ndarray:
+    """UTC offset in seconds for each timestamp (system local time if tz is None)."""
+    intervals, inverse = np.unique(seconds // _OFFSET_INTERVAL, return_inverse=True)
+    offsets = np.empty(len(intervals), dtype=np.int64)
+    for i, interval in enumerate(intervals.tolist()):
+        start = interval * _OFFSET_INTERVAL
+        if tz is None:
+            offsets[i] = time.localtime(start).tm_gmtoff
+        else:
+            offsets[i] = int(datetime.fromtimestamp(start, tz).utcoffset().total_seconds())
+    return offsets[inverse.reshape(-1)]
+
+
+def local_hours_and_weekdays(timestamps_ms: Iterable[float], tz: TimeZone = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert epoch milliseconds to local hour of day and weekday.
+
+    Args:
+        timestamps_ms: Epoch timestamps in milliseconds
+        tz: Time zone name or tzinfo (None = system local time)
+
+    Returns:
+        Tuple of (hours 0-23, weekdays 0-6 with Monday = 0)
+    """
+    if not isinstance(timestamps_ms, np.ndarray):
+        timestamps_ms = list(timestamps_ms)
+    timestamps = np.asarray(timestamps_ms)
+    if len(timestamps) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    seconds = np.floor_divide(timestamps, 1000).astype(np.int64)
+    local = seconds + _utc_offsets(seconds, _resolve_tz(tz))
+    days, seconds_of_day = np.divmod(local, _SECONDS_PER_DAY)
+    return seconds_of_day // 3600, (days + _EPOCH_WEEKDAY) % 7
+
+
+class TemporalProfile:
+    """Hour-of-day and weekday histograms of a set of timestamps.
+
+    Distributions are returned as dictionaries ordered by first appearance,
+    and ties for the peak go to the value seen first, as when counting into
+    a dict while iterating the events.
+    """
+
+    def __init__(self, timestamps_ms: Iterable[float], tz: TimeZone = None):
+        """Build the profile.
+
+        Args:
+            timestamps_ms: Epoch timestamps in milliseconds
+            tz: Time zone name or tzinfo (None = system local time)
+        """
+        self.hours, self.weekdays = local_hours_and_weekdays(timestamps_ms, tz)
+        self.hour_counts = np.bincount(self.hours, minlength=24)
+        self.weekday_counts = np.bincount(self.weekdays, minlength=7)
+
+    def __len__(self) -> int:
+        return len(self.hours)
+
+    @staticmethod
+    def _in_order_of_appearance(values: np.ndarray) -> np.ndarray:
+        uniques, first_index = np.unique(values, return_index=True)
+        return uniques[np.argsort(first_index)]
+
+    def _distribution(self, values: np.ndarray, counts: np.ndarray) -> Dict[int, int]:
+        return {int(v): int(counts[v]) for v in self._in_order_of_appearance(values)}
+
+    def _peak(self, values: np.ndarray, counts: np.ndarray) -> Optional[int]:
+        if len(values) == 0:
+            return None
+        top = counts.max()
+        return next(int(v) for v in self._in_order_of_appearance(values) if counts[v] == top)
+
+    def hour_distribution(self) -> Dict[int, int]:
+        """Event count per hour of day."""
+        return self._distribution(self.hours, self.hour_counts)
+
+    def weekday_distribution(self) -> Dict[int, int]:
+        """Event count per weekday (Monday = 0)."""
+        return self._distribution(self.weekdays, self.weekday_counts)
+
+    def day_distribution(self) -> Dict[str, int]:
+        """Event count per weekday name."""
+        return {calendar.day_name[day]: count for day, count in self.weekday_distribution().items()}
+
+    def peak_hour(self) -> Optional[int]:
+        """Hour of day with the most events."""
+        return self._peak(self.hours, self.hour_counts)
+
+    def peak_day(self) -> Optional[str]:
+        """Weekday name with the most events."""
+        peak = self._peak(self.weekdays, self.weekday_counts)
+        return calendar.day_name[peak] if peak is not None else None
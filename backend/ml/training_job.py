@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
 from backend.ml.training_pipeline import TrainingPipeline
+from backend.ml.training_orchestrator import TrainingOrchestrator
 from backend.ml.model_manager import ModelManager
 from backend.logging_config import get_logger
 
@@ -22,19 +23,8 @@ def train_models_job(db: Session, model_types: Optional[list] = None, user_id: O
     try:
         logger.info(f"Starting model training job. Types: {model_types}, User: {user_id}")
         
-        pipeline = TrainingPipeline(db, ModelManager(db))
-        
-        if model_types:
-            results = {}
-            for model_type in model_types:
-                try:
-                    result = pipeline.retrain_model(model_type, user_id)
-                    results[model_type] = result
-                except Exception as e:
-                    logger.error(f"Error training {model_type}: {e}")
-                    results[model_type] = {"error": str(e)}
-        else:
-            results = pipeline.train_all_models(user_id)
+        # Each model trains in its own worker process and session
+        results = TrainingOrchestrator(db).train_models(model_types, user_id)
         
         logger.info(f"Model training job completed. Results: {results}")
         return results
@@ -44,6 +34,35 @@ def train_models_job(db: Session, model_types: Optional[list] = None, user_id: O
         return {"error": str(e)}
 
 
+# Models that can be updated with new data only
+INCREMENTAL_MODEL_TYPES = ["pattern_classifier", "anomaly_detector"]
+
+
+def incremental_training_job(db: Session, model_types: Optional[list] = None, user_id: Optional[str] = None):
+    """Update models with the data created since they were last trained.
+    
+    Cost scales with the amount of new data, so this can run far more often
+    than a full retrain. Models that cannot be updated are fully retrained.
+    
+    Args:
+        db: Database session
+        model_types: Model types to update (default: INCREMENTAL_MODEL_TYPES)
+        user_id: Optional user ID for user-specific training
+    """
+    pipeline = TrainingPipeline(db, ModelManager(db))
+    results = {}
+    
+    for model_type in model_types or INCREMENTAL_MODEL_TYPES:
+        try:
+            results[model_type] = pipeline.update_model(model_type, user_id)
+        except Exception as e:
+            logger.error(f"Error updating {model_type}: {e}", exc_info=True)
+            results[model_type] = {"error": str(e)}
+    
+    logger.info(f"Incremental training job completed. Results: {results}")
+    return results
+
+
 def schedule_retraining_job(db: Session):
     """Schedule periodic retraining of models.
     
@@ -124,6 +143,16 @@ try:
         finally:
             db.close()
     
+    @shared_task
+    def incremental_training_task(model_types=None, user_id=None):
+        """Celery task for incremental training."""
+        from backend.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return incremental_training_job(db, model_types, user_id)
+        finally:
+            db.close()
+    
     @shared_task
     def schedule_retraining_task():
         """Celery task for scheduled retraining."""
@@ -0,0 +1,308 @@
+"""Parallel, isolated training of ML models.
+
+Each model trains in its own spawned worker process with its own database
+session, so a full retrain takes as long as the slowest model rather than the
+sum of all of them, and a crash or runaway model cannot take down the API
+worker that triggered it. Workers are limited by address space and CPU time
+where the platform supports it, and by wall-clock time from the parent.
+
+Progress is reported through the MLModel records themselves: the parent
+reserves one inactive record per model with ``training_config["status"]``
+set to ``queued``; the worker moves it to ``training`` and ``save_model``
+completes it, or it is marked ``failed`` with the error. On PostgreSQL all
+workers read from one exported snapshot, so every model in a run is trained
+on the same data.
+"""
+
+import multiprocessing
+import os
+import queue
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.ml.model_manager import (
+    MODEL_CLASSES,
+    ModelManager,
+    TRAINING_STATUS_FAILED,
+    TRAINING_STATUS_RUNNING,
+)
+from backend.ml.training_pipeline import TrainingPipeline
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import resource
+    RESOURCE_LIMITS_AVAILABLE = True
+except ImportError:
+    RESOURCE_LIMITS_AVAILABLE = False
+
+# Format of PostgreSQL snapshot identifiers, e.g. 00000003-0000001B-1
+_SNAPSHOT_ID = re.compile(r"^[0-9A-F]+-[0-9A-F]+(-[0-9]+)?$")
+
+POLL_INTERVAL = 0.5
+
+
+def _apply_resource_limits(memory_limit_mb: int, cpu_time_limit_s: int) -> None:
+    """Limit the current process's address space and CPU time."""
+    if not RESOURCE_LIMITS_AVAILABLE:
+        return
+    try:
+        if memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if cpu_time_limit_s:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_limit_s, cpu_time_limit_s))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not apply training resource limits: {e}")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if not RESOURCE_LIMITS_AVAILABLE:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _use_snapshot(db: Session, snapshot_id: Optional[str]) -> None:
+    """Start the session's transaction on an exported snapshot."""
+    if not snapshot_id:
+        return
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    # SET TRANSACTION SNAPSHOT does not accept bind parameters
+    db.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+
+
+def train_model_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Train one model with fresh sessions and complete its pending record.
+
+    Training data is read on its own session, started on the run's snapshot
+    when there is one. Status updates and the model record are written on a
+    second session: the record is updated after the snapshot was exported, so
+    writing it from the snapshot transaction would fail with a serialization
+    error on PostgreSQL.
+
+    Args:
+        task: Dictionary with model_type, model_record_id, user_id,
+            snapshot_id and kwargs
+
+    Returns:
+        Training result as returned by TrainingPipeline.train_model
+    """
+    from backend.database import SessionLocal
+
+    start = time.perf_counter()
+    model_type = task["model_type"]
+    db = SessionLocal()
+    data_db = SessionLocal()
+    try:
+        manager = ModelManager(db)
+        manager.update_training_status(task["model_record_id"], TRAINING_STATUS_RUNNING, pid=os.getpid())
+
+        try:
+            _use_snapshot(data_db, task.get("snapshot_id"))
+            result = TrainingPipeline(data_db, manager).train_model(
+                model_type,
+                MODEL_CLASSES[model_type],
+                task.get("user_id"),
+                model_record_id=task["model_record_id"],
+                **task.get("kwargs", {})
+            )
+        except Exception as e:
+            logger.error(f"Error training {model_type}: {e}", exc_info=True)
+            db.rollback()
+            result = {"error": str(e)}
+        finally:
+            # Read-only; ends the snapshot transaction
+            data_db.rollback()
+
+        timings = result.setdefault("timings", {})
+        timings["worker_seconds"] = round(time.perf_counter() - start, 3)
+        timings["peak_rss_mb"] = _peak_rss_mb()
+
+        if "error" in result:
+            manager.update_training_status(
+                task["model_record_id"], TRAINING_STATUS_FAILED, error=result["error"], timings=timings
+            )
+        return result
+    finally:
+        data_db.close()
+        db.close()
+
+
+def _worker_main(task: Dict[str, Any], results, memory_limit_mb: int, cpu_time_limit_s: int) -> None:
+    """Entry point of a training worker process."""
+    _apply_resource_limits(memory_limit_mb, cpu_time_limit_s)
+    try:
+        result = train_model_task(task)
+    except BaseException as e:
+        result = {"error": str(e) or type(e).__name__}
+    results.put((task["model_type"], result))
+
+
+class TrainingOrchestrator:
+    """Trains several models concurrently, one worker process per model."""
+
+    def __init__(self, db: Session, max_workers: Optional[int] = None,
+                 memory_limit_mb: Optional[int] = None, cpu_time_limit_s: Optional[int] = None,
+                 timeout_s: Optional[float] = None):
+        """Initialize the orchestrator.
+
+        Unset limits are read from settings.
+
+        Args:
+            db: Database session used to create and update MLModel records
+            max_workers: Maximum concurrent training processes
+            memory_limit_mb: Address space limit per worker (0 = unlimited)
+            cpu_time_limit_s: CPU time limit per worker (0 = unlimited)
+            timeout_s: Wall-clock limit per model
+        """
+        from backend.config import settings
+
+        self.db = db
+        self.model_manager = ModelManager(db)
+        self.max_workers = max_workers or settings.ml_training_max_workers or os.cpu_count() or 1
+        self.memory_limit_mb = settings.ml_training_memory_limit_mb if memory_limit_mb is None else memory_limit_mb
+        self.cpu_time_limit_s = settings.ml_training_cpu_limit_seconds if cpu_time_limit_s is None else cpu_time_limit_s
+        self.timeout_s = settings.ml_training_timeout_seconds if timeout_s is None else timeout_s
+
+    def train_models(self, model_types: Optional[List[str]] = None, user_id: Optional[str] = None,
+                     run_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Train models in parallel.
+
+        Args:
+            model_types: Model types to train (None = all)
+            user_id: Optional user ID to filter training data
+            run_id: Identifier for progress reporting (generated if omitted)
+            **kwargs: Additional training parameters
+
+        Returns:
+            Dictionary with training results for each model
+        """
+        run_id = run_id or str(uuid.uuid4())
+        results: Dict[str, Any] = {}
+        tasks = []
+
+        for model_type in model_types or list(MODEL_CLASSES):
+            if model_type not in MODEL_CLASSES:
+                results[model_type] = {"error": f"Unknown model type: {model_type}"}
+                continue
+            record = self.model_manager.create_training_record(
+                model_type, {"run_id": run_id, "user_id": str(user_id) if user_id else None}
+            )
+            tasks.append({
+                "model_type": model_type,
+                "model_record_id": str(record.id),
+                "user_id": user_id,
+                "kwargs": kwargs,
+            })
+
+        logger.info(f"Training run {run_id}: {len(tasks)} models, {self.max_workers} workers")
+        start = time.perf_counter()
+
+        with self._data_snapshot() as snapshot_id:
+            for task in tasks:
+                task["snapshot_id"] = snapshot_id
+
+            if multiprocessing.current_process().daemon:
+                # Daemonic processes (e.g. Celery prefork workers) cannot
+                # start children, so train in-process instead
+                logger.warning("Cannot start training workers from a daemon process; training sequentially")
+                for task in tasks:
+                    results[task["model_type"]] = train_model_task(task)
+            else:
+                results.update(self._run_workers(tasks))
+
+        logger.info(f"Training run {run_id} finished in {time.perf_counter() - start:.1f}s")
+        return results
+
+    def _run_workers(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run each task in its own process, at most max_workers at a time."""
+        context = multiprocessing.get_context("spawn")
+        result_queue = context.Queue()
+        waiting = list(tasks)
+        running: Dict[str, Any] = {}
+        results: Dict[str, Any] = {}
+
+        try:
+            while waiting or running:
+                while waiting and len(running) < self.max_workers:
+                    task = waiting.pop(0)
+                    process = context.Process(
+                        target=_worker_main,
+                        args=(task, result_queue, self.memory_limit_mb, self.cpu_time_limit_s),
+                        name=f"train-{task['model_type']}",
+                    )
+                    process.start()
+                    running[task["model_type"]] = (process, task, time.monotonic())
+
+                # Drain results before checking liveness: a worker that has
+                # exited has already flushed its result to the queue
+                try:
+                    model_type, result = result_queue.get(timeout=POLL_INTERVAL)
+                    results[model_type] = result
+                    while True:
+                        model_type, result = result_queue.get_nowait()
+                        results[model_type] = result
+                except queue.Empty:
+                    pass
+
+                for model_type, (process, task, started) in list(running.items()):
+                    if model_type in results:
+                        process.join()
+                        del running[model_type]
+                    elif not process.is_alive():
+                        self._fail(task, results, f"Training worker exited with code {process.exitcode}")
+                        del running[model_type]
+                    elif self.timeout_s and time.monotonic() - started > self.timeout_s:
+                        process.terminate()
+                        process.join()
+                        self._fail(task, results, f"Training timed out after {self.timeout_s:.0f}s")
+                        del running[model_type]
+        finally:
+            for process, _, _ in running.values():
+                process.terminate()
+            result_queue.close()
+
+        return results
+
+    def _fail(self, task: Dict[str, Any], results: Dict[str, Any], error: str) -> None:
+        logger.error(f"Error training {task['model_type']}: {error}")
+        results[task["model_type"]] = {"error": error}
+        self.model_manager.update_training_status(task["model_record_id"], TRAINING_STATUS_FAILED, error=error)
+
+    @contextmanager
+    def _data_snapshot(self) -> Iterator[Optional[str]]:
+        """Export a PostgreSQL snapshot for the workers to share.
+
+        Yields the snapshot ID, or None when snapshots are not supported.
+        The exporting transaction is held open until training finishes.
+        """
+        from backend.database import engine
+
+        if engine.dialect.name != "postgresql":
+            yield None
+            return
+
+        connection = engine.connect()
+        try:
+            connection.execution_options(isolation_level="REPEATABLE READ")
+            transaction = connection.begin()
+            snapshot_id = connection.execute(text("SELECT pg_export_snapshot()")).scalar()
+        except Exception as e:
+            logger.warning(f"Could not export data snapshot, workers will read live data: {e}")
+            connection.close()
+            yield None
+            return
+
+        try:
+            yield snapshot_id if snapshot_id and _SNAPSHOT_ID.match(snapshot_id) else None
+        finally:
+            transaction.rollback()
+            connection.close()
@@ -1,5 +1,6 @@
 """Training Pipeline for ML models."""
 
+import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -29,16 +30,23 @@ class TrainingPipeline:
         self.db = db
         self.model_manager = model_manager
         
-    def train_all_models(self, user_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    def train_all_models(self, user_id: Optional[str] = None, parallel: bool = False,
+                         run_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Train all ML models.
         
         Args:
             user_id: Optional user ID to filter training data
+            parallel: Train each model in its own worker process
+            run_id: Identifier for progress reporting (parallel only)
             **kwargs: Additional training parameters
             
         Returns:
             Dictionary with training results for each model
         """
+        if parallel:
+            from backend.ml.training_orchestrator import TrainingOrchestrator
+            return TrainingOrchestrator(self.db).train_models(user_id=user_id, run_id=run_id, **kwargs)
+        
         results = {}
         
         # Train each model
@@ -63,13 +71,14 @@ class TrainingPipeline:
         return results
     
     def train_model(self, model_type: str, model_class: type, user_id: Optional[str] = None,
-                   **kwargs) -> Dict[str, Any]:
+                   model_record_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Train a specific model.
         
         Args:
             model_type: Type of model
             model_class: Model class
             user_id: Optional user ID
+            model_record_id: Pending MLModel record to complete
             **kwargs: Additional parameters
             
         Returns:
@@ -80,7 +89,9 @@ class TrainingPipeline:
             model = model_class()
             
             # Train model
+            start = time.perf_counter()
             training_metrics = model.train(self.db, user_id=user_id, **kwargs)
+            timings = {"training_seconds": round(time.perf_counter() - start, 3)}
             
             if "error" in training_metrics:
                 return training_metrics
@@ -89,21 +100,26 @@ class TrainingPipeline:
             training_config = {
                 "user_id": str(user_id) if user_id else None,
                 "training_date": datetime.utcnow().isoformat(),
+                "timings": timings,
                 **kwargs
             }
             
+            start = time.perf_counter()
             model_record = self.model_manager.save_model(
                 model=model,
                 model_type=model_type,
                 training_metrics=training_metrics,
-                training_config=training_config
+                training_config=training_config,
+                model_record_id=model_record_id
             )
+            timings["save_seconds"] = round(time.perf_counter() - start, 3)
             
             return {
                 "success": True,
                 "model_id": str(model_record.id),
                 "version": model_record.version,
                 "metrics": training_metrics,
+                "timings": timings,
             }
             
         except Exception as e:
@@ -135,6 +151,68 @@ class TrainingPipeline:
         
         return self.train_model(model_type, model_classes[model_type], user_id, **kwargs)
     
+    def update_model(self, model_type: str, user_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Incrementally update a model with data created since its watermark.
+        
+        Falls back to a full retrain when the model has no watermark, does
+        not support incremental training or asks to be rebuilt.
+        
+        Args:
+            model_type: Type of model
+            user_id: Optional user ID
+            **kwargs: Additional parameters
+            
+        Returns:
+            Dictionary with training results
+        """
+        record, model = self.model_manager.load_model(model_type)
+        if (model is None or record.training_watermark is None
+                or not getattr(model, "supports_incremental", False)):
+            return self.retrain_model(model_type, user_id, **kwargs)
+        
+        try:
+            start = time.perf_counter()
+            metrics = model.partial_train(self.db, record.training_watermark, user_id=user_id, **kwargs)
+            timings = {"training_seconds": round(time.perf_counter() - start, 3)}
+            
+            if metrics.get("requires_full_retrain"):
+                logger.info(f"Full retrain of {model_type} required: {metrics.get('error')}")
+                return self.retrain_model(model_type, user_id, **kwargs)
+            if "error" in metrics:
+                return metrics
+            if metrics.get("skipped"):
+                return {"success": True, "skipped": True, "version": record.version, **metrics}
+            
+            base_config = record.training_config or {}
+            training_config = {
+                "user_id": str(user_id) if user_id else None,
+                "training_date": datetime.utcnow().isoformat(),
+                "mode": "incremental",
+                "base_version": record.version,
+                "increments": (base_config.get("increments", 0) if base_config.get("mode") == "incremental" else 0) + 1,
+                "timings": timings,
+                **kwargs
+            }
+            
+            model_record = self.model_manager.save_model(
+                model=model,
+                model_type=model_type,
+                training_metrics=metrics,
+                training_config=training_config
+            )
+            
+            return {
+                "success": True,
+                "model_id": str(model_record.id),
+                "version": model_record.version,
+                "metrics": metrics,
+                "timings": timings,
+            }
+            
+        except Exception as e:
+            logger.error(f"Error updating {model_type}: {e}", exc_info=True)
+            return {"error": str(e)}
+    
     def evaluate_model(self, model_type: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Evaluate a model's performance.
         
@@ -0,0 +1,101 @@
+"""Top-k inner-product retrieval over factor vectors.
+
+Used by the workflow recommender to find the highest scoring workflows for a
+user vector without sorting the whole catalog. The exact index scores every
+item and selects with ``np.argpartition`` (O(n) instead of O(n log n)); when
+``hnswlib`` is installed an approximate HNSW index can be used instead for
+very large catalogs.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+
+class TopKIndex:
+    """Inner-product top-k index over item vectors."""
+
+    def __init__(self, item_vectors: np.ndarray, approximate: bool = False, ef: int = 100):
+        """Build the index.
+
+        Args:
+            item_vectors: Array of shape (n_items, n_components)
+            approximate: Use an HNSW index when hnswlib is available
+            ef: HNSW search breadth (higher is more accurate, slower)
+        """
+        self.vectors = np.ascontiguousarray(item_vectors, dtype=np.float32)
+        self.n_items = self.vectors.shape[0]
+        self._ann = None
+
+        if approximate and HNSWLIB_AVAILABLE and self.n_items > 0:
+            self._ann = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+            self._ann.init_index(max_elements=self.n_items, ef_construction=200, M=16)
+            self._ann.add_items(self.vectors, np.arange(self.n_items))
+            self._ann.set_ef(ef)
+        elif approximate:
+            logger.warning("hnswlib not available. Falling back to exact top-k search.")
+
+    @property
+    def is_approximate(self) -> bool:
+        return self._ann is not None
+
+    def search(self, query: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the k items with the highest inner product with ``query``.
+
+        Args:
+            query: Vector of shape (n_components,)
+            k: Number of items to return
+            exclude: Item indices that must not be returned
+
+        Returns:
+            Tuple of (item indices, scores), highest score first
+        """
+        n_excluded = 0 if exclude is None else len(exclude)
+        k = min(k, self.n_items - n_excluded)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if self._ann is not None:
+            return self._search_approximate(query, k, exclude)
+        return self._search_exact(query, k, exclude)
+
+    def _search_exact(self, query: np.ndarray, k: int, exclude: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.vectors @ np.asarray(query, dtype=np.float32)
+
+        # Select enough candidates that k survive exclusion, then filter;
+        # masking with -inf instead makes argpartition degrade on ties
+        n_candidates = min(k + (0 if exclude is None else len(exclude)), self.n_items)
+        if n_candidates < self.n_items:
+            candidates = np.argpartition(scores, self.n_items - n_candidates)[self.n_items - n_candidates:]
+        else:
+            candidates = np.arange(self.n_items)
+
+        if exclude is not None and len(exclude):
+            candidates = candidates[~np.isin(candidates, exclude)]
+
+        top = candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+        return top, scores[top]
+
+    def _search_approximate(self, query: np.ndarray, k: int, exclude: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        # Over-fetch by the number of excluded items so filtering still leaves k
+        n_candidates = min(k + (0 if exclude is None else len(exclude)), self.n_items)
+        labels, distances = self._ann.knn_query(np.asarray(query, dtype=np.float32), k=n_candidates)
+        labels, distances = labels[0], distances[0]
+
+        if exclude is not None and len(exclude):
+            keep = ~np.isin(labels, exclude)
+            labels, distances = labels[keep], distances[keep]
+
+        # hnswlib's "ip" distance is 1 - inner product
+        return labels[:k].astype(np.int64), (1.0 - distances[:k]).astype(np.float32)
+
@@ -8,24 +8,33 @@ to build workflow models for automation generation.
 import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import defaultdict
 import logging
 
+import numpy as np
+
+from backend.ml.event_tokens import EventVocabulary, sequence_to_key
 from backend.ml.pattern_detector import AdvancedPatternDetector
+from backend.ml.sequence_mining import find_repeated_windows
+from backend.ml.temporal_profile import TimeZone, local_hours_and_weekdays
 
 logger = logging.getLogger(__name__)
 
+# Window lengths searched for repeated patterns
+PATTERN_LENGTHS = (3, 4, 5)
+
 
 class WorkflowModelBuilder:
     """
     Builds workflow models from user interactions, telemetry, and behaviors.
     """
     
-    def __init__(self):
+    def __init__(self, tz: TimeZone = None):
         self.patterns: Dict[str, Any] = {}
         self.sequences: List[List[Dict[str, Any]]] = []
         self.frequencies: Dict[str, int] = defaultdict(int)
-        self.pattern_detector = AdvancedPatternDetector()
+        self.tz = tz
+        self.pattern_detector = AdvancedPatternDetector(tz=tz)
         
     def analyze_interactions(
         self,
@@ -127,7 +136,12 @@ class WorkflowModelBuilder:
             'temporal_patterns': defaultdict(list),
         }
         
-        for interaction in interactions:
+        hours, _ = local_hours_and_weekdays(
+            [interaction.get('timestamp', 0) for interaction in interactions],
+            self.tz
+        )
+        
+        for interaction, hour in zip(interactions, hours.tolist()):
             # Overlay usage
             overlay_type = interaction.get('overlay', {}).get('type', 'none')
             patterns['overlay_usage'][overlay_type] += 1
@@ -142,8 +156,6 @@ class WorkflowModelBuilder:
             patterns['target_patterns'][target_key] += 1
             
             # Temporal patterns (group by hour)
-            timestamp = interaction.get('timestamp', 0)
-            hour = datetime.fromtimestamp(timestamp / 1000).hour
             patterns['temporal_patterns'][hour].append(interaction)
         
         # Extract sequence patterns (consecutive interactions)
@@ -550,28 +562,24 @@ class WorkflowModelBuilder:
         return sequences
     
     def _extract_pattern_based_sequences(self, all_events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        """Extract sequences based on repeated patterns."""
+        """Extract sequences based on repeated patterns.
+        
+        A window of 3-5 events is kept when the same sequence of event keys
+        occurs again later without overlapping it.
+        """
         sequences = []
         
-        # Look for repeated patterns of length 3-5
-        for pattern_length in [3, 4, 5]:
-            for i in range(len(all_events) - pattern_length + 1):
-                pattern = all_events[i:i + pattern_length]
-                
-                # Check if this pattern repeats later
-                pattern_key = self._sequence_to_key([e for e in pattern])
-                
-                for j in range(i + pattern_length, len(all_events) - pattern_length + 1):
-                    candidate = all_events[j:j + pattern_length]
-                    candidate_key = self._sequence_to_key([e for e in candidate])
-                    
-                    if pattern_key == candidate_key:
-                        # Found a repeated pattern
-                        sequences.append(pattern)
-                        break
+        tokens = self._intern_events(all_events)
+        repeated = find_repeated_windows(tokens, PATTERN_LENGTHS)
+        for pattern_length, starts in repeated.items():
+            sequences.extend(all_events[i:i + pattern_length] for i in starts.tolist())
         
         return sequences
     
+    def _intern_events(self, events: List[Dict[str, Any]]) -> np.ndarray:
+        """Map each event to an integer token, equal for equal event keys."""
+        return EventVocabulary().encode(events)
+    
     def _get_event_context(self, event: Dict[str, Any]) -> str:
         """Get context identifier for an event."""
         if event['type'] == 'interaction':
@@ -583,16 +591,8 @@ class WorkflowModelBuilder:
     
     def _deduplicate_sequences(self, sequences: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
         """Remove duplicate sequences."""
-        seen = set()
-        unique = []
-        
-        for sequence in sequences:
-            seq_key = self._sequence_to_key(sequence)
-            if seq_key not in seen:
-                seen.add(seq_key)
-                unique.append(sequence)
-        
-        return unique
+        groups = EventVocabulary().group_sequences(sequences)
+        return [matching[0] for matching in groups.values()]
     
     def _parse_timestamp(self, timestamp: Any) -> int:
         """Parse timestamp from various formats."""
@@ -615,30 +615,23 @@ class WorkflowModelBuilder:
         
         candidates = []
         
-        # Find frequently repeated sequences
-        sequence_freq = Counter()
-        for sequence in sequences:
-            seq_key = self._sequence_to_key(sequence)
-            sequence_freq[seq_key] += 1
+        # Group repeated sequences in one pass
+        vocabulary = EventVocabulary()
+        groups = vocabulary.group_sequences(sequences)
         
         # Get top sequences (appear at least 3 times)
         top_sequences = [
-            (seq_key, count)
-            for seq_key, count in sequence_freq.items()
-            if count >= 3
+            (tokens, matching_sequences)
+            for tokens, matching_sequences in groups.items()
+            if len(matching_sequences) >= 3
         ]
-        top_sequences.sort(key=lambda x: x[1], reverse=True)
-        
-        for seq_key, frequency in top_sequences[:10]:  # Top 10
-            # Find matching sequences
-            matching_sequences = [
-                seq for seq in sequences
-                if self._sequence_to_key(seq) == seq_key
-            ]
-            
+        top_sequences.sort(key=lambda x: len(x[1]), reverse=True)
+        
+        for tokens, matching_sequences in top_sequences[:10]:  # Top 10
+            frequency = len(matching_sequences)
             if matching_sequences:
                 candidate = {
-                    'sequence_key': seq_key,
+                    'sequence_key': vocabulary.sequence_key(tokens),
                     'frequency': frequency,
                     'steps': len(matching_sequences[0]),
                     'average_duration': self._calculate_average_duration(matching_sequences),
@@ -651,31 +644,7 @@ class WorkflowModelBuilder:
     
     def _sequence_to_key(self, sequence: List[Dict[str, Any]]) -> str:
         """Convert sequence to a key for comparison."""
-        keys = []
-        for event in sequence:
-            if isinstance(event, dict):
-                if event.get('type') == 'interaction':
-                    interaction = event.get('data', {})
-                    if isinstance(interaction, dict):
-                        key = f"i:{interaction.get('type', 'unknown')}:{interaction.get('overlay', {}).get('type', 'none')}"
-                    else:
-                        key = "i:unknown:none"
-                elif event.get('type') == 'telemetry':
-                    telemetry = event.get('data', {})
-                    if isinstance(telemetry, dict):
-                        key = f"t:{telemetry.get('eventType', 'unknown')}:{telemetry.get('appId', 'unknown')}"
-                    else:
-                        key = "t:unknown:unknown"
-                else:
-                    # Handle direct interaction/telemetry dicts (for pattern detector)
-                    if 'overlay' in event:
-                        key = f"i:{event.get('type', 'unknown')}:{event.get('overlay', {}).get('type', 'none')}"
-                    elif 'eventType' in event:
-                        key = f"t:{event.get('eventType', 'unknown')}:{event.get('appId', 'unknown')}"
-                    else:
-                        key = "unknown"
-                keys.append(key)
-        return ' -> '.join(keys) if keys else 'empty'
+        return sequence_to_key(sequence)
     
     def _calculate_average_duration(
         self,
@@ -825,15 +794,15 @@ class WorkflowModelBuilder:
         
         enhanced_candidates = []
         
+        patterns_by_key = {}
+        for pattern in repetitive_patterns:
+            patterns_by_key.setdefault(pattern.get('sequence_key'), pattern)
+        
         for candidate in candidates:
             enhanced = candidate.copy()
             
             # Add repetitive pattern info
-            seq_key = candidate.get('sequence_key', '')
-            matching_pattern = next(
-                (p for p in repetitive_patterns if p.get('sequence_key') == seq_key),
-                None
-            )
+            matching_pattern = patterns_by_key.get(candidate.get('sequence_key', ''))
             
             if matching_pattern:
                 enhanced['consistency_score'] = matching_pattern.get('consistency_score', 0)
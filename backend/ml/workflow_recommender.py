@@ -3,29 +3,85 @@
 from typing import Dict, Any, Optional, List, Tuple
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.decomposition import NMF
 from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy import func, case
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from backend.ml.base import BaseMLModel, FloyoDataProcessor
-from database.models import Workflow, WorkflowExecution, User, Event
+from backend.ml.vector_index import TopKIndex
+from database.models import Workflow, WorkflowExecution, Event
 from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+MAX_INTERACTION_SCORE = 5.0
+
+
+def interaction_matrix_from_rows(rows) -> Tuple[Optional[sparse.csr_matrix], List[str], List[str]]:
+    """Build the interaction matrix from aggregated workflow rows.
+    
+    Args:
+        rows: Iterable of (user_id, workflow_id, execution_count, completed_count)
+            tuples, one per workflow
+    
+    Returns:
+        Tuple of (CSR matrix of users x workflows, user IDs, workflow IDs)
+    
+    Scores are 1.0 for creating a workflow, plus 0.1 per execution, plus 0.5
+    when more than 80% of executions completed, capped at 5.0.
+    """
+    user_index: Dict[str, int] = {}
+    workflow_ids: List[str] = []
+    row_idx: List[int] = []
+    scores: List[float] = []
+    
+    for user_id, workflow_id, execution_count, completed_count in rows:
+        user_key = str(user_id)
+        if user_key not in user_index:
+            user_index[user_key] = len(user_index)
+        
+        score = 1.0 + execution_count * 0.1
+        if execution_count and (completed_count or 0) / execution_count > 0.8:
+            score += 0.5
+        
+        row_idx.append(user_index[user_key])
+        workflow_ids.append(str(workflow_id))
+        scores.append(min(score, MAX_INTERACTION_SCORE))
+    
+    if len(user_index) < 2 or len(workflow_ids) < 2:
+        return None, [], []
+    
+    # Every workflow has exactly one owner, so column i is workflow i
+    matrix = sparse.csr_matrix(
+        (np.array(scores), (np.array(row_idx), np.arange(len(workflow_ids)))),
+        shape=(len(user_index), len(workflow_ids)),
+    )
+    
+    return matrix, list(user_index), workflow_ids
+
 
 class WorkflowRecommender(BaseMLModel):
     """Collaborative filtering recommender for workflows."""
     
-    def __init__(self, model_version: int = 1, n_components: int = 10):
+    STATE_ATTRIBUTES = ["user_features", "workflow_features", "user_ids", "workflow_ids", "exclusions"]
+    
+    def __init__(self, model_version: int = 1, n_components: int = 10, approximate_index: bool = False):
         super().__init__("workflow_recommender", model_version)
         self.n_components = n_components
+        self.approximate_index = approximate_index
         self.model = None
         self.user_features = None
         self.workflow_features = None
         self.user_ids = []
         self.workflow_ids = []
+        # Retrieval state derived from the factors, rebuilt by _build_index()
+        self.exclusions: Optional[sparse.csr_matrix] = None
+        self._user_index: Dict[str, int] = {}
+        self._workflow_index: Dict[str, int] = {}
+        self._index: Optional[TopKIndex] = None
         
     def train(self, db: Session, user_id: Optional[str] = None, **kwargs) -> Dict[str, float]:
         """Train the collaborative filtering model.
@@ -50,6 +106,8 @@ class WorkflowRecommender(BaseMLModel):
             
             self.user_ids = user_ids
             self.workflow_ids = workflow_ids
+            # Workflows a user already owns are never recommended back
+            self.exclusions = (matrix != 0).tocsr()
             
             # Train NMF model
             self.model = NMF(
@@ -58,16 +116,17 @@ class WorkflowRecommender(BaseMLModel):
                 max_iter=1000
             )
             
-            # Factorize
+            # Factorize (NMF works directly on the sparse matrix)
             self.user_features = self.model.fit_transform(matrix)
             self.workflow_features = self.model.components_
             
-            # Calculate reconstruction error
-            reconstructed = np.dot(self.user_features, self.workflow_features)
-            error = np.mean((matrix - reconstructed) ** 2)
+            # Mean squared reconstruction error; reconstruction_err_ is the
+            # Frobenius norm, so the dense product is never materialized
+            n_cells = matrix.shape[0] * matrix.shape[1]
+            error = self.model.reconstruction_err_ ** 2 / n_cells
             
             # Calculate sparsity
-            sparsity = 1.0 - (np.count_nonzero(matrix) / matrix.size)
+            sparsity = 1.0 - (matrix.nnz / n_cells)
             
             self.training_metrics = {
                 "reconstruction_error": float(error),
@@ -79,6 +138,7 @@ class WorkflowRecommender(BaseMLModel):
             
             self.is_trained = True
             self.last_trained_at = datetime.utcnow()
+            self._build_index()
             
             logger.info(f"WorkflowRecommender trained. Error: {error:.4f}")
             
@@ -88,52 +148,24 @@ class WorkflowRecommender(BaseMLModel):
             logger.error(f"Error training WorkflowRecommender: {e}", exc_info=True)
             return {"error": str(e)}
     
-    def _build_interaction_matrix(self, db: Session) -> Tuple[Optional[np.ndarray], List[str], List[str]]:
-        """Build user-workflow interaction matrix."""
+    def _build_interaction_matrix(self, db: Session) -> Tuple[Optional[sparse.csr_matrix], List[str], List[str]]:
+        """Build the sparse user-workflow interaction matrix with one aggregated query."""
         try:
-            # Get all users with workflows
-            users = db.query(User).join(Workflow).distinct().all()
-            workflows = db.query(Workflow).distinct().all()
-            
-            if len(users) < 2 or len(workflows) < 2:
-                return None, [], []
-            
-            user_ids = [str(u.id) for u in users]
-            workflow_ids = [str(w.id) for w in workflows]
-            
-            # Create matrix
-            matrix = np.zeros((len(user_ids), len(workflow_ids)))
-            
-            # Fill matrix with interaction scores
-            for user_idx, user_id in enumerate(user_ids):
-                user_workflows = db.query(Workflow).filter(Workflow.user_id == user_id).all()
-                
-                for workflow in user_workflows:
-                    if str(workflow.id) in workflow_ids:
-                        workflow_idx = workflow_ids.index(str(workflow.id))
-                        
-                        # Score based on:
-                        # 1. Workflow created (1.0)
-                        # 2. Workflow executions (0.1 per execution)
-                        # 3. Workflow success rate (0.5 if high success)
-                        
-                        score = 1.0  # Created workflow
-                        
-                        executions = db.query(WorkflowExecution).filter(
-                            WorkflowExecution.workflow_id == workflow.id
-                        ).all()
-                        
-                        score += len(executions) * 0.1
-                        
-                        if executions:
-                            successful = sum(1 for e in executions if e.status == "completed")
-                            success_rate = successful / len(executions)
-                            if success_rate > 0.8:
-                                score += 0.5
-                        
-                        matrix[user_idx, workflow_idx] = min(score, 5.0)  # Cap at 5.0
-            
-            return matrix, user_ids, workflow_ids
+            completed = func.sum(case((WorkflowExecution.status == "completed", 1), else_=0))
+            rows = db.query(
+                Workflow.user_id,
+                Workflow.id,
+                func.count(WorkflowExecution.id),
+                completed,
+            ).outerjoin(
+                WorkflowExecution, WorkflowExecution.workflow_id == Workflow.id
+            ).group_by(
+                Workflow.user_id, Workflow.id
+            ).order_by(
+                Workflow.user_id, Workflow.id
+            ).all()
+            
+            return interaction_matrix_from_rows(rows)
             
         except Exception as e:
             logger.error(f"Error building interaction matrix: {e}")
@@ -155,38 +187,28 @@ class WorkflowRecommender(BaseMLModel):
             return {"recommendations": [], "error": "Model not trained"}
         
         try:
-            # Find user index
-            if user_id not in self.user_ids:
+            if self._index is None:
+                self._build_index()
+            
+            user_idx = self._user_index.get(user_id)
+            if user_idx is None:
                 # New user - use content-based fallback
                 return self._content_based_recommend(user_id, db, n_recommendations)
             
-            user_idx = self.user_ids.index(user_id)
-            user_vector = self.user_features[user_idx]
-            
-            # Calculate scores for all workflows
-            scores = np.dot(user_vector, self.workflow_features)
-            
-            # Get user's existing workflows
-            user_workflows = db.query(Workflow).filter(Workflow.user_id == user_id).all()
-            existing_workflow_ids = {str(w.id) for w in user_workflows}
-            
-            # Filter out existing workflows and get top N
-            recommendations = []
-            for workflow_idx, score in enumerate(scores):
-                workflow_id = self.workflow_ids[workflow_idx]
-                
-                if workflow_id not in existing_workflow_ids:
-                    recommendations.append((workflow_id, float(score)))
+            top, scores = self._index.search(
+                self.user_features[user_idx], n_recommendations, exclude=self._excluded(user_idx)
+            )
             
-            # Sort by score
-            recommendations.sort(key=lambda x: x[1], reverse=True)
-            recommendations = recommendations[:n_recommendations]
+            # Hydrate all recommended workflows with one query
+            recommended_ids = [self.workflow_ids[i] for i in top]
+            workflows = db.query(Workflow).filter(Workflow.id.in_(recommended_ids)).all()
+            workflows_by_id = {str(w.id): w for w in workflows}
             
-            # Get workflow details
             result = []
-            for workflow_id, score in recommendations:
-                workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+            for workflow_id, score in zip(recommended_ids, scores):
+                workflow = workflows_by_id.get(workflow_id)
                 if workflow:
+                    score = float(score)
                     result.append({
                         "workflow_id": workflow_id,
                         "workflow_name": workflow.name,
@@ -204,6 +226,19 @@ class WorkflowRecommender(BaseMLModel):
             logger.error(f"Error generating recommendations: {e}")
             return {"recommendations": [], "error": str(e)}
     
+    def _build_index(self):
+        """Build ID lookups and the top-k index from the trained factors."""
+        self._user_index = {uid: i for i, uid in enumerate(self.user_ids)}
+        self._workflow_index = {wid: i for i, wid in enumerate(self.workflow_ids)}
+        self._index = TopKIndex(self.workflow_features.T, approximate=self.approximate_index)
+    
+    def _excluded(self, user_idx: int) -> Optional[np.ndarray]:
+        """Workflow indices the user already owns."""
+        if self.exclusions is None:
+            return None
+        start, end = self.exclusions.indptr[user_idx], self.exclusions.indptr[user_idx + 1]
+        return self.exclusions.indices[start:end]
+    
     def _content_based_recommend(self, user_id: str, db: Session, n_recommendations: int) -> Dict[str, Any]:
         """Content-based recommendation for new users."""
         try:
@@ -289,11 +324,13 @@ class WorkflowRecommender(BaseMLModel):
             return {"score": 0.5, "error": "Model not trained"}
         
         try:
-            if user_id not in self.user_ids or workflow_id not in self.workflow_ids:
-                return {"score": 0.5, "note": "User or workflow not in training data"}
+            if self._index is None:
+                self._build_index()
             
-            user_idx = self.user_ids.index(user_id)
-            workflow_idx = self.workflow_ids.index(workflow_id)
+            user_idx = self._user_index.get(user_id)
+            workflow_idx = self._workflow_index.get(workflow_id)
+            if user_idx is None or workflow_idx is None:
+                return {"score": 0.5, "note": "User or workflow not in training data"}
             
             user_vector = self.user_features[user_idx]
             workflow_vector = self.workflow_features[:, workflow_idx]
@@ -310,3 +347,55 @@ class WorkflowRecommender(BaseMLModel):
         except Exception as e:
             logger.error(f"Error predicting preference: {e}")
             return {"score": 0.5, "error": str(e)}
+    
+    def predict_batch(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Predict preference scores for many (user_id, workflow_id) pairs.
+        
+        Args:
+            pairs: List of (user_id, workflow_id) tuples
+            
+        Returns:
+            List of dictionaries with preference scores
+        """
+        if not self.is_trained:
+            return [{"score": 0.5, "error": "Model not trained"} for _ in pairs]
+        
+        try:
+            if self._index is None:
+                self._build_index()
+            user_index = self._user_index
+            workflow_index = self._workflow_index
+            
+            results: List[Dict[str, Any]] = [
+                {"score": 0.5, "note": "User or workflow not in training data"} for _ in pairs
+            ]
+            known = [
+                (i, user_index[user_id], workflow_index[workflow_id])
+                for i, (user_id, workflow_id) in enumerate(pairs)
+                if user_id in user_index and workflow_id in workflow_index
+            ]
+            if not known:
+                return results
+            
+            positions, user_rows, workflow_cols = (np.array(col) for col in zip(*known))
+            
+            # Row-wise dot products of the selected user and workflow factors
+            scores = np.einsum(
+                "ij,ji->i",
+                self.user_features[user_rows],
+                self.workflow_features[:, workflow_cols]
+            )
+            normalized = np.clip(scores / 5.0, 0.0, 1.0)
+            
+            for position, score, normalized_score in zip(positions, scores, normalized):
+                results[position] = {
+                    "score": float(normalized_score),
+                    "raw_score": float(score),
+                    "confidence": "high" if normalized_score > 0.7 else "medium" if normalized_score > 0.4 else "low"
+                }
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error predicting preferences: {e}")
+            return [{"score": 0.5, "error": str(e)} for _ in pairs]
@@ -49,7 +49,7 @@ class WorkflowTriggerPredictor(BaseMLModel):
                 return {"error": "No training data available"}
             
             # Load events for context
-            events_df = FloyoDataProcessor.events_to_dataframe(db, user_id, limit=10000)
+            events_df = FloyoDataProcessor.events_to_dataframe(db, user_id, limit=10000, columns=["timestamp"])
             
             # Prepare features and labels
             features_list = []
@@ -242,6 +242,48 @@ class WorkflowTriggerPredictor(BaseMLModel):
                 "error": str(e)
             }
     
+    def predict(self, features: List[float]) -> Dict[str, Any]:
+        """Predict execution success probability from prediction features.
+        
+        Args:
+            features: Feature vector as built by ``_extract_prediction_features``
+            
+        Returns:
+            Dictionary with success probability
+        """
+        return self.predict_batch([features])[0]
+    
+    def predict_batch(self, feature_rows: List[List[float]]) -> List[Dict[str, Any]]:
+        """Predict success probabilities for many feature vectors at once.
+        
+        Args:
+            feature_rows: List of feature vectors
+            
+        Returns:
+            List of dictionaries with success probabilities
+        """
+        if not self.is_trained:
+            return [{"success_probability": 0.5, "error": "Model not trained"} for _ in feature_rows]
+        
+        if not feature_rows:
+            return []
+        
+        try:
+            X = np.asarray(feature_rows, dtype=float)
+            probabilities = np.clip(self.model.predict(X), 0.0, 1.0)
+            
+            return [
+                {
+                    "success_probability": float(p),
+                    "recommendation": "execute_now" if p > 0.7 else "execute_soon" if p > 0.5 else "wait"
+                }
+                for p in probabilities
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error predicting success probability: {e}")
+            return [{"success_probability": 0.5, "error": str(e)} for _ in feature_rows]
+    
     def _extract_prediction_features(self, workflow: Workflow, current_events: List[Dict[str, Any]], 
                                    db: Session) -> Optional[List[float]]:
         """Extract features for prediction."""
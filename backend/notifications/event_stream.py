@@ -0,0 +1,159 @@
+"""Coalesced real-time stream of event-creation notices.
+
+Event endpoints publish to an in-process channel and return immediately. A
+dispatcher task collects everything published during a short window, merges
+it per user and hands one message per user to the WebSocket layer, so a
+burst of events produces "N events created" instead of N broadcasts, and
+request latency no longer depends on connected clients.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WINDOW_MS = 250
+DEFAULT_MAX_PENDING = 10000
+
+DeliverCallback = Callable[[Optional[str], str], Awaitable[None]]
+
+
+def format_notice(count: int, event_type: Optional[str]) -> str:
+    """Text of the coalesced notice for one user's events in a window.
+    
+    Args:
+        count: Events created in the window
+        event_type: Event type when only one event was created
+    
+    Returns:
+        Message text
+    """
+    if count == 1 and event_type:
+        return f"Event created: {event_type}"
+    return f"Batch: {count} events created"
+
+
+class EventStream:
+    """In-process channel with a coalescing dispatcher."""
+    
+    def __init__(
+        self,
+        deliver: DeliverCallback,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        """Initialize stream.
+        
+        Args:
+            deliver: Coroutine called with (user_id, message) for each coalesced notice
+            window_ms: How long the dispatcher collects notices before delivering
+            max_pending: Channel capacity; notices beyond it are dropped
+        """
+        self.deliver = deliver
+        self.window_ms = window_ms
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Delivery of the current window, shielded from the dispatcher's cancellation
+        self._delivery: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Notices collected in the current window: user_id -> (count, last event type)
+        self._pending: Dict[Optional[str], Tuple[int, Optional[str]]] = {}
+        self.stats = {
+            "published": 0,
+            "dropped": 0,
+            "delivered": 0,
+            "windows": 0,
+        }
+    
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._dispatcher is None or self._dispatcher.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._dispatcher = loop.create_task(self._dispatch())
+    
+    def publish(self, user_id: Optional[str], event_type: Optional[str] = None, count: int = 1):
+        """Queue a notice for events created by a user; never waits.
+        
+        Must be called from the event loop (e.g. an async endpoint).
+        
+        Args:
+            user_id: User who created the events
+            event_type: Type of the event (for single events)
+            count: Number of events created
+        """
+        self._ensure_dispatcher()
+        try:
+            self._queue.put_nowait((user_id, event_type, count))
+            self.stats["published"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+    
+    def _merge(self, item: Tuple[Optional[str], Optional[str], int]):
+        user_id, event_type, count = item
+        total, _ = self._pending.get(user_id, (0, None))
+        self._pending[user_id] = (total + count, event_type)
+    
+    def _drain(self):
+        while not self._queue.empty():
+            self._merge(self._queue.get_nowait())
+    
+    async def _dispatch(self):
+        while True:
+            self._merge(await self._queue.get())
+            
+            # Let the rest of the burst arrive
+            await asyncio.sleep(self.window_ms / 1000.0)
+            self._drain()
+            
+            # Shielded, so close() never cuts a window off mid-delivery
+            self._delivery = asyncio.get_running_loop().create_task(self._deliver())
+            await asyncio.shield(self._delivery)
+    
+    async def _deliver(self):
+        pending, self._pending = self._pending, {}
+        self.stats["windows"] += 1
+        for user_id, (count, event_type) in pending.items():
+            try:
+                await self.deliver(user_id, format_notice(count, event_type))
+                self.stats["delivered"] += 1
+            except Exception as e:
+                logger.error(f"Error delivering event notice for user {user_id}: {e}")
+    
+    async def close(self):
+        """Deliver anything still queued and stop the dispatcher."""
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        await asyncio.gather(self._dispatcher, return_exceptions=True)
+        self._dispatcher = None
+        
+        # A window that was being delivered is finished first
+        if self._delivery is not None:
+            await asyncio.gather(self._delivery, return_exceptions=True)
+            self._delivery = None
+        
+        self._drain()
+        if self._pending:
+            await self._deliver()
+
+
+async def _broadcast_update(user_id: Optional[str], message: str):
+    """Send a notice to /ws clients, the audience event notices always had."""
+    from backend.api.websocket import manager
+    await manager.broadcast(message)
+
+
+_event_stream: Optional[EventStream] = None
+
+
+def get_event_stream() -> EventStream:
+    """Get the process-wide event notice stream."""
+    global _event_stream
+    if _event_stream is None:
+        from backend.config import settings
+        _event_stream = EventStream(deliver=_broadcast_update, window_ms=settings.event_stream_window_ms)
+    return _event_stream
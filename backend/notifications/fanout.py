@@ -0,0 +1,338 @@
+"""Per-user WebSocket fan-out with a cross-worker pub/sub bridge.
+
+Connections are indexed by user so a message for one user touches only that
+user's sockets. Every connection has a bounded send queue drained by its own
+writer task: publishing only enqueues, sends to different clients run
+concurrently, and a client that stops reading fills its queue and is
+disconnected instead of holding up everyone else.
+
+Messages are published through a bridge. With ``redis_url`` configured the
+bridge is Redis pub/sub, so a message published by one API worker reaches
+users connected to any worker; otherwise an in-memory bridge delivers within
+the process.
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from backend.logging_config import get_logger
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    aioredis = None
+
+logger = get_logger(__name__)
+
+CHANNEL_PREFIX = "floyo:ws:"
+
+# Close code sent to clients dropped for not keeping up (RFC 6455 "try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+DeliverCallback = Callable[[Optional[str], str], None]
+
+
+class _Connection:
+    """One WebSocket with its bounded send queue and writer task."""
+    
+    def __init__(self, websocket: WebSocket, user_id: Optional[str], queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+
+
+class LocalPubSub:
+    """In-memory bridge: published messages are delivered within the process.
+    
+    Bridges created with the same ``subscribers`` list share one in-memory
+    broker, standing in for several workers on one Redis channel.
+    """
+    
+    def __init__(self, subscribers: Optional[List[DeliverCallback]] = None):
+        self._subscribers = subscribers if subscribers is not None else []
+        self._deliver: Optional[DeliverCallback] = None
+    
+    async def start(self, deliver: DeliverCallback):
+        """Start delivering published messages to ``deliver``."""
+        self._deliver = deliver
+        self._subscribers.append(deliver)
+    
+    async def publish(self, user_id: Optional[str], message: str):
+        """Publish a message for one user (or all users when ``user_id`` is None)."""
+        for deliver in list(self._subscribers):
+            deliver(user_id, message)
+    
+    async def close(self):
+        """Stop delivering messages."""
+        if self._deliver in self._subscribers:
+            self._subscribers.remove(self._deliver)
+        self._deliver = None
+
+
+class RedisPubSub:
+    """Redis pub/sub bridge shared by all API workers."""
+    
+    def __init__(self, redis_url: str, channel: str):
+        """Initialize bridge.
+        
+        Args:
+            redis_url: Redis connection URL
+            channel: Pub/sub channel carrying this fan-out's messages
+        """
+        self.redis_url = redis_url
+        self.channel = channel
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def start(self, deliver: DeliverCallback):
+        """Subscribe to the channel and deliver every message to ``deliver``."""
+        self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(deliver))
+    
+    async def _listen(self, deliver: DeliverCallback):
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    payload = json.loads(item["data"])
+                    deliver(payload.get("user_id"), payload["message"])
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket pub/sub listener error on {self.channel}: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def publish(self, user_id: Optional[str], message: str):
+        """Publish a message for one user (or all users when ``user_id`` is None)."""
+        await self._client.publish(self.channel, json.dumps({"user_id": user_id, "message": message}))
+    
+    async def close(self):
+        """Unsubscribe and close the Redis connection."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        try:
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+        finally:
+            self._pubsub = None
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+
+class NotificationFanout:
+    """Routes messages to WebSocket connections by user, across workers."""
+    
+    def __init__(self, name: str, bridge=None, send_queue_size: Optional[int] = None):
+        """Initialize fan-out.
+        
+        Args:
+            name: Fan-out name, used as the pub/sub channel suffix
+            bridge: Pub/sub bridge (default: Redis when configured, else in-memory)
+            send_queue_size: Messages buffered per connection before it is dropped
+                (default from settings)
+        """
+        if bridge is None or send_queue_size is None:
+            from backend.config import settings
+            if bridge is None:
+                if settings.redis_url and REDIS_AVAILABLE:
+                    bridge = RedisPubSub(settings.redis_url, CHANNEL_PREFIX + name)
+                else:
+                    bridge = LocalPubSub()
+            if send_queue_size is None:
+                send_queue_size = settings.websocket_send_queue_size
+        
+        self.name = name
+        self.bridge = bridge
+        self.send_queue_size = send_queue_size
+        self._users: Dict[Optional[str], Set[_Connection]] = {}
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+        self.stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped_slow": 0,
+            "send_errors": 0,
+        }
+    
+    async def _ensure_started(self):
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            try:
+                await self.bridge.start(self.deliver_local)
+            except Exception as e:
+                # Keep delivering to this worker's clients
+                logger.warning(f"WebSocket pub/sub unavailable for {self.name}, delivering locally: {e}")
+                try:
+                    # Release whatever the failed start had opened
+                    await self.bridge.close()
+                except Exception as close_error:
+                    logger.warning(f"Error closing failed pub/sub bridge for {self.name}: {close_error}")
+                self.bridge = LocalPubSub()
+                await self.bridge.start(self.deliver_local)
+            self._started = True
+    
+    async def register(self, websocket: WebSocket, user_id: Optional[str] = None):
+        """Register an accepted WebSocket and start its writer.
+        
+        Args:
+            websocket: Accepted WebSocket connection
+            user_id: Owning user, or None for connections that only get broadcasts
+        """
+        await self._ensure_started()
+        
+        connection = _Connection(websocket, user_id, self.send_queue_size)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self._connections[websocket] = connection
+        self._users.setdefault(user_id, set()).add(connection)
+    
+    def unregister(self, websocket: WebSocket) -> Optional[str]:
+        """Remove a WebSocket and stop its writer.
+        
+        Args:
+            websocket: WebSocket connection
+        
+        Returns:
+            The connection's user ID, or None if it was not registered
+        """
+        connection = self._connections.pop(websocket, None)
+        if connection is None:
+            return None
+        
+        connections = self._users.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self._users[connection.user_id]
+        
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        return connection.user_id
+    
+    async def _write(self, connection: _Connection):
+        try:
+            while True:
+                message = await connection.queue.get()
+                await connection.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["send_errors"] += 1
+            logger.warning(f"Error sending to WebSocket of user {connection.user_id}: {e}")
+            self.unregister(connection.websocket)
+    
+    def _drop_slow(self, connection: _Connection):
+        self.stats["dropped_slow"] += 1
+        logger.warning(f"Dropping slow WebSocket consumer for user {connection.user_id}")
+        self.unregister(connection.websocket)
+        asyncio.ensure_future(self._close_quietly(connection.websocket))
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+    
+    def deliver_local(self, user_id: Optional[str], message: str):
+        """Queue a message on this worker's matching connections.
+        
+        Args:
+            user_id: Target user, or None for every connection
+            message: Text frame to send
+        """
+        if user_id is None:
+            targets = list(self._connections.values())
+        else:
+            targets = list(self._users.get(user_id, ()))
+        
+        for connection in targets:
+            try:
+                connection.queue.put_nowait(message)
+                self.stats["delivered"] += 1
+            except asyncio.QueueFull:
+                self._drop_slow(connection)
+    
+    async def publish(self, user_id: Optional[str], message: str):
+        """Publish a message to a user's connections on every worker.
+        
+        Args:
+            user_id: Target user, or None to broadcast to all connections
+            message: Text frame to send
+        """
+        await self._ensure_started()
+        self.stats["published"] += 1
+        try:
+            await self.bridge.publish(user_id, message)
+        except Exception as e:
+            logger.error(f"WebSocket publish failed on {self.name}, delivering locally: {e}")
+            self.deliver_local(user_id, message)
+    
+    async def broadcast(self, message: str):
+        """Publish a message to every connection on every worker."""
+        await self.publish(None, message)
+    
+    async def publish_json(self, user_id: Optional[str], payload: Any):
+        """Publish a JSON-encoded message to a user's connections."""
+        await self.publish(user_id, json.dumps(payload))
+    
+    def connected_users(self) -> Set[str]:
+        """User IDs with at least one connection on this worker."""
+        return {user_id for user_id in self._users if user_id is not None}
+    
+    def connection_count(self, user_id: Optional[str] = None) -> int:
+        """Connections on this worker, for one user or in total."""
+        if user_id is not None:
+            return len(self._users.get(user_id, ()))
+        return len(self._connections)
+    
+    @property
+    def websockets(self):
+        """WebSockets registered on this worker."""
+        return list(self._connections)
+    
+    async def close(self):
+        """Stop all writers and the pub/sub bridge."""
+        writers = [c.writer for c in self._connections.values() if c.writer is not None]
+        for websocket in list(self._connections):
+            self.unregister(websocket)
+        await asyncio.gather(*writers, return_exceptions=True)
+        await self.bridge.close()
+        self._started = False
+
+
+_fanouts: Dict[str, NotificationFanout] = {}
+
+
+def get_notification_fanout(name: str) -> NotificationFanout:
+    """Get the process-wide fan-out with the given name."""
+    fanout = _fanouts.get(name)
+    if fanout is None:
+        fanout = _fanouts[name] = NotificationFanout(name)
+    return fanout
+
+
+async def close_notification_fanouts():
+    """Close every fan-out created in this process."""
+    for fanout in list(_fanouts.values()):
+        try:
+            await fanout.close()
+        except Exception as e:
+            logger.error(f"Error closing WebSocket fan-out {fanout.name}: {e}")
@@ -2,39 +2,43 @@
 
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, String, Boolean, TIMESTAMP, ForeignKey, JSON, Text
-from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 
-from database.models import User
+from backend import cache
+from database.models import Notification
 from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
-Base = declarative_base()
+# Unread counts are cached by readers and invalidated by every write through
+# this service; the TTL bounds drift from writes that bypass it
+UNREAD_COUNT_TTL_SECONDS = 60
 
+# Writes bump a per-user version so a count computed concurrently with a
+# write is not cached; it must outlive any count query
+UNREAD_VERSION_TTL_SECONDS = 86400
 
-class Notification(Base):
-    """Notification model."""
-    __tablename__ = "notifications"
-    
-    id = Column(PGUUID(as_uuid=True), primary_key=True, default=lambda: __import__('uuid').uuid4())
-    user_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    notification_type = Column(String(50), nullable=False)  # info, success, warning, error
-    title = Column(String(255), nullable=False)
-    message = Column(Text, nullable=False)
-    data = Column(JSONB, nullable=True)
-    read = Column(Boolean, default=False, index=True)
-    action_url = Column(String(500), nullable=True)
-    action_label = Column(String(100), nullable=True)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
-    read_at = Column(TIMESTAMP(timezone=True), nullable=True)
-    
-    user = relationship("User")
+# Rows per INSERT statement in create_notifications (keeps bind parameters
+# well under database limits)
+INSERT_BATCH_SIZE = 1000
+
+
+def _unread_count_key(user_id: UUID) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def _unread_version_key(user_id: UUID) -> str:
+    return f"notifications:unread:{user_id}:version"
+
+
+def _invalidate_unread_count(user_id: UUID) -> None:
+    """Drop a user's cached unread count after a committed write."""
+    # Bump the version first: a reader that counted before the write then
+    # fails to cache its result, and one that cached it already is deleted
+    cache.incr(_unread_version_key(user_id), ttl_seconds=UNREAD_VERSION_TTL_SECONDS)
+    cache.delete(_unread_count_key(user_id))
 
 
 class NotificationService:
@@ -68,7 +72,7 @@ class NotificationService:
             data: Additional data
             action_url: Optional action URL
             action_label: Optional action label
-            
+        
         Returns:
             Created notification
         """
@@ -87,15 +91,63 @@ class NotificationService:
             self.db.commit()
             self.db.refresh(notification)
             
+            _invalidate_unread_count(user_id)
+            
             logger.info(f"Created notification {notification.id} for user {user_id}")
             
             return notification
-            
+        
         except Exception as e:
             logger.error(f"Error creating notification: {e}")
             self.db.rollback()
             raise
     
+    def create_notifications(self, notifications: List[Dict[str, Any]]) -> List[UUID]:
+        """Create many notifications with multi-row inserts and one commit.
+        
+        Args:
+            notifications: Notifications as dicts with the arguments of
+                create_notification (user_id, notification_type, title,
+                message and optionally data, action_url, action_label)
+        
+        Returns:
+            IDs of the created notifications, in input order
+        """
+        if not notifications:
+            return []
+        
+        rows = [
+            {
+                "id": uuid4(),
+                "user_id": n["user_id"],
+                "notification_type": n["notification_type"],
+                "title": n["title"],
+                "message": n["message"],
+                "data": n.get("data"),
+                "read": False,
+                "action_url": n.get("action_url"),
+                "action_label": n.get("action_label"),
+            }
+            for n in notifications
+        ]
+        
+        try:
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                self.db.execute(insert(Notification).values(rows[start:start + INSERT_BATCH_SIZE]))
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Error creating notifications: {e}")
+            self.db.rollback()
+            raise
+        
+        user_ids = {row["user_id"] for row in rows}
+        for user_id in user_ids:
+            _invalidate_unread_count(user_id)
+        
+        logger.info(f"Created {len(rows)} notifications for {len(user_ids)} users")
+        
+        return [row["id"] for row in rows]
+    
     def get_user_notifications(
         self,
         user_id: UUID,
@@ -110,7 +162,7 @@ class NotificationService:
             unread_only: Only return unread notifications
             limit: Maximum number of notifications
             offset: Offset for pagination
-            
+        
         Returns:
             List of notifications
         """
@@ -127,7 +179,7 @@ class NotificationService:
         Args:
             notification_id: Notification ID
             user_id: User ID (for verification)
-            
+        
         Returns:
             True if successful
         """
@@ -141,10 +193,11 @@ class NotificationService:
                 notification.read = True
                 notification.read_at = datetime.utcnow()
                 self.db.commit()
+                _invalidate_unread_count(user_id)
                 return True
             
             return False
-            
+        
         except Exception as e:
             logger.error(f"Error marking notification as read: {e}")
             self.db.rollback()
@@ -155,7 +208,7 @@ class NotificationService:
         
         Args:
             user_id: User ID
-            
+        
         Returns:
             Number of notifications marked as read
         """
@@ -169,8 +222,9 @@ class NotificationService:
             })
             
             self.db.commit()
+            _invalidate_unread_count(user_id)
             return count
-            
+        
         except Exception as e:
             logger.error(f"Error marking all notifications as read: {e}")
             self.db.rollback()
@@ -179,16 +233,29 @@ class NotificationService:
     def get_unread_count(self, user_id: UUID) -> int:
         """Get unread notification count.
         
+        Served from the cached per-user count; the rows are counted only
+        when it is missing, and the result is cached unless a write for the
+        user happened meanwhile.
+        
         Args:
             user_id: User ID
-            
+        
         Returns:
             Number of unread notifications
         """
-        return self.db.query(Notification).filter(
+        key = _unread_count_key(user_id)
+        count = cache.get(key)
+        if count is not None:
+            return count
+        
+        version_key = _unread_version_key(user_id)
+        version = cache.get(version_key)
+        count = self.db.query(Notification).filter(
             Notification.user_id == user_id,
             Notification.read == False
         ).count()
+        cache.set_if_unchanged(key, count, UNREAD_COUNT_TTL_SECONDS, version_key, version)
+        return count
     
     def delete_notification(self, notification_id: UUID, user_id: UUID) -> bool:
         """Delete a notification.
@@ -196,7 +263,7 @@ class NotificationService:
         Args:
             notification_id: Notification ID
             user_id: User ID (for verification)
-            
+        
         Returns:
             True if successful
         """
@@ -209,10 +276,12 @@ class NotificationService:
             if notification:
                 self.db.delete(notification)
                 self.db.commit()
+                if not notification.read:
+                    _invalidate_unread_count(user_id)
                 return True
             
             return False
-            
+        
         except Exception as e:
             logger.error(f"Error deleting notification: {e}")
             self.db.rollback()
@@ -5,9 +5,9 @@ Adds a unique request ID to each request for tracing across services.
 """
 
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 REQUEST_ID_HEADER = "X-Request-ID"
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+class RequestIDMiddleware:
     """
     Middleware that adds a unique request ID to each request.
     
@@ -24,26 +24,40 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
     - Added to response headers
     - Included in log messages
     - Available in request.state for use in endpoints
+    
+    Implemented as a pure ASGI middleware so it adds no task or stream
+    per request.
     """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request and add request ID.
         
         Args:
-            request: FastAPI request object
-            call_next: Next middleware/handler
-            
-        Returns:
-            Response: HTTP response with request ID header
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Get request ID from header or generate new one
-        request_id = request.headers.get(REQUEST_ID_HEADER)
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
         if not request_id:
             request_id = str(uuid.uuid4())
         
         # Store in request state for use in endpoints
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                # Add request ID to response headers
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
         
         # Add to logger context
         old_factory = logging.getLogRecordFactory()
@@ -57,12 +71,7 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         
         try:
             # Process request
-            response = await call_next(request)
-            
-            # Add request ID to response headers
-            response.headers[REQUEST_ID_HEADER] = request_id
-            
-            return response
+            await self.app(scope, receive, send_with_request_id)
         finally:
             # Restore original logger factory
             logging.setLogRecordFactory(old_factory)
@@ -74,7 +83,7 @@ def get_request_id(request: Request) -> str:
     
     Args:
         request: FastAPI request object
-        
+    
     Returns:
         str: Request ID if available, empty string otherwise
     """
@@ -7,24 +7,94 @@ Standardizes all API responses with consistent structure including:
 - API version
 - Metadata
 - Consistent error format
+
+The envelope is written by StandardJSONResponse while the route result is
+serialized, so bodies are never parsed back and re-encoded.
 """
 
-from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import StreamingResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import json
 import time
 from backend.config import settings
 from backend.request_id import get_request_id
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# (scope, start time) of the current request when its JSON body gets the envelope
+_envelope_request: ContextVar[Optional[Tuple[Scope, float]]] = ContextVar("api_envelope_request", default=None)
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    Serialize JSON-compatible content to compact UTF-8 bytes.
+    
+    Uses orjson when installed, otherwise the same json.dumps call as
+    Starlette's JSONResponse.
+    
+    Args:
+        content: JSON-compatible content
+    
+    Returns:
+        bytes: Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
 
-class APIResponseMiddleware(BaseHTTPMiddleware):
+class StandardJSONResponse(JSONResponse):
+    """
+    JSON response that writes the standard envelope while serializing.
+    
+    Used as the default response class of API routes. When
+    APIResponseMiddleware has marked the current request for
+    standardization, the route result is wrapped before it is encoded;
+    otherwise the content is encoded as is.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        request = _envelope_request.get()
+        if request is not None:
+            scope, start_time = request
+            response_time_ms = (time.time() - start_time) * 1000
+            
+            if isinstance(content, dict) and "request_id" in content:
+                # Already standardized, just add response time
+                content["metadata"] = content.get("metadata") or {}
+                content["metadata"]["response_time_ms"] = round(response_time_ms, 2)
+            else:
+                content = _standardize_response(
+                    content,
+                    # Request ID is set by RequestIDMiddleware further down the stack
+                    request_id=scope.get("state", {}).get("request_id", ""),
+                    status_code=self.status_code,
+                    response_time_ms=response_time_ms
+                )
+        return dumps_json(content)
+
+
+class APIResponseMiddleware:
     """
     Middleware that standardizes all API responses.
     
-    Adds consistent structure to all responses:
+    Adds X-Request-ID, X-Response-Time and X-API-Version headers to API
+    responses and, when the envelope is enabled, marks the request so that
+    StandardJSONResponse wraps the body in the standard structure:
     - request_id: Unique request identifier
     - timestamp: Response timestamp
     - api_version: API version
@@ -45,140 +115,129 @@ class APIResponseMiddleware(BaseHTTPMiddleware):
         "/health/migrations",
     }
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp, envelope: Optional[bool] = None):
         """
-        Process request and standardize response.
+        Initialize middleware.
         
         Args:
-            request: FastAPI request object
-            call_next: Next middleware/handler
-            
-        Returns:
-            Response: Standardized HTTP response
+            app: ASGI application
+            envelope: Wrap JSON bodies in the standard envelope (default from settings)
         """
-        # Skip standardization for exempt paths
-        if any(request.url.path.startswith(path) for path in self.EXEMPT_PATHS):
-            return await call_next(request)
+        self.app = app
+        self.envelope = settings.api_response_envelope if envelope is None else envelope
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Process request and add response metadata headers.
         
-        # Only standardize API endpoints
-        if not request.url.path.startswith("/api"):
-            return await call_next(request)
+        Args:
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        start_time = time.time()
+        path = scope["path"]
         
-        # Process request
-        response = await call_next(request)
+        # Skip standardization for exempt paths
+        if any(path.startswith(exempt) for exempt in self.EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
         
-        # Calculate response time
-        response_time_ms = (time.time() - start_time) * 1000
+        # Only standardize API endpoints
+        if not path.startswith("/api"):
+            await self.app(scope, receive, send)
+            return
         
-        # Get request ID
-        request_id = get_request_id(request)
+        start_time = time.time()
         
-        # Standardize JSON responses
-        if isinstance(response, JSONResponse):
-            try:
-                # Parse existing response body
-                body = json.loads(response.body.decode())
-                
-                # Check if already standardized (has request_id)
-                if isinstance(body, dict) and "request_id" in body:
-                    # Already standardized, just add response time
-                    body["metadata"] = body.get("metadata", {})
-                    body["metadata"]["response_time_ms"] = round(response_time_ms, 2)
-                    return JSONResponse(
-                        content=body,
-                        status_code=response.status_code,
-                        headers=dict(response.headers)
-                    )
+        async def send_with_metadata(message: Message):
+            if message["type"] == "http.response.start":
+                # Calculate response time
+                response_time_ms = (time.time() - start_time) * 1000
                 
-                # Standardize response
-                standardized = self._standardize_response(
-                    body,
-                    request_id=request_id,
-                    status_code=response.status_code,
-                    response_time_ms=response_time_ms
-                )
-                
-                return JSONResponse(
-                    content=standardized,
-                    status_code=response.status_code,
-                    headers=dict(response.headers)
-                )
-            except (json.JSONDecodeError, AttributeError):
-                # Not JSON or can't parse, return as-is
-                return response
+                # Request ID is set by RequestIDMiddleware further down the stack
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = scope.get("state", {}).get("request_id", "")
+                headers["X-Response-Time"] = f"{response_time_ms:.2f}ms"
+                headers["X-API-Version"] = "v1"
+            await send(message)
         
-        # For non-JSON responses, add headers
-        if not isinstance(response, StreamingResponse):
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Response-Time"] = f"{response_time_ms:.2f}ms"
-            response.headers["X-API-Version"] = "v1"
+        if not self.envelope:
+            await self.app(scope, receive, send_with_metadata)
+            return
         
-        return response
-    
-    def _standardize_response(
-        self,
-        body: Any,
-        request_id: str,
-        status_code: int,
-        response_time_ms: float
-    ) -> Dict[str, Any]:
-        """
-        Standardize response body.
-        
-        Args:
-            body: Original response body
-            request_id: Request ID
-            status_code: HTTP status code
-            response_time_ms: Response time in milliseconds
-            
-        Returns:
-            Dict[str, Any]: Standardized response
-        """
-        from datetime import datetime
-        
-        # Check if it's an error response
-        is_error = status_code >= 400
-        
-        standardized = {
-            "request_id": request_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "api_version": "v1",
-            "metadata": {
-                "response_time_ms": round(response_time_ms, 2),
-                "environment": settings.environment,
-            }
+        # Process request
+        token = _envelope_request.set((scope, start_time))
+        try:
+            await self.app(scope, receive, send_with_metadata)
+        finally:
+            _envelope_request.reset(token)
+
+
+def _standardize_response(
+    body: Any,
+    request_id: str,
+    status_code: int,
+    response_time_ms: float
+) -> Dict[str, Any]:
+    """
+    Standardize response body.
+    
+    Args:
+        body: Original response body
+        request_id: Request ID
+        status_code: HTTP status code
+        response_time_ms: Response time in milliseconds
+    
+    Returns:
+        Dict[str, Any]: Standardized response
+    """
+    from datetime import datetime
+    
+    # Check if it's an error response
+    is_error = status_code >= 400
+    
+    standardized = {
+        "request_id": request_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "api_version": "v1",
+        "metadata": {
+            "response_time_ms": round(response_time_ms, 2),
+            "environment": settings.environment,
         }
-        
-        if is_error:
-            # Error response structure
-            if isinstance(body, dict) and "error" in body:
-                standardized["error"] = body["error"]
-            else:
-                standardized["error"] = {
-                    "code": "UNKNOWN_ERROR",
-                    "message": str(body) if not isinstance(body, dict) else body.get("detail", "An error occurred"),
-                    "details": body if isinstance(body, dict) else {}
-                }
+    }
+    
+    if is_error:
+        # Error response structure
+        if isinstance(body, dict) and "error" in body:
+            standardized["error"] = body["error"]
         else:
-            # Success response structure
-            if isinstance(body, dict):
-                # If body has pagination info, preserve it
-                if "items" in body and "total" in body:
-                    standardized["data"] = body.get("items", [])
-                    standardized["pagination"] = {
-                        "total": body.get("total", 0),
-                        "skip": body.get("skip", 0),
-                        "limit": body.get("limit", 20),
-                        "has_more": body.get("has_more", False),
-                    }
-                else:
-                    standardized["data"] = body
+            standardized["error"] = {
+                "code": "UNKNOWN_ERROR",
+                "message": str(body) if not isinstance(body, dict) else body.get("detail", "An error occurred"),
+                "details": body if isinstance(body, dict) else {}
+            }
+    else:
+        # Success response structure
+        if isinstance(body, dict):
+            # If body has pagination info, preserve it
+            if "items" in body and "total" in body:
+                standardized["data"] = body.get("items", [])
+                standardized["pagination"] = {
+                    "total": body.get("total", 0),
+                    "skip": body.get("skip", 0),
+                    "limit": body.get("limit", 20),
+                    "has_more": body.get("has_more", False),
+                }
             else:
                 standardized["data"] = body
-        
-        return standardized
+        else:
+            standardized["data"] = body
+    
+    return standardized
 
 
 def create_standard_response(
@@ -195,7 +254,7 @@ def create_standard_response(
         request: FastAPI request object
         status_code: HTTP status code
         metadata: Additional metadata
-        
+    
     Returns:
         Dict[str, Any]: Standardized response dictionary
     """
@@ -232,7 +291,7 @@ def create_paginated_response(
         limit: Number of items per page
         request: FastAPI request object
         metadata: Additional metadata
-        
+    
     Returns:
         Dict[str, Any]: Standardized paginated response
     """
@@ -1,13 +1,14 @@
 """Workflow scheduling and execution engine."""
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 from uuid import UUID
-from datetime import datetime
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
 import json
 import croniter
 
-from database.models import Workflow, WorkflowExecution, WorkflowVersion
+from database.models import Event, Workflow, WorkflowExecution, WorkflowVersion
 from backend.audit import log_audit
 from backend.ml.model_manager import ModelManager
 from backend.ml.workflow_trigger_predictor import WorkflowTriggerPredictor
@@ -17,6 +18,139 @@ from backend.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+SEQUENCE_LOOKBACK_HOURS = 1
+SEQUENCE_EVENT_LIMIT = 10
+
+
+def _sequence_features(event: Event) -> Dict[str, Any]:
+    """Convert an event to the feature dict expected by SequencePredictor."""
+    return {
+        "timestamp": event.timestamp,
+        "event_type": event.event_type,
+        "file_path": event.file_path,
+        "tool": event.tool,
+        "hour_of_day": event.timestamp.hour,
+        "day_of_week": event.timestamp.weekday(),
+        "file_extension": event.file_path.split('.')[-1] if event.file_path and '.' in event.file_path else None,
+    }
+
+
+class TriggerEvaluationContext:
+    """Per-tick cache for ML trigger evaluation.
+    
+    A scheduler tick evaluates many workflows, often several per user. The
+    context holds one ModelManager for the tick, fetches each model once,
+    loads recent events for all users in a single query and runs the
+    sequence predictor once per user. Create a new context for every tick
+    so that predictions never outlive the events they were based on.
+    """
+    
+    def __init__(self, db: Session, now: Optional[datetime] = None):
+        self.db = db
+        self.now = now or datetime.utcnow()
+        self._model_manager: Optional[ModelManager] = None
+        self._models: Dict[str, Any] = {}
+        self._events: Dict[Tuple[Any, int, int], List[Event]] = {}
+        self._sequence_predictions: Dict[Any, Optional[Dict[str, Any]]] = {}
+    
+    def get_model(self, model_type: str) -> Optional[Any]:
+        """Get a model, fetching it at most once per tick."""
+        if model_type not in self._models:
+            if self._model_manager is None:
+                self._model_manager = ModelManager(self.db)
+            self._models[model_type] = self._model_manager.get_model(model_type)
+        return self._models[model_type]
+    
+    def prime(self, workflows: List[Workflow]) -> None:
+        """Batch-load events and sequence predictions for schedule-less workflows.
+        
+        Args:
+            workflows: Workflows that will be evaluated during this tick
+        """
+        user_ids = {
+            w.user_id for w in workflows
+            if w.is_active and not w.schedule_config
+        }
+        user_ids -= set(self._sequence_predictions)
+        if not user_ids:
+            return
+        
+        predictor = self.get_model("sequence_predictor")
+        if not predictor or not predictor.is_trained:
+            self._sequence_predictions.update({user_id: None for user_id in user_ids})
+            return
+        
+        self._load_recent_events(user_ids, SEQUENCE_LOOKBACK_HOURS, SEQUENCE_EVENT_LIMIT)
+        
+        sequences = {}
+        for user_id in user_ids:
+            events = self.recent_events(user_id, SEQUENCE_LOOKBACK_HOURS, SEQUENCE_EVENT_LIMIT)
+            if events:
+                sequences[user_id] = [_sequence_features(e) for e in events]
+            else:
+                self._sequence_predictions[user_id] = None
+        
+        # One vectorized prediction covering every active user this tick
+        if sequences:
+            predictions = predictor.predict_batch(list(sequences.values()))
+            self._sequence_predictions.update(zip(sequences.keys(), predictions))
+    
+    def recent_events(self, user_id: Any, hours: int, limit: int) -> List[Event]:
+        """Get a user's most recent events, newest first, cached for the tick."""
+        key = (user_id, hours, limit)
+        if key not in self._events:
+            self._load_recent_events({user_id}, hours, limit)
+        return self._events[key]
+    
+    def sequence_prediction(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Get the sequence predictor output for a user's recent activity.
+        
+        Returns:
+            Prediction dict, or None if the model is unavailable or the user
+            has no recent events
+        """
+        if user_id not in self._sequence_predictions:
+            predictor = self.get_model("sequence_predictor")
+            if predictor and predictor.is_trained:
+                self._sequence_predictions[user_id] = self._predict_sequence(predictor, user_id)
+            else:
+                self._sequence_predictions[user_id] = None
+        return self._sequence_predictions[user_id]
+    
+    def _predict_sequence(self, predictor: Any, user_id: Any) -> Optional[Dict[str, Any]]:
+        events = self.recent_events(user_id, SEQUENCE_LOOKBACK_HOURS, SEQUENCE_EVENT_LIMIT)
+        if not events:
+            return None
+        return predictor.predict([_sequence_features(e) for e in events])
+    
+    def _load_recent_events(self, user_ids: Set[Any], hours: int, limit: int) -> None:
+        """Load recent events for several users with a single query.
+        
+        Events are ranked per user in SQL so only the newest ``limit`` of
+        each user are fetched and hydrated.
+        """
+        ranked = select(
+            Event,
+            func.row_number().over(
+                partition_by=Event.user_id, order_by=Event.timestamp.desc()
+            ).label("rank")
+        ).where(
+            Event.user_id.in_(list(user_ids)),
+            Event.timestamp >= self.now - timedelta(hours=hours)
+        ).subquery()
+        recent = aliased(Event, ranked)
+        
+        rows = self.db.query(recent).filter(
+            ranked.c.rank <= limit
+        ).order_by(recent.user_id, recent.timestamp.desc()).all()
+        
+        grouped: Dict[Any, List[Event]] = {user_id: [] for user_id in user_ids}
+        for event in rows:
+            grouped.setdefault(event.user_id, []).append(event)
+        
+        for user_id, events in grouped.items():
+            self._events[(user_id, hours, limit)] = events
+
 
 class WorkflowScheduler:
     """Manages workflow scheduling and execution with ML-powered predictions."""
@@ -90,13 +224,20 @@ class WorkflowScheduler:
         return workflow
     
     @staticmethod
-    def should_run(workflow: Workflow, db: Session = None, use_ml: bool = True) -> bool:
+    def should_run(
+        workflow: Workflow,
+        db: Session = None,
+        use_ml: bool = True,
+        context: Optional["TriggerEvaluationContext"] = None
+    ) -> bool:
         """Check if a workflow should run based on schedule and ML predictions.
         
         Args:
             workflow: Workflow to check
             db: Database session (optional, needed for ML predictions)
             use_ml: Whether to use ML predictions for smart triggering
+            context: Per-tick evaluation context shared across workflows
+                (created on demand when omitted)
             
         Returns:
             True if workflow should run
@@ -108,35 +249,12 @@ class WorkflowScheduler:
             # Check ML prediction for predictive triggering
             if use_ml and db:
                 try:
-                    model_manager = ModelManager(db)
-                    sequence_predictor = model_manager.get_model("sequence_predictor")
-                    
-                    if sequence_predictor and sequence_predictor.is_trained:
-                        # Get recent events
-                        from database.models import Event
-                        from datetime import timedelta
-                        
-                        recent_events = db.query(Event).filter(
-                            Event.user_id == workflow.user_id,
-                            Event.timestamp >= datetime.utcnow() - timedelta(hours=1)
-                        ).order_by(Event.timestamp.desc()).limit(10).all()
-                        
-                        if recent_events:
-                            # Convert to dict format
-                            events_data = [{
-                                "timestamp": e.timestamp,
-                                "event_type": e.event_type,
-                                "file_path": e.file_path,
-                                "tool": e.tool,
-                                "hour_of_day": e.timestamp.hour,
-                                "day_of_week": e.timestamp.weekday(),
-                                "file_extension": e.file_path.split('.')[-1] if e.file_path and '.' in e.file_path else None,
-                            } for e in recent_events]
-                            
-                            prediction = sequence_predictor.predict(events_data)
-                            if prediction.get("will_trigger", False):
-                                logger.info(f"ML prediction triggered workflow {workflow.id}")
-                                return True
+                    if context is None:
+                        context = TriggerEvaluationContext(db)
+                    prediction = context.sequence_prediction(workflow.user_id)
+                    if prediction and prediction.get("will_trigger", False):
+                        logger.info(f"ML prediction triggered workflow {workflow.id}")
+                        return True
                 except Exception as e:
                     logger.warning(f"Error in ML prediction: {e}")
             
@@ -173,24 +291,17 @@ class WorkflowScheduler:
         elif schedule_type == "predictive" and use_ml and db:
             # ML-based predictive scheduling
             try:
-                model_manager = ModelManager(db)
-                trigger_predictor = model_manager.get_model("workflow_trigger_predictor")
+                if context is None:
+                    context = TriggerEvaluationContext(db)
+                trigger_predictor = context.get_model("workflow_trigger_predictor")
                 
                 if trigger_predictor and trigger_predictor.is_trained:
-                    from database.models import Event
-                    from datetime import timedelta
-                    
-                    recent_events = db.query(Event).filter(
-                        Event.user_id == workflow.user_id,
-                        Event.timestamp >= datetime.utcnow() - timedelta(hours=24)
-                    ).order_by(Event.timestamp.desc()).limit(50).all()
-                    
                     events_data = [{
                         "timestamp": e.timestamp,
                         "event_type": e.event_type,
                         "file_path": e.file_path,
                         "tool": e.tool,
-                    } for e in recent_events]
+                    } for e in context.recent_events(workflow.user_id, hours=24, limit=50)]
                     
                     prediction = trigger_predictor.predict_optimal_time(workflow, events_data, db)
                     optimal_time = datetime.fromisoformat(prediction["optimal_time"])
@@ -203,6 +314,35 @@ class WorkflowScheduler:
         
         return False
     
+    @staticmethod
+    def evaluate_workflows(
+        db: Session,
+        workflows: List[Workflow],
+        use_ml: bool = True
+    ) -> Dict[UUID, bool]:
+        """Evaluate a batch of workflows for one scheduler tick.
+        
+        Workflows share a single :class:`TriggerEvaluationContext`, so models
+        are fetched once and ML triggers are predicted once per user rather
+        than once per workflow.
+        
+        Args:
+            db: Database session
+            workflows: Workflows to evaluate
+            use_ml: Whether to use ML predictions for smart triggering
+            
+        Returns:
+            Mapping of workflow ID to whether it should run
+        """
+        context = TriggerEvaluationContext(db)
+        if use_ml:
+            context.prime(workflows)
+        
+        return {
+            workflow.id: WorkflowScheduler.should_run(workflow, db, use_ml=use_ml, context=context)
+            for workflow in workflows
+        }
+    
     @staticmethod
     def execute_workflow(
         db: Session,
@@ -248,9 +388,10 @@ class WorkflowScheduler:
         db.commit()
         db.refresh(execution)
         
-        # Update last_run in schedule_config
+        # Update last_run in schedule_config (reassigned, since the JSON
+        # column does not track in-place changes)
         if workflow.schedule_config:
-            workflow.schedule_config["last_run"] = datetime.utcnow().isoformat()
+            workflow.schedule_config = {**workflow.schedule_config, "last_run": datetime.utcnow().isoformat()}
             db.commit()
         
         return execution
@@ -266,3 +407,54 @@ class WorkflowScheduler:
         return db.query(WorkflowExecution).filter(
             WorkflowExecution.workflow_id == workflow_id
         ).order_by(WorkflowExecution.started_at.desc()).limit(limit).offset(offset).all()
+
+
+def run_due_workflows(db: Session, use_ml: bool = True) -> Dict[str, Any]:
+    """Run one scheduler tick: execute every active workflow that is due.
+    
+    All active workflows are evaluated together with
+    :meth:`WorkflowScheduler.evaluate_workflows`, so ML triggers share one
+    evaluation context per tick.
+    
+    Args:
+        db: Database session
+        use_ml: Whether to use ML predictions for smart triggering
+        
+    Returns:
+        Counts of evaluated, executed and failed workflows
+    """
+    workflows = db.query(Workflow).filter(Workflow.is_active == True).all()
+    due = WorkflowScheduler.evaluate_workflows(db, workflows, use_ml=use_ml)
+    
+    executed = 0
+    failed = 0
+    for workflow in workflows:
+        if not due.get(workflow.id):
+            continue
+        try:
+            WorkflowScheduler.execute_workflow(db, workflow)
+            executed += 1
+        except Exception as e:
+            db.rollback()
+            failed += 1
+            logger.error(f"Failed to execute scheduled workflow {workflow.id}: {e}", exc_info=True)
+    
+    logger.info(f"Scheduler tick: {len(workflows)} workflows evaluated, {executed} executed, {failed} failed")
+    return {"evaluated": len(workflows), "executed": executed, "failed": failed}
+
+
+# Celery task wrapper, run every minute by the "check-workflow-schedules" beat entry
+try:
+    from celery import shared_task
+    
+    @shared_task
+    def check_and_execute_workflows(use_ml: bool = True):
+        """Celery task for one workflow scheduler tick."""
+        from backend.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return run_due_workflows(db, use_ml=use_ml)
+        finally:
+            db.close()
+except ImportError:
+    logger.warning("Celery not available, using direct function calls")
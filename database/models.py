@@ -144,6 +144,18 @@ class TemporalPattern(Base):
     user = relationship("User", back_populates="temporal_patterns_rel")
 
 
+class PatternDetectionState(Base):
+    """Per-user progress of the streaming pattern detection job."""
+    __tablename__ = "pattern_detection_state"
+
+    user_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    watermark_timestamp = Column(TIMESTAMP(timezone=True), nullable=True)  # Timestamp of last processed event
+    watermark_event_id = Column(PGUUID(as_uuid=True), nullable=True)  # ID of last processed event (tie-break)
+    events_processed = Column(Integer, nullable=False, default=0)
+    rolling_state = Column(JSONB, nullable=True)  # Sequence tail and candidate counts carried between runs
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class Suggestion(Base):
     """Integration suggestion model."""
     __tablename__ = "suggestions"
@@ -714,8 +726,9 @@ class TrustLedgerRoot(Base):
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     date = Column(TIMESTAMP(timezone=True), nullable=False, index=True)  # Date (time set to 00:00:00)
-    hash_root = Column(String(255), nullable=False, index=True)  # SHA256 hash of day's entries
+    hash_root = Column(String(255), nullable=False, index=True)  # Merkle root of the day's entry hashes
     entry_count = Column(Integer, nullable=False, default=0)
+    last_hash = Column(String(64), nullable=True)  # Hash of the day's last entry (checkpoint for incremental verify)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     
     user = relationship("User", foreign_keys=[user_id])
@@ -803,6 +816,7 @@ class MLModel(Base):
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     model_path = Column(String(500), nullable=True)
     training_config = Column(JSONB, nullable=True)
+    training_watermark = Column(TIMESTAMP(timezone=True), nullable=True)  # Data trained on up to here
     
     __table_args__ = (
         Index('idx_ml_models_type_active', 'model_type', 'is_active'),
@@ -0,0 +1,28 @@
+"""
+Migration: Add training_watermark field to ml_models table.
+
+Revision ID: add_ml_model_training_watermark
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_ml_model_training_watermark'
+down_revision = 'ml_models_v1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Creation time of the newest data a model version was trained on
+    op.add_column(
+        'ml_models',
+        sa.Column('training_watermark', sa.TIMESTAMP(timezone=True), nullable=True)
+    )
+
+
+def downgrade():
+    # Remove training_watermark column
+    op.drop_column('ml_models', 'training_watermark')
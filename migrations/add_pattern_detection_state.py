@@ -0,0 +1,33 @@
+"""
+Migration: Add pattern_detection_state table.
+
+Revision ID: add_pattern_detection_state
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = 'add_pattern_detection_state'
+down_revision = 'add_ml_model_training_watermark'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user watermark and rolling state of the streaming pattern detection job
+    op.create_table(
+        'pattern_detection_state',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('watermark_timestamp', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('watermark_event_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('events_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rolling_state', postgresql.JSONB(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('pattern_detection_state')
@@ -0,0 +1,28 @@
+"""
+Migration: Add last_hash field to trust_ledger_roots table.
+
+Revision ID: add_trust_ledger_root_last_hash
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_trust_ledger_root_last_hash'
+down_revision = 'add_pattern_detection_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hash of a sealed ledger segment's last entry, where incremental verification resumes
+    op.add_column(
+        'trust_ledger_roots',
+        sa.Column('last_hash', sa.String(64), nullable=True)
+    )
+
+
+def downgrade():
+    # Remove last_hash column
+    op.drop_column('trust_ledger_roots', 'last_hash')
@@ -1,6 +1,7 @@
 """Guardian CLI commands for ops."""
 
 import click
+import json
 from pathlib import Path
 import sys
 
@@ -10,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from backend.guardian.ledger import TrustLedger
 from backend.guardian.service import get_guardian_service
 from backend.guardian.inspector import GuardianInspector
-from ops.guardian.audit import GuardianAuditor
+from ops.guardian.audit import GuardianAuditor, StateFileError, verify_ledgers
 
 
 @click.group()
@@ -55,10 +56,51 @@ def report(user_id: str):
     click.echo(f"  Confidence score: {report['weekly']['confidence_score']:.1f}%")
 
 
+@guardian.command("verify-all")
+@click.option("--ledger-dir", type=click.Path(file_okay=False, path_type=Path), default=None, help="Ledger directory (default: GUARDIAN_LEDGER_DIR)")
+@click.option("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+@click.option("--shard-size", type=int, default=64, show_default=True, help="Users per worker task")
+@click.option("--state", "state_file", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Checkpoint file; rerun with the same file to resume")
+@click.option("--report", "report_file", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Write the summary report as JSON")
+def verify_all(ledger_dir, workers, shard_size, state_file, report_file):
+    """Verify every user ledger in parallel."""
+    with click.progressbar(length=1, label="Verifying ledgers") as bar:
+        def progress(done: int, total: int):
+            bar.length = max(total, 1)
+            bar.update(done - bar.pos)
+        
+        try:
+            summary = verify_ledgers(
+                ledger_dir=ledger_dir,
+                workers=workers,
+                shard_size=shard_size,
+                state_file=state_file,
+                progress=progress,
+            )
+        except StateFileError as e:
+            raise click.BadParameter(str(e), param_hint="--state")
+    
+    if report_file:
+        report_file.write_text(json.dumps(summary, indent=2))
+    
+    click.echo(f"Users: {summary['users']} ({summary['resumed']} from checkpoint)")
+    click.echo(f"Entries: {summary['entries']} in {summary['elapsed_seconds']:.1f}s ({summary['entries_per_second']:.0f}/s)")
+    
+    if summary["valid"]:
+        click.echo(f"✅ All {summary['verified']} ledgers verified")
+    else:
+        click.echo(f"❌ {summary['invalid']} ledgers failed verification")
+        for invalid in summary["invalid_users"]:
+            click.echo(f"   {invalid['user_id']}: {invalid['errors'][0] if invalid['errors'] else 'invalid'}")
+        sys.exit(1)
+
+
 @guardian.command()
-def audit():
+@click.option("--all-ledgers", is_flag=True, help="Verify every ledger on disk instead of a sample")
+@click.option("--workers", type=int, default=None, help="Worker processes for ledger verification")
+def audit(all_ledgers: bool, workers):
     """Run Guardian audit checks."""
-    auditor = GuardianAuditor()
+    auditor = GuardianAuditor(ledger_sample=None if all_ledgers else 5, workers=workers)
     report = auditor.run_all_checks()
     
     if report["passed"]:
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Append throughput benchmark for the guardian trust ledger.
+
+Appends the same events through the old synchronous path (find the previous
+hash by scanning backwards from the end of the file, then reopen and append
+one line) and through TrustLedger, which chains in memory and group-commits
+batches on a background writer. Both are timed until every entry is on disk,
+and the resulting ledgers are checked with TrustLedger.verify.
+
+Usage:
+    python scripts/benchmark_guardian_ledger.py [--events 20000] [--users 50] [--threads 8]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from backend.guardian.events import GuardianEvent  # noqa: E402
+from backend.guardian.ledger import TrustLedger  # noqa: E402
+
+
+def legacy_last_hash(ledger_file: Path):
+    """Find the last line by seeking backwards from the end one byte at a time."""
+    if not ledger_file.exists():
+        return None
+    with open(ledger_file, 'rb') as f:
+        try:
+            f.seek(-2, os.SEEK_END)
+            while f.read(1) != b'\n':
+                f.seek(-2, os.SEEK_CUR)
+        except OSError:
+            f.seek(0)
+        return json.loads(f.readline().decode()).get("hash")
+
+
+def legacy_append(ledger: TrustLedger, event: GuardianEvent, fsync: bool) -> str:
+    """The original TrustLedger.append: read the last line, then append."""
+    ledger_file = ledger._get_ledger_file(event.user_id or "anonymous")
+    previous_hash = legacy_last_hash(ledger_file)
+
+    entry_data = event.to_dict()
+    entry_data["previous_hash"] = previous_hash
+    entry_json = json.dumps(entry_data, sort_keys=True, default=str)
+    entry_hash = hashlib.sha256(entry_json.encode()).hexdigest()
+
+    with open(ledger_file, 'a') as f:
+        f.write(json.dumps({**entry_data, "hash": entry_hash}, default=str) + '\n')
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    return entry_hash
+
+
+def make_events(count: int, users: int):
+    return [
+        GuardianEvent(
+            user_id=f"user{i % users}",
+            event_type="api_call",
+            description=f"GET /api/items/{i}",
+            data_touched={"method": "GET", "path": f"/api/items/{i}", "headers": {"accept": "application/json"}},
+            purpose="API request monitoring",
+            source="benchmark",
+        )
+        for i in range(count)
+    ]
+
+
+def run(append, events, threads: int) -> float:
+    """Append all events from ``threads`` threads and return elapsed seconds."""
+    chunks = [events[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        for event in chunk:
+            append(event)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.users)
+    users = sorted({e.user_id for e in events})
+
+    print(f"{args.events} events, {args.users} users, {args.threads} threads")
+    print(f"{'writer':<28} {'seconds':>9} {'appends/s':>11} {'verified':>9}")
+
+    for fsync in (False, True):
+        label = "fsync" if fsync else "no fsync"
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = TrustLedger(ledger_dir=Path(tmp) / "legacy", fsync=fsync)
+            lock = threading.Lock()
+
+            def locked_append(event):
+                # The old path is only chain-safe when serialized
+                with lock:
+                    legacy_append(ledger, event, fsync)
+
+            elapsed = run(locked_append, events, args.threads)
+            valid = all(ledger.verify(u)["valid"] for u in users)
+            print(f"{'legacy (' + label + ')':<28} {elapsed:>9.3f} {args.events / elapsed:>11,.0f} {str(valid):>9}")
+
+            ledger = TrustLedger(ledger_dir=Path(tmp) / "batched", fsync=fsync)
+            start = time.perf_counter()
+            run(ledger.append, events, args.threads)
+            ledger.flush()
+            elapsed = time.perf_counter() - start
+            valid = all(ledger.verify(u)["valid"] for u in users)
+            print(f"{'batched (' + label + ')':<28} {elapsed:>9.3f} {args.events / elapsed:>11,.0f} {str(valid):>9}"
+                  f"  [{ledger.stats['batches']} batches, {ledger.stats['fsyncs']} fsyncs]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for guardian policy assessment.
+
+Assesses the same random events with per-event evaluation (the previous
+PolicyEngine.assess_risk: rebuild weights, score, level, action and reason
+for each event) and with the compiled decision table, checks that both agree,
+and reports events assessed per second.
+
+Usage:
+    python scripts/benchmark_guardian_policies.py [--events 200000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from backend.guardian.events import DataClass, DataScope, GuardianEvent  # noqa: E402
+from backend.guardian.policies import PolicyEngine  # noqa: E402
+
+
+def legacy_assess(engine: PolicyEngine, event: GuardianEvent) -> GuardianEvent:
+    """Evaluate the policy for one event from scratch."""
+    engine._get_action_thresholds()
+    risk_score = engine._calculate_risk_score(event, engine._get_risk_weights(engine.policies))
+    event.risk_score = risk_score
+    event.risk_level = engine._risk_level(risk_score)
+    action = engine._determine_action(event)
+    event.guardian_action = action
+    event.action_reason = engine._get_action_reason(event, action)
+    return event
+
+
+def make_events(count: int):
+    rng = random.Random(0)
+    scopes, classes = list(DataScope), list(DataClass)
+    return [
+        GuardianEvent(
+            scope=rng.choice(scopes),
+            data_class=rng.choice(classes),
+            mfa_required=rng.random() < 0.2,
+            user_decision=rng.choice([None, None, None, "allow", "deny", "pending"]),
+        )
+        for _ in range(count)
+    ]
+
+
+def snapshot(event: GuardianEvent):
+    return (event.risk_score, event.risk_level, tuple(event.risk_factors), event.guardian_action, event.action_reason)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    engine = PolicyEngine()
+    events = make_events(args.events)
+
+    start = time.perf_counter()
+    for event in events:
+        legacy_assess(engine, event)
+    legacy_seconds = time.perf_counter() - start
+    legacy = [snapshot(e) for e in events]
+
+    start = time.perf_counter()
+    for event in events:
+        engine.assess_risk(event)
+    compiled_seconds = time.perf_counter() - start
+    compiled = [snapshot(e) for e in events]
+
+    print(f"{args.events} events, {len(engine._decisions)} table entries")
+    print(f"{'per-event evaluation':<22} {legacy_seconds:>8.3f}s {args.events / legacy_seconds:>12,.0f} events/s")
+    print(f"{'decision table':<22} {compiled_seconds:>8.3f}s {args.events / compiled_seconds:>12,.0f} events/s")
+    print(f"results identical: {legacy == compiled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Per-request middleware overhead benchmark.
+
+Builds two copies of a FastAPI app with one trivial JSON endpoint: a bare one
+and one configured by setup_middleware. Both are driven directly through the
+ASGI interface (no HTTP client or server in the loop), so the difference in
+time per request is the cost of the middleware pipeline itself.
+
+Usage:
+    python scripts/benchmark_middleware.py [--requests 5000] [--path /api/ping]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GUARDIAN_LEDGER_DIR", tempfile.mkdtemp(prefix="guardian-bench-"))
+
+from fastapi import FastAPI  # noqa: E402
+
+from backend.middleware import setup_middleware  # noqa: E402
+
+
+def build_app(with_middleware: bool) -> FastAPI:
+    """Create an app with a trivial endpoint, optionally with the full middleware stack."""
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    if with_middleware:
+        setup_middleware(app)
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int) -> float:
+    """Send ``requests`` GET requests and return the mean time per request in microseconds."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"user-agent", b"benchmark"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    # Warm up routing, lazy singletons and logging
+    for _ in range(min(200, requests)):
+        await app(dict(scope), receive, send)
+    status.clear()
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - start
+
+    if any(code != 200 for code in status):
+        raise RuntimeError(f"Unexpected status codes: {sorted(set(status))}")
+    return elapsed / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request middleware overhead")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--path", default="/api/ping")
+    args = parser.parse_args()
+
+    bare = asyncio.run(run(build_app(False), args.path, args.requests))
+    full = asyncio.run(run(build_app(True), args.path, args.requests))
+
+    print(f"Requests:           {args.requests}")
+    print(f"Bare app:           {bare:9.1f} us/request")
+    print(f"With middleware:    {full:9.1f} us/request")
+    print(f"Middleware overhead:{full - bare:9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Load-time and memory benchmark for model artifacts.
+
+Fits each model type on synthetic data, saves it both as a pickle (the old
+format) and as a pickle-free artifact, then loads each copy in a fresh
+subprocess and reports wall time and resident memory added by the load.
+Artifacts are loaded memory-mapped, so RSS only grows by the pages that are
+actually touched.
+
+Usage:
+    python scripts/benchmark_model_artifacts.py [--rows 20000] [--users 200000]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sklearn.decomposition import NMF  # noqa: E402
+from sklearn.ensemble import GradientBoostingRegressor, IsolationForest, RandomForestClassifier  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from scipy import sparse  # noqa: E402
+
+from backend.ml.artifacts import load_artifact, save_artifact  # noqa: E402
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def build_models(rows: int, users: int, workflows: int):
+    """Fit one estimator graph per model type, shaped like the real models."""
+    rng = np.random.default_rng(0)
+    X = rng.random((rows, 10))
+    labels = np.array(["script_automation", "data_processing", "general"], dtype=object)
+
+    scaler = StandardScaler().fit(X[:, :5])
+    interactions = sparse.csr_matrix(
+        (rng.random(users * 5) + 0.1, (np.repeat(np.arange(users), 5), rng.integers(0, workflows, users * 5))),
+        shape=(users, workflows),
+    )
+    nmf = NMF(n_components=32, max_iter=20, init="random", random_state=0)
+    user_features = nmf.fit_transform(interactions)
+
+    return {
+        "pattern_classifier": {
+            "model": RandomForestClassifier(n_estimators=100, max_depth=10, n_jobs=-1, random_state=0)
+            .fit(X, labels[rng.integers(0, 3, rows)]),
+        },
+        "suggestion_scorer": {
+            "model": GradientBoostingRegressor(n_estimators=100, random_state=0).fit(X[:, :6], rng.random(rows)),
+        },
+        "workflow_trigger_predictor": {
+            "model": GradientBoostingRegressor(n_estimators=100, random_state=0).fit(X[:, :5], rng.random(rows)),
+        },
+        "anomaly_detector": {
+            "model": IsolationForest(n_estimators=100, random_state=0).fit(scaler.transform(X[:, :5])),
+            "scaler": scaler,
+        },
+        "workflow_recommender": {
+            "model": nmf,
+            "user_features": user_features,
+            "workflow_features": nmf.components_,
+            "exclusions": (interactions != 0).tocsr(),
+        },
+    }
+
+
+def load_once(fmt: str, prefix: Path) -> dict:
+    """Load one saved model and report time and RSS growth (runs in a subprocess)."""
+    before = rss_mb()
+    start = time.perf_counter()
+    if fmt == "pickle":
+        with open(prefix.with_suffix(".pkl"), "rb") as f:
+            state = pickle.load(f)
+    else:
+        state = load_artifact(prefix, verify=fmt == "artifact")
+    seconds = time.perf_counter() - start
+    assert state["model"] is not None
+    return {"seconds": seconds, "rss_mb": rss_mb() - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model artifact loading")
+    parser.add_argument("--rows", type=int, default=20_000, help="Training rows for tree models")
+    parser.add_argument("--users", type=int, default=200_000, help="Recommender users")
+    parser.add_argument("--workflows", type=int, default=20_000, help="Recommender workflows")
+    parser.add_argument("--load", nargs=2, metavar=("FORMAT", "PREFIX"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        print(json.dumps(load_once(args.load[0], Path(args.load[1]))))
+        return
+
+    directory = Path(tempfile.mkdtemp(prefix="floyo-artifacts-"))
+    models = build_models(args.rows, args.users, args.workflows)
+
+    def measure(fmt, prefix):
+        output = subprocess.run(
+            [sys.executable, __file__, "--load", fmt, str(prefix)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'model':<28}{'format':<20}{'size MB':>9}{'load ms':>10}{'RSS MB':>9}")
+    for model_type, state in models.items():
+        prefix = directory / model_type
+
+        with open(prefix.with_suffix(".pkl"), "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        save_artifact(state, prefix)
+
+        pickle_size = prefix.with_suffix(".pkl").stat().st_size / 1e6
+        artifact_size = sum(
+            p.stat().st_size for p in directory.glob(f"{model_type}.*") if p.suffix != ".pkl"
+        ) / 1e6
+
+        for fmt, size in (("pickle", pickle_size), ("artifact", artifact_size), ("artifact-noverify", artifact_size)):
+            result = measure(fmt, prefix)
+            print(f"{model_type:<28}{fmt:<20}{size:>9.1f}{result['seconds'] * 1000:>10.1f}{result['rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Repeated-pattern mining benchmark for the workflow model builder.
+
+Generates a synthetic timeline of interaction and telemetry events and times
+``WorkflowModelBuilder._extract_pattern_based_sequences`` at each size, split
+into interning, window mining and building the output sequences. The
+original pairwise scan is timed as well up to ``--legacy-max`` events; it is
+quadratic and impractical beyond that.
+
+Usage:
+    python scripts/benchmark_pattern_mining.py [--sizes 2000 10000 100000 1000000] [--vocabulary 30]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from backend.ml.sequence_mining import find_repeated_windows  # noqa: E402
+from backend.ml.workflow_model_builder import PATTERN_LENGTHS, WorkflowModelBuilder  # noqa: E402
+
+
+def generate_events(count: int, vocabulary: int, seed: int = 42):
+    """Events drawn from ``vocabulary`` distinct event keys."""
+    rng = random.Random(seed)
+    kinds = []
+    for i in range(vocabulary):
+        if i % 2:
+            kinds.append(('interaction', {'type': f'click_{i}', 'overlay': {'type': 'modal'}}))
+        else:
+            kinds.append(('telemetry', {'eventType': f'file_modified_{i}', 'appId': 'vscode'}))
+    return [
+        {'type': kind, 'data': data, 'timestamp': i * 1000}
+        for i, (kind, data) in enumerate(rng.choice(kinds) for _ in range(count))
+    ]
+
+
+def legacy_extract(builder: WorkflowModelBuilder, all_events):
+    """The original quadratic scan, kept for comparison."""
+    sequences = []
+    for pattern_length in PATTERN_LENGTHS:
+        for i in range(len(all_events) - pattern_length + 1):
+            pattern = all_events[i:i + pattern_length]
+            pattern_key = builder._sequence_to_key(pattern)
+            for j in range(i + pattern_length, len(all_events) - pattern_length + 1):
+                if builder._sequence_to_key(all_events[j:j + pattern_length]) == pattern_key:
+                    sequences.append(pattern)
+                    break
+    return sequences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repeated-pattern mining")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--vocabulary", type=int, default=30, help="Distinct event keys")
+    parser.add_argument("--legacy-max", type=int, default=2_000, help="Largest size to run the old scan on")
+    args = parser.parse_args()
+
+    builder = WorkflowModelBuilder()
+    print(f"{'events':>10}{'intern s':>10}{'mine s':>10}{'total s':>10}{'windows':>11}{'legacy s':>11}")
+    for size in args.sizes:
+        events = generate_events(size, args.vocabulary)
+
+        start = time.perf_counter()
+        tokens = builder._intern_events(events)
+        intern_s = time.perf_counter() - start
+        start = time.perf_counter()
+        find_repeated_windows(tokens, PATTERN_LENGTHS)
+        mine_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sequences = builder._extract_pattern_based_sequences(events)
+        total_s = time.perf_counter() - start
+
+        legacy = "-"
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            expected = legacy_extract(builder, events)
+            legacy = f"{time.perf_counter() - start:.2f}"
+            assert expected == sequences, "miner output differs from the pairwise scan"
+
+        print(f"{size:>10}{intern_s:>10.3f}{mine_s:>10.3f}{total_s:>10.3f}{len(sequences):>11}{legacy:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Response envelope benchmark.
+
+Builds the standard envelope for the same route result two ways: the old
+middleware path (render a JSONResponse, parse the body back with json.loads,
+wrap it and render a second JSONResponse) and StandardJSONResponse, which
+wraps the content once while serializing. Both bodies are checked to decode
+to the same envelope.
+
+Usage:
+    python scripts/benchmark_response_envelope.py [--items 1000] [--rounds 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.response_middleware import (  # noqa: E402
+    ORJSON_AVAILABLE,
+    StandardJSONResponse,
+    _envelope_request,
+    _standardize_response,
+)
+
+
+def make_payload(items: int):
+    """A paginated list of event-like records."""
+    return {
+        "items": [
+            {
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "event_type": "file_modified",
+                "file_path": f"/home/user/project/src/module_{i % 50}.py",
+                "tool": "vscode",
+                "details": {"size": i * 17, "lines": i % 400, "tags": ["python", "src"]},
+                "timestamp": "2026-01-01T12:00:00",
+            }
+            for i in range(items)
+        ],
+        "total": items * 10,
+        "skip": 0,
+        "limit": items,
+        "has_more": True,
+    }
+
+
+def legacy_envelope(content) -> bytes:
+    """The original middleware path: serialize, parse back, wrap, serialize again."""
+    response = JSONResponse(content)
+    body = json.loads(response.body.decode())
+    standardized = _standardize_response(body, request_id="req", status_code=200, response_time_ms=0.0)
+    return JSONResponse(content=standardized, headers=dict(response.headers)).body
+
+
+def single_pass_envelope(content) -> bytes:
+    """StandardJSONResponse with the request marked for standardization."""
+    return StandardJSONResponse(content).body
+
+
+def bench(fn, payload, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response envelope construction")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = make_payload(args.items)
+    token = _envelope_request.set(({"state": {"request_id": "req"}}, time.time()))
+    try:
+        legacy = json.loads(legacy_envelope(payload))
+        single = json.loads(single_pass_envelope(payload))
+        for body in (legacy, single):
+            body.pop("timestamp")
+            body["metadata"].pop("response_time_ms")
+        assert legacy == single, "envelopes differ"
+
+        legacy_ms = bench(legacy_envelope, payload, args.rounds)
+        single_ms = bench(single_pass_envelope, payload, args.rounds)
+    finally:
+        _envelope_request.reset(token)
+
+    size_kb = len(single_pass_envelope(payload)) / 1024
+    print(f"Items: {args.items} ({size_kb:.0f} KiB body), orjson: {ORJSON_AVAILABLE}")
+    print(f"Serialize + reparse:  {legacy_ms:8.3f} ms/response")
+    print(f"Single pass:          {single_ms:8.3f} ms/response")
+    print(f"Speedup:              {legacy_ms / single_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Tests for FloyoDataProcessor
+
+Unit tests for columnar event extraction.
+"""
+
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+
+from backend.ml.base import EVENT_COLUMNS, FloyoDataProcessor
+
+
+PATHS = [
+    "/src/app.PY", "/src/archive.tar.gz", "/home/user/.bashrc", "/src/Makefile",
+    "/src/file.", "/src/pkg.d/readme", "relative/notes.md", "/src/dir.py/", None, "",
+]
+
+
+def _rows():
+    return [
+        (f"event-{i}", "user-1", "file_modified", path, "vscode", "write",
+         datetime(2024, 1, 1 + i, i, 30, tzinfo=timezone.utc))
+        for i, path in enumerate(PATHS)
+    ]
+
+
+def _db(rows):
+    result = Mock()
+    result.keys.return_value = ["event_id", "user_id", "event_type", "file_path", "tool", "operation", "timestamp"]
+    result.partitions.side_effect = lambda size: (rows[i:i + size] for i in range(0, len(rows), size))
+    db = Mock()
+    db.execute.return_value = result
+    return db
+
+
+def test_derived_columns_match_per_row_computation():
+    """Vectorized hour, weekday and extension agree with datetime and Path."""
+    frame = FloyoDataProcessor.events_to_dataframe(_db(_rows()))
+
+    assert list(frame.columns) == EVENT_COLUMNS
+    for row, (_, _, _, path, _, _, timestamp) in zip(frame.itertuples(), _rows()):
+        assert row.hour_of_day == timestamp.hour
+        assert row.day_of_week == timestamp.weekday()
+        extension = None if pd.isna(row.file_extension) else row.file_extension
+        assert extension == (Path(path).suffix.lower() if path else None)
+
+
+def test_iter_event_frames_chunks():
+    """Events stream in chunks of the requested size."""
+    chunks = list(FloyoDataProcessor.iter_event_frames(_db(_rows()), chunk_size=4))
+
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert pd.concat(chunks)["event_id"].tolist() == [f"event-{i}" for i in range(len(PATHS))]
+
+
+def test_select_only_requested_columns():
+    """Derived columns pull in their source column and nothing else."""
+    stmt = FloyoDataProcessor._event_select(user_id="user-1", limit=50, columns=["tool", "hour_of_day"])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "events.tool" in sql and "events.timestamp" in sql
+    assert "file_path" not in sql and "details" not in sql
+    assert "LIMIT" in sql
+
+
+def test_requested_columns_returned():
+    """Only the requested columns are returned."""
+    frame = FloyoDataProcessor.events_to_dataframe(_db(_rows()), columns=["tool", "hour_of_day"])
+
+    assert list(frame.columns) == ["tool", "hour_of_day"]
+    assert frame["hour_of_day"].tolist() == list(range(len(PATHS)))
@@ -0,0 +1,132 @@
+"""
+Tests for EventStream
+
+Unit tests for coalescing event-created notices off the request path.
+"""
+
+import asyncio
+
+from backend.notifications.event_stream import EventStream, format_notice
+
+
+def _stream(window_ms=20, **options):
+    delivered = []
+
+    async def deliver(user_id, message):
+        delivered.append((user_id, message))
+
+    return EventStream(deliver=deliver, window_ms=window_ms, **options), delivered
+
+
+def test_publish_returns_without_delivering():
+    """Publishing only queues; the dispatcher delivers after the window."""
+    async def scenario():
+        stream, delivered = _stream()
+        stream.publish("u1", "file_created")
+        assert delivered == []
+
+        await asyncio.sleep(0.05)
+        assert delivered == [("u1", "Event created: file_created")]
+        await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_bursts_are_coalesced_per_user():
+    """Notices published within one window become one message per user."""
+    async def scenario():
+        stream, delivered = _stream()
+        for _ in range(5):
+            stream.publish("u1", "file_modified")
+        stream.publish("u1", count=10)
+        stream.publish("u2", "file_deleted")
+
+        await asyncio.sleep(0.05)
+        assert sorted(delivered) == [("u1", "Batch: 15 events created"), ("u2", "Event created: file_deleted")]
+        assert stream.stats["windows"] == 1
+        await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_flushes_pending_notices():
+    """Notices still inside a window are delivered on shutdown."""
+    async def scenario():
+        stream, delivered = _stream(window_ms=10_000)
+        stream.publish("u1", "file_created")
+        stream.publish("u1", "file_created")
+        await asyncio.sleep(0)
+
+        await stream.close()
+        assert delivered == [("u1", "Batch: 2 events created")]
+
+    asyncio.run(scenario())
+
+
+def test_close_finishes_window_being_delivered():
+    """Closing while a window is being delivered delivers the rest of it."""
+    async def scenario():
+        delivered = []
+        release = asyncio.Event()
+
+        async def deliver(user_id, message):
+            if not delivered:
+                await release.wait()
+            delivered.append(user_id)
+
+        stream = EventStream(deliver=deliver, window_ms=10)
+        for user_id in ("u1", "u2", "u3"):
+            stream.publish(user_id, "file_created")
+        await asyncio.sleep(0.03)
+        assert delivered == []
+
+        closing = asyncio.ensure_future(stream.close())
+        await asyncio.sleep(0)
+        release.set()
+        await closing
+
+        assert delivered == ["u1", "u2", "u3"]
+
+    asyncio.run(scenario())
+
+
+def test_full_channel_drops_notices():
+    """Publishing never blocks; notices beyond capacity are counted and dropped."""
+    async def scenario():
+        stream, delivered = _stream(max_pending=3)
+        for _ in range(5):
+            stream.publish("u1", "file_created")
+
+        assert stream.stats == {"published": 3, "dropped": 2, "delivered": 0, "windows": 0}
+        await stream.close()
+        assert delivered == [("u1", "Batch: 3 events created")]
+
+    asyncio.run(scenario())
+
+
+def test_delivery_errors_do_not_stop_the_dispatcher():
+    """A failing delivery is logged and later windows are still delivered."""
+    async def scenario():
+        calls = []
+
+        async def deliver(user_id, message):
+            calls.append(message)
+            if len(calls) == 1:
+                raise RuntimeError("socket gone")
+
+        stream = EventStream(deliver=deliver, window_ms=10)
+        stream.publish("u1", "a")
+        await asyncio.sleep(0.03)
+        stream.publish("u1", "b")
+        await asyncio.sleep(0.03)
+
+        assert calls == ["Event created: a", "Event created: b"]
+        await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_format_notice():
+    """Single events keep their type; anything else is reported as a count."""
+    assert format_notice(1, "x") == "Event created: x"
+    assert format_notice(1, None) == "Batch: 1 events created"
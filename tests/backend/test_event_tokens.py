@@ -0,0 +1,104 @@
+"""
+Tests for the token-interned event representation
+
+Unit tests for event keys, sequence grouping and their use by the pattern
+detector, workflow model builder and automation generator.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from backend.ml.automation_generator import AutomationGenerator
+from backend.ml.event_tokens import EventVocabulary, parse_sequence_key, sequence_to_key
+from backend.ml.pattern_detector import AdvancedPatternDetector
+from backend.ml.workflow_model_builder import WorkflowModelBuilder
+
+
+def _interaction(kind, overlay, timestamp):
+    return {'type': 'interaction', 'data': {'type': kind, 'overlay': {'type': overlay}}, 'timestamp': timestamp}
+
+
+def _telemetry(event_type, app_id, timestamp):
+    return {'type': 'telemetry', 'data': {'eventType': event_type, 'appId': app_id}, 'timestamp': timestamp}
+
+
+def _sequences():
+    events = [
+        _interaction('click', 'modal', 1000),
+        _telemetry('file_modified', 'vscode', 2000),
+        _interaction('hover', 'none', 3000),
+        {'overlay': {'type': 'dropdown'}, 'type': 'click', 'timestamp': 4000},
+    ]
+    windows = [events[0:2], events[1:3], events[0:2], events[2:4], events[0:2], events[1:3], events[1:3], []]
+    # Equal content in distinct dict objects must group together too
+    windows.append([dict(events[0]), dict(events[1])])
+    return windows
+
+
+def test_sequence_key_round_trip():
+    """Vocabulary keys match the string keys and parse back into steps."""
+    vocabulary = EventVocabulary()
+    for sequence in _sequences():
+        assert vocabulary.sequence_key(vocabulary.encode_sequence(sequence)) == sequence_to_key(sequence)
+
+    assert parse_sequence_key('i:click:modal -> t:file_modified:vscode -> unknown') == [
+        {'type': 'interaction', 'interaction_type': 'click', 'overlay_type': 'modal'},
+        {'type': 'telemetry', 'event_type': 'file_modified', 'app_id': 'vscode'},
+    ]
+
+
+def test_encode_interns_to_small_ints():
+    """Equal events share a token and tokens are dense."""
+    events = [_interaction('click', 'modal', 1), _interaction('click', 'modal', 2), _telemetry('a', 'b', 3)]
+    tokens = EventVocabulary().encode(events)
+
+    assert tokens.dtype == np.int32
+    assert tokens.tolist() == [0, 0, 1]
+
+
+def test_group_sequences_matches_string_keys():
+    """Groups are the string-key groups, in order of first occurrence."""
+    sequences = _sequences()
+    vocabulary = EventVocabulary()
+    groups = vocabulary.group_sequences(sequences)
+
+    expected = Counter(sequence_to_key(s) for s in sequences)
+    assert [vocabulary.sequence_key(t) for t in groups] == list(expected)
+    assert [len(g) for g in groups.values()] == list(expected.values())
+
+
+def test_repetitive_patterns_and_candidates():
+    """Detector and builder find the same frequent sequences in one pass."""
+    sequences = _sequences()
+    patterns = AdvancedPatternDetector().detect_repetitive_patterns(sequences, min_frequency=3)
+    candidates = WorkflowModelBuilder()._identify_workflow_candidates({}, sequences)
+
+    keys = ['i:click:modal -> t:file_modified:vscode', 't:file_modified:vscode -> i:hover:none']
+    assert [(p['sequence_key'], p['frequency']) for p in patterns] == list(zip(keys, [4, 3]))
+    assert [(c['sequence_key'], c['frequency']) for c in candidates] == list(zip(keys, [4, 3]))
+
+
+def test_deduplicate_keeps_first_occurrence():
+    """Deduplication keeps the first sequence of each key."""
+    sequences = _sequences()
+    unique = WorkflowModelBuilder()._deduplicate_sequences(sequences)
+
+    assert [sequence_to_key(s) for s in unique] == list(dict.fromkeys(sequence_to_key(s) for s in sequences))
+    assert unique[0] is sequences[0]
+
+
+def test_automation_generator_parses_candidate_key():
+    """Generated workflows are built from the parsed candidate key."""
+    candidate = {
+        'sequence_key': 'i:click:modal -> t:file_modified:vscode',
+        'automation_potential': 0.8,
+        'confidence': 0.5,
+        'steps': 2,
+        'frequency': 4,
+    }
+    result = AutomationGenerator().generate_workflow({'workflow_candidates': [candidate]}, 'user-1')
+
+    definition = result['workflow']['definition']
+    assert definition['triggers'][0] == {'type': 'user_action', 'action': 'click', 'target': {'overlay_type': 'modal'}}
+    assert definition['steps'][0]['event_type'] == 'file_modified'
@@ -0,0 +1,114 @@
+"""
+Tests for GuardianMiddleware
+
+Unit tests for inline policy decisions, sampling and background emission.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.guardian.events import DataClass, DataScope, ResponseAction
+from backend.guardian.ledger import TrustLedger
+from backend.guardian.middleware import GuardianMiddleware, parse_route_sample_rates
+from backend.guardian.service import GuardianService
+
+
+@pytest.fixture
+def guardian(tmp_path):
+    """Create a guardian service with a temporary ledger."""
+    service = GuardianService(ledger=TrustLedger(ledger_dir=tmp_path, fsync=False))
+    with patch("backend.guardian.middleware.get_guardian_service", return_value=service):
+        yield service
+
+
+def _client(**options):
+    app = FastAPI()
+    app.add_middleware(GuardianMiddleware, **options)
+
+    @app.get("/api/items")
+    def items():
+        return {"ok": True}
+
+    @app.get("/api/events/{event_id}")
+    def event(event_id: str):
+        return {"id": event_id}
+
+    return TestClient(app)
+
+
+def _recorded(guardian):
+    guardian.wait_for_events()
+    return [e["event_type"] for e in reversed(guardian.ledger.get_user_ledger("anonymous"))]
+
+
+def test_async_mode_records_events_off_the_request_path(guardian):
+    """Request and response events are emitted by the background consumer."""
+    client = _client(async_events=True, sample_rate=1.0, route_sample_rates={})
+
+    with patch.object(guardian, "emit_event", wraps=guardian.emit_event) as emit_event:
+        assert client.get("/api/items", headers={"Authorization": "Bearer secret"}).status_code == 200
+        entries = _recorded(guardian)
+
+    assert entries == ["api_call", "api_response"]
+    assert guardian.async_stats["emitted"] == 2
+    assert emit_event.call_count == 2
+
+    call = guardian.ledger.get_user_ledger("anonymous")[-1]
+    assert "authorization" in call["data_touched"]["headers"]
+    assert "Bearer secret" not in str(call)
+
+
+def test_sync_mode_emits_inline(guardian):
+    """With async events off, events are in the ledger when the response returns."""
+    client = _client(async_events=False, sample_rate=1.0, route_sample_rates={})
+
+    client.get("/api/items")
+
+    assert [e["event_type"] for e in reversed(guardian.ledger.get_user_ledger("anonymous"))] == ["api_call", "api_response"]
+    assert guardian.async_stats["queued"] == 0
+
+
+def test_route_sample_rates_override_default(guardian):
+    """Unsampled routes record nothing; the longest matching prefix wins."""
+    client = _client(async_events=True, sample_rate=1.0, route_sample_rates={"/api/events": 0.0, "/api/": 1.0})
+
+    for i in range(5):
+        client.get(f"/api/events/{i}")
+    client.get("/api/items")
+
+    assert _recorded(guardian) == ["api_call", "api_response"]
+
+
+def test_blocked_requests_are_always_recorded(guardian):
+    """Lockdown blocks inline and records the request even when unsampled."""
+    guardian.enable_lockdown()
+    client = _client(async_events=True, sample_rate=0.0, route_sample_rates={})
+
+    response = client.get("/api/items")
+
+    assert response.status_code == 403
+    assert response.json()["reason"] == "Guardian lockdown active"
+    assert _recorded(guardian) == []  # lockdown events are not written to the ledger
+    assert guardian.async_stats["emitted"] == 1
+
+
+def test_decide_matches_emit_event(guardian):
+    """The inline decision is the action emit_event takes for the same event."""
+    for scope in DataScope:
+        for data_class in DataClass:
+            event = guardian.emit_event(
+                event_type="api_call", scope=scope, data_class=data_class,
+                description="", data_touched={}, purpose="",
+            )
+            assert guardian.decide(scope, data_class).action == event.guardian_action
+
+    guardian.enable_private_mode()
+    assert guardian.decide(DataScope.API, DataClass.TELEMETRY).action == ResponseAction.MASK
+
+
+def test_parse_route_sample_rates():
+    """Pairs are clamped and sorted longest prefix first; bad entries are skipped."""
+    assert parse_route_sample_rates("/api=0.5, /api/events=2,bad=x,") == [("/api/events", 1.0), ("/api", 0.5)]
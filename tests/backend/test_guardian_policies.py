@@ -0,0 +1,95 @@
+"""
+Tests for PolicyEngine
+
+Unit tests for the compiled policy decision table and hot reload.
+"""
+
+import os
+
+import pytest
+
+from backend.guardian.events import DataClass, DataScope, GuardianEvent, ResponseAction, RiskLevel
+from backend.guardian.policies import PolicyEngine
+
+
+@pytest.fixture
+def policy_dir(tmp_path):
+    """Create a policy directory with a default policy."""
+    (tmp_path / "default.yaml").write_text("allowed_scopes: [user, app, api, external]\n")
+    return tmp_path
+
+
+def test_table_covers_every_combination(policy_dir):
+    """Every scope, data class, MFA flag and user decision has a decision."""
+    engine = PolicyEngine(policy_dir)
+
+    assert len(engine._decisions) == len(DataScope) * len(DataClass) * 2 * 3
+
+
+@pytest.mark.parametrize("scope, data_class, mfa, user_decision, level, action", [
+    (DataScope.API, DataClass.TELEMETRY, False, None, RiskLevel.LOW, ResponseAction.ALLOW),
+    (DataScope.EXTERNAL, DataClass.CREDENTIALS, False, None, RiskLevel.CRITICAL, ResponseAction.BLOCK),
+    (DataScope.EXTERNAL, DataClass.TELEMETRY, False, None, RiskLevel.HIGH, ResponseAction.MASK),
+    (DataScope.EXTERNAL, DataClass.TELEMETRY, True, None, RiskLevel.MEDIUM, ResponseAction.REDACT),
+    (DataScope.API, DataClass.CREDENTIALS, False, "deny", RiskLevel.HIGH, ResponseAction.ALERT),
+    (DataScope.API, DataClass.CREDENTIALS, True, "pending", RiskLevel.MEDIUM, ResponseAction.ALLOW),
+])
+def test_assess_risk_uses_table(policy_dir, scope, data_class, mfa, user_decision, level, action):
+    """Assessment fills the event from the decision table."""
+    engine = PolicyEngine(policy_dir)
+    event = GuardianEvent(scope=scope, data_class=data_class, mfa_required=mfa, user_decision=user_decision)
+
+    engine.assess_risk(event)
+
+    assert event.risk_level == level
+    assert event.guardian_action == action
+    assert event.risk_factors == list(engine.decide(scope, data_class, mfa, user_decision).risk_factors)
+
+
+def test_risk_factors_are_not_shared_between_events(policy_dir):
+    """Each assessed event gets its own risk factor list."""
+    engine = PolicyEngine(policy_dir)
+    first = engine.assess_risk(GuardianEvent(scope=DataScope.EXTERNAL))
+    first.risk_factors.append("extra")
+
+    second = engine.assess_risk(GuardianEvent(scope=DataScope.EXTERNAL))
+
+    assert "extra" not in second.risk_factors
+
+
+def test_policy_changes_are_hot_reloaded(policy_dir):
+    """Adding or changing a policy file rebuilds the table on the next check."""
+    engine = PolicyEngine(policy_dir, reload_interval=0)
+    assert engine.decide(DataScope.API, DataClass.TELEMETRY).action == ResponseAction.ALLOW
+
+    weights = policy_dir / "risk_weights.yaml"
+    weights.write_text("scope: 1.0\ndata_class: 1.0\n")
+
+    assert engine.decide(DataScope.API, DataClass.TELEMETRY).action == ResponseAction.MASK
+    assert "risk_weights" in engine.policies
+
+    weights.write_text("scope: 0.3\ndata_class: 0.4\n")
+    stat = weights.stat()
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert engine.decide(DataScope.API, DataClass.TELEMETRY).risk_level == RiskLevel.LOW
+
+    weights.unlink()
+    assert engine.reload_if_changed()
+    assert "risk_weights" not in engine.policies
+
+
+def test_reload_disabled(policy_dir):
+    """With no reload interval, policy files are only read at load time."""
+    engine = PolicyEngine(policy_dir, reload_interval=None)
+    (policy_dir / "risk_weights.yaml").write_text("scope: 1.0\ndata_class: 1.0\n")
+
+    assert engine.decide(DataScope.API, DataClass.TELEMETRY).risk_level == RiskLevel.LOW
+
+
+def test_missing_policy_dir_uses_defaults(tmp_path):
+    """A missing directory falls back to the built-in default policy."""
+    engine = PolicyEngine(tmp_path / "missing")
+
+    assert "default" in engine.policies
+    assert engine.decide(DataScope.API, DataClass.TELEMETRY).action == ResponseAction.ALLOW
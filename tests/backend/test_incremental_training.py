@@ -0,0 +1,160 @@
+"""
+Tests for incremental training
+
+Unit tests for partial_train on PatternClassifier and PatternAnomalyDetector
+and the pipeline's watermark handling.
+"""
+
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+from backend.ml import pattern_classifier
+from backend.ml.base import WATERMARK_LAG, training_watermark
+from backend.ml.pattern_classifier import PatternClassifier, INCREMENTAL_ESTIMATORS
+from backend.ml.anomaly_detector import PatternAnomalyDetector
+from backend.ml.training_pipeline import TrainingPipeline
+
+EXTENSIONS = [".py", ".csv", ".md", ".txt", ".png"]
+TOOLS = ["vscode", "git", "excel"]
+STORED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _events(n, tools=TOOLS, offset=0, stored_at=STORED_AT):
+    return pd.DataFrame({
+        "event_type": ["file_modified", "file_created"] * (n // 2),
+        "tool": [tools[(i + offset) % len(tools)] for i in range(n)],
+        "operation": ["write"] * n,
+        "hour_of_day": [(i + offset) % 24 for i in range(n)],
+        "day_of_week": [(i + offset) % 7 for i in range(n)],
+        "file_extension": [EXTENSIONS[(i + offset) % len(EXTENSIONS)] for i in range(n)],
+        "created_at": [stored_at + timedelta(seconds=i) for i in range(n)],
+    })
+
+
+@pytest.fixture
+def classifier():
+    """Create a fully trained classifier."""
+    model = PatternClassifier()
+    model.model.set_params(n_estimators=10, n_jobs=1)
+    with patch.object(pattern_classifier.FloyoDataProcessor, "events_to_dataframe", return_value=_events(200)):
+        metrics = model.train(Mock())
+    assert "error" not in metrics
+    return model
+
+
+def test_classifier_partial_train_grows_forest(classifier):
+    """New trees are added and new categorical values get new codes."""
+    old_tools = list(classifier.label_encoders["tool"].classes_)
+    watermark = classifier.training_watermark
+
+    with patch.object(pattern_classifier.FloyoDataProcessor, "events_to_dataframe",
+                      return_value=_events(50, tools=["github", "vscode"], offset=3,
+                                           stored_at=STORED_AT + timedelta(hours=1))) as load:
+        metrics = classifier.partial_train(Mock(), since=watermark)
+
+    assert "error" not in metrics
+    assert load.call_args.kwargs["since"] == watermark
+    assert len(classifier.model.estimators_) == 10 + INCREMENTAL_ESTIMATORS
+    assert metrics["new_samples"] == 50
+    assert list(classifier.label_encoders["tool"].classes_) == old_tools + ["github"]
+    assert classifier.training_watermark == STORED_AT + timedelta(hours=1, seconds=49) - WATERMARK_LAG
+    assert classifier.samples_seen == 160 + 50
+    assert len(classifier.replay_X) == len(classifier.replay_y) == 210
+
+
+def test_classifier_partial_train_skips_small_batches(classifier):
+    """Too few new events leave the model and its watermark unchanged."""
+    watermark = classifier.training_watermark
+
+    with patch.object(pattern_classifier.FloyoDataProcessor, "events_to_dataframe", return_value=_events(4)):
+        metrics = classifier.partial_train(Mock(), since=watermark)
+
+    assert metrics == {"skipped": True, "new_samples": 4}
+    assert classifier.training_watermark == watermark
+    assert len(classifier.model.estimators_) == 10
+
+
+def test_classifier_watermark_follows_stored_time_of_rows_read(classifier):
+    """The watermark comes from the newest row read, less the lag, not the clock."""
+    assert classifier.training_watermark == STORED_AT + timedelta(seconds=199) - WATERMARK_LAG
+
+
+def test_training_watermark_rereads_recent_rows():
+    """Rows committed late with an earlier stored time stay at or after the watermark."""
+    stored_at = [STORED_AT, STORED_AT + timedelta(seconds=90)]
+    watermark = training_watermark(stored_at)
+
+    late_row = STORED_AT + timedelta(seconds=60)
+    assert late_row >= watermark
+    assert watermark == STORED_AT + timedelta(seconds=30)
+
+    # Never moves backwards, and stays put when nothing was read
+    assert training_watermark([STORED_AT], since=watermark) == watermark
+    assert training_watermark(pd.Series([], dtype=object), since=watermark) == watermark
+    assert training_watermark(None) is None
+
+
+def test_classifier_state_survives_save_and_load(classifier, tmp_path):
+    """Encoders and the replay buffer are persisted with the estimator."""
+    assert classifier.save(tmp_path)
+
+    loaded = PatternClassifier()
+    assert loaded.load(tmp_path)
+
+    assert list(loaded.label_encoders["tool"].classes_) == list(classifier.label_encoders["tool"].classes_)
+    assert (loaded.replay_X == classifier.replay_X).all()
+    assert loaded.training_watermark == classifier.training_watermark
+
+
+def test_anomaly_detector_partial_train_keeps_scaler():
+    """Updates add trees on new patterns without refitting the scaler."""
+    detector = PatternAnomalyDetector()
+    detector.model.set_params(n_estimators=10)
+    patterns = pd.DataFrame({"count": range(30), "tools": [["git"]] * 30, "updated_at": [STORED_AT] * 30})
+    updated = patterns.assign(updated_at=STORED_AT + timedelta(hours=1))
+    with patch("backend.ml.anomaly_detector.FloyoDataProcessor.patterns_to_dataframe",
+               side_effect=[patterns, updated]):
+        detector.train(Mock())
+        mean = detector.scaler.mean_.copy()
+        since = detector.training_watermark
+        metrics = detector.partial_train(Mock(), since=since)
+
+    assert metrics["new_samples"] == 30
+    assert len(detector.model.estimators_) == 10 + INCREMENTAL_ESTIMATORS
+    assert (detector.scaler.mean_ == mean).all()
+    assert since == STORED_AT - WATERMARK_LAG
+    assert detector.training_watermark == STORED_AT + timedelta(hours=1) - WATERMARK_LAG
+
+
+def test_update_model_without_watermark_retrains():
+    """Models trained before watermarks existed are fully retrained."""
+    manager = Mock()
+    manager.load_model.return_value = (Mock(training_watermark=None), Mock(supports_incremental=True))
+    pipeline = TrainingPipeline(Mock(), manager)
+
+    with patch.object(pipeline, "retrain_model", return_value={"success": True}) as retrain:
+        assert pipeline.update_model("pattern_classifier") == {"success": True}
+
+    retrain.assert_called_once_with("pattern_classifier", None)
+
+
+def test_update_model_saves_incremental_version():
+    """A successful update is saved as a new version recording its base."""
+    model = Mock(supports_incremental=True)
+    model.partial_train.return_value = {"new_samples": 50}
+    record = Mock(version=3, training_watermark=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                  training_config={"mode": "incremental", "increments": 2})
+    manager = Mock()
+    manager.load_model.return_value = (record, model)
+    manager.save_model.return_value = Mock(id="new", version=4)
+
+    result = TrainingPipeline(Mock(), manager).update_model("anomaly_detector")
+
+    assert result["version"] == 4
+    assert model.partial_train.call_args.args[1] == record.training_watermark
+    config = manager.save_model.call_args.kwargs["training_config"]
+    assert config["mode"] == "incremental"
+    assert config["base_version"] == 3
+    assert config["increments"] == 3
@@ -0,0 +1,186 @@
+"""
+Tests for the pure ASGI middleware layers
+
+Unit tests for request IDs, response metadata and version headers, the response
+envelope and CSRF validation as they behave when stacked in the application.
+"""
+
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.api_versioning import VersionDeprecationMiddleware
+from backend.csrf_protection import CSRFProtectionMiddleware
+from backend.request_id import REQUEST_ID_HEADER, RequestIDMiddleware
+from backend.response_middleware import (
+    APIResponseMiddleware,
+    StandardJSONResponse,
+    create_standard_response,
+    dumps_json,
+)
+
+
+def _app(*middleware):
+    app = FastAPI()
+    for cls in middleware:
+        app.add_middleware(cls)
+
+    @app.get("/api/v1/items")
+    def items(request: Request):
+        return {"request_id": request.state.request_id}
+
+    @app.get("/api/v0/items")
+    def legacy_items():
+        return {"ok": True}
+
+    @app.post("/api/v1/items")
+    def create_item():
+        return {"created": True}
+
+    @app.get("/api/v1/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    @app.get("/page")
+    def page():
+        return PlainTextResponse("page")
+
+    return app
+
+
+def test_request_id_is_generated_and_shared_with_endpoint():
+    """A generated ID is visible in request.state and echoed in the response."""
+    client = TestClient(_app(RequestIDMiddleware))
+
+    response = client.get("/api/v1/items")
+
+    assert response.headers[REQUEST_ID_HEADER]
+    assert response.json()["request_id"] == response.headers[REQUEST_ID_HEADER]
+    assert client.get("/api/v1/items", headers={REQUEST_ID_HEADER: "abc"}).headers[REQUEST_ID_HEADER] == "abc"
+
+
+def test_request_id_log_factory_is_restored():
+    """The log record factory is only swapped for the duration of the request."""
+    factory = logging.getLogRecordFactory()
+    client = TestClient(_app(RequestIDMiddleware))
+
+    client.get("/api/v1/items")
+
+    assert logging.getLogRecordFactory() is factory
+
+
+def test_stacked_layers_add_metadata_and_version_headers():
+    """Outer layers see the request ID set further down and add their own headers."""
+    client = TestClient(_app(RequestIDMiddleware, VersionDeprecationMiddleware, APIResponseMiddleware))
+
+    response = client.get("/api/v1/items")
+
+    assert response.headers["X-Request-ID"] == response.json()["request_id"]
+    assert response.headers["X-Response-Time"].endswith("ms")
+    assert response.headers["X-API-Version"] == "v1"
+    assert response.headers["X-API-Current-Version"] == "v1"
+    assert "Warning" not in response.headers
+
+    legacy = client.get("/api/v0/items")
+    assert legacy.headers["X-API-Deprecated"] == "true"
+    assert legacy.headers["Warning"].startswith("299")
+
+    page = client.get("/page")
+    assert page.text == "page"
+    assert "X-API-Current-Version" not in page.headers
+    assert "X-Response-Time" not in page.headers
+
+
+def test_streaming_responses_pass_through():
+    """Streamed bodies are forwarded chunk by chunk with headers added."""
+    client = TestClient(_app(RequestIDMiddleware, APIResponseMiddleware))
+
+    response = client.get("/api/v1/stream")
+
+    assert response.text == "abc"
+    assert response.headers["X-API-Version"] == "v1"
+
+
+def test_csrf_rejects_state_changing_requests_without_matching_token():
+    """Unsafe methods need the cookie and header to match; safe methods pass."""
+    client = TestClient(_app(CSRFProtectionMiddleware))
+
+    assert client.get("/page").status_code == 200
+    with pytest.raises(HTTPException) as exc_info:
+        client.post("/api/v1/items")
+    assert exc_info.value.status_code == 403
+
+    client.cookies.set("XSRF-TOKEN", "token")
+    with pytest.raises(HTTPException):
+        client.post("/api/v1/items", headers={"X-XSRF-TOKEN": "other"})
+
+    response = client.post("/api/v1/items", headers={"X-XSRF-TOKEN": "token"})
+    assert response.json() == {"created": True}
+    assert "set-cookie" not in response.headers
+
+
+def _envelope_client():
+    app = FastAPI(default_response_class=StandardJSONResponse)
+    app.add_middleware(APIResponseMiddleware, envelope=True)
+    app.add_middleware(RequestIDMiddleware)
+
+    @app.get("/api/v1/items")
+    def items():
+        return {"items": [1, 2], "total": 5, "skip": 0, "limit": 2, "has_more": True}
+
+    @app.get("/api/v1/item", status_code=404)
+    def missing():
+        return {"detail": "Not found"}
+
+    @app.get("/api/v1/standard")
+    def standard(request: Request):
+        return create_standard_response({"ok": True}, request)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_envelope_is_written_at_serialization():
+    """Route results are wrapped once, with pagination and errors mapped."""
+    client = _envelope_client()
+
+    response = client.get("/api/v1/items", headers={REQUEST_ID_HEADER: "req-1"})
+    body = response.json()
+    assert body["request_id"] == "req-1"
+    assert body["data"] == [1, 2]
+    assert body["pagination"] == {"total": 5, "skip": 0, "limit": 2, "has_more": True}
+    assert body["metadata"]["response_time_ms"] >= 0
+
+    error = client.get("/api/v1/item")
+    assert error.status_code == 404
+    assert error.json()["error"]["message"] == "Not found"
+
+
+def test_envelope_skips_standardized_and_exempt_responses():
+    """Bodies that already carry a request ID only get the response time added."""
+    client = _envelope_client()
+
+    body = client.get("/api/v1/standard").json()
+    assert body["data"] == {"ok": True}
+    assert "response_time_ms" in body["metadata"]
+
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_envelope_disabled_leaves_body_unchanged():
+    """Without the envelope the response class only encodes the content."""
+    app = FastAPI(default_response_class=StandardJSONResponse)
+    app.add_middleware(APIResponseMiddleware, envelope=False)
+
+    @app.get("/api/v1/items")
+    def items():
+        return {"items": [], "total": 0}
+
+    assert TestClient(app).get("/api/v1/items").json() == {"items": [], "total": 0}
+    assert dumps_json({"a": "é", 1: None}) == '{"a":"é","1":null}'.encode()
@@ -0,0 +1,188 @@
+"""
+Tests for batch ML inference
+
+Unit tests for predict_batch and the prediction micro-batcher.
+"""
+
+import asyncio
+import numpy as np
+import pytest
+from unittest.mock import Mock
+
+from backend.ml.batching import PredictionBatcher
+from backend.ml.suggestion_scorer import SuggestionScorer
+from backend.ml.anomaly_detector import PatternAnomalyDetector
+
+
+@pytest.fixture
+def rng():
+    """Create a seeded random generator."""
+    return np.random.default_rng(0)
+
+
+def test_suggestion_scorer_batch_matches_single(rng):
+    """Batched scoring returns the same results as per-record scoring."""
+    scorer = SuggestionScorer()
+    scorer.model.fit(rng.random((200, 6)), rng.random(200))
+    scorer.is_trained = True
+
+    inputs = [
+        {"pattern_frequency": float(x), "tools_count": 2.0}
+        for x in rng.random(20)
+    ]
+    inputs.append({"pattern_frequency": "not-a-number"})
+
+    batch = scorer.predict_batch(inputs)
+
+    assert batch == [scorer.predict(x) for x in inputs]
+    assert batch[-1] == {"confidence": 0.5}
+
+
+def test_anomaly_detector_batch_matches_single(rng):
+    """Batched anomaly detection returns the same results as per-record detection."""
+    detector = PatternAnomalyDetector()
+    detector.model.fit(detector.scaler.fit_transform(rng.random((200, 5))))
+    detector.is_trained = True
+
+    inputs = [{"count": int(c), "tools": ["git"]} for c in rng.integers(0, 50, size=10)]
+
+    assert detector.predict_batch(inputs) == [detector.predict(x) for x in inputs]
+
+
+def test_untrained_model_batch_defaults():
+    """Untrained models return a default result per input."""
+    scorer = SuggestionScorer()
+
+    results = scorer.predict_batch([{}, {}])
+
+    assert len(results) == 2
+    assert all(r["confidence"] == 0.5 for r in results)
+
+
+def test_batcher_groups_concurrent_requests():
+    """Concurrent requests for one model are served by a single predict_batch call."""
+    model = Mock()
+    model.predict_batch.side_effect = lambda inputs: [{"value": x * 2} for x in inputs]
+    batcher = PredictionBatcher(max_batch_size=100, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.predict("m", model, i) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert results == [{"value": i * 2} for i in range(10)]
+    assert model.predict_batch.call_count == 1
+
+
+def test_batcher_propagates_errors():
+    """A failing batch raises in every waiting request."""
+    model = Mock()
+    model.predict_batch.side_effect = RuntimeError("boom")
+    batcher = PredictionBatcher(max_batch_size=2, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.predict("m", model, 1), batcher.predict("m", model, 2), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_batcher_fails_requests_when_results_are_missing():
+    """A batch returning fewer results than inputs fails every request instead of hanging."""
+    model = Mock()
+    model.predict_batch.side_effect = lambda inputs: inputs[:-1]
+    batcher = PredictionBatcher(max_batch_size=3, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.predict("m", model, i) for i in range(3)), return_exceptions=True),
+            timeout=5,
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert "2 results for 3 inputs" in str(results[0])
+
+
+def test_batcher_keeps_running_batches_referenced():
+    """In-flight batch tasks are held by the batcher until they finish."""
+    model = Mock()
+    model.predict_batch.side_effect = lambda inputs: inputs
+    batcher = PredictionBatcher(max_batch_size=2, max_wait_ms=5)
+
+    async def run():
+        requests = asyncio.gather(*(batcher.predict("m", model, i) for i in range(2)))
+        await asyncio.sleep(0)
+        running = len(batcher._tasks)
+        return running, await requests
+
+    running, results = asyncio.run(run())
+
+    assert running == 1
+    assert results == [0, 1]
+    assert not batcher._tasks
+
+
+def test_batcher_close_finishes_queued_requests():
+    """Closing runs batches still waiting for their timer and stops the pool."""
+    model = Mock()
+    model.predict_batch.side_effect = lambda inputs: inputs
+    batcher = PredictionBatcher(max_batch_size=10, max_wait_ms=10000)
+
+    async def run():
+        requests = asyncio.gather(*(batcher.predict("m", model, i) for i in range(3)))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(batcher.close(), timeout=5)
+        return await requests
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert batcher._executor is None
+
+
+def test_batcher_runs_on_dedicated_pool_and_records_histograms():
+    """Batches run on the batcher's own threads and feed the latency/size histograms."""
+    import threading
+
+    threads = []
+    model = Mock()
+
+    def predict_batch(inputs):
+        threads.append(threading.current_thread().name)
+        return [{"value": x} for x in inputs]
+
+    model.predict_batch.side_effect = predict_batch
+    batcher = PredictionBatcher(max_batch_size=4, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.predict("m", model, i) for i in range(6)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        batcher.shutdown()
+
+    assert all(name.startswith("ml-predict") for name in threads)
+
+    stats = batcher.get_stats()["models"]["m"]
+    assert stats["batch_size"]["count"] == 2
+    assert stats["batch_size"]["sum"] == 6
+    assert stats["batch_size"]["buckets"]["2"] == 1
+    assert stats["batch_size"]["buckets"]["4"] == 2
+    assert stats["latency_ms"]["count"] == 6
+    assert stats["latency_ms"]["buckets"]["+Inf"] == 6
+    assert stats["inference_ms"]["count"] == 2
+
+
+def test_histogram_cumulative_buckets():
+    """Values land in the first bucket whose upper bound they do not exceed."""
+    from backend.ml.batching import Histogram
+
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    assert histogram.to_dict()["buckets"] == {"1": 2, "10": 3, "+Inf": 4}
@@ -0,0 +1,149 @@
+"""
+Tests for model artifacts
+
+Unit tests for the pickle-free artifact format and BaseMLModel save/load.
+"""
+
+import json
+import pickle
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+from scipy import sparse
+
+from backend.ml.artifacts import ArtifactError, load_artifact, manifest_path, arrays_path, save_artifact
+from backend.ml.suggestion_scorer import SuggestionScorer
+from backend.ml.workflow_recommender import WorkflowRecommender
+
+
+@pytest.fixture
+def rng():
+    """Create a seeded random generator."""
+    return np.random.default_rng(0)
+
+
+def test_round_trip_preserves_predictions(rng, tmp_path):
+    """Estimators, sparse matrices and plain data survive a round trip."""
+    X = rng.random((200, 4))
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, np.array(["a", "b"], dtype=object)[rng.integers(0, 2, 200)])
+    boosting = GradientBoostingRegressor(n_estimators=5, random_state=0).fit(X, X[:, 0])
+    state = {"forest": forest, "boosting": boosting, "matrix": sparse.identity(3, format="csr"), "ids": ["u1", 2, None]}
+
+    checksum = save_artifact(state, tmp_path / "model")
+    loaded = load_artifact(tmp_path / "model", expected_sha256=checksum)
+
+    assert (loaded["forest"].predict_proba(X) == forest.predict_proba(X)).all()
+    assert (loaded["boosting"].predict(X) == boosting.predict(X)).all()
+    assert (loaded["matrix"] != state["matrix"]).nnz == 0
+    assert loaded["ids"] == ["u1", 2, None]
+    # Shared generator stays shared
+    assert loaded["boosting"].estimators_[0, 0].random_state is loaded["boosting"].estimators_[1, 0].random_state
+
+
+def test_arrays_are_memory_mapped_read_only(rng, tmp_path):
+    """Arrays are views into the mapped file."""
+    factors = rng.random((100, 8))
+    save_artifact({"factors": factors}, tmp_path / "model")
+
+    loaded = load_artifact(tmp_path / "model")["factors"]
+
+    assert (loaded == factors).all()
+    assert not loaded.flags.writeable
+
+
+def test_corrupt_arrays_are_rejected(rng, tmp_path):
+    """A modified array file fails checksum verification."""
+    save_artifact({"factors": rng.random(16)}, tmp_path / "model")
+    data = bytearray(arrays_path(tmp_path / "model").read_bytes())
+    data[0] ^= 0xFF
+    arrays_path(tmp_path / "model").write_bytes(bytes(data))
+
+    with pytest.raises(ArtifactError, match="checksum"):
+        load_artifact(tmp_path / "model")
+
+
+def test_untrusted_classes_are_rejected(tmp_path):
+    """Manifests cannot name classes outside the allowlist."""
+    save_artifact({"value": 1}, tmp_path / "model")
+    manifest = json.loads(manifest_path(tmp_path / "model").read_text())
+    manifest["root"] = {"__reduce__": "os:system", "args": {"__tuple__": ["true"]}, "state": None}
+    manifest_path(tmp_path / "model").write_text(json.dumps(manifest))
+
+    with pytest.raises(ArtifactError, match="Refusing"):
+        load_artifact(tmp_path / "model")
+
+
+@pytest.mark.parametrize("node", [
+    # Class reached through module attributes of an allowed module
+    {"__reduce__": "sklearn.utils._testing:np.f2py.subprocess.Popen", "args": {"__tuple__": [["touch", "{marker}"]]}, "state": None},
+    {"__object__": "sklearn.utils._testing:np.f2py.subprocess.Popen", "state": None},
+    # Allowed module, class not on the list
+    {"__reduce__": "sklearn.utils._testing:TempMemmap", "args": {"__tuple__": ["{marker}"]}, "state": None},
+])
+def test_classes_outside_the_allowlist_are_never_called(tmp_path, node):
+    """Only listed classes resolve; attribute paths and other sklearn classes are refused."""
+    marker = tmp_path / "pwned"
+    save_artifact({"value": 1}, tmp_path / "model")
+    manifest = json.loads(manifest_path(tmp_path / "model").read_text())
+    manifest["root"] = json.loads(json.dumps(node).replace("{marker}", str(marker)))
+    manifest_path(tmp_path / "model").write_text(json.dumps(manifest))
+
+    with pytest.raises(ArtifactError, match="Refusing"):
+        load_artifact(tmp_path / "model")
+    assert not marker.exists()
+
+
+def test_reduce_nodes_do_not_call_the_class(tmp_path):
+    """Extension types are allocated with __new__, so __init__ never runs."""
+    save_artifact({"value": 1}, tmp_path / "model")
+    manifest = json.loads(manifest_path(tmp_path / "model").read_text())
+    manifest["root"] = {"__reduce__": "sklearn.preprocessing._data:StandardScaler", "args": {"__tuple__": []}, "state": None}
+    manifest_path(tmp_path / "model").write_text(json.dumps(manifest))
+
+    with patch("sklearn.preprocessing._data.StandardScaler.__init__", side_effect=AssertionError("called")):
+        assert load_artifact(tmp_path / "model").__class__.__name__ == "StandardScaler"
+
+
+def test_unsupported_objects_cannot_be_saved(tmp_path):
+    """Arbitrary objects are refused instead of being pickled."""
+    with pytest.raises(ArtifactError):
+        save_artifact({"callback": print}, tmp_path / "model")
+
+
+def test_model_save_and_load(rng, tmp_path):
+    """Models save without pickle and load with their extra state."""
+    recommender = WorkflowRecommender()
+    recommender.user_ids = ["u1", "u2"]
+    recommender.workflow_ids = ["w1", "w2", "w3"]
+    recommender.user_features = rng.random((2, 2))
+    recommender.workflow_features = rng.random((2, 3))
+    recommender.exclusions = sparse.csr_matrix(np.eye(2, 3, dtype=bool))
+    recommender.is_trained = True
+
+    assert recommender.save(tmp_path)
+    assert not list(tmp_path.glob("*.pkl"))
+
+    loaded = WorkflowRecommender()
+    assert loaded.load(tmp_path)
+    assert loaded.is_trained
+    assert loaded.workflow_ids == ["w1", "w2", "w3"]
+    assert loaded.predict("u2", "w3") == recommender.predict("u2", "w3")
+
+
+def test_legacy_pickle_still_loads(rng, tmp_path):
+    """Models saved as pickle before the artifact format load only when allowed."""
+    scorer = SuggestionScorer()
+    scorer.model.fit(rng.random((50, 6)), rng.random(50))
+    scorer.is_trained = True
+    with open(tmp_path / "suggestion_scorer_v1.pkl", "wb") as f:
+        pickle.dump(scorer.model, f)
+    (tmp_path / "suggestion_scorer_v1_metadata.json").write_text(json.dumps({"is_trained": True}))
+
+    loaded = SuggestionScorer()
+    assert not loaded.load(tmp_path)  # pickle loading is off by default
+
+    with patch("backend.config.settings.ml_allow_pickle_artifacts", True):
+        assert loaded.load(tmp_path)
+    assert loaded.predict({"pattern_frequency": 0.3}) == scorer.predict({"pattern_frequency": 0.3})
@@ -0,0 +1,78 @@
+"""
+Tests for ModelRegistry
+
+Unit tests for the process-wide ML model registry.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from backend.ml.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def db_session():
+    """Create a mock database session returning an active model row."""
+    session = Mock()
+    mock_query = session.query.return_value
+    mock_query.filter.return_value = mock_query
+    mock_query.order_by.return_value = mock_query
+    mock_query.first.return_value = (1, "/models/pattern_classifier")
+    return session
+
+
+@pytest.fixture
+def loader():
+    """Create a loader that returns a new model object per call."""
+    return Mock(side_effect=lambda model_type, record: Mock(model_version=record.version, loaded_from=None))
+
+
+def test_registry_loads_once(db_session, loader):
+    """Repeated lookups are served from memory without touching the database."""
+    registry = ModelRegistry(check_interval=60)
+
+    first = registry.get_model(db_session, "pattern_classifier", loader)
+    second = registry.get_model(db_session, "pattern_classifier", loader)
+
+    assert first is second
+    assert loader.call_count == 1
+    assert db_session.query.call_count == 1
+    stats = registry.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert "pattern_classifier" in stats["load_times"]
+
+
+def test_registry_hot_reloads_new_version(db_session, loader):
+    """A newer active version replaces the cached model on the next check."""
+    registry = ModelRegistry(check_interval=0)
+
+    first = registry.get_model(db_session, "pattern_classifier", loader)
+    db_session.query.return_value.first.return_value = (2, "/models/pattern_classifier")
+    second = registry.get_model(db_session, "pattern_classifier", loader)
+
+    assert first is not second
+    assert second.model_version == 2
+    assert registry.get_stats()["reloads"] == 1
+
+
+def test_registry_drops_deactivated_model(db_session, loader):
+    """A model without an active record is no longer served."""
+    registry = ModelRegistry(check_interval=0)
+
+    registry.get_model(db_session, "pattern_classifier", loader)
+    db_session.query.return_value.first.return_value = None
+
+    assert registry.get_model(db_session, "pattern_classifier", loader) is None
+    assert registry.get_stats()["models"] == {}
+
+
+def test_registry_invalidate(db_session, loader):
+    """Invalidated models are reloaded on next access."""
+    registry = ModelRegistry(check_interval=60)
+
+    registry.get_model(db_session, "pattern_classifier", loader)
+    registry.invalidate("pattern_classifier")
+    registry.get_model(db_session, "pattern_classifier", loader)
+
+    assert loader.call_count == 2
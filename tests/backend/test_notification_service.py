@@ -0,0 +1,128 @@
+"""
+Tests for NotificationService
+
+Unit tests for bulk notification creation and the cached unread counter.
+"""
+
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Query, sessionmaker
+
+from backend import cache
+from backend.notifications.service import NotificationService, _unread_count_key
+from database.models import Notification, User
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the notifications table."""
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Notification.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    cache.clear_cache()
+    yield session
+    session.close()
+    cache.clear_cache()
+
+
+def _notification(user_id, i=0):
+    return {"user_id": user_id, "notification_type": "info", "title": f"t{i}", "message": "m"}
+
+
+def test_create_notifications_inserts_all_rows_in_one_commit(db):
+    """Bulk creation writes every row and commits once."""
+    users = [uuid4(), uuid4()]
+    service = NotificationService(db)
+
+    with patch.object(db, "commit", wraps=db.commit) as commit:
+        ids = service.create_notifications([_notification(users[i % 2], i) for i in range(5)])
+
+    assert commit.call_count == 1
+    assert len(ids) == 5
+    stored = {n.id: n for n in db.query(Notification).all()}
+    assert set(stored) == set(ids)
+    assert [stored[i].title for i in ids] == [f"t{i}" for i in range(5)]
+    assert not any(n.read for n in stored.values())
+    assert service.create_notifications([]) == []
+
+
+def test_create_notifications_batches_large_inserts(db):
+    """Large lists are split into several multi-row INSERT statements."""
+    user_id = uuid4()
+    service = NotificationService(db)
+
+    with patch("backend.notifications.service.INSERT_BATCH_SIZE", 3), \
+            patch.object(db, "execute", wraps=db.execute) as execute:
+        service.create_notifications([_notification(user_id, i) for i in range(7)])
+
+    assert execute.call_count == 3
+    assert service.get_unread_count(user_id) == 7
+
+
+def test_unread_count_is_served_from_cache(db):
+    """After the first count, the badge is read from the cache until a write."""
+    user_id = uuid4()
+    service = NotificationService(db)
+    service.create_notification(user_id, "info", "a", "m")
+
+    assert service.get_unread_count(user_id) == 1
+    with patch.object(db, "query", side_effect=AssertionError("counted rows")):
+        assert service.get_unread_count(user_id) == 1
+
+    service.create_notification(user_id, "info", "b", "m")
+    service.create_notifications([_notification(user_id, i) for i in range(3)])
+    assert service.get_unread_count(user_id) == 5
+
+
+def test_count_racing_a_write_is_not_cached(db):
+    """A count taken before a concurrent create is returned but never cached."""
+    user_id = uuid4()
+    service = NotificationService(db)
+    service.create_notification(user_id, "info", "a", "m")
+    real_count = Query.count
+
+    def count_then_create(query):
+        count = real_count(query)
+        # Another request creates a notification between the count and the cache write
+        NotificationService(db).create_notification(user_id, "info", "b", "m")
+        return count
+
+    with patch.object(Query, "count", count_then_create):
+        assert service.get_unread_count(user_id) == 1
+
+    assert cache.get(_unread_count_key(user_id)) is None
+    assert service.get_unread_count(user_id) == 2
+
+
+def test_reads_invalidate_unread_count(db):
+    """Marking one or all notifications read drops the cached count."""
+    user_id = uuid4()
+    service = NotificationService(db)
+    first = service.create_notification(user_id, "info", "a", "m")
+    service.create_notifications([_notification(user_id, i) for i in range(2)])
+    assert service.get_unread_count(user_id) == 3
+
+    assert service.mark_as_read(first.id, user_id)
+    assert service.get_unread_count(user_id) == 2
+
+    assert service.mark_all_as_read(user_id) == 2
+    assert service.get_unread_count(user_id) == 0
+
+
+def test_cache_set_if_unchanged_checks_guard():
+    """Values are cached only while the guard key holds the value read earlier."""
+    cache.clear_cache()
+
+    assert cache.incr("version", ttl_seconds=60) == 1
+    assert cache.incr("version", 2, ttl_seconds=60) == 3
+
+    assert not cache.set_if_unchanged("value", 10, 60, "version", 1)
+    assert cache.get("value") is None
+    assert cache.set_if_unchanged("value", 10, 60, "version", 3)
+    assert cache.get("value") == 10
+    assert cache.set_if_unchanged("other", 5, 60, "missing", None)
+    cache.clear_cache()
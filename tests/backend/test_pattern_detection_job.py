@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from uuid import uuid4
 
 from backend.jobs.pattern_detection import (
+    aggregate_events,
     process_events_task,
     trigger_pattern_detection_sync,
 )
@@ -33,33 +34,60 @@ def mock_events():
     user_id = str(uuid4())
     return [
         Mock(
+            id=uuid4(),
             user_id=user_id,
             file_path="/test/file1.ts",
             event_type="file_created",
             tool="vscode",
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.utcnow() - timedelta(minutes=5),
             metadata={},
         ),
         Mock(
+            id=uuid4(),
             user_id=user_id,
             file_path="/test/file2.ts",
             event_type="file_modified",
             tool="vscode",
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.utcnow() - timedelta(minutes=4),
             metadata={},
         ),
     ]
 
 
+def _rows(events):
+    return [(e.id, e.timestamp, e.event_type, e.file_path, e.tool) for e in events]
+
+
+def _setup_session(session, rows, existing_patterns=()):
+    """Wire the mock session: one state row, event chunks and pattern lookups."""
+    state = Mock(watermark_timestamp=datetime.utcnow() - timedelta(hours=1), watermark_event_id=None,
+                 events_processed=0, rolling_state={})
+
+    state_query = Mock()
+    state_query.filter.return_value = state_query
+    state_query.with_for_update.return_value = state_query
+    state_query.one_or_none.return_value = state
+
+    pattern_query = Mock()
+    pattern_query.filter.return_value = pattern_query
+    pattern_query.all.return_value = list(existing_patterns)
+
+    def query_side_effect(model):
+        if model.__name__ == 'PatternDetectionState':
+            return state_query
+        return pattern_query
+
+    session.query.side_effect = query_side_effect
+    session.execute.return_value.all.return_value = rows
+    return state
+
+
 def test_process_events_task_no_events(mock_db_session):
     """Test pattern detection with no events."""
     with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session):
-        mock_query = mock_db_session.query.return_value
-        mock_query.filter.return_value = mock_query
-        mock_query.order_by.return_value = mock_query
-        mock_query.all.return_value = []
+        _setup_session(mock_db_session, [])
         
-        result = process_events_task(user_id="test-user", hours_back=1)
+        result = process_events_task(user_id=str(uuid4()), hours_back=1)
         
         assert result['processed'] == 0
         assert result['patterns_created'] == 0
@@ -69,27 +97,94 @@ def test_process_events_task_no_events(mock_db_session):
 def test_process_events_task_with_events(mock_db_session, mock_events):
     """Test pattern detection with events."""
     with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session):
-        mock_query = mock_db_session.query.return_value
-        mock_query.filter.return_value = mock_query
-        mock_query.order_by.return_value = mock_query
-        mock_query.all.return_value = mock_events
-        
-        # Mock pattern query (no existing patterns)
-        pattern_query = Mock()
-        pattern_query.filter.return_value = pattern_query
-        pattern_query.all.return_value = []
+        state = _setup_session(mock_db_session, _rows(mock_events))
         
-        # Set up query chain
-        def query_side_effect(model):
-            if model.__name__ == 'Event':
-                return mock_query
-            elif model.__name__ == 'Pattern':
-                return pattern_query
-            return Mock()
+        result = process_events_task(user_id=str(mock_events[0].user_id), hours_back=24)
         
-        mock_db_session.query.side_effect = query_side_effect
+        assert result['processed'] == 2
+        assert result['patterns_created'] == 1
+        pattern = mock_db_session.add.call_args[0][0]
+        assert (pattern.file_extension, pattern.count, pattern.tools) == ('.ts', 2, ['vscode'])
         
-        result = process_events_task(user_id=str(mock_events[0].user_id), hours_back=24)
+        # Watermark moves to the last event in the same transaction
+        assert state.watermark_event_id == mock_events[-1].id
+        assert state.watermark_timestamp == mock_events[-1].timestamp
+        assert state.events_processed == 2
+        mock_db_session.commit.assert_called()
+
+
+def test_existing_pattern_is_updated(mock_db_session, mock_events):
+    """New events add to an existing pattern's count and tools."""
+    existing = Mock(file_extension='.ts', count=10, tools=['vim'], last_used=datetime(2020, 1, 1))
+    with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session):
+        _setup_session(mock_db_session, _rows(mock_events), [existing])
         
-        # Should process events (even if no patterns created due to min_frequency)
-        assert result['processed'] >= 0  # May be 0 if patterns don't meet frequency threshold
+        result = process_events_task(user_id=str(uuid4()))
+    
+    assert result['patterns_updated'] == 1
+    assert existing.count == 12
+    assert existing.tools == ['vim', 'vscode']
+
+
+def test_locked_user_is_skipped(mock_db_session):
+    """A user being processed by another worker is skipped."""
+    with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session), \
+            patch('backend.jobs.pattern_detection._lock_state', return_value=None):
+        result = process_events_task(user_id=str(uuid4()))
+    
+    assert result['skipped'] is True
+    mock_db_session.execute.assert_not_called()
+
+
+def test_aggregate_events_is_chunk_invariant():
+    """Chunked processing with a carried tail equals one pass over all events."""
+    start = datetime(2024, 1, 1, 9, 0)
+    rows = [
+        (uuid4(), start + timedelta(seconds=30 * i), ['file_created', 'file_modified'][i % 2],
+         f"/src/f{i}.{['py', 'md', 'py'][i % 3]}", 'vscode')
+        for i in range(40)
+    ]
+    # A long pause breaks the sequence
+    rows[20] = (rows[20][0], rows[20][1] + timedelta(hours=1), *rows[20][2:])
+    rows[21:] = [(r[0], r[1] + timedelta(hours=1), *r[2:]) for r in rows[21:]]
+    
+    whole_extensions, whole_sequences, whole_tail = aggregate_events(rows, [])
+    
+    tail = []
+    extensions, sequences = {}, {}
+    for i in range(0, len(rows), 7):
+        chunk_extensions, chunk_sequences, tail = aggregate_events(rows[i:i + 7], tail)
+        for key, stats in chunk_extensions.items():
+            extensions[key] = extensions.get(key, 0) + stats['count']
+        for key, stats in chunk_sequences.items():
+            sequences[key] = sequences.get(key, 0) + stats['count']
+    
+    assert extensions == {k: v['count'] for k, v in whole_extensions.items()} == {'.py': 27, '.md': 13}
+    assert sequences == {k: v['count'] for k, v in whole_sequences.items()}
+    assert sum(sequences.values()) == 36
+    assert tail == whole_tail
+
+
+def test_process_events_task_fans_out_users(mock_db_session):
+    """Users with new events are dispatched as parallel tasks."""
+    with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session), \
+            patch('backend.jobs.pattern_detection.find_users_with_new_events', return_value=['u1', 'u2']), \
+            patch('backend.jobs.pattern_detection.group') as group:
+        result = process_events_task(hours_back=1)
+    
+    assert result == {'users_dispatched': 2}
+    assert len(list(group.call_args[0][0])) == 2
+    group.return_value.apply_async.assert_called_once()
+
+
+def test_trigger_sync_processes_inline(mock_db_session):
+    """The synchronous trigger processes users without Celery and without a settle delay."""
+    with patch('backend.jobs.pattern_detection.SessionLocal', return_value=mock_db_session), \
+            patch('backend.jobs.pattern_detection.find_users_with_new_events', return_value=['u1']) as find, \
+            patch('backend.jobs.pattern_detection.process_user_events') as process:
+        process.return_value = {'processed': 3, 'patterns_created': 1, 'patterns_updated': 0}
+        result = trigger_pattern_detection_sync(hours_back=2)
+    
+    assert result == {'processed': 3, 'patterns_created': 1, 'patterns_updated': 0, 'users_processed': 1}
+    assert find.call_args.kwargs['lag_seconds'] == 0
+    assert process.call_args.kwargs['lag_seconds'] == 0
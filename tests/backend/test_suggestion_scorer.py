@@ -0,0 +1,81 @@
+"""
+Tests for SuggestionScorer
+
+Unit tests for bulk feature extraction.
+"""
+
+import pytest
+from unittest.mock import Mock
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from backend.ml.suggestion_scorer import SuggestionScorer, FEATURE_NAMES
+from database.models import Event, Pattern, Workflow
+
+
+@pytest.fixture
+def users():
+    """Create two test user IDs."""
+    return uuid4(), uuid4()
+
+
+@pytest.fixture
+def db_session(users):
+    """Create a mock session answering the grouped feature queries."""
+    user_a, user_b = users
+    results = {
+        Event.user_id: [(user_a, 42)],
+        Workflow.user_id: [(user_a, 10, 9)],
+        Pattern.user_id: [(user_a, ["git", "vscode"], 5), (user_a, ["excel"], 3), (user_b, ["git"], 7)],
+    }
+
+    def query(*columns):
+        q = Mock()
+        q.filter.return_value = q
+        q.join.return_value = q
+        q.group_by.return_value = q
+        q.all.return_value = results[columns[0]]
+        return q
+
+    session = Mock()
+    session.query.side_effect = query
+    return session
+
+
+def _suggestion(user_id, tools, **kwargs):
+    return Mock(
+        user_id=user_id,
+        tools_involved=tools,
+        created_at=kwargs.get("created_at", datetime.utcnow()),
+        confidence=kwargs.get("confidence", 0.7),
+    )
+
+
+def test_extract_features_frame(db_session, users):
+    """Per-user aggregates are computed once and joined to every suggestion."""
+    user_a, user_b = users
+    suggestions = [
+        _suggestion(user_a, ["git"]),
+        _suggestion(user_a, ["excel", "vscode"], created_at=datetime.utcnow() - timedelta(days=3)),
+        _suggestion(user_a, None, confidence=None),
+        _suggestion(user_b, ["git"]),
+    ]
+
+    frame = SuggestionScorer()._extract_features_frame(suggestions, db_session)
+
+    assert db_session.query.call_count == 3
+    assert list(frame.columns) == FEATURE_NAMES
+    assert list(frame["pattern_frequency"]) == [5.0, 8.0, 0.0, 7.0]
+    assert list(frame["user_activity_level"]) == [42.0, 42.0, 42.0, 0.0]
+    assert list(frame["workflow_success_rate"]) == pytest.approx([0.9, 0.9, 0.9, 0.5])
+    assert list(frame["temporal_recency"]) == pytest.approx([1.0, 0.25, 1.0, 1.0])
+    assert list(frame["base_confidence"]) == [0.7, 0.7, 0.5, 0.7]
+    assert list(frame["tools_count"]) == [1.0, 2.0, 0.0, 1.0]
+
+
+def test_extract_features_single(db_session, users):
+    """Single-suggestion extraction returns a feature dict."""
+    features = SuggestionScorer()._extract_features(_suggestion(users[0], ["git"]), db_session)
+
+    assert set(features) == set(FEATURE_NAMES)
+    assert features["pattern_frequency"] == 5.0
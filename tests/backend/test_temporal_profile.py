@@ -0,0 +1,68 @@
+"""
+Tests for TemporalProfile
+
+Unit tests for vectorized hour and weekday histograms.
+"""
+
+import random
+from collections import defaultdict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from backend.ml.pattern_detector import AdvancedPatternDetector
+from backend.ml.temporal_profile import TemporalProfile, local_hours_and_weekdays
+
+
+def _timestamps(count, seed=0):
+    rng = random.Random(seed)
+    # Spread over several years, plus the instants around a DST change
+    timestamps = [rng.randrange(1_500_000_000_000, 1_800_000_000_000) for _ in range(count)]
+    timestamps += [1_710_054_000_000 + minutes * 60_000 for minutes in range(-90, 90, 7)]
+    return timestamps
+
+
+@pytest.mark.parametrize("tz", ["UTC", "America/New_York", "Asia/Kolkata", "Australia/Lord_Howe"])
+def test_hours_and_weekdays_match_datetime(tz):
+    """Integer arithmetic agrees with datetime across DST and half-hour offsets."""
+    timestamps = _timestamps(2000)
+    hours, weekdays = local_hours_and_weekdays(timestamps, tz)
+
+    expected = [datetime.fromtimestamp(ts / 1000, ZoneInfo(tz)) for ts in timestamps]
+    assert hours.tolist() == [dt.hour for dt in expected]
+    assert weekdays.tolist() == [dt.weekday() for dt in expected]
+
+
+def test_profile_orders_by_first_appearance():
+    """Distributions keep first-seen order and peaks break ties the same way."""
+    base = 1_704_067_200_000  # Monday 2024-01-01 00:00 UTC
+    hour = 3_600_000
+    profile = TemporalProfile([base + 5 * hour, base + 2 * hour, base + 2 * hour + 1, base + 5 * hour + 24 * hour], "UTC")
+
+    assert list(profile.hour_distribution().items()) == [(5, 2), (2, 2)]
+    assert profile.peak_hour() == 5
+    assert profile.day_distribution() == {'Monday': 3, 'Tuesday': 1}
+    assert profile.peak_day() == 'Monday'
+    assert TemporalProfile([]).peak_hour() is None
+
+
+def test_detect_temporal_patterns_matches_per_event_grouping():
+    """Detector output is unchanged from grouping events one by one."""
+    tz = ZoneInfo("Europe/Berlin")
+    timestamps = _timestamps(500, seed=1)
+    interactions = [{'timestamp': ts} for ts in timestamps] + [{'timestamp': 0}]
+    telemetry = [{'timestamp': datetime.fromtimestamp(ts / 1000, tz).isoformat()} for ts in timestamps[:100]]
+
+    result = AdvancedPatternDetector(tz=tz).detect_temporal_patterns(interactions, telemetry)
+
+    hourly, daily = defaultdict(int), defaultdict(int)
+    for ts in timestamps:
+        dt = datetime.fromtimestamp(ts / 1000, tz)
+        hourly[dt.hour] += 1
+        daily[dt.strftime('%A')] += 1
+    assert list(result['hourly_distribution'].items()) == list(hourly.items())
+    assert list(result['daily_distribution'].items()) == list(daily.items())
+    assert result['peak_hours']['interactions'] == max(hourly.items(), key=lambda x: x[1])[0]
+    assert result['peak_days']['interactions'] == max(daily.items(), key=lambda x: x[1])[0]
+    assert result['peak_hours']['telemetry'] is not None
@@ -0,0 +1,88 @@
+"""
+Tests for TrainingOrchestrator
+
+Unit tests for parallel model training and progress reporting.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from backend.ml.model_manager import MODEL_CLASSES, TRAINING_STATUS_FAILED, TRAINING_STATUS_RUNNING
+from backend.ml.training_orchestrator import TrainingOrchestrator, train_model_task
+
+
+@pytest.fixture
+def orchestrator():
+    """Create an orchestrator with a mocked model manager."""
+    with patch("backend.ml.training_orchestrator.ModelManager") as manager_cls:
+        manager_cls.return_value.create_training_record.side_effect = lambda model_type, config: Mock(
+            id=f"record-{model_type}", config=config
+        )
+        yield TrainingOrchestrator(Mock(), max_workers=2, memory_limit_mb=0, cpu_time_limit_s=0, timeout_s=60)
+
+
+def test_train_models_reserves_record_per_model(orchestrator):
+    """Each model gets a pending record tagged with the run ID."""
+    with patch.object(orchestrator, "_run_workers", return_value={}) as run_workers:
+        results = orchestrator.train_models(["pattern_classifier", "unknown"], user_id="user-1", run_id="run-1")
+
+    assert results == {"unknown": {"error": "Unknown model type: unknown"}}
+    create = orchestrator.model_manager.create_training_record
+    create.assert_called_once_with("pattern_classifier", {"run_id": "run-1", "user_id": "user-1"})
+
+    tasks = run_workers.call_args[0][0]
+    assert [t["model_type"] for t in tasks] == ["pattern_classifier"]
+    assert tasks[0]["model_record_id"] == "record-pattern_classifier"
+    assert tasks[0]["snapshot_id"] is None
+
+
+def test_train_models_sequential_in_daemon_process(orchestrator):
+    """Daemonic callers cannot start workers and train in-process instead."""
+    with patch("backend.ml.training_orchestrator.multiprocessing.current_process") as current, \
+            patch("backend.ml.training_orchestrator.train_model_task") as task_fn:
+        current.return_value.daemon = True
+        task_fn.side_effect = lambda task: {"success": True, "model_type": task["model_type"]}
+        results = orchestrator.train_models()
+
+    assert set(results) == set(MODEL_CLASSES)
+    assert task_fn.call_count == len(MODEL_CLASSES)
+
+
+def test_train_model_task_marks_failures():
+    """A model that fails to train leaves its record failed with timings."""
+    task = {"model_type": "pattern_classifier", "model_record_id": "record-1", "user_id": None}
+
+    status_db, data_db = Mock(), Mock()
+    with patch("backend.database.SessionLocal", side_effect=[status_db, data_db]), \
+            patch("backend.ml.training_orchestrator.ModelManager") as manager_cls, \
+            patch("backend.ml.training_orchestrator.TrainingPipeline") as pipeline_cls:
+        pipeline_cls.return_value.train_model.return_value = {"error": "Insufficient training data"}
+        result = train_model_task(task)
+
+    manager = manager_cls.return_value
+    statuses = [c.args[1] for c in manager.update_training_status.call_args_list]
+    assert statuses == [TRAINING_STATUS_RUNNING, TRAINING_STATUS_FAILED]
+    assert result["error"] == "Insufficient training data"
+    assert result["timings"]["worker_seconds"] >= 0
+    assert pipeline_cls.return_value.train_model.call_args.kwargs["model_record_id"] == "record-1"
+    status_db.close.assert_called_once()
+    data_db.close.assert_called_once()
+
+
+def test_train_model_task_reads_and_writes_on_separate_sessions():
+    """Training data is read on the snapshot session; records are written on another."""
+    task = {"model_type": "pattern_classifier", "model_record_id": "record-1", "user_id": None,
+            "snapshot_id": "00000003-0000001B-1"}
+    status_db, data_db = Mock(), Mock()
+
+    with patch("backend.database.SessionLocal", side_effect=[status_db, data_db]), \
+            patch("backend.ml.training_orchestrator.ModelManager") as manager_cls, \
+            patch("backend.ml.training_orchestrator.TrainingPipeline") as pipeline_cls, \
+            patch("backend.ml.training_orchestrator._use_snapshot") as use_snapshot:
+        pipeline_cls.return_value.train_model.return_value = {"success": True}
+        train_model_task(task)
+
+    use_snapshot.assert_called_once_with(data_db, "00000003-0000001B-1")
+    manager_cls.assert_called_once_with(status_db)
+    assert pipeline_cls.call_args.args == (data_db, manager_cls.return_value)
+    data_db.rollback.assert_called_once()
@@ -0,0 +1,327 @@
+"""
+Tests for TrustLedger
+
+Unit tests for the batched, segmented, hash-chained guardian ledger.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from backend.guardian.events import GuardianEvent
+from backend.guardian.ledger import LedgerWriteError, TrustLedger, merkle_root
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    """Create a ledger in a temporary directory."""
+    return TrustLedger(ledger_dir=tmp_path)
+
+
+def test_appends_form_a_verifiable_chain(ledger):
+    """Entries are linked by previous_hash and verify after the writer drains."""
+    hashes = [ledger.append(GuardianEvent(user_id="u1", event_type=f"e{i}")) for i in range(50)]
+
+    result = ledger.verify("u1")
+    entries = ledger.get_user_ledger("u1")
+
+    assert result["valid"], result["errors"]
+    assert result["entries"] == 50
+    assert result["last_hash"] == hashes[-1]
+    assert [e["hash"] for e in reversed(entries)] == hashes
+    assert entries[-1]["previous_hash"] is None
+
+
+def test_concurrent_appends_keep_chain_order(ledger):
+    """Appends from many threads still produce one unbroken chain per user."""
+    def worker(n):
+        for i in range(100):
+            ledger.append(GuardianEvent(user_id=f"u{n % 2}", event_type=f"{n}:{i}"))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for user_id in ("u0", "u1"):
+        result = ledger.verify(user_id)
+        assert result["valid"], result["errors"]
+        assert result["entries"] == 300
+
+
+def test_new_ledger_continues_existing_chain(tmp_path):
+    """A fresh instance picks up the chain head from disk."""
+    first = TrustLedger(ledger_dir=tmp_path)
+    last = first.append(GuardianEvent(user_id="u1"), wait=True)
+    first.close()
+
+    second = TrustLedger(ledger_dir=tmp_path)
+    second.append(GuardianEvent(user_id="u1"))
+
+    assert second.get_user_ledger("u1")[0]["previous_hash"] == last
+    assert second.verify("u1")["valid"]
+
+
+def test_second_writer_of_a_directory_is_refused(tmp_path):
+    """Only one ledger writes a directory, so chain heads cannot fork."""
+    first = TrustLedger(ledger_dir=tmp_path)
+    first.append(GuardianEvent(user_id="u1"), wait=True)
+
+    second = TrustLedger(ledger_dir=tmp_path)
+    with pytest.raises(LedgerWriteError):
+        second.append(GuardianEvent(user_id="u1"))
+    # Reading does not need ownership
+    assert len(second.get_user_ledger("u1")) == 1
+
+    assert first.close()
+    last = second.append(GuardianEvent(user_id="u1"), wait=True)
+
+    with pytest.raises(LedgerWriteError):
+        first.append(GuardianEvent(user_id="u1"))
+    second.close()
+    first.append(GuardianEvent(user_id="u1"), wait=True)
+
+    assert first.get_user_ledger("u1")[1]["hash"] == last
+    assert first.verify("u1")["valid"]
+    assert first.verify("u1")["entries"] == 3
+
+
+def test_group_commit_fsyncs_once_per_batch(ledger):
+    """Entries queued while the writer is busy share one fsync."""
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(0.02)
+        real_fsync(fd)
+
+    with patch("backend.guardian.ledger.os.fsync", side_effect=slow_fsync):
+        for i in range(200):
+            ledger.append(GuardianEvent(user_id="u1", event_type=str(i)))
+        assert ledger.flush(timeout=10)
+
+    assert ledger.stats["entries_written"] == 200
+    assert ledger.stats["fsyncs"] < 20
+    assert ledger.verify("u1")["valid"]
+
+
+def test_write_failures_are_reported_and_chain_recovers(ledger):
+    """Failed writes reach waiters once, and later entries chain to what is on disk."""
+    first = ledger.append(GuardianEvent(user_id="u1", event_type="ok"), wait=True)
+    ledger._segment_sizes.clear()
+
+    with patch.object(ledger, "_prepare_segment", side_effect=OSError("disk full")):
+        with pytest.raises(LedgerWriteError, match="disk full"):
+            ledger.append(GuardianEvent(user_id="u1", event_type="lost"), wait=True)
+        ledger.append(GuardianEvent(user_id="u1", event_type="lost too"))
+        assert not ledger.flush(timeout=10)
+    assert ledger.flush(timeout=10)
+
+    ledger.append(GuardianEvent(user_id="u1", event_type="after"), wait=True)
+    entries = ledger.get_user_ledger("u1")
+
+    assert [e["event_type"] for e in entries] == ["after", "ok"]
+    assert entries[0]["previous_hash"] == first
+    assert ledger.verify("u1")["valid"]
+    assert ledger.stats["write_errors"] == 2
+
+
+def test_entries_chained_to_a_failed_write_are_dropped(tmp_path):
+    """Entries queued behind a failed one are not written on a broken chain."""
+    ledger = TrustLedger(ledger_dir=tmp_path, fsync=False, max_batch=1)
+    release = threading.Event()
+    real_prepare = ledger._prepare_segment
+    calls = []
+
+    def prepare(segment):
+        calls.append(segment)
+        if len(calls) == 1:
+            release.wait(5)
+            raise OSError("disk full")
+        return real_prepare(segment)
+
+    with patch.object(ledger, "_prepare_segment", side_effect=prepare):
+        ledger.append(GuardianEvent(user_id="u1", event_type="failed"))
+        ledger.append(GuardianEvent(user_id="u1", event_type="orphan"))
+        release.set()
+        assert not ledger.flush(timeout=10)
+        ledger.append(GuardianEvent(user_id="u1", event_type="after"), wait=True)
+
+    assert [e["event_type"] for e in ledger.get_user_ledger("u1")] == ["after"]
+    assert ledger.verify("u1")["valid"]
+
+
+def _events_over_days(user_id, days, per_day):
+    start = datetime(2026, 1, 1, 12)
+    return [
+        GuardianEvent(user_id=user_id, event_type=f"{d}:{i}", timestamp=start + timedelta(days=d, seconds=i))
+        for d in range(days)
+        for i in range(per_day)
+    ]
+
+
+def test_entries_are_segmented_by_day_with_index(ledger, tmp_path):
+    """Each day gets its own segment and offset index; tail reads follow the index."""
+    hashes = [ledger.append(e) for e in _events_over_days("u1", 3, 10)]
+    ledger.flush()
+
+    user_dir = tmp_path / "user_u1"
+    assert sorted(p.name for p in user_dir.glob("*.jsonl")) == ["2026-01-01.jsonl", "2026-01-02.jsonl", "2026-01-03.jsonl"]
+    assert (user_dir / "2026-01-01.idx").stat().st_size == 10 * 8
+
+    recent = ledger.get_user_ledger("u1", limit=15)
+    assert [e["hash"] for e in recent] == hashes[::-1][:15]
+    assert len(ledger.get_user_ledger("u1")) == 30
+    assert ledger.verify("u1")["valid"]
+
+
+def test_late_events_stay_in_current_segment(ledger):
+    """An event stamped before the current segment's day is appended to that segment."""
+    ledger.append(GuardianEvent(user_id="u1", timestamp=datetime(2026, 1, 2)))
+    ledger.append(GuardianEvent(user_id="u1", timestamp=datetime(2026, 1, 1, 23, 59)))
+
+    result = ledger.verify("u1")
+
+    assert result["valid"]
+    assert [s["date"] for s in result["segments"]] == ["2026-01-02"]
+    assert result["segments"][0]["entry_count"] == 2
+
+
+def test_daily_hash_root_is_segment_merkle_root(ledger):
+    """The daily root is the Merkle root of that day's entry hashes."""
+    hashes = [ledger.append(e) for e in _events_over_days("u1", 2, 5)]
+
+    assert ledger.get_daily_hash_root("u1", datetime(2026, 1, 2)) == merkle_root(hashes[5:])
+    assert ledger.get_daily_hash_root("u1", datetime(2026, 1, 5)) is None
+
+
+def test_merkle_root_pairs_and_carries_odd_node():
+    """Pairs are hashed together and an odd last node is promoted."""
+    a, b, c = "aa", "bb", "cc"
+    ab = hashlib.sha256(b"aabb").hexdigest()
+
+    assert merkle_root([]) is None
+    assert merkle_root([a]) == a
+    assert merkle_root([a, b, c]) == hashlib.sha256((ab + c).encode()).hexdigest()
+
+
+def test_index_is_repaired_after_interrupted_write(ledger, tmp_path):
+    """A stale index and a torn last line are fixed before the next write."""
+    for e in _events_over_days("u1", 1, 5):
+        ledger.append(e)
+    ledger.flush()
+
+    segment = tmp_path / "user_u1" / "2026-01-01.jsonl"
+    index_file = segment.with_suffix(".idx")
+    index_file.write_bytes(index_file.read_bytes()[:16])
+    with open(segment, "ab") as f:
+        f.write(b'{"torn": ')
+    ledger.close()
+
+    reopened = TrustLedger(ledger_dir=tmp_path)
+    assert len(reopened.get_user_ledger("u1")) == 5
+
+    reopened.append(GuardianEvent(user_id="u1", timestamp=datetime(2026, 1, 1, 13)))
+    reopened.flush()
+
+    assert index_file.stat().st_size == 6 * 8
+    assert reopened.verify("u1")["valid"]
+    assert reopened.verify("u1")["entries"] == 6
+
+
+def test_write_from_another_process_is_indexed_not_truncated(ledger, tmp_path):
+    """Lines written since this process's last batch are indexed from the file's real size."""
+    day = datetime(2026, 1, 1, 12)
+    for i in range(3):
+        ledger.append(GuardianEvent(user_id="u1", timestamp=day + timedelta(seconds=i)))
+    ledger.flush()
+
+    # Another writer's fsynced line whose index entry is not there yet
+    segment = tmp_path / "user_u1" / "2026-01-01.jsonl"
+    foreign = json.dumps({"hash": "foreign"}) + "\n"
+    with open(segment, "a") as f:
+        f.write(foreign)
+
+    ledger.append(GuardianEvent(user_id="u1", timestamp=day + timedelta(seconds=5)))
+    ledger.flush()
+
+    data = segment.read_bytes()
+    assert foreign.encode() in data
+    ends = [i + 1 for i, byte in enumerate(data) if byte == ord("\n")]
+    assert ledger._read_index(segment).tolist() == ends
+    assert segment.with_suffix(".idx").stat().st_size == len(ends) * 8
+    assert len(ledger.get_user_ledger("u1")) == 5
+
+
+def test_legacy_single_file_ledger_is_continued(tmp_path):
+    """Entries in the old user_<id>.jsonl layout are read as the first segment."""
+    previous_hash = None
+    with open(tmp_path / "user_u1.jsonl", "w") as f:
+        for i in range(3):
+            entry = {**GuardianEvent(user_id="u1", event_type=str(i)).to_dict(), "previous_hash": previous_hash}
+            previous_hash = hashlib.sha256(json.dumps(entry, sort_keys=True, default=str).encode()).hexdigest()
+            f.write(json.dumps({**entry, "hash": previous_hash}) + "\n")
+
+    ledger = TrustLedger(ledger_dir=tmp_path)
+    ledger.append(GuardianEvent(user_id="u1"))
+
+    result = ledger.verify("u1")
+    assert result["valid"], result["errors"]
+    assert result["entries"] == 4
+    assert ledger.get_user_ledger("u1")[0]["previous_hash"] == previous_hash
+
+
+def test_verify_resumes_from_checkpoint(ledger, tmp_path):
+    """Sealed segments covered by a checkpoint are not re-hashed."""
+    for e in _events_over_days("u1", 3, 10):
+        ledger.append(e)
+
+    full = ledger.verify("u1")
+    sealed = full["segments"][1]
+    checkpoint = {"date": sealed["date"], "entry_count": sealed["entry_count"], "last_hash": sealed["last_hash"]}
+
+    result = ledger.verify("u1", checkpoint=checkpoint)
+    assert result["valid"]
+    assert result["verified_from"] == "2026-01-02"
+    assert result["entries"] == 10
+
+    # Appending to a checkpointed segment is detected
+    with open(tmp_path / "user_u1" / "2026-01-02.jsonl", "a") as f:
+        f.write(json.dumps({"hash": "x"}) + "\n")
+    assert not ledger.verify("u1", checkpoint=checkpoint)["valid"]
+
+
+def test_verify_incremental_persists_sealed_roots(ledger):
+    """Roots of sealed segments are stored and used as the next checkpoint."""
+    user_id = str(uuid4())
+    for e in _events_over_days(user_id, 3, 4):
+        ledger.append(e)
+
+    db = Mock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    result = ledger.verify_incremental(user_id, db)
+
+    assert result["valid"]
+    stored = [c.args[0] for c in db.add.call_args_list]
+    assert [row.date.strftime("%Y-%m-%d") for row in stored] == ["2026-01-01", "2026-01-02"]
+    assert stored[1].hash_root == result["segments"][1]["hash_root"]
+    db.commit.assert_called_once()
+
+    db = Mock()
+    db.query.return_value.filter.return_value.all.return_value = stored
+    result = ledger.verify_incremental(user_id, db)
+
+    assert result["valid"]
+    assert result["verified_from"] == "2026-01-02"
+    db.add.assert_not_called()
+
+    # A full pass compares sealed segments with their stored roots
+    stored[0].hash_root = "0" * 64
+    assert not ledger.verify_incremental(user_id, db, full=True)["valid"]
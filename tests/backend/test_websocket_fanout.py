@@ -0,0 +1,148 @@
+"""
+Tests for NotificationFanout
+
+Unit tests for per-user routing, slow-consumer handling and delivery across
+workers sharing a pub/sub bridge.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+from backend.notifications.fanout import SLOW_CONSUMER_CLOSE_CODE, LocalPubSub, NotificationFanout, RedisPubSub
+
+
+class FakeWebSocket:
+    """Records sent frames; optionally blocks or fails on send."""
+
+    def __init__(self, block=False, fail=False):
+        self.sent = []
+        self.closed_with = None
+        self.block = block
+        self.fail = fail
+        self._release = asyncio.Event()
+
+    async def send_text(self, message):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.block:
+            await self._release.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_messages_are_routed_per_user():
+    """A user's message reaches only that user's connections; broadcasts reach all."""
+    async def scenario():
+        fanout = NotificationFanout("test", bridge=LocalPubSub(), send_queue_size=10)
+        a1, a2, b, anonymous = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await fanout.register(a1, "a")
+        await fanout.register(a2, "a")
+        await fanout.register(b, "b")
+        await fanout.register(anonymous)
+
+        await fanout.publish("a", "for a")
+        await fanout.broadcast("for all")
+        await _drain()
+
+        assert a1.sent == a2.sent == ["for a", "for all"]
+        assert b.sent == anonymous.sent == ["for all"]
+        assert fanout.connected_users() == {"a", "b"}
+        assert fanout.connection_count("a") == 2
+        await fanout.close()
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_is_dropped_without_delaying_others():
+    """A client that stops reading fills its queue and is closed."""
+    async def scenario():
+        fanout = NotificationFanout("test", bridge=LocalPubSub(), send_queue_size=3)
+        slow, fast = FakeWebSocket(block=True), FakeWebSocket()
+        await fanout.register(slow, "a")
+        await fanout.register(fast, "a")
+
+        for i in range(10):
+            await fanout.publish("a", str(i))
+            await _drain()
+
+        assert fast.sent == [str(i) for i in range(10)]
+        assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+        assert fanout.connection_count("a") == 1
+        assert fanout.stats["dropped_slow"] == 1
+        await fanout.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_send_unregisters_connection():
+    """A send error removes the connection."""
+    async def scenario():
+        fanout = NotificationFanout("test", bridge=LocalPubSub(), send_queue_size=10)
+        broken = FakeWebSocket(fail=True)
+        await fanout.register(broken, "a")
+
+        await fanout.publish("a", "hello")
+        await _drain()
+
+        assert fanout.connection_count() == 0
+        assert fanout.stats["send_errors"] == 1
+        await fanout.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_bridge_delivers_across_workers():
+    """A message published on one worker reaches the user connected to another."""
+    async def scenario():
+        broker = []
+        worker_1 = NotificationFanout("test", bridge=LocalPubSub(broker), send_queue_size=10)
+        worker_2 = NotificationFanout("test", bridge=LocalPubSub(broker), send_queue_size=10)
+        on_1, on_2 = FakeWebSocket(), FakeWebSocket()
+        await worker_1.register(on_1, "a")
+        await worker_2.register(on_2, "b")
+
+        await worker_1.publish("b", "from worker 1")
+        await worker_2.broadcast("everyone")
+        await _drain()
+
+        assert on_1.sent == ["everyone"]
+        assert on_2.sent == ["from worker 1", "everyone"]
+
+        await worker_1.close()
+        await worker_2.publish("a", "gone")
+        assert on_1.sent == ["everyone"]
+        await worker_2.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_redis_bridge_is_closed_before_falling_back():
+    """A bridge that fails to subscribe releases its connections and local delivery goes on."""
+    async def scenario():
+        client = Mock(aclose=AsyncMock())
+        pubsub = Mock(subscribe=AsyncMock(side_effect=ConnectionError("refused")), aclose=AsyncMock())
+        client.pubsub.return_value = pubsub
+
+        with patch("backend.notifications.fanout.aioredis") as aioredis:
+            aioredis.from_url.return_value = client
+            fanout = NotificationFanout("test", bridge=RedisPubSub("redis://localhost", "test"), send_queue_size=10)
+            websocket = FakeWebSocket()
+            await fanout.register(websocket, "a")
+
+        pubsub.aclose.assert_awaited_once()
+        client.aclose.assert_awaited_once()
+        assert isinstance(fanout.bridge, LocalPubSub)
+
+        await fanout.publish("a", "hello")
+        await _drain()
+        assert websocket.sent == ["hello"]
+        await fanout.close()
+
+    asyncio.run(scenario())
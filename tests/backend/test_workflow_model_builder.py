@@ -0,0 +1,65 @@
+"""
+Tests for WorkflowModelBuilder
+
+Unit tests for repeated pattern mining.
+"""
+
+import random
+
+import numpy as np
+
+from backend.ml.sequence_mining import find_repeated_windows, iter_window_ids
+from backend.ml.workflow_model_builder import WorkflowModelBuilder
+
+
+def _events(count, vocabulary, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        if rng.random() < 0.5:
+            data = {'type': rng.choice(['click', 'hover'][:vocabulary]), 'overlay': {'type': 'modal'}}
+            events.append({'type': 'interaction', 'data': data, 'timestamp': i})
+        else:
+            data = {'eventType': 'file_modified', 'appId': rng.choice(['vscode', 'git', 'npm'][:vocabulary])}
+            events.append({'type': 'telemetry', 'data': data, 'timestamp': i})
+    return events
+
+
+def _brute_force(builder, all_events):
+    """The original quadratic scan."""
+    sequences = []
+    for pattern_length in [3, 4, 5]:
+        for i in range(len(all_events) - pattern_length + 1):
+            pattern = all_events[i:i + pattern_length]
+            pattern_key = builder._sequence_to_key(pattern)
+            for j in range(i + pattern_length, len(all_events) - pattern_length + 1):
+                if builder._sequence_to_key(all_events[j:j + pattern_length]) == pattern_key:
+                    sequences.append(pattern)
+                    break
+    return sequences
+
+
+def test_pattern_sequences_match_brute_force():
+    """The linear miner yields the same windows in the same order."""
+    builder = WorkflowModelBuilder()
+    for count, vocabulary, seed in [(0, 2, 0), (4, 1, 0), (60, 2, 1), (200, 3, 2)]:
+        events = _events(count, vocabulary, seed)
+        assert builder._extract_pattern_based_sequences(events) == _brute_force(builder, events)
+
+
+def test_overlapping_repeat_is_not_counted():
+    """A repeat that overlaps the window does not count."""
+    found = find_repeated_windows(np.array([7, 7, 7, 7]), [3])
+
+    assert found[3].tolist() == []
+
+
+def test_window_ids_identify_equal_windows():
+    """Windows get the same ID exactly when their tokens are equal."""
+    tokens = np.array([1, 2, 1, 2, 1, 3])
+    ids = dict(iter_window_ids(tokens, 3))
+
+    windows = [tuple(tokens[i:i + 3]) for i in range(len(tokens) - 2)]
+    for a in range(len(windows)):
+        for b in range(len(windows)):
+            assert (ids[3][a] == ids[3][b]) == (windows[a] == windows[b])
@@ -0,0 +1,109 @@
+"""
+Tests for WorkflowRecommender
+
+Unit tests for interaction matrix construction, training and retrieval.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from scipy import sparse
+
+from backend.ml.vector_index import TopKIndex
+from backend.ml.workflow_recommender import WorkflowRecommender, interaction_matrix_from_rows
+
+
+@pytest.fixture
+def rows():
+    """Aggregated (user, workflow, executions, completed) rows."""
+    return [
+        (f"user-{u}", f"wf-{u}-{w}", (u + w) % 4, (u + w) % 4)
+        for u in range(6)
+        for w in range(2)
+    ] + [("user-0", "wf-failing", 10, 2), ("user-1", "wf-busy", 100, 100)]
+
+
+def test_interaction_matrix_scores(rows):
+    """Scores combine creation, execution count and success rate."""
+    matrix, user_ids, workflow_ids = interaction_matrix_from_rows(rows)
+
+    assert sparse.issparse(matrix)
+    assert matrix.shape == (6, 14)
+    assert matrix.nnz == 14
+
+    def score(user_id, workflow_id):
+        return matrix[user_ids.index(user_id), workflow_ids.index(workflow_id)]
+
+    assert score("user-0", "wf-0-0") == pytest.approx(1.0)
+    assert score("user-0", "wf-0-1") == pytest.approx(1.6)
+    assert score("user-0", "wf-failing") == pytest.approx(2.0)
+    assert score("user-1", "wf-busy") == pytest.approx(5.0)
+    assert score("user-1", "wf-0-0") == 0
+
+
+def test_interaction_matrix_requires_data():
+    """Too few users or workflows yields no matrix."""
+    assert interaction_matrix_from_rows([("user-0", "wf-0", 1, 1)]) == (None, [], [])
+
+
+def test_train_uses_single_query(rows):
+    """Training builds the matrix from one aggregated query."""
+    db = Mock()
+    query = db.query.return_value
+    query.outerjoin.return_value = query
+    query.group_by.return_value = query
+    query.order_by.return_value = query
+    query.all.return_value = rows
+
+    recommender = WorkflowRecommender(n_components=3)
+    metrics = recommender.train(db)
+
+    assert db.query.call_count == 1
+    assert recommender.is_trained
+    assert metrics["n_users"] == 6
+    assert metrics["n_workflows"] == 14
+    assert metrics["sparsity"] == pytest.approx(1 - 14 / (6 * 14))
+    assert metrics["reconstruction_error"] >= 0
+
+
+def test_top_k_index_matches_full_sort():
+    """Exact top-k search agrees with sorting every score."""
+    rng = np.random.default_rng(0)
+    vectors = rng.random((500, 8))
+    query = rng.random(8)
+    exclude = np.array([3, 7, 11])
+
+    top, scores = TopKIndex(vectors).search(query, 10, exclude=exclude)
+
+    full = vectors @ query
+    full[exclude] = -np.inf
+    assert list(top) == list(np.argsort(-full)[:10])
+    assert scores == pytest.approx(full[top], rel=1e-5)
+
+
+def test_recommend_excludes_owned_and_hydrates_in_bulk(rows):
+    """Recommendations skip the user's own workflows and load details with one query."""
+    db = Mock()
+    query = db.query.return_value
+    query.outerjoin.return_value = query
+    query.group_by.return_value = query
+    query.order_by.return_value = query
+    query.all.return_value = rows
+
+    recommender = WorkflowRecommender(n_components=3)
+    recommender.train(db)
+
+    query.filter.return_value = query
+    query.all.side_effect = lambda: [
+        Mock(id=wid, description="") for wid in recommender.workflow_ids
+    ]
+    db.query.reset_mock()
+
+    result = recommender.recommend("user-0", db, n_recommendations=3)
+
+    ids = [r["workflow_id"] for r in result["recommendations"]]
+    assert len(ids) == 3
+    assert not {"wf-0-0", "wf-0-1", "wf-failing"} & set(ids)
+    scores = [r["score"] for r in result["recommendations"]]
+    assert scores == sorted(scores, reverse=True)
+    assert db.query.call_count == 1
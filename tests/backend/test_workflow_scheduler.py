@@ -0,0 +1,135 @@
+"""
+Tests for WorkflowScheduler
+
+Unit tests for per-tick ML trigger evaluation.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from datetime import datetime
+from uuid import uuid4
+
+from backend.workflow_scheduler import WorkflowScheduler, TriggerEvaluationContext, run_due_workflows
+
+
+@pytest.fixture
+def db_session():
+    """Create a mock database session."""
+    session = Mock()
+    session.query = Mock()
+    return session
+
+
+def _workflow(user_id, schedule_config=None):
+    return Mock(id=uuid4(), user_id=user_id, is_active=True, schedule_config=schedule_config)
+
+
+def _event(user_id, minute):
+    return Mock(
+        user_id=user_id,
+        timestamp=datetime(2024, 1, 1, 12, minute),
+        event_type="file_modified",
+        file_path="/src/app.py",
+        tool="vscode",
+    )
+
+
+def test_evaluate_workflows_predicts_once_per_user(db_session):
+    """Workflows share one query and one batched prediction across users."""
+    user_a, user_b = uuid4(), uuid4()
+    workflows = [_workflow(user_a), _workflow(user_a), _workflow(user_a), _workflow(user_b)]
+
+    mock_query = db_session.query.return_value
+    mock_query.filter.return_value = mock_query
+    mock_query.order_by.return_value = mock_query
+    mock_query.all.return_value = [_event(user_a, 5), _event(user_a, 4), _event(user_b, 3)]
+
+    predictor = Mock(is_trained=True)
+    predictor.predict_batch.side_effect = lambda batch: [
+        {"will_trigger": len(events) > 1} for events in batch
+    ]
+
+    with patch("backend.workflow_scheduler.ModelManager") as manager_cls:
+        manager_cls.return_value.get_model.return_value = predictor
+        results = WorkflowScheduler.evaluate_workflows(db_session, workflows)
+
+    assert manager_cls.call_count == 1
+    assert mock_query.all.call_count == 1
+    assert predictor.predict_batch.call_count == 1
+    assert len(predictor.predict_batch.call_args[0][0]) == 2
+    assert [results[w.id] for w in workflows] == [True, True, True, False]
+
+
+def test_context_limits_events_per_user():
+    """Each user only receives their most recent events, limited in SQL."""
+    from sqlalchemy import create_engine, event as sa_event
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Event, User
+
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Event.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    user_a, user_b = uuid4(), uuid4()
+    with Session() as setup:
+        setup.add_all(
+            [Event(user_id=user_a, event_type="file_modified", timestamp=datetime(2024, 1, 1, 12, m)) for m in range(30)]
+            + [Event(user_id=user_b, event_type="file_modified", timestamp=datetime(2024, 1, 1, 12, m)) for m in range(3)]
+        )
+        setup.commit()
+
+    statements = []
+    sa_event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session = Session()
+    context = TriggerEvaluationContext(session, now=datetime(2024, 1, 1, 12, 30))
+    context._load_recent_events({user_a, user_b}, hours=1, limit=10)
+    events = context.recent_events(user_a, hours=1, limit=10)
+
+    assert [e.timestamp.minute for e in events] == list(range(29, 19, -1))
+    assert len(context.recent_events(user_b, hours=1, limit=10)) == 3
+    assert context.recent_events(user_a, hours=1, limit=10) is events
+    assert len(statements) == 1
+    assert "row_number() OVER (PARTITION BY" in statements[0]
+    # Only the ranked rows are hydrated
+    assert len(session.identity_map) == 13
+    session.close()
+
+
+def test_should_run_without_trained_model(db_session):
+    """Schedule-less workflows do not run when no model is available."""
+    workflow = _workflow(uuid4())
+
+    with patch("backend.workflow_scheduler.ModelManager") as manager_cls:
+        manager_cls.return_value.get_model.return_value = None
+        assert WorkflowScheduler.should_run(workflow, db_session) is False
+
+    db_session.query.assert_not_called()
+
+
+def test_run_due_workflows_evaluates_once_and_executes_due(db_session):
+    """A scheduler tick evaluates all active workflows together and runs the due ones."""
+    workflows = [_workflow(uuid4()) for _ in range(3)]
+    db_session.query.return_value.filter.return_value.all.return_value = workflows
+    due = {workflows[0].id: True, workflows[1].id: False, workflows[2].id: True}
+
+    with patch.object(WorkflowScheduler, "evaluate_workflows", return_value=due) as evaluate, \
+            patch.object(WorkflowScheduler, "execute_workflow", side_effect=[Mock(), RuntimeError("boom")]) as execute:
+        result = run_due_workflows(db_session)
+
+    evaluate.assert_called_once_with(db_session, workflows, use_ml=True)
+    assert [c.args[1] for c in execute.call_args_list] == [workflows[0], workflows[2]]
+    assert result == {"evaluated": 3, "executed": 1, "failed": 1}
+    db_session.rollback.assert_called_once()
+
+
+def test_execute_workflow_persists_last_run(db_session):
+    """last_run is written through a new dict so the JSON column is marked changed."""
+    config = {"type": "interval", "interval": 300}
+    workflow = _workflow(uuid4(), schedule_config=config)
+    workflow.steps = []
+
+    WorkflowScheduler.execute_workflow(db_session, workflow)
+
+    assert workflow.schedule_config is not config
+    assert workflow.schedule_config["interval"] == 300
+    assert "last_run" in workflow.schedule_config
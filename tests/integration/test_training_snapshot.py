@@ -0,0 +1,58 @@
+"""
+Integration Tests for Snapshot Training
+
+Trains a model the way a parallel training worker does, on PostgreSQL with
+an exported data snapshot, and checks that its pending record is completed.
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from backend.ml.model_manager import MLModel, TRAINING_STATUS_COMPLETED
+from backend.ml.pattern_classifier import PatternClassifier
+from backend.ml.training_orchestrator import TrainingOrchestrator, train_model_task
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL", "").startswith("postgresql"),
+    reason="Data snapshots require PostgreSQL",
+)
+
+
+@pytest.fixture
+def db():
+    """Session on the configured PostgreSQL database."""
+    from backend.database import SessionLocal, engine
+
+    MLModel.__table__.create(engine, checkfirst=True)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_worker_completes_record_updated_after_snapshot_export(db):
+    """The record written after the export is completed without a serialization failure."""
+    orchestrator = TrainingOrchestrator(db, max_workers=1)
+    record = orchestrator.model_manager.create_training_record("pattern_classifier", {"run_id": "snapshot-test"})
+
+    try:
+        with orchestrator._data_snapshot() as snapshot_id, \
+                patch.object(PatternClassifier, "train", return_value={"accuracy": 1.0}), \
+                patch.object(PatternClassifier, "save", return_value=False):
+            assert snapshot_id
+            result = train_model_task({
+                "model_type": "pattern_classifier",
+                "model_record_id": str(record.id),
+                "user_id": None,
+                "snapshot_id": snapshot_id,
+            })
+
+        assert result.get("success"), result
+        db.expire_all()
+        completed = db.query(MLModel).filter(MLModel.id == record.id).one()
+        assert completed.training_config["status"] == TRAINING_STATUS_COMPLETED
+        assert completed.is_active
+    finally:
+        db.query(MLModel).filter(MLModel.id == record.id).delete()
+        db.commit()